@@ -3,6 +3,7 @@ Enhanced Database Performance Monitoring - I005 Infrastructure Issue
 Comprehensive database performance monitoring with real-time metrics and alerting
 """
 
+import os
 import time
 import asyncio
 import threading
@@ -19,10 +20,17 @@ from sqlalchemy.pool import Pool
 
 from api.orm_bootstrap import SessionLocal, engine
 from api.models import PerformanceMetric, QueryPerformanceLog
+from api.query_telemetry import QueryTelemetry
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("db_monitor")
 
+# Query telemetry sizing: ring buffer slots, fraction of statements recorded,
+# and distinct statement fingerprints tracked before the rest share one entry
+DB_TELEMETRY_CAPACITY = int(os.getenv("DB_TELEMETRY_CAPACITY", "65536"))
+DB_TELEMETRY_SAMPLE_RATE = float(os.getenv("DB_TELEMETRY_SAMPLE_RATE", "1.0"))
+DB_TELEMETRY_MAX_FINGERPRINTS = int(os.getenv("DB_TELEMETRY_MAX_FINGERPRINTS", "1000"))
+
 
 @dataclass
 class PerformanceThresholds:
@@ -47,19 +55,6 @@ class ConnectionPoolMetrics:
     timestamp: datetime
 
 
-@dataclass
-class QueryMetrics:
-    """Individual query performance metrics"""
-    query_id: str
-    query_type: str
-    table_name: Optional[str]
-    execution_time_ms: float
-    row_count: Optional[int]
-    timestamp: datetime
-    success: bool
-    error_message: Optional[str]
-
-
 class DatabasePerformanceMonitor:
     """Enhanced database performance monitoring with real-time metrics"""
     
@@ -67,7 +62,11 @@ class DatabasePerformanceMonitor:
         self.thresholds = thresholds or PerformanceThresholds()
         self.metrics_buffer = []
         self.connection_pool_history = []
-        self.query_metrics_history = []
+        self.telemetry = QueryTelemetry(
+            capacity=DB_TELEMETRY_CAPACITY,
+            sample_rate=DB_TELEMETRY_SAMPLE_RATE,
+            max_fingerprints=DB_TELEMETRY_MAX_FINGERPRINTS
+        )
         self.performance_stats = {
             "total_queries": 0,
             "slow_queries": 0,
@@ -93,15 +92,13 @@ class DatabasePerformanceMonitor:
         @event.listens_for(Engine, "before_cursor_execute")
         def receive_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
             """Record query start time"""
-            context._query_start_time = time.time()
-            context._query_statement = statement
+            context._query_start_time = time.perf_counter()
         
         @event.listens_for(Engine, "after_cursor_execute")
         def receive_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
             """Record query completion and metrics"""
             if hasattr(context, '_query_start_time'):
-                execution_time = time.time() - context._query_start_time
-                execution_time_ms = execution_time * 1000
+                execution_time_ms = (time.perf_counter() - context._query_start_time) * 1000
                 
                 # Update performance stats
                 self.performance_stats["total_queries"] += 1
@@ -116,19 +113,7 @@ class DatabasePerformanceMonitor:
                     (current_avg * (total_queries - 1) + execution_time_ms) / total_queries
                 )
                 
-                # Create query metrics
-                query_metrics = QueryMetrics(
-                    query_id=f"q_{int(time.time()*1000)}_{id(context)}",
-                    query_type=self._determine_query_type(statement),
-                    table_name=self._extract_table_name(statement),
-                    execution_time_ms=execution_time_ms,
-                    row_count=getattr(cursor, 'rowcount', None) if hasattr(cursor, 'rowcount') else None,
-                    timestamp=datetime.utcnow(),
-                    success=True,
-                    error_message=None
-                )
-                
-                self._record_query_metrics(query_metrics)
+                self.telemetry.record(statement, execution_time_ms, getattr(cursor, 'rowcount', None))
                 
                 # Check for alerts
                 if execution_time_ms > self.thresholds.very_slow_query_ms:
@@ -143,77 +128,11 @@ class DatabasePerformanceMonitor:
             """Record query errors"""
             self.performance_stats["failed_queries"] += 1
             
-            query_metrics = QueryMetrics(
-                query_id=f"e_{int(time.time()*1000)}_{id(exception_context)}",
-                query_type="ERROR",
-                table_name=None,
-                execution_time_ms=0.0,
-                row_count=None,
-                timestamp=datetime.utcnow(),
-                success=False,
-                error_message=str(exception_context.original_exception)
-            )
-            
-            self._record_query_metrics(query_metrics)
+            self.telemetry.record(exception_context.statement or "", 0.0, success=False)
             
             # Check error rate
             self._check_error_rate()
     
-    def _determine_query_type(self, statement: str) -> str:
-        """Determine query type from SQL statement"""
-        statement_upper = statement.strip().upper()
-        
-        if statement_upper.startswith('SELECT'):
-            return 'SELECT'
-        elif statement_upper.startswith('INSERT'):
-            return 'INSERT'
-        elif statement_upper.startswith('UPDATE'):
-            return 'UPDATE'
-        elif statement_upper.startswith('DELETE'):
-            return 'DELETE'
-        elif statement_upper.startswith('CREATE'):
-            return 'CREATE'
-        elif statement_upper.startswith('DROP'):
-            return 'DROP'
-        elif statement_upper.startswith('ALTER'):
-            return 'ALTER'
-        else:
-            return 'OTHER'
-    
-    def _extract_table_name(self, statement: str) -> Optional[str]:
-        """Extract table name from SQL statement"""
-        try:
-            statement_upper = statement.strip().upper()
-            
-            # Simple extraction for common patterns
-            if 'FROM ' in statement_upper:
-                parts = statement_upper.split('FROM ')[1].split()
-                if parts:
-                    return parts[0].strip('`"[]').lower()
-            
-            if 'INTO ' in statement_upper:
-                parts = statement_upper.split('INTO ')[1].split()
-                if parts:
-                    return parts[0].strip('`"[]').lower()
-            
-            if 'UPDATE ' in statement_upper:
-                parts = statement_upper.split('UPDATE ')[1].split()
-                if parts:
-                    return parts[0].strip('`"[]').lower()
-                    
-        except Exception:
-            pass
-        
-        return None
-    
-    def _record_query_metrics(self, metrics: QueryMetrics):
-        """Record query metrics in buffer"""
-        self.query_metrics_history.append(metrics)
-        
-        # Keep only recent metrics (last 1000 queries)
-        if len(self.query_metrics_history) > 1000:
-            self.query_metrics_history = self.query_metrics_history[-1000:]
-    
     def _trigger_alert(self, alert_type: str, context: Dict[str, Any]):
         """Trigger performance alert"""
         alert_data = {
@@ -304,54 +223,21 @@ class DatabasePerformanceMonitor:
         """Get performance summary for the last N minutes"""
         since = datetime.utcnow() - timedelta(minutes=minutes)
         
-        # Filter recent queries
-        recent_queries = [
-            q for q in self.query_metrics_history 
-            if q.timestamp >= since
-        ]
+        query_stats = self.telemetry.summary(
+            time.time() - minutes * 60,
+            self.thresholds.slow_query_ms,
+            self.thresholds.very_slow_query_ms
+        )
         
-        if not recent_queries:
+        if not query_stats["total_queries"]:
             return {
                 "period_minutes": minutes,
                 "no_data": True
             }
         
-        # Calculate metrics
-        total_queries = len(recent_queries)
-        successful_queries = len([q for q in recent_queries if q.success])
-        failed_queries = total_queries - successful_queries
-        
-        execution_times = [q.execution_time_ms for q in recent_queries if q.success]
-        
-        if execution_times:
-            import statistics
-            avg_time = statistics.mean(execution_times)
-            median_time = statistics.median(execution_times)
-            max_time = max(execution_times)
-            min_time = min(execution_times)
-        else:
-            avg_time = median_time = max_time = min_time = 0.0
-        
-        # Slow query analysis
-        slow_queries = [q for q in recent_queries if q.execution_time_ms > self.thresholds.slow_query_ms]
-        very_slow_queries = [q for q in recent_queries if q.execution_time_ms > self.thresholds.very_slow_query_ms]
-        
-        # Query type breakdown
-        query_types = {}
-        for query in recent_queries:
-            query_type = query.query_type
-            if query_type not in query_types:
-                query_types[query_type] = {"count": 0, "avg_time": 0.0, "errors": 0}
-            
-            query_types[query_type]["count"] += 1
-            if query.success:
-                current_avg = query_types[query_type]["avg_time"]
-                current_count = query_types[query_type]["count"]
-                query_types[query_type]["avg_time"] = (
-                    (current_avg * (current_count - 1) + query.execution_time_ms) / current_count
-                )
-            else:
-                query_types[query_type]["errors"] += 1
+        total_queries = query_stats["total_queries"]
+        successful_queries = query_stats["successful_queries"]
+        slow_queries = query_stats["slow_queries"]
         
         # Recent connection pool metrics
         recent_pool_metrics = [
@@ -371,18 +257,21 @@ class DatabasePerformanceMonitor:
             "query_performance": {
                 "total_queries": total_queries,
                 "successful_queries": successful_queries,
-                "failed_queries": failed_queries,
-                "success_rate": (successful_queries / total_queries * 100) if total_queries > 0 else 0,
+                "failed_queries": total_queries - successful_queries,
+                "success_rate": successful_queries / total_queries * 100,
                 "queries_per_minute": total_queries / minutes if minutes > 0 else 0,
-                "avg_execution_time_ms": avg_time,
-                "median_execution_time_ms": median_time,
-                "min_execution_time_ms": min_time,
-                "max_execution_time_ms": max_time,
-                "slow_queries": len(slow_queries),
-                "very_slow_queries": len(very_slow_queries),
-                "slow_query_percentage": (len(slow_queries) / total_queries * 100) if total_queries > 0 else 0
+                "avg_execution_time_ms": query_stats["avg_execution_time_ms"],
+                "median_execution_time_ms": query_stats["median_execution_time_ms"],
+                "p95_execution_time_ms": query_stats["p95_execution_time_ms"],
+                "p99_execution_time_ms": query_stats["p99_execution_time_ms"],
+                "min_execution_time_ms": query_stats["min_execution_time_ms"],
+                "max_execution_time_ms": query_stats["max_execution_time_ms"],
+                "slow_queries": slow_queries,
+                "very_slow_queries": query_stats["very_slow_queries"],
+                "slow_query_percentage": slow_queries / total_queries * 100,
+                "sample_rate": query_stats["sample_rate"]
             },
-            "query_type_breakdown": query_types,
+            "query_type_breakdown": query_stats["query_types"],
             "connection_pool": {
                 "avg_utilization_percentage": avg_pool_utilization,
                 "max_utilization_percentage": max_pool_utilization,
@@ -397,27 +286,11 @@ class DatabasePerformanceMonitor:
     
     def get_top_slow_queries(self, limit: int = 10, minutes: int = 60) -> List[Dict[str, Any]]:
         """Get top slow queries from recent history"""
-        since = datetime.utcnow() - timedelta(minutes=minutes)
-        
-        recent_queries = [
-            q for q in self.query_metrics_history 
-            if q.timestamp >= since and q.success
-        ]
-        
-        # Sort by execution time and get top N
-        slow_queries = sorted(recent_queries, key=lambda q: q.execution_time_ms, reverse=True)[:limit]
-        
-        return [
-            {
-                "query_id": q.query_id,
-                "query_type": q.query_type,
-                "table_name": q.table_name,
-                "execution_time_ms": q.execution_time_ms,
-                "timestamp": q.timestamp.isoformat(),
-                "row_count": q.row_count
-            }
-            for q in slow_queries
-        ]
+        return self.telemetry.top_slow_queries(time.time() - minutes * 60, limit)
+    
+    def get_query_fingerprints(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get latency percentiles per statement fingerprint since the last reset"""
+        return self.telemetry.fingerprint_stats(limit)
     
     def register_alert_handler(self, handler: Callable[[str, Dict[str, Any]], None]):
         """Register an alert handler function"""
@@ -484,6 +357,7 @@ class DatabasePerformanceMonitor:
             "queries_per_second": 0.0,
             "last_reset": datetime.utcnow()
         }
+        self.telemetry.reset()
         
         logger.info("Performance statistics reset")
     
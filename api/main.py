@@ -4,7 +4,6 @@ from pathlib import Path
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
@@ -36,7 +35,7 @@ try:
         cleanup_cache_service, 
         CacheConfiguration
     )
-    from api.middlewares.enhanced_cache import EnhancedApiCacheMiddleware
+    from api.middlewares.enhanced_cache import EnhancedApiCacheStage
     
     # Audit logging system for T026 Security Hardening
     from api.audit.security_audit_logger import initialize_audit_logging
@@ -44,11 +43,13 @@ try:
     # T026 Security Hardening - Secure logging utilities
     from api.utils.log_sanitization import safe_log_format, sanitize_for_log
     
-    # T026 Security Hardening - Comprehensive security middleware
-    from api.security.middleware import create_security_middleware_stack
+    # T026 Security Hardening - Comprehensive security pipeline stages
+    from api.security.middleware import create_security_stages
+    from api.security.audit_sink import audit_sink
     
-    # T027 API Key Management - API key authentication middleware
-    from api.middlewares.api_key_auth import APIKeyAuthenticationMiddleware
+    # T027 API Key Management - API key authentication stage
+    from api.middlewares.api_key_auth import APIKeyAuthenticationStage
+    from api.services.api_key_cache import api_key_cache
     
     # Enhanced database optimization for T025 Phase 3 - TEMPORARILY DISABLED FOR DEBUGGING
     # from api.services.database_optimization_integration import (
@@ -67,6 +68,7 @@ try:
         get_job_notifier,
         setup_job_event_listeners
     )
+    from api.services.job_events import job_event_broker
     
     # Chunked upload service for T025 Phase 5
     from api.services.chunked_upload_service import (
@@ -97,9 +99,11 @@ from api.orm_bootstrap import SessionLocal, validate_or_initialize_database, get
 from api.models import Job
 from api.models import JobStatusEnum
 from api.services.users import ensure_default_admin
+from api.services.transcript_search import transcript_search_service
 from api.utils.model_validation import validate_models_dir
 from api.router_setup import register_routes
-from api.middlewares.access_log import AccessLogMiddleware
+from api.middlewares.access_log import AccessLogStage
+from api.middlewares.pipeline import CORSStage, RequestPipeline
 from api.utils.db_lock import db_lock
 
 
@@ -138,6 +142,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         system_log.warning(f"Failed to initialize audit logging: {e}")
     
+    # Start the batched audit log writer
+    audit_sink.start()
+    
     # Database initialization
     validate_or_initialize_database()
     ensure_default_admin()
@@ -151,6 +158,8 @@ async def lifespan(app: FastAPI):
             redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
             default_ttl=int(os.getenv("CACHE_DEFAULT_TTL", "300")),
             max_memory_mb=int(os.getenv("CACHE_MAX_MEMORY_MB", "100")),
+            local_cache_max_bytes=int(os.getenv("CACHE_LOCAL_MAX_MB", "16")) * 1024 * 1024,
+            local_cache_ttl=int(os.getenv("CACHE_LOCAL_TTL", "10")),
             enable_smart_invalidation=True,
             cache_warming=True,
             track_hit_ratio=True,
@@ -201,6 +210,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         system_log.warning(f"Failed to initialize WebSocket service: {e}")
 
+    # Relay job state changes from workers to /jobs/{job_id}/events streams
+    try:
+        await job_event_broker.start()
+    except Exception as e:
+        system_log.warning(f"Failed to start job event broker: {e}")
+
+    # Drop cached API keys revoked or changed on other replicas
+    try:
+        await api_key_cache.start()
+    except Exception as e:
+        system_log.warning(f"Failed to subscribe to API key invalidations: {e}")
+
     # Initialize chunked upload service for T025 Phase 5
     try:
         # Initialize chunked upload service with WebSocket integration
@@ -227,6 +248,9 @@ async def lifespan(app: FastAPI):
 
     # Rehydrate incomplete jobs at startup
     rehydrate_incomplete_jobs()
+
+    # Index transcripts that predate the search index without delaying startup
+    transcript_search_service.start_index_backfill()
     
     system_log.info("App initialization complete.")
 
@@ -248,6 +272,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         system_log.error(f"Error shutting down database optimization service: {e}")
     
+    # Stop relaying job events
+    try:
+        await job_event_broker.stop()
+    except Exception as e:
+        system_log.error(f"Error shutting down job event broker: {e}")
+
+    # Stop listening for API key invalidations
+    try:
+        await api_key_cache.stop()
+    except Exception as e:
+        system_log.error(f"Error stopping API key cache: {e}")
+    
     # Cleanup enhanced WebSocket service
     try:
         await cleanup_websocket_service()
@@ -278,6 +314,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             system_log.error(f"Error shutting down backup service: {e}")
     
+    # Write audit rows still queued
+    try:
+        audit_sink.stop()
+        system_log.info("Audit sink flushed")
+    except Exception as e:
+        system_log.error(f"Error flushing audit sink: {e}")
+    
     # Stop background threads
     stop_cleanup_thread()
 
@@ -288,14 +331,6 @@ system_log.info("FastAPI app initialization starting.")
 # ─── App Setup ───
 app = FastAPI(lifespan=lifespan)
 
-# ─── Security Hardening Middleware Stack (T027) ───
-# Apply comprehensive security middleware stack
-security_middleware_stack = create_security_middleware_stack()
-app = security_middleware_stack(app)
-
-# ─── API Key Authentication Middleware (T027) ───
-app.add_middleware(APIKeyAuthenticationMiddleware)
-
 # ─── Middleware ───
 # Enhanced API Response Caching with Redis (T025 Phase 2)
 enhanced_cache_config = CacheConfiguration(
@@ -312,19 +347,26 @@ enhanced_cache_config = CacheConfiguration(
     track_hit_ratio=True,
     log_cache_operations=settings.log_level == "DEBUG"
 )
-app.add_middleware(EnhancedApiCacheMiddleware, config=enhanced_cache_config)
 
-# Enhanced Security Headers with environment-specific configuration
+# Every cross-cutting concern runs as an ordered stage of one ASGI middleware,
+# outermost first: access log, CORS, response cache, API key authentication
+# (T027), then the security hardening stages (T026).
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins.split(","),
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    RequestPipeline,
+    stages=[
+        AccessLogStage(),
+        CORSStage(
+            allow_origins=settings.cors_origins.split(","),
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        ),
+        EnhancedApiCacheStage(config=enhanced_cache_config),
+        APIKeyAuthenticationStage(),
+        *create_security_stages(enable_audit_logging=True),
+    ],
 )
 
-app.add_middleware(AccessLogMiddleware)
-
 
 # ─── Static File Routes ───
 @app.get("/health")
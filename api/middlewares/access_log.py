@@ -1,13 +1,12 @@
 """
-Access logging middleware for the Whisper Transcriber API.
+Access logging stage of the Whisper Transcriber request pipeline.
 """
 
-import time
-from typing import Callable, Optional
+from typing import Optional
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 
+from api.middlewares.pipeline import RequestContext, Stage
 from api.routes.metrics import REQUESTS_IN_PROGRESS, record_http_request
 from api.utils.logger import (
     bind_request_id,
@@ -21,73 +20,68 @@ from api.utils.logger import (
 # Create a dedicated access logger
 access_logger = get_system_logger("access")
 
-class AccessLogMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging HTTP access requests."""
+class AccessLogStage(Stage):
+    """Pipeline stage logging HTTP access requests."""
     
-    def __init__(self, app, log_body: bool = False):
-        super().__init__(app)
-        self.log_body = log_body
+    name = "access_log"
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Log request and response details."""
-        start_time = time.time()
-        endpoint = request.url.path
-
-        # Get client information
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent", "")
-
+    async def on_request(self, ctx: RequestContext) -> None:
+        """Bind a request identifier and count the request as in progress."""
+        request = ctx.request
+        
         # Ensure each request has a request identifier for log correlation
         request_id = getattr(request.state, "request_id", None) or generate_request_id()
         request.state.request_id = request_id
-        token = bind_request_id(request_id)
-        REQUESTS_IN_PROGRESS.labels(endpoint=endpoint).inc()
-
-        response: Optional[Response] = None
-        status_code = 500
-
-        # Process request
+        ctx.data["request_id_token"] = bind_request_id(request_id)
+        REQUESTS_IN_PROGRESS.labels(endpoint=ctx.path).inc()
+        ctx.data["in_progress"] = True
+        return None
+    
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        headers["X-Process-Time"] = str(ctx.elapsed)
+    
+    async def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        """Log request and response details."""
+        process_time = ctx.elapsed
+        request = ctx.request
+        endpoint = ctx.path
+        status_code = ctx.status_code if ctx.status_code is not None and exc is None else 500
+        if ctx.data.pop("in_progress", False):
+            REQUESTS_IN_PROGRESS.labels(endpoint=endpoint).dec()
+        
+        # Log access information
+        latency_ms = round(process_time * 1000, 2)
+        latency_token = bind_latency(latency_ms)
+        
+        headers = ctx.response_headers
+        log_extra = {
+            "client_ip": self._get_client_ip(request),
+            "method": request.method,
+            "url": str(request.url),
+            "path": endpoint,
+            "query_params": dict(request.query_params),
+            "status_code": status_code,
+            "response_time_ms": latency_ms,
+            "user_agent": request.headers.get("user-agent", ""),
+            "content_length": headers.get("content-length", "0") if headers is not None else "0",
+            "authenticated": "authorization" in request.headers,
+        }
+        
+        message = "HTTP request completed"
         try:
-            response = await call_next(request)
-            status_code = response.status_code
-            return response
+            if status_code >= 400:
+                access_logger.warning(message, extra=log_extra)
+            else:
+                access_logger.info(message, extra=log_extra)
         finally:
-            process_time = time.time() - start_time
-            REQUESTS_IN_PROGRESS.labels(endpoint=endpoint).dec()
-
-            # Log access information
-            latency_ms = round(process_time * 1000, 2)
-            latency_token = bind_latency(latency_ms)
-
-            log_extra = {
-                "client_ip": client_ip,
-                "method": request.method,
-                "url": str(request.url),
-                "path": endpoint,
-                "query_params": dict(request.query_params),
-                "status_code": status_code,
-                "response_time_ms": latency_ms,
-                "user_agent": user_agent,
-                "content_length": response.headers.get("content-length", "0") if response else "0",
-                "authenticated": "authorization" in request.headers,
-            }
-
-            if response:
-                response.headers["X-Process-Time"] = str(process_time)
-
-            message = "HTTP request completed"
-            try:
-                if status_code >= 400:
-                    access_logger.warning(message, extra=log_extra)
-                else:
-                    access_logger.info(message, extra=log_extra)
-            finally:
-                release_latency(latency_token)
-
-            record_http_request(request.method, endpoint, status_code, process_time)
+            release_latency(latency_token)
+        
+        record_http_request(request.method, endpoint, status_code, process_time)
+        token = ctx.data.pop("request_id_token", None)
+        if token is not None:
             release_request_id(token)
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, request) -> str:
         """Get the real client IP address."""
         # Check for forwarded headers
         forwarded_for = request.headers.get("X-Forwarded-For")
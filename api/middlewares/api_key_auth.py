@@ -1,30 +1,30 @@
 #!/usr/bin/env python3
 """
-T027 Advanced Features: API Key Authentication Middleware
-FastAPI middleware for API key authentication and rate limiting.
+T027 Advanced Features: API Key Authentication Stage
+Request pipeline stage for API key authentication and rate limiting.
 """
 
-import time
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
-from fastapi import Request, Response, HTTPException, status
+from fastapi import Request, Response, status
 from fastapi.security.utils import get_authorization_scheme_param
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
 
-from api.orm_bootstrap import get_db
+from api.middlewares.pipeline import RequestContext, Stage
 from api.services.api_key_service import api_key_service
-from api.extended_models.api_keys import APIKey, APIKeyPermission
+from api.services.api_key_cache import VerifiedAPIKey
+from api.extended_models.api_keys import APIKeyPermission
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("api_key_middleware")
 
-class APIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
-    """Middleware for API key authentication and validation."""
+class APIKeyAuthenticationStage(Stage):
+    """Pipeline stage for API key authentication and validation."""
     
-    def __init__(self, app):
-        super().__init__(app)
+    name = "api_key_auth"
+    
+    def __init__(self):
         self.exempt_paths = {
             "/health",
             "/docs",
@@ -47,72 +47,69 @@ class APIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
         self.rate_limit_storage = {}
         self.quota_storage = {}
     
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        request = ctx.request
         
         # Skip authentication for exempt paths
-        if self._is_exempt_path(request.url.path):
-            return await call_next(request)
+        if self._is_exempt_path(ctx.path):
+            return None
         
         # Extract API key from request
         api_key = self._extract_api_key(request)
         
         if not api_key:
             # No API key provided - check if endpoint requires authentication
-            if self._requires_authentication(request.url.path):
+            if self._requires_authentication(ctx.path):
                 return self._create_auth_error_response("API key required")
-            return await call_next(request)
-        
-        # Get database session
-        db = next(get_db())
+            return None
         
         try:
-            # Validate API key
+            # Validate API key; verified keys are cached, so this is normally DB-free
             client_ip = self._get_client_ip(request)
-            required_permission = self._get_required_permission(request.url.path, request.method)
+            required_permission = self._get_required_permission(ctx.path, ctx.method)
             
-            db_api_key = api_key_service.validate_api_key(
-                db, api_key, required_permission, client_ip
+            verified_key = api_key_service.validate_api_key(
+                None, api_key, required_permission, client_ip
             )
             
-            if not db_api_key:
+            if not verified_key:
                 return self._create_auth_error_response("Invalid or expired API key")
             
             # Check rate limits
-            rate_limit_result = self._check_rate_limits(db_api_key, client_ip)
+            rate_limit_result = self._check_rate_limits(verified_key, client_ip)
             if not rate_limit_result["allowed"]:
                 return self._create_rate_limit_error_response(rate_limit_result)
             
             # Check quotas
-            quota_result = self._check_quotas(db, db_api_key)
+            quota_result = self._check_quotas(verified_key)
             if not quota_result["allowed"]:
                 return self._create_quota_error_response(quota_result)
             
-            # Add API key info to request state
-            request.state.api_key = db_api_key
-            request.state.user_id = db_api_key.user_id
-            request.state.api_permissions = db_api_key.permissions_list
-            
-            # Process the request
-            response = await call_next(request)
-            
-            # Log the API key usage
-            processing_time = int((time.time() - start_time) * 1000)
-            self._log_api_key_usage(
-                db, db_api_key, request, response, client_ip, processing_time
-            )
-            
-            # Add rate limit headers to response
-            self._add_rate_limit_headers(response, rate_limit_result)
-            
-            return response
-            
         except Exception as e:
             logger.error(f"API key authentication error: {e}")
             return self._create_auth_error_response("Authentication error")
         
-        finally:
-            db.close()
+        # Add API key info to request state
+        request.state.api_key = verified_key
+        request.state.user_id = verified_key.user_id
+        request.state.api_permissions = verified_key.permissions_list
+        
+        ctx.data["api_key"] = verified_key
+        ctx.data["api_key_client_ip"] = client_ip
+        ctx.data["rate_limit_result"] = rate_limit_result
+        return None
+    
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        rate_limit_result = ctx.data.get("rate_limit_result")
+        if rate_limit_result is not None:
+            self._add_rate_limit_headers(headers, rate_limit_result)
+    
+    async def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        verified_key = ctx.data.get("api_key")
+        if verified_key is not None:
+            self._log_api_key_usage(
+                verified_key, ctx, ctx.data["api_key_client_ip"], int(ctx.elapsed * 1000)
+            )
     
     def _is_exempt_path(self, path: str) -> bool:
         """Check if path is exempt from API key authentication."""
@@ -184,7 +181,7 @@ class APIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
         # Read operations require read permission
         return APIKeyPermission.READ.value
     
-    def _check_rate_limits(self, api_key: APIKey, client_ip: str) -> Dict[str, Any]:
+    def _check_rate_limits(self, api_key: VerifiedAPIKey, client_ip: str) -> Dict[str, Any]:
         """Check rate limits for the API key."""
         current_time = datetime.utcnow()
         rate_limit = api_key.rate_limit_per_hour or 1000
@@ -243,92 +240,43 @@ class APIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
             "reset_time": window_start + timedelta(hours=1)
         }
     
-    def _check_quotas(self, db: Session, api_key: APIKey) -> Dict[str, Any]:
-        """Check daily/monthly quotas for the API key."""
-        current_time = datetime.utcnow()
-        
-        # Check daily quota
-        if api_key.daily_quota:
-            daily_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-            daily_usage = self._get_usage_count(db, api_key.id, daily_start, current_time)
-            
-            if daily_usage >= api_key.daily_quota:
-                return {
-                    "allowed": False,
-                    "quota_type": "daily",
-                    "limit": api_key.daily_quota,
-                    "used": daily_usage,
-                    "reset_time": daily_start + timedelta(days=1)
-                }
-        
-        # Check monthly quota
-        if api_key.monthly_quota:
-            monthly_start = current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            monthly_usage = self._get_usage_count(db, api_key.id, monthly_start, current_time)
-            
-            if monthly_usage >= api_key.monthly_quota:
-                # Calculate next month
-                if monthly_start.month == 12:
-                    next_month = monthly_start.replace(year=monthly_start.year + 1, month=1)
-                else:
-                    next_month = monthly_start.replace(month=monthly_start.month + 1)
-                
-                return {
-                    "allowed": False,
-                    "quota_type": "monthly",
-                    "limit": api_key.monthly_quota,
-                    "used": monthly_usage,
-                    "reset_time": next_month
-                }
-        
-        return {"allowed": True}
-    
-    def _get_usage_count(self, db: Session, api_key_id: int, start_time: datetime, end_time: datetime) -> int:
-        """Get usage count for a time period."""
-        from api.extended_models.api_keys import APIKeyUsageLog
-        
-        count = db.query(APIKeyUsageLog).filter(
-            APIKeyUsageLog.api_key_id == api_key_id,
-            APIKeyUsageLog.timestamp >= start_time,
-            APIKeyUsageLog.timestamp < end_time
-        ).count()
-        
-        return count
+    def _check_quotas(self, api_key: VerifiedAPIKey) -> Dict[str, Any]:
+        """Check daily/monthly quotas against the key's in-memory usage counters."""
+        return api_key.consume_quota()
     
     def _log_api_key_usage(
         self,
-        db: Session,
-        api_key: APIKey,
-        request: Request,
-        response: Response,
+        api_key: VerifiedAPIKey,
+        ctx: RequestContext,
         client_ip: str,
         processing_time: int
     ):
         """Log API key usage."""
+        request = ctx.request
         try:
             api_key_service.log_api_key_usage(
-                db=db,
+                db=None,
                 api_key=api_key,
                 method=request.method,
-                endpoint=str(request.url.path),
-                status_code=response.status_code,
+                endpoint=ctx.path,
+                status_code=ctx.status_code or 500,
                 client_ip=client_ip,
                 user_agent=request.headers.get("User-Agent"),
                 response_time_ms=processing_time,
                 request_size_bytes=int(request.headers.get("Content-Length", 0)),
-                response_size_bytes=len(response.body) if hasattr(response, "body") else None
+                response_size_bytes=ctx.response_bytes
             )
         except Exception as e:
             logger.error(f"Failed to log API key usage: {e}")
     
-    def _add_rate_limit_headers(self, response: Response, rate_limit_result: Dict[str, Any]):
+    def _add_rate_limit_headers(self, headers: MutableHeaders, rate_limit_result: Dict[str, Any]):
         """Add rate limit headers to response."""
         if "limit" in rate_limit_result:
-            response.headers["X-RateLimit-Limit"] = str(rate_limit_result["limit"])
+            headers["X-RateLimit-Limit"] = str(rate_limit_result["limit"])
         if "remaining" in rate_limit_result:
-            response.headers["X-RateLimit-Remaining"] = str(rate_limit_result["remaining"])
+            headers["X-RateLimit-Remaining"] = str(rate_limit_result["remaining"])
         if "reset_time" in rate_limit_result:
-            response.headers["X-RateLimit-Reset"] = str(int(rate_limit_result["reset_time"].timestamp()))
+            headers["X-RateLimit-Reset"] = str(int(rate_limit_result["reset_time"].timestamp()))
     
     def _create_auth_error_response(self, message: str) -> Response:
         """Create authentication error response."""
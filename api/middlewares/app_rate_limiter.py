@@ -5,15 +5,13 @@ This middleware provides comprehensive rate limiting with multiple strategies:
 - Per-IP rate limiting
 - Per-user rate limiting  
 - Per-endpoint rate limiting
-- Sliding window algorithm
-- Memory-based storage (Redis support ready)
+- GCRA algorithm with a single timestamp per key
+- Redis-backed limits shared by every replica, with an in-process fallback
 - Configurable limits and timeouts
 - Security event logging
 """
 
-import asyncio
 import time
-from collections import defaultdict, deque
 from typing import Dict, Optional, Tuple, List, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -24,6 +22,8 @@ from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from api.middlewares.gcra_rate_limit import GCRARateLimiter, reset_time
+
 
 logger = logging.getLogger("rate_limiter")
 
@@ -76,84 +76,19 @@ class RateLimitConfig:
     include_retry_after: bool = True
     
     # Storage settings
-    cleanup_interval: int = 300  # Clean up old entries every 5 minutes
-    max_memory_entries: int = 10000  # Maximum entries to keep in memory
-
-
-class SlidingWindowCounter:
-    """Sliding window rate limit counter with memory management."""
-    
-    def __init__(self, window_size: int, max_requests: int):
-        self.window_size = window_size
-        self.max_requests = max_requests
-        self.requests: deque = deque()
-        self.last_cleanup = time.time()
-    
-    def add_request(self, timestamp: Optional[float] = None) -> Tuple[bool, int, float]:
-        """
-        Add a request and check if rate limit is exceeded.
-        
-        Returns:
-            Tuple of (allowed, remaining_requests, reset_time)
-        """
-        if timestamp is None:
-            timestamp = time.time()
-        
-        # Clean old requests
-        self._cleanup_old_requests(timestamp)
-        
-        # Check if limit exceeded
-        current_count = len(self.requests)
-        if current_count >= self.max_requests:
-            oldest_request = self.requests[0] if self.requests else timestamp
-            reset_time = oldest_request + self.window_size
-            return False, 0, reset_time
-        
-        # Add new request
-        self.requests.append(timestamp)
-        remaining = self.max_requests - (current_count + 1)
-        reset_time = timestamp + self.window_size
-        
-        return True, remaining, reset_time
-    
-    def _cleanup_old_requests(self, current_time: float) -> None:
-        """Remove requests older than the window size."""
-        cutoff_time = current_time - self.window_size
-        while self.requests and self.requests[0] < cutoff_time:
-            self.requests.popleft()
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get current rate limit statistics."""
-        current_time = time.time()
-        self._cleanup_old_requests(current_time)
-        
-        current_count = len(self.requests)
-        remaining = max(0, self.max_requests - current_count)
-        
-        # Calculate reset time
-        if self.requests:
-            oldest_request = self.requests[0]
-            reset_time = oldest_request + self.window_size
-        else:
-            reset_time = current_time + self.window_size
-        
-        return {
-            "current_count": current_count,
-            "limit": self.max_requests,
-            "remaining": remaining,
-            "reset_time": reset_time,
-            "window_size": self.window_size
-        }
+    redis_url: Optional[str] = None  # Share limits across replicas; None keeps them in memory
+    max_memory_entries: int = 10000  # Keys kept by the in-process limiter
 
 
-class MemoryRateLimitStore:
-    """Memory-based rate limit store with automatic cleanup."""
+class RateLimitStore:
+    """Rate limit store applying GCRA limits in Redis or process memory."""
     
-    def __init__(self, config: RateLimitConfig):
+    def __init__(self, config: RateLimitConfig, limiter: Optional[GCRARateLimiter] = None):
         self.config = config
-        self.counters: Dict[str, Dict[str, SlidingWindowCounter]] = defaultdict(dict)
-        self.last_cleanup = time.time()
-        self._cleanup_lock = asyncio.Lock()
+        self.limiter = limiter or GCRARateLimiter.from_url(
+            config.redis_url,
+            max_memory_entries=config.max_memory_entries,
+        )
     
     async def check_rate_limit(
         self, 
@@ -172,77 +107,33 @@ class MemoryRateLimitStore:
         Returns:
             Tuple of (allowed, rate_limit_info)
         """
-        # Periodic cleanup
-        await self._maybe_cleanup()
-        
-        # Get or create counter
-        counter_key = f"{limit_type}:{identifier}"
-        if counter_key not in self.counters[limit_type]:
-            self.counters[limit_type][counter_key] = SlidingWindowCounter(
-                rate_limit.window, 
-                rate_limit.requests
-            )
-        
-        counter = self.counters[limit_type][counter_key]
-        allowed, remaining, reset_time = counter.add_request()
-        
-        # Get detailed stats
-        stats = counter.get_stats()
+        decision = await self.limiter.hit(
+            f"{limit_type}:{identifier}",
+            rate_limit.requests,
+            rate_limit.window,
+            rate_limit.burst,
+        )
+        capacity = rate_limit.burst or rate_limit.requests
         
         rate_limit_info = {
             "limit": rate_limit.requests,
-            "remaining": remaining,
-            "reset_time": reset_time,
+            "remaining": decision.remaining,
+            "reset_time": reset_time(decision),
             "window": rate_limit.window,
-            "current": stats["current_count"],
+            "current": capacity - decision.remaining,
             "identifier": identifier,
             "type": limit_type
         }
         
         # Log rate limit events
-        if not allowed:
+        if not decision.allowed:
             logger.warning(
                 f"Rate limit exceeded: {limit_type} for {identifier}. "
                 f"Limit: {rate_limit.requests}/{rate_limit.window}s, "
-                f"Current: {stats['current_count']}"
+                f"retry after {decision.retry_after:.1f}s"
             )
         
-        return allowed, rate_limit_info
-    
-    async def _maybe_cleanup(self) -> None:
-        """Perform cleanup if needed."""
-        current_time = time.time()
-        if current_time - self.last_cleanup > self.config.cleanup_interval:
-            async with self._cleanup_lock:
-                if current_time - self.last_cleanup > self.config.cleanup_interval:
-                    await self._cleanup_old_entries()
-                    self.last_cleanup = current_time
-    
-    async def _cleanup_old_entries(self) -> None:
-        """Clean up old rate limit entries."""
-        total_entries = sum(len(counters) for counters in self.counters.values())
-        
-        if total_entries > self.config.max_memory_entries:
-            logger.info(f"Cleaning up rate limit store. Current entries: {total_entries}")
-            
-            # Remove empty counters and old entries
-            for limit_type in list(self.counters.keys()):
-                counters = self.counters[limit_type]
-                for key in list(counters.keys()):
-                    counter = counters[key]
-                    # Clean up the counter's old requests
-                    counter._cleanup_old_requests(time.time())
-                    
-                    # Remove if no recent requests
-                    if not counter.requests:
-                        del counters[key]
-                
-                # Remove empty limit types
-                if not counters:
-                    del self.counters[limit_type]
-            
-            final_entries = sum(len(counters) for counters in self.counters.values())
-            logger.info(f"Rate limit cleanup complete. Entries: {total_entries} → {final_entries}")
+        return decision.allowed, rate_limit_info
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -251,7 +142,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, config: Optional[RateLimitConfig] = None):
         super().__init__(app)
         self.config = config or RateLimitConfig()
-        self.store = MemoryRateLimitStore(self.config)
+        self.store = RateLimitStore(self.config)
         logger.info("Rate limiting middleware initialized")
         self._log_configuration()
     
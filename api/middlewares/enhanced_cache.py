@@ -1,5 +1,5 @@
 """
-Enhanced API cache middleware using Redis for T025 Phase 2: API Response Caching
+Enhanced API cache stage using Redis for T025 Phase 2: API Response Caching
 Provides intelligent caching with compression, invalidation, and performance monitoring.
 """
 
@@ -7,26 +7,25 @@ import time
 import json
 from typing import Dict, Optional, Set, Any
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 
+from api.middlewares.pipeline import RequestContext, Stage
+from api.services import redis_cache
 from api.services.redis_cache import get_cache_service, CacheConfiguration
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("enhanced_cache_middleware")
 
-class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
-    """Enhanced API caching middleware with Redis backend and intelligent invalidation."""
+class EnhancedApiCacheStage(Stage):
+    """Enhanced API caching pipeline stage with Redis backend and intelligent invalidation."""
     
-    def __init__(self, app, config: Optional[CacheConfiguration] = None):
-        super().__init__(app)
+    name = "cache"
+    
+    def __init__(self, config: Optional[CacheConfiguration] = None):
         self.config = config or CacheConfiguration()
         
         # Define cacheable endpoints with specific configurations
         self.cacheable_endpoints = {
-            # High-frequency, rarely changing endpoints
-            '/health': {'ttl': 60, 'cache_control': 'public, max-age=60'},
-            '/version': {'ttl': 3600, 'cache_control': 'public, max-age=3600'},
-            
             # Job-related endpoints with different caching strategies
             '/jobs': {'ttl': 120, 'cache_control': 'private, max-age=120'},
             '/jobs/{job_id}': {'ttl': 60, 'cache_control': 'private, max-age=60'},
@@ -49,11 +48,17 @@ class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
             '/admin/shutdown',
             '/admin/restart',
             '/ws/',  # WebSocket endpoints
+            # Probes and version checks must see the live process
+            '/health',
+            '/ready',
+            '/version',
         }
         
         # Performance tracking
         self.request_count = 0
         self.cache_hit_count = 0
+        self.local_hit_count = 0
+        self.redis_hit_count = 0
         
     def _should_cache_request(self, request: Request) -> bool:
         """Determine if request should be cached."""
@@ -61,6 +66,14 @@ class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
         if request.method != "GET":
             return False
         
+        # Conditional requests are answered from a fresh ETag check by the route
+        if "if-none-match" in request.headers:
+            return False
+        
+        # Partial (206) responses must not be stored under the whole resource's key
+        if "range" in request.headers:
+            return False
+        
         path = request.url.path
         
         # Check explicitly non-cacheable paths
@@ -94,14 +107,18 @@ class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
         
         return True
     
-    def _should_cache_response(self, response: Response) -> bool:
+    def _should_cache_response(self, request: Request, status_code: int, headers: MutableHeaders) -> bool:
         """Determine if response should be cached."""
-        # Don't cache error responses
-        if response.status_code >= 400:
+        # Cache keys are not scoped to the caller, so only anonymous responses are stored
+        if any(header in request.headers for header in ("authorization", "x-api-key", "cookie")):
+            return False
+        
+        # Don't cache error or 304 Not Modified responses
+        if status_code >= 400 or status_code == 304:
             return False
         
         # Check cache-control headers
-        cache_control = response.headers.get("cache-control", "")
+        cache_control = headers.get("cache-control", "")
         if "no-cache" in cache_control or "no-store" in cache_control:
             return False
         
@@ -115,35 +132,41 @@ class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
         
         return {'ttl': self.config.default_ttl, 'cache_control': 'private, max-age=300'}
     
-    async def dispatch(self, request: Request, call_next):
-        """Handle request with caching logic."""
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        """Answer cacheable requests from the cache, or note the key to store under."""
         self.request_count += 1
-        start_time = time.time()
+        request = ctx.request
         
         # Skip caching logic if not cacheable
         if not self._should_cache_request(request):
-            response = await call_next(request)
-            # Add cache headers to indicate no caching
-            response.headers["X-Cache"] = "SKIP"
-            return response
+            ctx.data["cache_status"] = "SKIP"
+            return None
         
         # Get cache service
         cache_service = await get_cache_service()
         if not cache_service:
             # Fallback to no caching if Redis unavailable
-            response = await call_next(request)
-            response.headers["X-Cache"] = "UNAVAILABLE"
-            return response
+            ctx.data["cache_status"] = "UNAVAILABLE"
+            return None
         
         # Generate cache key
         cache_key = cache_service._generate_cache_key(request)
         
-        # Try to get from cache
-        cached_entry = await cache_service.get(cache_key)
+        # Try the in-process tier first, then Redis
+        cache_tier = "L1"
+        cached_entry = cache_service.get_local(cache_key)
+        if cached_entry is None:
+            cache_tier = "L2"
+            cached_entry = await cache_service.get(cache_key)
+            if cached_entry:
+                cache_service.store_local(cache_key, cached_entry)
         if cached_entry:
             # Cache hit
             self.cache_hit_count += 1
-            processing_time = time.time() - start_time
+            if cache_tier == "L1":
+                self.local_hit_count += 1
+            else:
+                self.redis_hit_count += 1
             
             # Create response from cache
             response = Response(
@@ -154,80 +177,87 @@ class EnhancedApiCacheMiddleware(BaseHTTPMiddleware):
             
             # Add cache headers
             response.headers["X-Cache"] = "HIT"
-            response.headers["X-Cache-Hit-Count"] = str(cached_entry.hit_count)
+            response.headers["X-Cache-Tier"] = cache_tier
             response.headers["X-Cache-Age"] = str(int((time.time() - cached_entry.created_at.timestamp())))
-            response.headers["X-Processing-Time"] = f"{processing_time:.3f}s"
+            response.headers["X-Processing-Time"] = f"{ctx.elapsed:.3f}s"
             
             # Set appropriate cache-control headers
             endpoint_config = self._get_endpoint_config(request.url.path)
             response.headers["Cache-Control"] = endpoint_config.get('cache_control', 'private, max-age=300')
             
-            logger.debug(f"Cache hit for {request.url.path} (key: {cache_key[:8]}...)")
+            logger.debug(f"Cache {cache_tier} hit for {request.url.path} (key: {cache_key[:8]}...)")
+            ctx.data["cache_status"] = "HIT"
             return response
         
-        # Cache miss - process request
-        response = await call_next(request)
-        processing_time = time.time() - start_time
-        
-        # Check if response should be cached and cache service is available
-        if self._should_cache_response(response) and cache_service:
-            # For caching, we need to read the response content
-            # This is a simplified approach - in production you might want to handle streaming responses differently
-            if hasattr(response, 'body') and callable(response.body):
-                try:
-                    response_body = await response.body()
-                    content_str = response_body.decode('utf-8')
-                    
-                    # Store in cache
-                    success = await cache_service.set(cache_key, response, request, content_str)
-                    
-                    # Recreate response with cached content
-                    response = Response(
-                        content=content_str,
-                        status_code=response.status_code,
-                        headers=dict(response.headers)
-                    )
-                    
-                    # Add cache headers
-                    response.headers["X-Cache"] = "MISS" if success else "STORE-FAILED"
-                    response.headers["X-Processing-Time"] = f"{processing_time:.3f}s"
-                    
-                    # Set cache-control headers
-                    endpoint_config = self._get_endpoint_config(request.url.path)
-                    response.headers["Cache-Control"] = endpoint_config.get('cache_control', 'private, max-age=300')
-                    
-                    if success:
-                        logger.debug(f"Cache stored for {request.url.path} (key: {cache_key[:8]}...)")
-                    else:
-                        logger.warning(f"Failed to cache response for {request.url.path}")
-                except Exception as e:
-                    # If we can't read the response body, just add headers and continue
-                    logger.debug(f"Could not cache response for {request.url.path}: {e}")
-                    response.headers["X-Cache"] = "READ-FAILED"
-                    response.headers["X-Processing-Time"] = f"{processing_time:.3f}s"
-            else:
-                # Response doesn't support body reading, just add headers
-                response.headers["X-Cache"] = "UNSUPPORTED"
-                response.headers["X-Processing-Time"] = f"{processing_time:.3f}s"
+        # Cache miss - the response is stored once it has been sent
+        ctx.data["cache_key"] = cache_key
+        ctx.data["cache_service"] = cache_service
+        return None
+    
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        """Label the response and ask the pipeline for its body when it can be stored."""
+        status = ctx.data.get("cache_status")
+        if status == "HIT":
+            return
+        if status is not None:
+            headers["X-Cache"] = status
+            return
+        
+        if self._should_cache_response(ctx.request, ctx.status_code, headers):
+            # Stored as the application produced them; outer stages add theirs again on a hit
+            ctx.data["cache_headers"] = list(headers.raw)
+            ctx.capture_body = True
+            endpoint_config = self._get_endpoint_config(ctx.path)
+            headers["Cache-Control"] = endpoint_config.get('cache_control', 'private, max-age=300')
+            headers["X-Cache"] = "MISS"
         else:
-            # Response not cacheable or cache service unavailable
-            if not cache_service:
-                response.headers["X-Cache"] = "SERVICE-UNAVAILABLE"
-            else:
-                response.headers["X-Cache"] = "NOT-CACHEABLE"
-            response.headers["X-Processing-Time"] = f"{processing_time:.3f}s"
+            headers["X-Cache"] = "NOT-CACHEABLE"
+        headers["X-Processing-Time"] = f"{ctx.elapsed:.3f}s"
+    
+    async def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        """Store a fully sent, single-body response; streamed responses are never cached."""
+        cache_key = ctx.data.get("cache_key")
+        if exc is not None or cache_key is None or not ctx.capture_body or ctx.body is None:
+            return
         
-        return response
+        try:
+            content_str = ctx.body.decode('utf-8')
+        except UnicodeDecodeError:
+            logger.debug(f"Could not cache non-text response for {ctx.path}")
+            return
+        
+        response = Response(status_code=ctx.status_code)
+        response.raw_headers = ctx.data["cache_headers"]
+        success = await ctx.data["cache_service"].set(cache_key, response, ctx.request, content_str)
+        if success:
+            logger.debug(f"Cache stored for {ctx.path} (key: {cache_key[:8]}...)")
+        else:
+            logger.warning(f"Failed to cache response for {ctx.path}")
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get middleware performance statistics."""
         hit_ratio = (self.cache_hit_count / self.request_count) if self.request_count > 0 else 0.0
+        local_hit_ratio = (self.local_hit_count / self.request_count) if self.request_count > 0 else 0.0
+        redis_hit_ratio = (self.redis_hit_count / self.request_count) if self.request_count > 0 else 0.0
+        cache_service = redis_cache.cache_service
+        local_cache = cache_service.local_cache if cache_service else None
         
         return {
             'total_requests': self.request_count,
             'cache_hits': self.cache_hit_count,
             'cache_misses': self.request_count - self.cache_hit_count,
             'hit_ratio': hit_ratio,
+            'tiers': {
+                'l1': {
+                    'hits': self.local_hit_count,
+                    'hit_ratio': local_hit_ratio,
+                    'cache': local_cache.stats() if local_cache else None,
+                },
+                'l2': {
+                    'hits': self.redis_hit_count,
+                    'hit_ratio': redis_hit_ratio,
+                },
+            },
             'cacheable_endpoints': list(self.cacheable_endpoints.keys()),
             'non_cacheable_paths': list(self.non_cacheable_paths)
         }
@@ -9,19 +9,20 @@ import os
 import time
 import json
 import logging
-from collections import defaultdict, deque
+from collections import defaultdict
 from typing import Dict, Optional, Tuple, List, Any, Set
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import ipaddress
 import hashlib
-import redis
 from pathlib import Path
 
 from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from api.middlewares.gcra_rate_limit import GCRARateLimiter, reset_time
+
 logger = logging.getLogger("enhanced_rate_limiter")
 
 @dataclass
@@ -102,6 +103,10 @@ class EnhancedRateLimitConfig:
     enable_captcha_challenge: bool = False  # Require CAPTCHA after violations
     enable_security_logging: bool = True
     
+    # Response settings
+    include_headers: bool = True
+    include_retry_after: bool = True
+    
     # Storage and performance
     use_redis: bool = False
     redis_url: str = field(default_factory=lambda: os.getenv("REDIS_URL", "redis://localhost:6379/0"))
@@ -153,73 +158,46 @@ class ThreatDetector:
         
         return score, threats
 
-class EnhancedSlidingWindowCounter:
-    """Enhanced sliding window counter with security features."""
+class ViolationTracker:
+    """Tracks limit violations and auto-bans for one rate limit key.
+
+    Request counting is done by the shared GCRA limiter; a tracker only exists
+    for keys that have exceeded a limit, so memory grows with offenders rather
+    than with request rate.
+    """
     
-    def __init__(self, window_size: int, max_requests: int, ban_threshold: Optional[int] = None):
-        self.window_size = window_size
-        self.max_requests = max_requests
+    def __init__(self, ban_threshold: Optional[int] = None, ban_duration: int = 3600):
         self.ban_threshold = ban_threshold
-        self.requests: deque = deque()
+        self.ban_duration = ban_duration
         self.violations = 0
         self.last_violation = 0
         self.is_banned = False
         self.ban_until = 0
-        self.threat_score = 0
     
-    def add_request(self, timestamp: Optional[float] = None, threat_score: int = 0) -> Tuple[bool, int, float, bool]:
-        """
-        Add a request and check if rate limit is exceeded.
-        
-        Returns:
-            Tuple of (allowed, remaining_requests, reset_time, is_banned)
-        """
+    def check_ban(self, timestamp: Optional[float] = None) -> bool:
+        """Return True while the key is banned; lifts expired bans."""
         if timestamp is None:
             timestamp = time.time()
-        
-        # Check if currently banned
-        if self.is_banned and timestamp < self.ban_until:
-            return False, 0, self.ban_until, True
-        elif self.is_banned and timestamp >= self.ban_until:
+        if self.is_banned and timestamp >= self.ban_until:
             # Ban expired, reset
             self.is_banned = False
             self.violations = max(0, self.violations - 1)  # Reduce violations over time
-        
-        # Clean old requests
-        self._cleanup_old_requests(timestamp)
-        
-        # Add threat score
-        self.threat_score = max(0, self.threat_score + threat_score - 1)  # Decay over time
-        
-        # Check if limit exceeded
-        current_count = len(self.requests)
-        if current_count >= self.max_requests:
-            self.violations += 1
-            self.last_violation = timestamp
-            
-            # Check for auto-ban
-            if self.ban_threshold and self.violations >= self.ban_threshold:
-                self.is_banned = True
-                self.ban_until = timestamp + 3600  # 1 hour ban
-                logger.warning(f"IP auto-banned due to {self.violations} violations")
-                return False, 0, self.ban_until, True
-            
-            oldest_request = self.requests[0] if self.requests else timestamp
-            reset_time = oldest_request + self.window_size
-            return False, 0, reset_time, False
-        
-        # Add new request
-        self.requests.append(timestamp)
-        remaining = self.max_requests - (current_count + 1)
-        reset_time = timestamp + self.window_size
-        
-        return True, remaining, reset_time, False
+        return self.is_banned
     
-    def _cleanup_old_requests(self, current_time: float) -> None:
-        """Remove requests older than the window size."""
-        cutoff_time = current_time - self.window_size
-        while self.requests and self.requests[0] < cutoff_time:
-            self.requests.popleft()
+    def record_violation(self, timestamp: Optional[float] = None) -> bool:
+        """Count a violation; returns True if it triggered an auto-ban."""
+        if timestamp is None:
+            timestamp = time.time()
+        self.violations += 1
+        self.last_violation = timestamp
+        
+        # Check for auto-ban
+        if self.ban_threshold and self.violations >= self.ban_threshold:
+            self.is_banned = True
+            self.ban_until = timestamp + self.ban_duration
+            logger.warning(f"IP auto-banned due to {self.violations} violations")
+            return True
+        return False
 
 class EnhancedRateLimitMiddleware(BaseHTTPMiddleware):
     """Enhanced rate limiting middleware with comprehensive security features."""
@@ -227,19 +205,16 @@ class EnhancedRateLimitMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, config: EnhancedRateLimitConfig):
         super().__init__(app)
         self.config = config
-        self.counters: Dict[str, EnhancedSlidingWindowCounter] = {}
+        self.trackers: Dict[str, ViolationTracker] = {}
         self.threat_detector = ThreatDetector()
         self.last_cleanup = time.time()
         
-        # Initialize Redis if configured
-        self.redis_client = None
-        if config.use_redis:
-            try:
-                self.redis_client = redis.from_url(config.redis_url)
-                self.redis_client.ping()
-                logger.info("Connected to Redis for rate limiting")
-            except Exception as e:
-                logger.warning(f"Failed to connect to Redis: {e}, falling back to memory")
+        # Request counts live in Redis when configured (shared by all replicas),
+        # otherwise in process memory; the limiter falls back to memory on Redis errors
+        self.limiter = GCRARateLimiter.from_url(
+            config.redis_url if config.use_redis else None,
+            max_memory_entries=config.max_memory_entries,
+        )
         
         # Security logging
         if config.enable_security_logging:
@@ -273,67 +248,74 @@ class EnhancedRateLimitMiddleware(BaseHTTPMiddleware):
         # Check rate limits
         for limit_name, limit_config in limits.items():
             key = f"{rate_limit_key}:{limit_name}"
+            tracker = self.trackers.get(key)
             
-            # Get or create counter
-            if key not in self.counters:
-                self.counters[key] = EnhancedSlidingWindowCounter(
-                    limit_config.window,
-                    limit_config.requests,
-                    limit_config.ban_threshold
+            if tracker and tracker.check_ban():
+                return JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={
+                        "error": "IP address temporarily banned",
+                        "ban_until": tracker.ban_until
+                    }
                 )
             
-            counter = self.counters[key]
-            allowed, remaining, reset_time, is_banned = counter.add_request(
-                threat_score=threat_score
+            decision = await self.limiter.hit(
+                key, limit_config.requests, limit_config.window, limit_config.burst
             )
+            if decision.allowed:
+                continue
             
-            if is_banned:
+            if tracker is None:
+                tracker = self.trackers[key] = ViolationTracker(
+                    limit_config.ban_threshold, limit_config.ban_duration
+                )
+            if tracker.record_violation():
                 self._log_security_event(
                     "IP_AUTO_BANNED",
                     client_ip,
-                    f"Auto-banned for {counter.violations} violations"
+                    f"Auto-banned for {tracker.violations} violations"
                 )
                 return JSONResponse(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     content={
                         "error": "IP address temporarily banned",
-                        "ban_until": reset_time
+                        "ban_until": tracker.ban_until
                     }
                 )
             
-            if not allowed:
-                self._log_security_event(
-                    "RATE_LIMIT_EXCEEDED",
-                    client_ip,
-                    f"Rate limit exceeded for {limit_name}"
-                )
-                
-                # Progressive delay
-                if self.config.enable_progressive_delays:
-                    delay = min(counter.violations * 0.5, 5.0)  # Max 5 second delay
-                    await asyncio.sleep(delay)
-                
-                headers = {}
-                if self.config.include_headers:
-                    headers.update({
-                        "X-RateLimit-Limit": str(limit_config.requests),
-                        "X-RateLimit-Remaining": str(remaining),
-                        "X-RateLimit-Reset": str(int(reset_time))
-                    })
-                
-                if self.config.include_retry_after:
-                    headers["Retry-After"] = str(int(reset_time - time.time()))
-                
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "limit": limit_config.requests,
-                        "window": limit_config.window,
-                        "retry_after": int(reset_time - time.time())
-                    },
-                    headers=headers
-                )
+            self._log_security_event(
+                "RATE_LIMIT_EXCEEDED",
+                client_ip,
+                f"Rate limit exceeded for {limit_name}"
+            )
+            
+            # Progressive delay
+            if self.config.enable_progressive_delays:
+                delay = min(tracker.violations * 0.5, 5.0)  # Max 5 second delay
+                await asyncio.sleep(delay)
+            
+            reset_at = reset_time(decision)
+            headers = {}
+            if self.config.include_headers:
+                headers.update({
+                    "X-RateLimit-Limit": str(limit_config.requests),
+                    "X-RateLimit-Remaining": str(decision.remaining),
+                    "X-RateLimit-Reset": str(int(reset_at))
+                })
+            
+            if self.config.include_retry_after:
+                headers["Retry-After"] = str(int(reset_at - time.time()))
+            
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "error": "Rate limit exceeded",
+                    "limit": limit_config.requests,
+                    "window": limit_config.window,
+                    "retry_after": int(reset_at - time.time())
+                },
+                headers=headers
+            )
         
         # Log threats if detected
         if threats:
@@ -424,19 +406,15 @@ class EnhancedRateLimitMiddleware(BaseHTTPMiddleware):
             )
     
     def _cleanup_old_entries(self):
-        """Clean up old rate limit entries."""
+        """Forget violation trackers for keys that are not banned and have been quiet for an hour."""
         current_time = time.time()
-        keys_to_remove = []
-        
-        for key, counter in self.counters.items():
-            # Remove if no recent requests and not banned
-            if (not counter.requests and 
-                not counter.is_banned and 
-                current_time - counter.last_violation > 3600):
-                keys_to_remove.append(key)
+        keys_to_remove = [
+            key for key, tracker in self.trackers.items()
+            if not tracker.check_ban(current_time) and current_time - tracker.last_violation > 3600
+        ]
         
         for key in keys_to_remove:
-            del self.counters[key]
+            del self.trackers[key]
         
         logger.info(f"Cleaned up {len(keys_to_remove)} old rate limit entries")
 
@@ -0,0 +1,163 @@
+"""
+GCRA (Generic Cell Rate Algorithm) rate limiting backend.
+
+A limit of ``requests`` per ``window`` seconds with a burst of ``burst``
+requests is enforced by storing one number per key: the theoretical arrival
+time (TAT) of the next request.  Each allowed request pushes the TAT forward
+by ``window / requests``; a request is refused while the TAT is more than
+``burst`` intervals ahead of now.  This is equivalent to a token bucket that
+refills continuously, needs no per-request timestamps and no sweeping, and a
+key whose TAT has passed carries no state at all.
+
+With Redis the check-and-update runs as a Lua script, so every replica shares
+the same limits at one round-trip per request and the key expires on its own
+once the bucket is full again.  Without Redis, or while it is unreachable,
+the same algorithm runs in process memory; after a Redis error the limiter
+waits ``redis_retry_seconds`` before trying Redis again, so an outage does
+not cost every request a failed connection attempt.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("rate_limiter")
+
+# Times are integer microseconds: Redis truncates Lua numbers to integers.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - capacity
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil((new_tat - now) / 1000))
+return {1, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check."""
+    allowed: bool
+    remaining: int       # Requests still allowed right now
+    retry_after: float   # Seconds until a refused request would be allowed
+    reset_after: float   # Seconds until the full burst is available again
+
+
+def gcra_decide(
+    tat: Optional[float],
+    now: float,
+    interval: float,
+    capacity: float,
+) -> Tuple[Optional[float], RateLimitDecision]:
+    """Apply GCRA to the stored ``tat``; returns the TAT to store (None if refused)."""
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - capacity
+    if now < allow_at:
+        return None, RateLimitDecision(False, 0, allow_at - now, tat - now)
+    return new_tat, RateLimitDecision(
+        True, int((now - allow_at) / interval + 1e-9), 0.0, new_tat - now
+    )
+
+
+class GCRARateLimiter:
+    """GCRA limiter backed by Redis when a client is given, else process memory."""
+
+    def __init__(
+        self,
+        redis_client: Optional[Any] = None,
+        key_prefix: str = "ratelimit:",
+        max_memory_entries: int = 10000,
+        redis_retry_seconds: float = 5.0,
+    ):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.max_memory_entries = max_memory_entries
+        self.redis_retry_seconds = redis_retry_seconds
+        self._tats: Dict[str, float] = {}
+        self._script = redis_client.register_script(GCRA_SCRIPT) if redis_client is not None else None
+        self._redis_failing = False
+        self._redis_retry_at = 0.0
+
+    @classmethod
+    def from_url(cls, redis_url: Optional[str], **kwargs) -> "GCRARateLimiter":
+        """Create a limiter for ``redis_url``; ``None`` keeps state in memory."""
+        if not redis_url:
+            return cls(**kwargs)
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(redis_url), **kwargs)
+
+    async def hit(self, key: str, requests: int, window: float, burst: Optional[int] = None) -> RateLimitDecision:
+        """Count one request against ``key`` limited to ``requests`` per ``window`` seconds."""
+        interval = window / max(1, requests)
+        capacity = interval * max(1, burst or requests)
+
+        if self._script is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                allowed, remaining, retry_after, reset_after = await self._script(
+                    keys=[self.key_prefix + key],
+                    args=[max(1, round(interval * 1_000_000)), round(capacity * 1_000_000)],
+                )
+                if self._redis_failing:
+                    logger.info("Redis rate limiting recovered")
+                    self._redis_failing = False
+                return RateLimitDecision(
+                    bool(allowed), int(remaining), retry_after / 1_000_000, reset_after / 1_000_000
+                )
+            except Exception as e:
+                if not self._redis_failing:
+                    logger.warning(f"Redis rate limiting unavailable, using in-process limits: {e}")
+                    self._redis_failing = True
+                self._redis_retry_at = time.monotonic() + self.redis_retry_seconds
+
+        return self._hit_memory(key, interval, capacity)
+
+    def _hit_memory(self, key: str, interval: float, capacity: float) -> RateLimitDecision:
+        now = time.monotonic()
+        new_tat, decision = gcra_decide(self._tats.get(key), now, interval, capacity)
+        if new_tat is not None:
+            if key not in self._tats and len(self._tats) >= self.max_memory_entries:
+                self._evict_expired(now)
+            self._tats[key] = new_tat
+        return decision
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop keys whose TAT has passed; they are indistinguishable from new keys."""
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        if len(self._tats) >= self.max_memory_entries:
+            # Everyone is mid-burst: forget the keys closest to a full bucket
+            for key, _ in sorted(self._tats.items(), key=lambda item: item[1])[: len(self._tats) // 10 + 1]:
+                del self._tats[key]
+
+    @property
+    def memory_entries(self) -> int:
+        return len(self._tats)
+
+
+def reset_time(decision: RateLimitDecision, now: Optional[float] = None) -> float:
+    """Wall-clock time at which a refused request may retry, or the bucket refills."""
+    now = time.time() if now is None else now
+    return now + (decision.reset_after if decision.allowed else math.ceil(decision.retry_after))
+
+
+__all__ = [
+    "GCRARateLimiter",
+    "GCRA_SCRIPT",
+    "RateLimitDecision",
+    "gcra_decide",
+    "reset_time",
+]
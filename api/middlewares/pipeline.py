@@ -0,0 +1,211 @@
+"""
+Single pure-ASGI request pipeline.
+
+Cross-cutting request handling (access logging, CORS, response caching, API
+key authentication, security auditing) used to be a stack of
+``BaseHTTPMiddleware`` subclasses.  Each layer ran the rest of the stack in a
+new task and rebuilt the response around a streaming body, so every request
+paid one task hop and one response wrapper per layer.
+
+``RequestPipeline`` is one ASGI middleware that runs a list of ``Stage``
+objects on the same ``scope``/``receive``/``send``:
+
+* ``on_request`` runs in order before the application and may return a
+  ``Response`` to answer the request itself (cache hit, 401, CORS preflight);
+  later stages and the application are then skipped.  An ``HTTPException``
+  raised here becomes a JSON error response.
+* ``on_response_start`` runs in reverse order on the ``http.response.start``
+  message and may edit the response headers in place.
+* ``on_complete`` runs in reverse order once the response has been sent or
+  the application raised, for every stage whose ``on_request`` was called.
+
+Response bodies are forwarded message by message without buffering.  A stage
+that needs the body (the response cache) sets ``ctx.capture_body`` from
+``on_response_start``; the pipeline then keeps a copy of single-message
+bodies and drops it as soon as a response turns out to be streamed.
+
+Time spent in each stage is accumulated per request and observed once per
+stage in ``http_pipeline_stage_seconds``.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from prometheus_client import Histogram  # type: ignore
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("request_pipeline")
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "http_pipeline_stage_seconds",
+    "Time spent in each request pipeline stage per request",
+    ["stage"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+class RequestContext:
+    """Per-request state shared by the pipeline stages."""
+
+    def __init__(self, scope: Scope, receive: Receive):
+        self.scope = scope
+        # Shares scope["state"], so request.state set here is visible to route handlers
+        self.request = Request(scope, receive)
+        self.start_time = time.time()
+        self.status_code: Optional[int] = None
+        self.response_headers: Optional[MutableHeaders] = None
+        self.response_bytes = 0
+        self.streaming = False
+        self.capture_body = False
+        self.body: Optional[bytes] = None
+        self.data: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def path(self) -> str:
+        return self.scope["path"]
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.start_time
+
+
+class Stage:
+    """One concern of the request pipeline; override the hooks it needs."""
+
+    name = "stage"
+
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        return None
+
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        pass
+
+    async def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        pass
+
+
+class RequestPipeline:
+    """ASGI middleware running ``stages`` around ``app`` on one request."""
+
+    def __init__(self, app: ASGIApp, stages: Sequence[Stage]):
+        self.app = app
+        self.stages = list(stages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext(scope, receive)
+        entered: List[Stage] = []
+        timings = ctx.timings
+        perf_counter = time.perf_counter
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                ctx.status_code = message["status"]
+                message["headers"] = list(message.get("headers", []))
+                ctx.response_headers = headers = MutableHeaders(scope=message)
+                for stage in reversed(entered):
+                    started = perf_counter()
+                    stage.on_response_start(ctx, headers)
+                    timings[stage.name] = timings.get(stage.name, 0.0) + perf_counter() - started
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                ctx.response_bytes += len(body)
+                if message.get("more_body", False):
+                    ctx.streaming = True
+                if ctx.capture_body:
+                    if ctx.streaming:
+                        ctx.capture_body, ctx.body = False, None
+                    else:
+                        ctx.body = body
+            await send(message)
+
+        exc: Optional[BaseException] = None
+        try:
+            response: Optional[Response] = None
+            for stage in self.stages:
+                entered.append(stage)
+                started = perf_counter()
+                try:
+                    response = await stage.on_request(ctx)
+                except HTTPException as e:
+                    response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+                finally:
+                    timings[stage.name] = timings.get(stage.name, 0.0) + perf_counter() - started
+                if response is not None:
+                    break
+
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            for stage in reversed(entered):
+                started = perf_counter()
+                try:
+                    await stage.on_complete(ctx, exc)
+                except Exception as e:
+                    logger.error(f"Pipeline stage {stage.name} failed to complete {ctx.path}: {e}")
+                timings[stage.name] = timings.get(stage.name, 0.0) + perf_counter() - started
+            for name, seconds in timings.items():
+                PIPELINE_STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+
+class CORSStage(Stage):
+    """CORS handling with the semantics of Starlette's ``CORSMiddleware``."""
+
+    name = "cors"
+
+    def __init__(self, **options: Any):
+        self.cors = CORSMiddleware(app=None, **options)
+
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        headers = ctx.request.headers
+        origin = headers.get("origin")
+        ctx.data["cors_origin"] = origin
+        if origin is not None and ctx.method == "OPTIONS" and "access-control-request-method" in headers:
+            ctx.data["cors_preflight"] = True
+            return self.cors.preflight_response(request_headers=headers)
+        return None
+
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        if ctx.data.get("cors_preflight"):
+            return
+        cors = self.cors
+        origin = ctx.data.get("cors_origin")
+        if origin is not None:
+            headers.update(cors.simple_headers)
+
+        # With credentials the specific origin must be echoed instead of '*'
+        if origin is not None and cors.allow_all_origins and cors.allow_credentials:
+            cors.allow_explicit_origin(headers, origin)
+        elif origin is not None and not cors.allow_all_origins and cors.is_allowed_origin(origin=origin):
+            cors.allow_explicit_origin(headers, origin)
+        else:
+            headers["Vary"] = ", ".join([*headers.getlist("Vary"), "Origin"])
+
+
+__all__ = [
+    "CORSStage",
+    "PIPELINE_STAGE_SECONDS",
+    "RequestContext",
+    "RequestPipeline",
+    "Stage",
+]
@@ -0,0 +1,28 @@
+"""T037 Covering index for keyset job listings"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 't037_job_listing_index'
+down_revision = 't036_user_email_required'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index jobs by owner and (created_at, id) with the listed columns trailing.
+
+    ``GET /jobs`` seeks to a user's cursor position and reads each page from
+    this index alone; the trailing columns make it covering.
+    """
+    op.create_index(
+        'idx_jobs_user_created_listing',
+        'jobs',
+        ['user_id', 'created_at', 'id', 'status', 'original_filename'],
+    )
+
+
+def downgrade() -> None:
+    """Drop the job listing index."""
+    op.drop_index('idx_jobs_user_created_listing', table_name='jobs')
@@ -86,6 +86,11 @@ class Job(Base):
         Index('idx_jobs_status_created', 'status', 'created_at'),
         Index('idx_jobs_model', 'model'),
         Index('idx_jobs_user_status', 'user_id', 'status'),
+        # Covering index for keyset pagination of GET /jobs
+        Index(
+            'idx_jobs_user_created_listing',
+            'user_id', 'created_at', 'id', 'status', 'original_filename',
+        ),
     )
 
     def __repr__(self):
@@ -0,0 +1,275 @@
+"""
+Fixed-memory query telemetry for the database performance monitor.
+
+Recording a statement costs the same however long the monitor has been
+running and however many statements it has seen:
+
+* Statements are described (fingerprint, query type, table) once per distinct
+  SQL string through an LRU cache.  The fingerprint replaces literals with
+  ``?`` and collapses ``IN (?, ?, ...)`` lists, so statements differing only
+  in their values share one entry.
+* Each recorded statement claims the next slot of a preallocated ring of
+  numpy arrays (time, duration, fingerprint id, row count, success).  Slots
+  are claimed with ``itertools.count``, which is atomic under the GIL, so
+  recording takes no lock; a reader racing a writer may see one slot half
+  written, which telemetry tolerates.
+* Every fingerprint owns a ``LatencySketch``: DDSketch-style logarithmic
+  buckets with a bounded relative error, giving p50/p95/p99 since the last
+  reset without keeping individual durations.
+
+``sample_rate`` records only that fraction of statements; counts reported by
+``summary`` are scaled back up.  With the default 65536 slots and full
+sampling the ring covers about an hour at 18 statements per second; lowering
+the rate stretches the window proportionally.
+"""
+
+import itertools
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+QUERY_TYPES = ("SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+[`\"\[]?([\w.]+)", re.IGNORECASE)
+
+OTHER_FINGERPRINT = "<other>"
+
+
+@dataclass(frozen=True)
+class StatementInfo:
+    """Normalized form and classification of one SQL statement."""
+    fingerprint: str
+    query_type: str
+    table_name: Optional[str]
+
+
+@lru_cache(maxsize=4096)
+def describe_statement(statement: str) -> StatementInfo:
+    """Fingerprint and classify ``statement``; cached per distinct SQL string."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _VALUE_LIST.sub("(?)", normalized)
+
+    head = normalized[:6].upper()
+    query_type = next((kind for kind in QUERY_TYPES if head.startswith(kind)), "OTHER")
+    match = _TABLE.search(normalized)
+    table_name = match.group(1).lower() if match else None
+    return StatementInfo(normalized, query_type, table_name)
+
+
+class LatencySketch:
+    """
+    Latency histogram with relative-error guarantees (DDSketch-style).
+
+    Bucket ``i`` holds values in ``(gamma**(i-1), gamma**i]`` with
+    ``gamma = (1 + accuracy) / (1 - accuracy)``; any quantile is returned
+    within ``accuracy`` of the true value.  Buckets span ``min_ms`` to
+    ``max_ms`` and values outside are clamped, so memory is fixed.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_ms: float = 0.01, max_ms: float = 3_600_000.0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_ms) / self._log_gamma)
+        self.counts = np.zeros(math.ceil(math.log(max_ms) / self._log_gamma) - self._offset + 1, dtype=np.uint32)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, value_ms: float) -> None:
+        index = math.ceil(math.log(value_ms) / self._log_gamma) - self._offset if value_ms > 0 else 0
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, q * (cumulative[-1] - 1), side="right"))
+        # Midpoint of the bucket in the relative sense, as DDSketch does
+        return 2 * self.gamma ** (index + self._offset) / (self.gamma + 1)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryTelemetry:
+    """Ring buffer of recent statements plus per-fingerprint latency sketches."""
+
+    def __init__(self, capacity: int = 65536, sample_rate: float = 1.0, max_fingerprints: int = 1000):
+        self.capacity = max(1, capacity)
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.max_fingerprints = max(1, max_fingerprints)
+        self._register_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        # Unused slots sort before any window start
+        self._times = np.full(self.capacity, -np.inf, dtype=np.float64)
+        self._durations = np.zeros(self.capacity, dtype=np.float32)
+        self._fingerprint_ids = np.zeros(self.capacity, dtype=np.int32)
+        self._rows = np.full(self.capacity, -1, dtype=np.int64)
+        self._success = np.zeros(self.capacity, dtype=bool)
+        self._sequence = itertools.count()
+        self._ids: Dict[str, int] = {OTHER_FINGERPRINT: 0}
+        self._statements: List[StatementInfo] = [StatementInfo(OTHER_FINGERPRINT, "OTHER", None)]
+        self._sketches: List[LatencySketch] = [LatencySketch()]
+
+    def record(
+        self,
+        statement: str,
+        duration_ms: float,
+        row_count: Optional[int] = None,
+        success: bool = True,
+        now: Optional[float] = None,
+    ) -> None:
+        """Record one statement; O(1) and lock-free once its fingerprint is known."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        fingerprint_id = self._fingerprint_id(describe_statement(statement or ""))
+        if success:
+            self._sketches[fingerprint_id].add(duration_ms)
+
+        slot = next(self._sequence) % self.capacity
+        self._durations[slot] = duration_ms
+        self._fingerprint_ids[slot] = fingerprint_id
+        self._rows[slot] = row_count if row_count is not None and row_count >= 0 else -1
+        self._success[slot] = success
+        self._times[slot] = time.time() if now is None else now
+
+    def _fingerprint_id(self, info: StatementInfo) -> int:
+        fingerprint_id = self._ids.get(info.fingerprint)
+        if fingerprint_id is not None:
+            return fingerprint_id
+        with self._register_lock:
+            fingerprint_id = self._ids.get(info.fingerprint)
+            if fingerprint_id is None:
+                if len(self._statements) > self.max_fingerprints:
+                    return 0
+                self._statements.append(info)
+                self._sketches.append(LatencySketch())
+                fingerprint_id = len(self._statements) - 1
+                self._ids[info.fingerprint] = fingerprint_id
+            return fingerprint_id
+
+    def _window(self, since: float) -> np.ndarray:
+        return np.flatnonzero(self._times >= since)
+
+    def summary(self, since: float, slow_ms: float, very_slow_ms: float) -> Dict[str, Any]:
+        """Counts, latency percentiles and a per-type breakdown of statements since ``since``."""
+        window = self._window(since)
+        if not len(window):
+            return {"total_queries": 0}
+
+        scale = 1.0 / self.sample_rate if self.sample_rate > 0 else 1.0
+        success = self._success[window]
+        durations = self._durations[window][success].astype(np.float64)
+        fingerprint_ids = self._fingerprint_ids[window]
+
+        if len(durations):
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            latency = {
+                "avg_execution_time_ms": float(durations.mean()),
+                "median_execution_time_ms": float(p50),
+                "p95_execution_time_ms": float(p95),
+                "p99_execution_time_ms": float(p99),
+                "min_execution_time_ms": float(durations.min()),
+                "max_execution_time_ms": float(durations.max()),
+            }
+        else:
+            latency = dict.fromkeys([
+                "avg_execution_time_ms", "median_execution_time_ms", "p95_execution_time_ms",
+                "p99_execution_time_ms", "min_execution_time_ms", "max_execution_time_ms",
+            ], 0.0)
+
+        type_names = np.array([info.query_type for info in self._statements])[fingerprint_ids]
+        query_types = {}
+        for query_type in np.unique(type_names):
+            of_type = type_names == query_type
+            ok = of_type & success
+            query_types[str(query_type)] = {
+                "count": round(int(of_type.sum()) * scale),
+                "avg_time": float(self._durations[window][ok].mean()) if ok.any() else 0.0,
+                "errors": round(int((of_type & ~success).sum()) * scale),
+            }
+
+        all_durations = self._durations[window]
+        return {
+            "total_queries": round(len(window) * scale),
+            "successful_queries": round(int(success.sum()) * scale),
+            "slow_queries": round(int((all_durations > slow_ms).sum()) * scale),
+            "very_slow_queries": round(int((all_durations > very_slow_ms).sum()) * scale),
+            "query_types": query_types,
+            "sample_rate": self.sample_rate,
+            **latency,
+        }
+
+    def top_slow_queries(self, since: float, limit: int) -> List[Dict[str, Any]]:
+        """Slowest successful statements recorded since ``since``."""
+        window = self._window(since)
+        window = window[self._success[window]]
+        slowest = window[np.argsort(self._durations[window])[::-1][:limit]]
+        results = []
+        for slot in slowest:
+            info = self._statements[self._fingerprint_ids[slot]]
+            timestamp = float(self._times[slot])
+            results.append({
+                "query_id": f"q_{int(timestamp * 1000)}_{slot}",
+                "query_type": info.query_type,
+                "table_name": info.table_name,
+                "fingerprint": info.fingerprint,
+                "execution_time_ms": float(self._durations[slot]),
+                "timestamp": datetime.utcfromtimestamp(timestamp).isoformat(),
+                "row_count": int(self._rows[slot]) if self._rows[slot] >= 0 else None,
+            })
+        return results
+
+    def fingerprint_stats(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Per-fingerprint latency percentiles since the last reset, by total time spent."""
+        ranked = sorted(
+            (index for index, sketch in enumerate(self._sketches) if sketch.count),
+            key=lambda index: self._sketches[index].total_ms,
+            reverse=True,
+        )[:limit]
+        results = []
+        for index in ranked:
+            info, sketch = self._statements[index], self._sketches[index]
+            results.append({
+                "fingerprint": info.fingerprint,
+                "query_type": info.query_type,
+                "table_name": info.table_name,
+                "count": sketch.count,
+                "total_time_ms": sketch.total_ms,
+                "avg_execution_time_ms": sketch.mean_ms,
+                "p50_execution_time_ms": sketch.quantile(0.50),
+                "p95_execution_time_ms": sketch.quantile(0.95),
+                "p99_execution_time_ms": sketch.quantile(0.99),
+                "max_execution_time_ms": sketch.max_ms,
+            })
+        return results
+
+
+__all__ = [
+    "LatencySketch",
+    "QueryTelemetry",
+    "StatementInfo",
+    "describe_statement",
+]
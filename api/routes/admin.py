@@ -9,6 +9,7 @@ from sqlalchemy import and_, or_, text
 from api.orm_bootstrap import get_database_info, get_db
 from api.models import Job, JobStatusEnum
 from api.services.job_queue import job_queue
+from api.services.transcription_dedup import content_store, result_cache
 from api.routes.auth import get_current_admin_user as verify_token
 from api.settings import settings
 from api.app_state import get_app_state
@@ -311,6 +312,52 @@ async def get_job_stats(
         logger.error(f"Failed to get job stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ─── Upload Deduplication ─────────────────────────────────────────
+
+@router.get("/dedup/stats", response_model=Dict[str, Any])
+async def get_dedup_stats(
+    current_user: dict = Depends(verify_token),
+):
+    """Get content store and transcription result cache statistics."""
+    try:
+        return {
+            "result_cache": result_cache.stats(),
+            "content_store": content_store.stats(),
+        }
+    except Exception as e:
+        logger.error(f"Failed to get dedup stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/dedup/results")
+async def purge_dedup_results(
+    audio_sha256: Optional[str] = Query(None, min_length=64, max_length=64),
+    model: Optional[str] = Query(None),
+    older_than_days: Optional[int] = Query(None, ge=0),
+    include_unreferenced_audio: bool = Query(False),
+    current_user: dict = Depends(verify_token),
+):
+    """Purge cached transcription results, optionally filtered by audio hash, model or age."""
+    try:
+        removed = result_cache.purge(
+            audio_sha256=audio_sha256.lower() if audio_sha256 else None,
+            model=model,
+            older_than_seconds=older_than_days * 86400 if older_than_days is not None else None,
+        )
+        removed_blobs = content_store.purge_unreferenced() if include_unreferenced_audio else 0
+        
+        logger.info(
+            f"Admin {getattr(current_user, 'username', 'unknown')} purged {removed} cached results "
+            f"and {removed_blobs} unreferenced audio blobs"
+        )
+        return {
+            "message": "Deduplication cache purged",
+            "results_removed": removed,
+            "audio_blobs_removed": removed_blobs,
+        }
+    except Exception as e:
+        logger.error(f"Failed to purge dedup cache: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.get("/jobs/{job_id}", response_model=Dict[str, Any])
 async def get_job_details(
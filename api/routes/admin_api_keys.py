@@ -14,6 +14,7 @@ from pydantic import BaseModel, Field
 
 from api.orm_bootstrap import get_db
 from api.services.api_key_service import api_key_service, APIKeyUsageStats
+from api.services.api_key_cache import api_key_cache
 from api.services.users import get_current_admin
 from api.models import User
 from api.extended_models.api_keys import APIKey, APIKeyUsageLog, APIKeyStatus
@@ -297,6 +298,7 @@ def admin_revoke_api_key(
         api_key.revoked_reason = f"Admin revocation by {current_admin.username}: {request.reason}"
         
         db.commit()
+        api_key_cache.invalidate(api_key.key_hash)
         
         # Log the admin action
         logger.info(f"Admin {current_admin.username} revoked API key {key_id}. Reason: {request.reason}")
@@ -356,6 +358,7 @@ def suspend_api_key(
             api_key.metadata = suspension_info
         
         db.commit()
+        api_key_cache.invalidate(api_key.key_hash)
         
         logger.info(f"Admin {current_admin.username} suspended API key {key_id}. Reason: {reason}")
         
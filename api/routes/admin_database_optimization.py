@@ -481,6 +481,26 @@ async def get_realtime_slow_queries(limit: int = Query(10, ge=1, le=100), minute
         raise HTTPException(status_code=500, detail=f"Failed to get slow queries: {str(e)}")
 
 
+@router.get("/monitoring/fingerprints", response_model=Dict[str, Any])
+async def get_query_fingerprints(limit: int = Query(20, ge=1, le=200)):
+    """Get latency percentiles per statement fingerprint, by total time spent."""
+    try:
+        performance_monitor = get_performance_monitor()
+        
+        fingerprints = performance_monitor.get_query_fingerprints(limit)
+        
+        return {
+            "status": "success",
+            "fingerprints": fingerprints,
+            "limit": limit,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to get query fingerprints: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get query fingerprints: {str(e)}")
+
+
 @router.post("/monitoring/start", response_model=Dict[str, Any])
 async def start_monitoring(interval_seconds: int = Query(30, ge=10, le=300)):
     """Start database performance monitoring."""
@@ -3,14 +3,22 @@ Backup Management API - Admin Endpoints for Backup Operations
 
 This module provides a comprehensive backup system for database and file storage,
 supporting both manual and scheduled backups with retention policies.
+
+Uploads and transcripts are backed up as incremental snapshots in a
+content-addressed chunk store (see :mod:`api.services.backup_store`) and the
+database with its native online backup tooling (see
+:mod:`api.services.database_backup`). Backups made before those formats are
+still restored from their ``.tar.zst`` streams and SQL dumps.
 """
 
 import asyncio
 import contextlib
+import io
 import json
 import os
 import shutil
 import threading
+import time
 
 # Ensure environments without compiled Zstandard wheels can fall back to the CFFI backend.
 os.environ.setdefault("PYTHON_ZSTANDARD_IMPORT_POLICY", "cffi_fallback")
@@ -23,14 +31,23 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy import create_engine, text
-import aiofiles
+from sqlalchemy.orm import Session
 import schedule
 
 from api.orm_bootstrap import get_db
+from api.models import Job
 from api.settings import settings
 from api.routes.auth import get_current_admin_user
 from api.utils.logger import get_system_logger
 from api.paths import storage
+from api.services.backup_store import ContentAddressedBackupStore, SNAPSHOT_SUFFIX
+from api.services.database_backup import (
+    backup_database,
+    is_snapshot,
+    record_backup_metrics,
+    restore_database,
+    snapshot_suffix,
+)
 
 logger = get_system_logger("backup_service")
 
@@ -42,6 +59,11 @@ BACKUP_DIR = storage.backups_dir
 DB_BACKUP_DIR = BACKUP_DIR / "database"
 FILES_BACKUP_DIR = BACKUP_DIR / "files"
 MANIFEST_FILE = BACKUP_DIR / "backup_manifest.json"
+# Upload and transcript snapshots share one content-addressed chunk store
+backup_store = ContentAddressedBackupStore(
+    FILES_BACKUP_DIR,
+    workers=int(os.getenv("BACKUP_WORKERS", str(min(8, os.cpu_count() or 1)))),
+)
 
 # Create backup directories
 for directory in [BACKUP_DIR, DB_BACKUP_DIR, FILES_BACKUP_DIR]:
@@ -167,61 +189,75 @@ class BackupService:
         self._enqueue_scheduled_backup(backup_type)
         return True
 
-    async def _compress_directory(self, source_dir: Path, output_file: Path):
-        """Compress a directory using Zstandard compression."""
-        cctx = zstandard.ZstdCompressor(level=3)
-        with open(output_file, 'wb') as f:
-            with cctx.stream_writer(f) as compressor:
-                for file_path in source_dir.rglob('*'):
-                    if file_path.is_file():
-                        relative_path = file_path.relative_to(source_dir)
-                        file_info = {
-                            'path': str(relative_path),
-                            'size': file_path.stat().st_size
-                        }
-                        # Write file metadata
-                        compressor.write(json.dumps(file_info).encode() + b'\n')
-                        # Write file content
-                        async with aiofiles.open(file_path, 'rb') as src:
-                            while chunk := await src.read(8192):
-                                compressor.write(chunk)
+    def _latest_snapshot(self, kind: str) -> Optional[Path]:
+        """Return the newest completed snapshot manifest of ``kind``, if any."""
+        for backup in sorted(
+            self.manifest["backups"],
+            key=lambda x: datetime.fromisoformat(x["timestamp"]),
+            reverse=True
+        ):
+            path = backup.get("files", {}).get(kind)
+            if backup.get("status") == "completed" and path and path.endswith(SNAPSHOT_SUFFIX):
+                return Path(path)
+        return None
+
+    async def _snapshot_directory(self, kind: str, source_dir: Path, backup_id: str) -> Dict:
+        """Snapshot ``source_dir`` incrementally against the last snapshot of ``kind``."""
+        manifest_path = FILES_BACKUP_DIR / f"{backup_id}_{kind}{SNAPSHOT_SUFFIX}"
+        started = time.perf_counter()
+        stats = await asyncio.to_thread(
+            backup_store.snapshot,
+            source_dir,
+            manifest_path,
+            self._latest_snapshot(kind),
+        )
+        stats.update(record_backup_metrics(
+            kind, time.perf_counter() - started, stats["bytes"], stats["stored_bytes"]
+        ))
+        logger.info(
+            f"Snapshot {kind}: {stats['files']} files, {stats['reused_files']} unchanged, "
+            f"{stats['new_chunks']} new chunks ({stats['stored_bytes']} bytes stored)"
+        )
+        return {"manifest": str(manifest_path), "stats": stats}
+
+    async def _restore_directory(self, backup_file: Path, target_dir: Path):
+        """Restore a snapshot manifest, or a legacy ``.tar.zst`` stream archive."""
+        if backup_file.name.endswith(SNAPSHOT_SUFFIX):
+            await asyncio.to_thread(backup_store.restore, backup_file, target_dir)
+        else:
+            await self._decompress_directory(backup_file, target_dir)
 
     async def _decompress_directory(self, backup_file: Path, target_dir: Path):
-        """Decompress a Zstandard compressed backup."""
+        """Decompress a legacy Zstandard stream backup."""
+        await asyncio.to_thread(self._decompress_stream, backup_file, target_dir)
+
+    @staticmethod
+    def _decompress_stream(backup_file: Path, target_dir: Path):
         dctx = zstandard.ZstdDecompressor()
         target_dir.mkdir(parents=True, exist_ok=True)
-        
+
         with open(backup_file, 'rb') as f:
             with dctx.stream_reader(f) as decompressor:
+                # Buffered so metadata lines are not read one byte per call
+                reader = io.BufferedReader(decompressor, buffer_size=1024 * 1024)
                 while True:
-                    try:
-                        # Read file metadata
-                        metadata_line = b''
-                        while True:
-                            char = decompressor.read(1)
-                            if not char:
-                                return
-                            if char == b'\n':
+                    metadata_line = reader.readline()
+                    if not metadata_line.strip():
+                        return
+
+                    file_info = json.loads(metadata_line.decode())
+                    file_path = backup_store._target_path(target_dir, file_info['path'])
+                    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+                    # Read and write file content
+                    remaining = file_info['size']
+                    with open(file_path, 'wb') as dest:
+                        while remaining > 0:
+                            chunk = reader.read(min(remaining, 1024 * 1024))
+                            if not chunk:
                                 break
-                            metadata_line += char
-                        
-                        file_info = json.loads(metadata_line.decode())
-                        file_path = target_dir / file_info['path']
-                        file_path.parent.mkdir(parents=True, exist_ok=True)
-                        
-                        # Read and write file content
-                        remaining = file_info['size']
-                        with open(file_path, 'wb') as dest:
-                            while remaining > 0:
-                                chunk_size = min(remaining, 8192)
-                                chunk = decompressor.read(chunk_size)
-                                if not chunk:
-                                    break
-                                dest.write(chunk)
-                                remaining -= len(chunk)
-                    
-                    except EOFError:
-                        break
+                            dest.write(chunk)
+                            remaining -= len(chunk)
 
     async def create_backup(
         self,
@@ -238,30 +274,38 @@ class BackupService:
                 "timestamp": timestamp.isoformat(),
                 "description": description,
                 "status": "in_progress",
-                "files": {}
+                "files": {},
+                "stats": {}
             }
 
             # Database backup
             if backup_type in ["full", "database"]:
-                db_file = DB_BACKUP_DIR / f"{backup_id}_db.sql.zst"
-                await self._backup_database(db_file)
+                db_file = DB_BACKUP_DIR / f"{backup_id}_db{snapshot_suffix(str(settings.database_url))}"
+                backup_info["stats"]["database"] = await self._backup_database(db_file)
                 backup_info["files"]["database"] = str(db_file)
 
-            # Files backup (for full backups only)
+            # Files backup (for full backups only); unchanged files are not re-read
             if backup_type == "full":
-                # Backup uploads
-                uploads_backup = FILES_BACKUP_DIR / f"{backup_id}_uploads.tar.zst"
-                await self._compress_directory(storage.upload_dir, uploads_backup)
-                backup_info["files"]["uploads"] = str(uploads_backup)
-
-                # Backup transcripts
-                transcripts_backup = FILES_BACKUP_DIR / f"{backup_id}_transcripts.tar.zst"
-                await self._compress_directory(storage.transcripts_dir, transcripts_backup)
-                backup_info["files"]["transcripts"] = str(transcripts_backup)
-
-            backup_info["status"] = "completed"
-            self.manifest["backups"].append(backup_info)
-            self._save_manifest()
+                # Garbage collection must not run until these snapshots are recorded
+                await asyncio.to_thread(backup_store.acquire_lease)
+                try:
+                    for kind, source_dir in (
+                        ("uploads", storage.upload_dir),
+                        ("transcripts", storage.transcripts_dir),
+                    ):
+                        snapshot = await self._snapshot_directory(kind, source_dir, backup_id)
+                        backup_info["files"][kind] = snapshot["manifest"]
+                        backup_info["stats"][kind] = snapshot["stats"]
+
+                    backup_info["status"] = "completed"
+                    self.manifest["backups"].append(backup_info)
+                    self._save_manifest()
+                finally:
+                    backup_store.release_lease()
+            else:
+                backup_info["status"] = "completed"
+                self.manifest["backups"].append(backup_info)
+                self._save_manifest()
 
             # Apply retention policy
             await self.apply_retention_policy()
@@ -277,56 +321,19 @@ class BackupService:
                 self._save_manifest()
             raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
 
-    async def _backup_database(self, backup_file: Path):
-        """Create a compressed database backup."""
+    async def _backup_database(self, backup_file: Path) -> Dict:
+        """Create a consistent, compressed database snapshot."""
         try:
-            # Create a temporary SQL dump
-            temp_sql = BACKUP_DIR / f"temp_{uuid4()}.sql"
-            
-            # Get database URL from settings
-            db_url = str(settings.database_url)
-            
-            # Create engine for backup
-            engine = create_engine(db_url)
-            
-            # Dump schema and data
-            with engine.connect() as conn:
-                with open(temp_sql, 'w') as f:
-                    # Get schema
-                    schema_result = conn.execute(text("""
-                        SELECT sql FROM sqlite_master 
-                        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-                    """))
-                    for row in schema_result:
-                        f.write(f"{row[0]};\n")
-
-                    # Get data
-                    table_result = conn.execute(text("""
-                        SELECT name FROM sqlite_master 
-                        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-                    """))
-                    for table_row in table_result:
-                        table_name = table_row[0]
-                        data_result = conn.execute(text(f"SELECT * FROM {table_name}"))
-                        for data_row in data_result:
-                            values = [
-                                "'{}'".format(str(v).replace("'", "''")) if v is not None else "NULL"
-                                for v in data_row
-                            ]
-                            f.write(f"INSERT INTO {table_name} VALUES ({','.join(values)});\n")
-
-            # Compress the SQL dump
-            cctx = zstandard.ZstdCompressor(level=3)
-            with open(temp_sql, 'rb') as src, open(backup_file, 'wb') as dest:
-                cctx.copy_stream(src, dest)
-
-            # Cleanup
-            temp_sql.unlink()
-
+            stats = await asyncio.to_thread(
+                backup_database, str(settings.database_url), backup_file
+            )
+            logger.info(
+                f"Database snapshot written in {stats['duration_seconds']}s "
+                f"({stats['throughput_bytes_per_second']} bytes/s)"
+            )
+            return stats
         except Exception as e:
             logger.error(f"Database backup failed: {e}")
-            if "temp_sql" in locals() and temp_sql.exists():
-                temp_sql.unlink()
             raise
 
     async def restore_backup(
@@ -364,7 +371,7 @@ class BackupService:
                         shutil.rmtree(storage.upload_dir)
                     storage.upload_dir.mkdir(parents=True, exist_ok=True)
                     # Restore uploads
-                    await self._decompress_directory(
+                    await self._restore_directory(
                         Path(backup["files"]["uploads"]),
                         storage.upload_dir
                     )
@@ -375,7 +382,7 @@ class BackupService:
                         shutil.rmtree(storage.transcripts_dir)
                     storage.transcripts_dir.mkdir(parents=True, exist_ok=True)
                     # Restore transcripts
-                    await self._decompress_directory(
+                    await self._restore_directory(
                         Path(backup["files"]["transcripts"]),
                         storage.transcripts_dir
                     )
@@ -392,8 +399,84 @@ class BackupService:
             logger.error(f"Restore failed: {e}")
             raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
 
+    async def restore_job(
+        self,
+        backup_id: str,
+        job_id: str,
+        upload_path: Optional[Path] = None,
+        transcript_path: Optional[Path] = None,
+    ) -> Dict:
+        """Restore one job's upload and transcripts from a snapshot backup.
+
+        Only the objects of the selected files are read, and nothing else in
+        the upload or transcript directories is touched.
+        """
+        backup = next(
+            (b for b in self.manifest["backups"] if b["id"] == backup_id),
+            None
+        )
+        if not backup:
+            raise HTTPException(status_code=404, detail="Backup not found")
+
+        selections = {
+            "uploads": (storage.upload_dir, self._relative_paths(storage.upload_dir, upload_path)),
+            "transcripts": (
+                storage.transcripts_dir,
+                self._relative_paths(storage.transcripts_dir, transcript_path) | {f"{job_id}/"},
+            ),
+        }
+        restored = {}
+        for kind, (target_dir, wanted) in selections.items():
+            manifest_path = backup.get("files", {}).get(kind)
+            if not wanted or not manifest_path:
+                continue
+            if not manifest_path.endswith(SNAPSHOT_SUFFIX):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Backup {backup_id} predates snapshots; use a full restore"
+                )
+            restored[kind] = await asyncio.to_thread(
+                backup_store.restore,
+                Path(manifest_path),
+                target_dir,
+                lambda path, wanted=wanted: any(
+                    path == item or (item.endswith("/") and path.startswith(item))
+                    for item in wanted
+                ),
+            )
+
+        if not any(restored.values()):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Backup {backup_id} has no files for job {job_id}"
+            )
+        return {
+            "status": "success",
+            "message": f"Restored job {job_id} from backup {backup_id}",
+            "files": restored,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _relative_paths(root: Path, path: Optional[Path]) -> set:
+        """``path`` relative to ``root`` as a snapshot path, if it lies inside it."""
+        if path is None:
+            return set()
+        try:
+            return {Path(path).resolve().relative_to(root.resolve()).as_posix()}
+        except ValueError:
+            return set()
+
     async def _restore_database(self, backup_file: Path):
-        """Restore database from backup."""
+        """Restore database from a snapshot, or replay a legacy SQL dump."""
+        if is_snapshot(backup_file):
+            try:
+                await asyncio.to_thread(restore_database, str(settings.database_url), backup_file)
+            except Exception as e:
+                logger.error(f"Database restore failed: {e}")
+                raise
+            return
+
         try:
             # Decompress backup
             temp_sql = BACKUP_DIR / f"temp_{uuid4()}.sql"
@@ -470,9 +553,22 @@ class BackupService:
             self.manifest["backups"] = retained_backups
             self._save_manifest()
 
+            # Drop chunks that only deleted snapshots referenced, including
+            # collections deferred earlier because a backup was in progress
+            removed_objects = 0
+            if deleted_backups or backup_store.gc_deferred:
+                live_snapshots = [
+                    Path(path)
+                    for backup in retained_backups
+                    for path in backup["files"].values()
+                    if path.endswith(SNAPSHOT_SUFFIX)
+                ]
+                removed_objects = await asyncio.to_thread(backup_store.collect_garbage, live_snapshots)
+
             return {
                 "retained": len(retained_backups),
-                "deleted": len(deleted_backups)
+                "deleted": len(deleted_backups),
+                "removed_objects": removed_objects
             }
 
         except Exception as e:
@@ -503,7 +599,8 @@ async def backup_status(
             "backup_dir": str(BACKUP_DIR),
             "storage_usage": {
                 "database": sum(p.stat().st_size for p in DB_BACKUP_DIR.glob("*")),
-                "files": sum(p.stat().st_size for p in FILES_BACKUP_DIR.glob("*"))
+                "files": sum(p.stat().st_size for p in FILES_BACKUP_DIR.glob("*") if p.is_file()),
+                "objects": await asyncio.to_thread(backup_store.disk_usage)
             }
         }
     except Exception as e:
@@ -553,6 +650,28 @@ async def restore_backup(
         logger.error(f"Error initiating restore: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@backup_router.post("/restore/{backup_id}/jobs/{job_id}")
+async def restore_job(
+    backup_id: str,
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Restore the upload and transcripts of a single job from a backup."""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    try:
+        return await backup_service.restore_job(
+            backup_id=backup_id,
+            job_id=job_id,
+            upload_path=Path(job.saved_filename) if job and job.saved_filename else None,
+            transcript_path=Path(job.transcript_path) if job and job.transcript_path else None,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error restoring job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @backup_router.get("/list")
 async def list_backups(
     current_user: dict = Depends(get_current_admin_user)
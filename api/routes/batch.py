@@ -290,7 +290,7 @@ async def start_batch_processing(
             )
         
         # Start processing asynchronously
-        asyncio.create_task(batch_processor.start_batch_processing(batch_id, db))
+        asyncio.create_task(batch_processor.start_batch_processing(batch_id))
         
         logger.info(f"User {current_user.id} started batch processing for {batch_id}")
         
@@ -411,12 +411,8 @@ async def delete_batch(
         if batch_dir.exists():
             shutil.rmtree(batch_dir)
         
-        # Remove from active batches
-        if batch_id in batch_processor.active_batches:
-            del batch_processor.active_batches[batch_id]
-        
-        if batch_id in batch_processor.processing_semaphores:
-            del batch_processor.processing_semaphores[batch_id]
+        # Remove from active batches and the scheduler
+        batch_processor.discard_batch(batch_id)
         
         logger.info(f"User {current_user.id} deleted batch {batch_id}")
         
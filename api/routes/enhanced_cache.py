@@ -327,7 +327,7 @@ async def get_cache_entry_details(
             "status_code": entry.status_code,
             "created_at": entry.created_at.isoformat(),
             "expires_at": entry.expires_at.isoformat(),
-            "hit_count": entry.hit_count,
+            "hit_count": await cache_service.get_hit_count(full_key),
             "tags": entry.tags,
             "headers": entry.headers
         }
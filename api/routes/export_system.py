@@ -559,6 +559,7 @@ async def get_user_batch_exports(
 @router.get("/batch/{batch_export_id}/download")
 async def download_batch_export(
     batch_export_id: int,
+    stream: bool = Query(False, description="Render and stream the ZIP now if the archive is not ready"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -571,6 +572,20 @@ async def download_batch_export(
     if batch_export.created_by != current_user.get("sub") and not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Access denied to this batch export")
     
+    archive_ready = (
+        batch_export.is_complete()
+        and batch_export.archive_path
+        and os.path.exists(batch_export.archive_path)
+    )
+    if stream and not archive_ready:
+        # Entries are sent as each export finishes rendering
+        filename = f"{batch_export.name}_{batch_export.export_format}_batch.zip".replace('"', "")
+        return StreamingResponse(
+            BatchExportService.stream_batch_archive(db, batch_export),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    
     # Check if batch export is complete
     if not batch_export.is_complete():
         raise HTTPException(status_code=400, detail="Batch export is not completed yet")
@@ -7,17 +7,28 @@ Enhanced with audit logging for T026 Security Hardening.
 # T026 Security: Fixed log injection vulnerability
 from api.utils.log_sanitization import safe_log_format, sanitize_for_log
 
-from typing import Dict, Any, Optional
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Any, Optional
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from api.orm_bootstrap import get_db
+from api.orm_bootstrap import SessionLocal, get_db
 from api.models import Job, JobStatusEnum
 from api.routes.dependencies import get_authenticated_user_id
 from api.services.job_queue import job_queue
 from api.settings import settings
 from api.utils.logger import get_system_logger
 from api.services.cache_hooks import job_cache_manager, cache_invalidator
+from api.services.job_events import is_terminal_status, job_etag, job_event_broker, job_state_event
+from api.services.transcript_index import transcript_index
+from api.services.transcription_dedup import content_store, result_cache
+from api.services.transcript_storage import TranscriptFile
+from api.paths import storage
+from api.utils.upload_streaming import UploadTooLargeError, stream_upload_to_path
+from api.utils.app_pagination import CachedCounter, CursorGenerator, apply_keyset_filter
 import uuid
 from datetime import datetime
 
@@ -37,6 +48,9 @@ logger = get_system_logger("jobs_api")
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+# Per-user job totals for list_jobs; dropped locally on create/delete.
+job_count_cache = CachedCounter(ttl_seconds=30.0)
+
 
 def _normalize_upload_filename(filename: Optional[str]) -> str:
     """Collapse user provided filenames to a safe, filesystem-friendly form."""
@@ -52,6 +66,87 @@ def _normalize_upload_filename(filename: Optional[str]) -> str:
     sanitized = sanitized.strip("._")
     return sanitized or "upload.bin"
 
+# Idle SSE streams send a comment and re-read the job this often, so a missed
+# event (e.g. Redis unavailable) delays an update by at most this long.
+EVENT_STREAM_REFRESH_SECONDS = 15.0
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True when an ``If-None-Match`` header covers ``etag``."""
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Encode a job event as a Server-Sent Events message."""
+
+    event_type = "status" if event.get("etag") else "progress"
+    return f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def _index_transcript_file(job_id: str, transcript_path: Path, user_id: Optional[str]) -> None:
+    """Add a finished transcript to the search index; blocking."""
+
+    transcript_index.index_document(
+        job_id, transcript_path.read_text(encoding="utf-8"), user_id=user_id
+    )
+
+
+def _load_job_state(job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Read the current job state with a short-lived session.
+
+    With ``user_id``, jobs owned by someone else read as missing.
+    """
+
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job or (user_id is not None and job.user_id != user_id):
+            return None
+        return job_state_event(job)
+    finally:
+        db.close()
+
+
+async def _job_event_stream(job_id: str, request: Request) -> AsyncIterator[str]:
+    """Yield the current job state, then each change until the job finishes."""
+
+    with job_event_broker.subscribe(job_id) as queue:
+        # Subscribed before reading, so no transition can slip in between.
+        state = _load_job_state(job_id)
+        if state is None:
+            return
+        last_etag = state["etag"]
+        yield _format_sse(state)
+
+        while not is_terminal_status(state.get("status")):
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENT_STREAM_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                event = _load_job_state(job_id)
+                if event is None:
+                    return
+                if event["etag"] == last_etag:
+                    yield ": keepalive\n\n"
+                    continue
+
+            if event.get("etag"):
+                if event["etag"] == last_etag:
+                    continue  # Same transition relayed by the notifier and the worker
+                last_etag = event["etag"]
+                state = event
+            yield _format_sse(event)
+
 @router.post("/", response_model=Dict[str, Any])
 async def create_job(
     request: Request,
@@ -94,9 +189,18 @@ async def create_job(
                                      sanitize_for_log(", ".join(allowed_extensions)))
             )
         
-        # Validate file size
-        content = await file.read()
-        if len(content) > settings.max_file_size:
+        # Stream the upload to disk, enforcing the size limit as bytes arrive
+        file_id = str(uuid.uuid4())
+        safe_filename = _normalize_upload_filename(file.filename)
+        file_path = settings.upload_dir / f"{file_id}_{safe_filename}"
+
+        try:
+            stored = await stream_upload_to_path(
+                file,
+                file_path,
+                max_bytes=settings.max_file_size,
+            )
+        except UploadTooLargeError:
             # Audit failed file upload
             audit_data_operation(
                 user_id=user_id or "anonymous",
@@ -111,13 +215,9 @@ async def create_job(
                 detail=safe_log_format("File too large. Maximum size: {} bytes", sanitize_for_log(settings.max_file_size))
             )
         
-        # Save uploaded file
-        file_id = str(uuid.uuid4())
-        safe_filename = _normalize_upload_filename(file.filename)
-        file_path = settings.upload_dir / f"{file_id}_{safe_filename}"
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Keep one copy of identical audio and look for a reusable transcript
+        duplicate_upload = await asyncio.to_thread(content_store.adopt, file_path, stored.sha256)
+        cached = await asyncio.to_thread(result_cache.get, stored.sha256, model, language)
         
         # Create job record
         job = Job(
@@ -129,20 +229,44 @@ async def create_job(
             user_id=user_id
         )
         
+        if cached is not None:
+            # Duplicate submission: complete immediately from the cached transcript
+            transcript_path = await asyncio.to_thread(
+                result_cache.link_transcript,
+                cached,
+                storage.get_transcript_dir(file_id) / "transcript.txt",
+            )
+            now = datetime.utcnow()
+            job.status = JobStatusEnum.COMPLETED
+            job.transcript_path = str(transcript_path)
+            job.started_at = now
+            job.finished_at = now
+        
         db.add(job)
         db.commit()
         db.refresh(job)
         
-        # Submit to job queue
-        queue_job_id = job_queue.submit_job(
-            "transcribe_audio",
-            audio_path=str(file_path),
-            model=model,
-            language=language,
-            job_id=file_id
-        )
+        if cached is not None:
+            queue_job_id = None
+            try:
+                await asyncio.to_thread(_index_transcript_file, file_id, transcript_path, user_id)
+            except Exception as exc:
+                logger.warning(safe_log_format("Failed to index transcript for job {}: {}", sanitize_for_log(file_id), exc))
+        else:
+            # Submit to job queue
+            queue_job_id = job_queue.submit_job(
+                "transcribe_audio",
+                audio_path=str(file_path),
+                model=model,
+                language=language,
+                job_id=file_id,
+                content_sha256=stored.sha256,
+                # The miss above is already counted; the worker only re-checks
+                result_cache_checked=True
+            )
         
         # Invalidate cache for job lists since a new job was created
+        job_count_cache.invalidate(user_id)
         await job_cache_manager.job_created(file_id, {
             "status": job.status.value,
             "filename": file.filename,
@@ -152,9 +276,11 @@ async def create_job(
         
         logger.info(
             safe_log_format(
-                "Created transcription job {} for file {}",
+                "Created transcription job {} for file {} ({} bytes, sha256 {})",
                 sanitize_for_log(file_id),
                 sanitize_for_log(safe_filename),
+                stored.size,
+                stored.sha256,
             )
         )
         
@@ -163,7 +289,11 @@ async def create_job(
             "status": job.status.value,
             "message": "Job created successfully",
             "queue_job_id": queue_job_id,
-            "user_id": user_id
+            "user_id": user_id,
+            "file_size": stored.size,
+            "content_sha256": stored.sha256,
+            "duplicate_upload": duplicate_upload,
+            "result_cached": cached is not None,
         }
     
     except HTTPException:
@@ -176,16 +306,32 @@ async def create_job(
 @router.get("/{job_id}", response_model=Dict[str, Any])
 async def get_job(
     job_id: str,
+    request: Request,
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated extras; 'transcript' returns the full text"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_authenticated_user_id)
 ):
-    """Get job status and details."""
+    """Get job status and details.
+
+    Responses carry an ``ETag``; a matching ``If-None-Match`` is answered with
+    ``304 Not Modified`` before the result backend or transcript is touched.
+    The transcript is a preview (see ``transcript_truncated`` and
+    ``transcript_size_bytes``) unless ``?include=transcript`` is given; the
+    full file is served by ``transcript_download_url``.
+    """
     try:
         job = db.query(Job).filter(Job.id == job_id).first()
 
         if not job or job.user_id != user_id:
             raise HTTPException(status_code=404, detail="Job not found")
 
+        include_transcript = "transcript" in {part.strip() for part in (include or "").split(",")}
+        # The full-transcript body is a different representation, so it gets its own tag
+        etag = job_etag(job, "transcript" if include_transcript else "")
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
         # Get queue status if available
         try:
             queue_job = job_queue.get_job(job.id)
@@ -194,14 +340,21 @@ async def get_job(
             queue_status = None
 
         transcript_content = None
+        transcript_truncated = False
+        transcript_size = None
         transcript_download_url = None
         transcript_filename = None
         if getattr(job, "transcript_path", None):
             transcript_path = Path(job.transcript_path)
             try:
-                resolved_path = transcript_path.expanduser().resolve()
-                if resolved_path.exists():
-                    transcript_content = resolved_path.read_text(encoding="utf-8")
+                transcript = TranscriptFile.open(transcript_path.expanduser().resolve())
+                if transcript is not None:
+                    with transcript:
+                        if include_transcript:
+                            transcript_content = transcript.read_text()
+                        else:
+                            transcript_content, transcript_truncated = transcript.preview()
+                        transcript_size = transcript.size
                     transcript_download_url = safe_log_format(
                         "/transcripts/{}/download",
                         sanitize_for_log(job.id),
@@ -216,6 +369,7 @@ async def get_job(
                     )
                 )
 
+        response.headers["ETag"] = etag
         return {
             "job_id": job.id,
             "original_filename": job.original_filename,
@@ -232,6 +386,8 @@ async def get_job(
                 else None
             ),
             "transcript": transcript_content,
+            "transcript_truncated": transcript_truncated,
+            "transcript_size_bytes": transcript_size,
             "transcript_path": transcript_filename,
             "transcript_download_url": transcript_download_url,
             "error_message": getattr(job, "error_message", None)
@@ -242,36 +398,126 @@ async def get_job(
         logger.error(f"Failed to get job {job_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve job")
 
+@router.get("/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    request: Request,
+    timeout: float = Query(default=30.0, ge=0, le=300),
+    user_id: str = Depends(get_authenticated_user_id)
+):
+    """Deliver job state changes without polling.
+
+    With ``Accept: text/event-stream`` the current state is sent as a
+    Server-Sent Event followed by every transition until the job finishes.
+    Otherwise the request long-polls: the state is returned at once if it
+    differs from ``If-None-Match``, else the call waits up to ``timeout``
+    seconds for the next transition and answers ``304`` if none arrives.
+
+    No database session is held while waiting; each read opens its own.
+    """
+    if "text/event-stream" in request.headers.get("accept", ""):
+        if _load_job_state(job_id, user_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return StreamingResponse(
+            _job_event_stream(job_id, request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    with job_event_broker.subscribe(job_id) as queue:
+        state = _load_job_state(job_id, user_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        etag = state["etag"]
+        if not _etag_matches(request.headers.get("if-none-match"), etag):
+            return JSONResponse(state, headers={"ETag": etag})
+
+        if not is_terminal_status(state["status"]):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), min(remaining, EVENT_STREAM_REFRESH_SECONDS)
+                    )
+                except asyncio.TimeoutError:
+                    # Re-check with a fresh session in case a notification was missed
+                    event = _load_job_state(job_id)
+                    if event is None:
+                        break
+                if event.get("etag") and event["etag"] != etag:
+                    return JSONResponse(event, headers={"ETag": event["etag"]})
+
+    return Response(status_code=304, headers={"ETag": etag})
+
 @router.get("/", response_model=Dict[str, Any])
 async def list_jobs(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, max_length=500),
+    include_total: bool = True,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_authenticated_user_id)
 ):
-    """List all jobs."""
-    jobs = (
-        db.query(Job)
+    """List the caller's jobs, newest first.
+
+    Pages are keyset-paginated on ``(created_at, id)``: pass ``next_cursor``
+    from the previous page as ``cursor``. ``skip`` is kept for older clients
+    and ignored when a cursor is given. ``total`` comes from a short-lived
+    per-user cache and is omitted when ``include_total`` is false.
+    """
+    query = (
+        db.query(Job.id, Job.original_filename, Job.status, Job.created_at)
         .filter(Job.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
-    total = db.query(Job).filter(Job.user_id == user_id).count()
-    
+
+    if cursor:
+        try:
+            cursor_data = CursorGenerator.parse_cursor(cursor)
+            if cursor_data.get("sort_by") != "created_at" or "id" not in cursor_data:
+                raise ValueError("Invalid cursor format")
+            query = apply_keyset_filter(query, Job.created_at, Job.id, cursor_data, "desc")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    query = query.order_by(Job.created_at.desc(), Job.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # One extra row tells us whether another page exists without counting.
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = CursorGenerator.generate_cursor(last.id, last.created_at, "created_at", "desc")
+
+    total = None
+    if include_total:
+        total = job_count_cache.get_or_count(
+            user_id,
+            lambda: db.query(func.count(Job.id)).filter(Job.user_id == user_id).scalar() or 0,
+        )
+
     return {
         "jobs": [
             {
-                "job_id": job.id,
-                "original_filename": job.original_filename,
-                "status": job.status.value,
-                "created_at": job.created_at.isoformat() if job.created_at else None
+                "job_id": row.id,
+                "original_filename": row.original_filename,
+                "status": row.status.value,
+                "created_at": row.created_at.isoformat() if row.created_at else None
             }
-            for job in jobs
+            for row in rows
         ],
         "total": total,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": has_more
     }
 
 @router.delete("/{job_id}")
@@ -294,13 +540,14 @@ async def delete_job(
     db.commit()
     
     # Invalidate related caches
+    job_count_cache.invalidate(user_id)
     await job_cache_manager.job_deleted(job_id)
     
-    logger.info(safe_log_format("Deleted job {}", sanitize_for_log(job_id)))
-    
-    return {"message": "Job deleted successfully"}
-    db.delete(job)
-    db.commit()
+    # Drop the transcript from the search index
+    try:
+        await asyncio.to_thread(transcript_index.remove_document, job_id)
+    except Exception as exc:
+        logger.warning(safe_log_format("Failed to remove job {} from search index: {}", sanitize_for_log(job_id), exc))
     
     logger.info(safe_log_format("Deleted job {}", sanitize_for_log(job_id)))
     
@@ -5,7 +5,7 @@ from __future__ import annotations
 from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from api.orm_bootstrap import get_db
@@ -38,7 +38,11 @@ async def download_transcript(
     db: Session = Depends(get_db),
     user_id: str = Depends(get_authenticated_user_id),
 ):
-    """Stream the transcript file after enforcing ownership checks."""
+    """Stream the transcript file after enforcing ownership checks.
+
+    ``FileResponse`` answers ``Range`` requests with ``206 Partial Content``
+    and hands the path to servers supporting ``http.response.pathsend``.
+    """
     transcript_path = await transcript_service.get_transcript_path(job_id=job_id, user_id=user_id, db=db)
 
     logger.info("User %s downloading transcript %s", user_id, job_id)
@@ -54,9 +58,10 @@ async def read_transcript_text(
     job_id: str,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_authenticated_user_id),
-) -> PlainTextResponse:
+) -> FileResponse:
     """Return only the transcript text, primarily for legacy clients."""
-    transcript = await transcript_service.get_transcript(job_id=job_id, user_id=user_id, db=db)
-    if "transcript" not in transcript:
+    transcript_path = await transcript_service.get_transcript_path(job_id=job_id, user_id=user_id, db=db)
+    if not transcript_path.is_file():
         raise HTTPException(status_code=404, detail="Transcript not available")
-    return PlainTextResponse(transcript["transcript"], media_type="text/plain; charset=utf-8")
+    # Served from the file like downloads, inline and with Range support
+    return FileResponse(transcript_path, media_type="text/plain; charset=utf-8")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Batched audit log writer.
+
+Request handlers record audit rows with ``audit_sink.record(Model, **values)``,
+which only appends to a bounded in-memory queue.  A background thread drains
+the queue and writes each batch as one multi-row INSERT per table in a single
+transaction, flushing when ``AUDIT_SINK_BATCH_SIZE`` rows are waiting or
+``AUDIT_SINK_FLUSH_INTERVAL`` seconds after the first queued row, whichever
+comes first.  Requests therefore never wait on the database write lock.
+
+When the queue is full ``AUDIT_SINK_OVERFLOW_POLICY`` decides whether the
+oldest queued row (``drop_oldest``, the default) or the new row
+(``drop_newest``) is discarded; drops are counted in
+``audit_sink_events_total{outcome="dropped"}``.  ``stop()`` flushes whatever
+is still queued, so a clean shutdown loses nothing; rows recorded after it are
+written directly by the caller instead of restarting the writer thread.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram  # type: ignore
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("audit_sink")
+
+QUEUE_SIZE = int(os.getenv("AUDIT_SINK_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("AUDIT_SINK_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("AUDIT_SINK_FLUSH_INTERVAL", "1.0"))
+OVERFLOW_POLICY = os.getenv("AUDIT_SINK_OVERFLOW_POLICY", "drop_oldest")
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_sink_queue_depth",
+    "Audit rows waiting to be written",
+)
+AUDIT_EVENTS = Counter(
+    "audit_sink_events_total",
+    "Audit rows by outcome (written, dropped, failed)",
+    ["outcome"],
+)
+AUDIT_FLUSH_SECONDS = Histogram(
+    "audit_sink_flush_seconds",
+    "Time taken to write one batch of audit rows",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# Called with the open session and the rows of one table after they are inserted
+Rollup = Callable[[Session, List[Dict[str, Any]]], None]
+
+
+class AuditSink:
+    """Bounded queue of audit rows written in batches by a background thread."""
+
+    def __init__(
+        self,
+        maxsize: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        overflow_policy: str = OVERFLOW_POLICY,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ):
+        if overflow_policy not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown audit sink overflow policy: {overflow_policy}")
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[Tuple[Any, Dict[str, Any]]]" = queue.Queue(maxsize=max(1, maxsize))
+        self._rollups: Dict[Any, Rollup] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._stopped = False
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.dropped = 0
+
+    def register_rollup(self, model: Any, rollup: Rollup) -> None:
+        """Run ``rollup`` in the same transaction after each batch of ``model`` rows."""
+        self._rollups[model] = rollup
+
+    def record(self, model: Any, **values: Any) -> None:
+        """Queue one ``model`` row; never raises, and only blocks once stopped."""
+        item = (model, values)
+        if self._stopped:
+            # No writer thread after stop(); write the late row here rather than restart it
+            try:
+                self._write([item])
+            except Exception as e:
+                AUDIT_EVENTS.labels(outcome="failed").inc()
+                logger.error(f"Failed to write audit row after shutdown: {e}")
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow_policy == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    pass
+            self._count_drop()
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        if self._thread is None:
+            self.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start the writer thread if it is not running."""
+        with self._start_lock:
+            self._stopped = False
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="audit-sink")
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer thread and write every row still queued.
+
+        ``record()`` does not restart the thread afterwards; call ``start()``
+        to resume batching.
+        """
+        self._stopped = True
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write the rows queued right now from the calling thread; returns rows written.
+
+        A batch the writer thread has already taken is written by that thread;
+        use ``stop()`` to wait for it as well.
+        """
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _drain(self, limit: int) -> List[Tuple[Any, Dict[str, Any]]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        rows_by_model: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for model, values in batch:
+            rows_by_model[model].append(values)
+
+        started = time.perf_counter()
+        with self._write_lock:
+            db = self._new_session()
+            try:
+                for model, rows in rows_by_model.items():
+                    # Rows of one table can carry different columns; insert each shape together
+                    by_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+                    for row in rows:
+                        by_columns[tuple(sorted(row))].append(row)
+                    for shaped_rows in by_columns.values():
+                        db.execute(insert(model), shaped_rows)
+                    rollup = self._rollups.get(model)
+                    if rollup is not None:
+                        rollup(db, rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                AUDIT_EVENTS.labels(outcome="failed").inc(len(batch))
+                logger.error(f"Failed to write {len(batch)} audit rows: {e}")
+                return 0
+            finally:
+                db.close()
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        AUDIT_EVENTS.labels(outcome="written").inc(len(batch))
+        return len(batch)
+
+    def _new_session(self) -> Session:
+        if self._session_factory is not None:
+            return self._session_factory()
+        # Looked up on each write so a rebound SessionLocal (tests, reconfiguration) is honoured
+        from api import orm_bootstrap
+
+        return orm_bootstrap.SessionLocal()
+
+    def _count_drop(self) -> None:
+        self.dropped += 1
+        AUDIT_EVENTS.labels(outcome="dropped").inc()
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            logger.warning(
+                f"Audit sink queue full ({self._queue.maxsize} rows); {self.dropped} rows dropped so far"
+            )
+
+
+# Global audit sink
+audit_sink = AuditSink()
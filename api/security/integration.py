@@ -19,6 +19,7 @@ from api.security.audit_models import (
     SecurityAuditLog, APIKeyAudit, SecurityIncident,
     AuditEventType, AuditSeverity
 )
+from api.security.audit_sink import audit_sink
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("security_integration")
@@ -35,7 +36,7 @@ class SecurityIntegrationService:
     def validate_and_audit_request(
         self,
         request: Request,
-        db: Session,
+        db: Optional[Session],
         user_id: Optional[str] = None,
         endpoint_type: str = "api"
     ) -> Dict[str, Any]:
@@ -85,16 +86,26 @@ class SecurityIntegrationService:
                 security_info
             )
         
-        # Log successful API access
+        # Log successful API access once the response status is known
         processing_time = int((time.time() - start_time) * 1000)
-        self._log_audit_event(
-            db, AuditEventType.API_ACCESS, AuditSeverity.LOW,
+        request.state.audit_access_row = self._audit_row(
+            AuditEventType.API_ACCESS, AuditSeverity.LOW,
             request, user_id, f"API access: {request.method} {request.url.path}",
             {"processing_time_ms": processing_time}
         )
         
         return security_info
     
+    def complete_request_audit(self, request: Request, status_code: int, processing_time: int):
+        """Record the API access row for ``request`` with its response status."""
+        row = getattr(request.state, "audit_access_row", None)
+        if row is None:
+            return
+        request.state.audit_access_row = None
+        row["response_status"] = status_code
+        row["processing_time_ms"] = processing_time
+        audit_sink.record(SecurityAuditLog, **row)
+    
     def log_authentication_event(
         self,
         db: Session,
@@ -211,7 +222,7 @@ class SecurityIntegrationService:
             request, admin_user_id, description, audit_details
         )
     
-    def validate_api_key(self, api_key: str, db: Session, request: Request) -> Optional[Dict]:
+    def validate_api_key(self, api_key: str, db: Optional[Session], request: Request) -> Optional[Dict]:
         """Validate API key and log usage."""
         key_info = self.security.api_key_manager.validate_api_key(api_key)
         
@@ -321,8 +332,23 @@ class SecurityIntegrationService:
         description: str,
         details: Optional[Dict] = None
     ):
-        """Log audit event to database."""
-        audit_log = SecurityAuditLog(
+        """Queue an audit event for the batched audit writer."""
+        audit_sink.record(
+            SecurityAuditLog,
+            **self._audit_row(event_type, severity, request, user_id, description, details)
+        )
+    
+    def _audit_row(
+        self,
+        event_type: AuditEventType,
+        severity: AuditSeverity,
+        request: Request,
+        user_id: Optional[str],
+        description: str,
+        details: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Column values of a security audit log row."""
+        return dict(
             timestamp=datetime.utcnow(),
             event_type=event_type,
             severity=severity,
@@ -334,11 +360,8 @@ class SecurityIntegrationService:
             event_description=description,
             event_details=json.dumps(details) if details else None,
             risk_score=self._calculate_risk_score(event_type, severity, details),
-            response_status=200  # Will be updated by middleware
+            response_status=200
         )
-        
-        db.add(audit_log)
-        db.commit()
     
     def _log_api_key_usage(
         self,
@@ -348,7 +371,8 @@ class SecurityIntegrationService:
         key_info: Dict
     ):
         """Log API key usage to audit trail."""
-        api_audit = APIKeyAudit(
+        audit_sink.record(
+            APIKeyAudit,
             timestamp=datetime.utcnow(),
             api_key_id=api_key[:10] + "...",  # Partial key for security
             user_id=key_info["user_id"],
@@ -358,11 +382,8 @@ class SecurityIntegrationService:
             request_url=str(request.url),
             permissions_used=",".join(key_info["permissions"]),
             success=True,
-            response_time_ms=0  # Will be updated
+            response_time_ms=0
         )
-        
-        db.add(api_audit)
-        db.commit()
     
     def _create_security_incident(
         self,
@@ -374,7 +395,8 @@ class SecurityIntegrationService:
         source_ip: Optional[str] = None
     ):
         """Create a new security incident."""
-        incident = SecurityIncident(
+        audit_sink.record(
+            SecurityIncident,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
             incident_type=incident_type,
@@ -385,9 +407,6 @@ class SecurityIntegrationService:
             status="open"
         )
         
-        db.add(incident)
-        db.commit()
-        
         logger.warning(f"Security incident created: {title}")
     
     def _calculate_risk_score(
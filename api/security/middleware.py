@@ -1,28 +1,29 @@
 #!/usr/bin/env python3
 """
-T026 Security Hardening: Security Middleware
+T026 Security Hardening: Security Pipeline Stages
 Integrates comprehensive security features into FastAPI requests.
 """
 
-import time
 import json
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
 
-from api.orm_bootstrap import get_db
+from api.middlewares.pipeline import RequestContext, Stage
+from api.security.audit_sink import audit_sink
 from api.security.integration import security_service
 from api.security.comprehensive_security import SecurityHeadersMiddleware
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("security_middleware")
 
-class SecurityHardeningMiddleware(BaseHTTPMiddleware):
-    """Main security hardening middleware for T026."""
+class SecurityHardeningStage(Stage):
+    """Main security hardening pipeline stage for T026."""
     
-    def __init__(self, app, enable_audit_logging: bool = True):
-        super().__init__(app)
+    name = "security"
+    
+    def __init__(self, enable_audit_logging: bool = True):
         self.enable_audit_logging = enable_audit_logging
         self.exempt_paths = {
             "/health",
@@ -32,53 +33,45 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
             "/favicon.ico"
         }
     
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
         # Skip security checks for exempt paths
-        if request.url.path in self.exempt_paths:
-            return await call_next(request)
-        
-        # Get database session
-        db = next(get_db())
+        if ctx.path in self.exempt_paths:
+            return None
+        ctx.data["security_checked"] = True
         
-        try:
+        # Audit rows go through the batched audit sink, so no database session is held here
+        if self.enable_audit_logging:
+            request = ctx.request
             # Extract user information if available
             user_id = self._extract_user_id(request)
             
             # Determine endpoint type for rate limiting
-            endpoint_type = self._classify_endpoint(request.url.path)
+            endpoint_type = self._classify_endpoint(ctx.path)
             
             # Comprehensive security validation
-            if self.enable_audit_logging:
-                security_info = security_service.validate_and_audit_request(
-                    request, db, user_id, endpoint_type
-                )
-            
-            # Process the request
-            response = await call_next(request)
-            
-            # Add security headers
-            response = self._add_security_headers(response)
-            
+            security_service.validate_and_audit_request(
+                request, None, user_id, endpoint_type
+            )
+        return None
+    
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        if ctx.data.get("security_checked"):
+            self._add_security_headers(headers)
+    
+    async def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        if not ctx.data.get("security_checked") or not self.enable_audit_logging:
+            return
+        
+        processing_time = int(ctx.elapsed * 1000)
+        if exc is None:
             # Log successful request completion
-            if self.enable_audit_logging:
-                processing_time = int((time.time() - start_time) * 1000)
-                self._update_audit_log_response(db, request, response.status_code, processing_time)
-            
-            return response
-            
-        except Exception as e:
+            security_service.complete_request_audit(ctx.request, ctx.status_code or 500, processing_time)
+        else:
             # Log security exceptions
-            if self.enable_audit_logging:
-                processing_time = int((time.time() - start_time) * 1000)
-                self._log_security_exception(db, request, e, processing_time)
-            
-            # Re-raise the exception
-            raise
-        
-        finally:
-            db.close()
+            security_service.complete_request_audit(
+                ctx.request, getattr(exc, "status_code", 500), processing_time
+            )
+            self._log_security_exception(ctx.request, exc, processing_time)
     
     def _extract_user_id(self, request: Request) -> str:
         """Extract user ID from request if available."""
@@ -115,10 +108,10 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
         else:
             return "general"
     
-    def _add_security_headers(self, response: Response) -> Response:
+    def _add_security_headers(self, headers: MutableHeaders) -> None:
         """Add comprehensive security headers to response."""
         # Content Security Policy that supports modern frontend frameworks
-        response.headers["Content-Security-Policy"] = (
+        headers["Content-Security-Policy"] = (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline'; "  # Allow inline scripts for Vite/React
             "style-src 'self' 'unsafe-inline'; "   # Allow inline styles for Vite/React  
@@ -132,56 +125,25 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
         )
         
         # Security headers
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        headers["X-Frame-Options"] = "DENY"
+        headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-XSS-Protection"] = "1; mode=block"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
         
         # HSTS (HTTP Strict Transport Security)
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
         
         # Additional security headers
-        response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
-        response.headers["Cross-Origin-Embedder-Policy"] = "require-corp"
-        response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
-        response.headers["Cross-Origin-Resource-Policy"] = "same-origin"
-        
-        return response
-    
-    def _update_audit_log_response(
-        self,
-        db: Session,
-        request: Request,
-        status_code: int,
-        processing_time: int
-    ):
-        """Update the most recent audit log with response information."""
-        try:
-            # This is a simplified approach - in production you'd want to track the specific log entry
-            from api.security.audit_models import SecurityAuditLog
-            from sqlalchemy import desc
-            
-            # Get the most recent audit log for this IP
-            client_ip = security_service._get_client_ip(request)
-            latest_log = db.query(SecurityAuditLog).filter(
-                SecurityAuditLog.client_ip == client_ip,
-                SecurityAuditLog.request_url == str(request.url)
-            ).order_by(desc(SecurityAuditLog.timestamp)).first()
-            
-            if latest_log and latest_log.response_status is None:
-                latest_log.response_status = status_code
-                latest_log.processing_time_ms = processing_time
-                db.commit()
-                
-        except Exception as e:
-            logger.warning(f"Failed to update audit log response: {e}")
+        headers["X-Permitted-Cross-Domain-Policies"] = "none"
+        headers["Cross-Origin-Embedder-Policy"] = "require-corp"
+        headers["Cross-Origin-Opener-Policy"] = "same-origin"
+        headers["Cross-Origin-Resource-Policy"] = "same-origin"
     
     def _log_security_exception(
         self,
-        db: Session,
         request: Request,
-        exception: Exception,
+        exception: BaseException,
         processing_time: int
     ):
         """Log security-related exceptions."""
@@ -194,7 +156,8 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
             ])
             
             if security_related:
-                audit_log = SecurityAuditLog(
+                audit_sink.record(
+                    SecurityAuditLog,
                     timestamp=datetime.utcnow(),
                     event_type=AuditEventType.SECURITY_VIOLATION,
                     severity=AuditSeverity.HIGH,
@@ -213,47 +176,37 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
                     response_status=getattr(exception, "status_code", 500)
                 )
                 
-                db.add(audit_log)
-                db.commit()
-                
         except Exception as e:
             logger.error(f"Failed to log security exception: {e}")
 
-class SecurityAPIKeyMiddleware(BaseHTTPMiddleware):
-    """API key validation middleware."""
+class SecurityAPIKeyStage(Stage):
+    """API key validation pipeline stage."""
     
-    def __init__(self, app):
-        super().__init__(app)
+    name = "security_api_key"
+    
+    def __init__(self):
         self.protected_paths = {"/api/", "/admin/"}
     
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, ctx: RequestContext) -> Optional[Response]:
         # Check if this path requires API key authentication
-        requires_api_key = any(request.url.path.startswith(path) for path in self.protected_paths)
+        requires_api_key = any(ctx.path.startswith(path) for path in self.protected_paths)
         
         if requires_api_key:
+            request = ctx.request
             api_key = request.headers.get("x-api-key")
             if api_key:
-                # Get database session
-                db = next(get_db())
-                try:
-                    key_info = security_service.validate_api_key(api_key, db, request)
-                    if key_info:
-                        # Add user info to request state
-                        request.state.user_id = key_info["user_id"]
-                        request.state.api_permissions = key_info["permissions"]
-                finally:
-                    db.close()
+                key_info = security_service.validate_api_key(api_key, None, request)
+                if key_info:
+                    # Add user info to request state
+                    request.state.user_id = key_info["user_id"]
+                    request.state.api_permissions = key_info["permissions"]
         
-        return await call_next(request)
+        return None
 
-def create_security_middleware_stack():
-    """Create the complete security middleware stack for T026."""
-    def add_security_middlewares(app):
-        # Add security middlewares in order (last added = first executed)
-        app.add_middleware(SecurityAPIKeyMiddleware)
-        app.add_middleware(SecurityHardeningMiddleware, enable_audit_logging=True)
-        
-        logger.info("T026 Security Hardening middleware stack initialized")
-        return app
-    
-    return add_security_middlewares
\ No newline at end of file
+def create_security_stages(enable_audit_logging: bool = True) -> List[Stage]:
+    """Create the security pipeline stages for T026, in execution order."""
+    logger.info("T026 Security Hardening pipeline stages initialized")
+    return [
+        SecurityHardeningStage(enable_audit_logging=enable_audit_logging),
+        SecurityAPIKeyStage(),
+    ]
@@ -0,0 +1,376 @@
+"""
+In-process cache of verified API keys.
+
+Authenticating an API key used to cost a ``key_hash`` lookup plus two usage
+count queries per request.  ``APIKeyCache`` keeps what authentication needs
+for recently used keys, keyed by the SHA-256 hash of the key:
+
+* the permission set,
+* the IP allow-list compiled once into ``ipaddress`` networks, so CIDR ranges
+  such as ``10.0.0.0/8`` match as well as single addresses,
+* daily and monthly quota counters, seeded from the usage log when the entry
+  is loaded and counted in memory afterwards.
+
+Entries are bounded in number (least recently used evicted first) and expire
+after ``API_KEY_CACHE_TTL`` seconds, which also re-seeds the quota counters
+from the database and bounds how far replicas can drift apart.
+
+Revocation must not wait for the TTL: whoever changes a key calls
+``invalidate`` with its hash, which drops the local entry and publishes the
+hash on the ``api_key_invalidations`` Redis channel.  Every API replica
+subscribes to the channel (see ``start``) and drops the entry too.  While the
+subscription is down the cache is cleared on reconnect, because messages
+published in the meantime are lost.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from prometheus_client import Counter  # type: ignore
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("api_key_cache")
+
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "10000"))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+API_KEY_INVALIDATION_CHANNEL = "api_key_invalidations"
+
+API_KEY_CACHE_LOOKUPS = Counter(
+    "api_key_cache_lookups_total",
+    "Verified API key cache lookups by result (hit, miss, expired)",
+    ["result"],
+)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def compile_ip_allow_list(allowed_ips: Optional[Iterable[str]]) -> Tuple[IPNetwork, ...]:
+    """Parse addresses and CIDR ranges into networks; invalid entries are skipped."""
+    networks = []
+    for entry in allowed_ips or ():
+        try:
+            networks.append(ipaddress.ip_network(str(entry).strip(), strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid entry in API key IP allow-list: {entry!r}")
+    return tuple(networks)
+
+
+def ip_in_networks(client_ip: str, networks: Iterable[IPNetwork]) -> bool:
+    """Return True when ``client_ip`` falls inside any of ``networks``."""
+    try:
+        address = ipaddress.ip_address(client_ip)
+    except ValueError:
+        return False
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return any(address.version == network.version and address in network for network in networks)
+
+
+def _day_start(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_start(now: datetime) -> datetime:
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month_start: datetime) -> datetime:
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+@dataclass
+class VerifiedAPIKey:
+    """What request authentication needs to know about one active API key."""
+    id: int
+    key_id: str
+    key_hash: str
+    user_id: str
+    permissions: FrozenSet[str]
+    expires_at: Optional[datetime] = None
+    rate_limit_per_hour: Optional[int] = None
+    daily_quota: Optional[int] = None
+    monthly_quota: Optional[int] = None
+    allowed_networks: Tuple[IPNetwork, ...] = ()
+    daily_used: int = 0
+    monthly_used: int = 0
+    day_start: datetime = field(default_factory=lambda: _day_start(datetime.utcnow()))
+    month_start: datetime = field(default_factory=lambda: _month_start(datetime.utcnow()))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def from_model(cls, api_key: Any, daily_used: int = 0, monthly_used: int = 0) -> "VerifiedAPIKey":
+        return cls(
+            id=api_key.id,
+            key_id=api_key.key_id,
+            key_hash=api_key.key_hash,
+            user_id=api_key.user_id,
+            permissions=frozenset(api_key.permissions_list),
+            expires_at=api_key.expires_at,
+            rate_limit_per_hour=api_key.rate_limit_per_hour,
+            daily_quota=api_key.daily_quota,
+            monthly_quota=api_key.monthly_quota,
+            allowed_networks=compile_ip_allow_list(api_key.allowed_ips),
+            daily_used=daily_used,
+            monthly_used=monthly_used,
+        )
+
+    @property
+    def permissions_list(self) -> List[str]:
+        return sorted(self.permissions)
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        return self.expires_at is not None and self.expires_at < (now or datetime.utcnow())
+
+    def is_ip_allowed(self, client_ip: Optional[str]) -> bool:
+        """Keys without an allow-list (or requests without an IP) are not restricted."""
+        if not self.allowed_networks or not client_ip:
+            return True
+        return ip_in_networks(client_ip, self.allowed_networks)
+
+    def consume_quota(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Count one request against the daily and monthly quotas if both allow it."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            day_start, month_start = _day_start(now), _month_start(now)
+            if day_start > self.day_start:
+                self.day_start, self.daily_used = day_start, 0
+            if month_start > self.month_start:
+                self.month_start, self.monthly_used = month_start, 0
+
+            if self.daily_quota and self.daily_used >= self.daily_quota:
+                return {
+                    "allowed": False,
+                    "quota_type": "daily",
+                    "limit": self.daily_quota,
+                    "used": self.daily_used,
+                    "reset_time": self.day_start + timedelta(days=1),
+                }
+            if self.monthly_quota and self.monthly_used >= self.monthly_quota:
+                return {
+                    "allowed": False,
+                    "quota_type": "monthly",
+                    "limit": self.monthly_quota,
+                    "used": self.monthly_used,
+                    "reset_time": _next_month(self.month_start),
+                }
+
+            self.daily_used += 1
+            self.monthly_used += 1
+            return {"allowed": True}
+
+
+@dataclass
+class _CacheEntry:
+    key: VerifiedAPIKey
+    expires_at: float
+
+
+class APIKeyCache:
+    """Bounded LRU of verified keys with TTL and cross-replica invalidation."""
+
+    def __init__(
+        self,
+        max_entries: int = API_KEY_CACHE_SIZE,
+        ttl: float = API_KEY_CACHE_TTL,
+        channel: str = API_KEY_INVALIDATION_CHANNEL,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.channel = channel
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._instance_id = uuid.uuid4().hex
+        self._redis = None
+        self._sync_client = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations_published = 0
+        self.invalidations_received = 0
+
+    def get(self, key_hash: str) -> Optional[VerifiedAPIKey]:
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                self.misses += 1
+                API_KEY_CACHE_LOOKUPS.labels(result="miss").inc()
+                return None
+            if time.monotonic() >= entry.expires_at:
+                del self._entries[key_hash]
+                self.misses += 1
+                API_KEY_CACHE_LOOKUPS.labels(result="expired").inc()
+                return None
+            self._entries.move_to_end(key_hash)
+            self.hits += 1
+        API_KEY_CACHE_LOOKUPS.labels(result="hit").inc()
+        return entry.key
+
+    def put(self, key: VerifiedAPIKey) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key.key_hash] = _CacheEntry(key, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key.key_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key_hashes: Iterable[str]) -> int:
+        """Drop entries in this process only."""
+        removed = 0
+        with self._lock:
+            for key_hash in key_hashes:
+                if self._entries.pop(key_hash, None) is not None:
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, *key_hashes: str) -> None:
+        """Forget ``key_hashes`` here and on every other replica.
+
+        Called synchronously after a key is revoked, suspended, expired or
+        otherwise changed.  Publishing failures are logged; other replicas then
+        serve the old entry for at most ``ttl`` seconds.
+        """
+        key_hashes = tuple(h for h in key_hashes if h)
+        if not key_hashes:
+            return
+        self.discard(key_hashes)
+        try:
+            client = self._get_sync_client()
+            client.publish(
+                self.channel,
+                json.dumps({"origin": self._instance_id, "key_hashes": list(key_hashes)}),
+            )
+            self.invalidations_published += 1
+        except Exception as e:
+            logger.warning(f"Failed to publish API key invalidation: {e}")
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            import redis
+
+            self._sync_client = redis.Redis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                socket_timeout=1.0,
+                socket_connect_timeout=1.0,
+            )
+        return self._sync_client
+
+    async def start(self, redis_url: Optional[str] = None) -> bool:
+        """Subscribe to invalidations from other replicas; without Redis only local ones apply."""
+        if self._listener_task is not None:
+            return True
+        try:
+            import redis.asyncio as redis
+
+            client = redis.from_url(
+                redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                encoding="utf-8",
+                decode_responses=True
+            )
+            await client.ping()
+        except Exception as e:
+            logger.warning(f"Redis unavailable for API key invalidations, caching keys for {self.ttl}s: {e}")
+            return False
+
+        self._redis = client
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f"API key cache subscribed to {self.channel}")
+        return True
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # Invalidations published while unsubscribed are lost, so start clean.
+                self.clear()
+                async for message in pubsub.listen():
+                    self._apply_invalidation(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"API key invalidation subscription lost: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _apply_invalidation(self, data: Any) -> None:
+        if not data:
+            return
+        try:
+            message = json.loads(data)
+            key_hashes = message["key_hashes"]
+        except (TypeError, ValueError, KeyError):
+            logger.warning(f"Ignoring malformed API key invalidation message: {data!r}")
+            return
+        if message.get("origin") == self._instance_id:
+            return  # Already dropped locally before publishing
+
+        self.invalidations_received += 1
+        self.discard(key_hashes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations_published": self.invalidations_published,
+                "invalidations_received": self.invalidations_received,
+                "redis_connected": self._redis is not None,
+            }
+
+
+# Global cache shared by the API key service and the authentication middleware
+api_key_cache = APIKeyCache()
+
+
+__all__ = [
+    "API_KEY_INVALIDATION_CHANNEL",
+    "APIKeyCache",
+    "VerifiedAPIKey",
+    "api_key_cache",
+    "compile_ip_allow_list",
+    "ip_in_networks",
+]
@@ -8,7 +8,7 @@ import secrets
 import hashlib
 import hmac
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Tuple, Union
 from enum import Enum
 import uuid
 import json
@@ -19,10 +19,34 @@ from fastapi import HTTPException, status
 from pydantic import BaseModel, Field
 
 from api.extended_models.api_keys import APIKey, APIKeyUsageLog, APIKeyQuotaUsage, APIKeyStatus, APIKeyPermission
+from api.security.audit_sink import audit_sink
+from api.services.api_key_cache import VerifiedAPIKey, api_key_cache, compile_ip_allow_list, ip_in_networks
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("api_key_service")
 
+
+def _roll_up_key_usage(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Apply a batch of usage log rows to the usage statistics of their keys."""
+    by_key: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_key.setdefault(row["api_key_id"], []).append(row)
+    
+    for api_key_id, key_rows in by_key.items():
+        latest = max(key_rows, key=lambda row: row["timestamp"])
+        values: Dict[str, Any] = {
+            "usage_count": APIKey.usage_count + len(key_rows),
+            "last_used_at": latest["timestamp"],
+        }
+        if latest.get("client_ip"):
+            values["last_used_ip"] = latest["client_ip"]
+        if latest.get("user_agent"):
+            values["last_used_user_agent"] = latest["user_agent"]
+        db.query(APIKey).filter(APIKey.id == api_key_id).update(values, synchronize_session=False)
+
+
+audit_sink.register_rollup(APIKeyUsageLog, _roll_up_key_usage)
+
 class APIKeyCreateRequest(BaseModel):
     """Request model for creating API keys."""
     name: str = Field(..., min_length=1, max_length=255, description="User-friendly name for the API key")
@@ -194,16 +218,20 @@ class APIKeyManagementService:
     
     def validate_api_key(
         self,
-        db: Session,
+        db: Optional[Session],
         api_key: str,
         required_permission: Optional[str] = None,
         client_ip: Optional[str] = None
-    ) -> Optional[APIKey]:
+    ) -> Optional[VerifiedAPIKey]:
         """
         Validate an API key and check permissions.
         
+        Verified keys are served from ``api_key_cache``; the database is only
+        read when the key is not cached (``db`` may be None, in which case a
+        session is opened for the lookup).
+        
         Returns:
-            APIKey object if valid, None if invalid
+            VerifiedAPIKey if valid, None if invalid
         """
         if not api_key or not api_key.startswith(self.key_prefix):
             return None
@@ -211,45 +239,78 @@ class APIKeyManagementService:
         # Hash the provided key
         key_hash = self.hash_api_key(api_key)
         
-        # Find the key in database
-        db_key = db.query(APIKey).filter(
-            and_(
-                APIKey.key_hash == key_hash,
-                APIKey.status == APIKeyStatus.ACTIVE.value
-            )
-        ).first()
-        
-        if not db_key:
-            return None
-        
-        # Check expiration
-        if db_key.expires_at and db_key.expires_at < datetime.utcnow():
-            # Auto-expire the key
-            db_key.status = APIKeyStatus.EXPIRED.value
-            db.commit()
-            return None
+        verified = api_key_cache.get(key_hash)
+        if verified is not None and verified.is_expired():
+            api_key_cache.discard([key_hash])
+            verified = None
+        if verified is None:
+            verified = self._load_verified_key(db, key_hash)
+            if verified is None:
+                return None
+            api_key_cache.put(verified)
         
         # Check IP restrictions
-        if db_key.allowed_ips and client_ip:
-            if not self._is_ip_allowed(client_ip, db_key.allowed_ips):
-                logger.warning(f"API key {db_key.key_id} used from unauthorized IP: {client_ip}")
-                return None
+        if not verified.is_ip_allowed(client_ip):
+            logger.warning(f"API key {verified.key_id} used from unauthorized IP: {client_ip}")
+            return None
         
         # Check required permission
-        if required_permission and not db_key.has_permission(required_permission):
+        if required_permission and not verified.has_permission(required_permission):
             return None
         
-        return db_key
+        return verified
+    
+    def _load_verified_key(self, db: Optional[Session], key_hash: str) -> Optional[VerifiedAPIKey]:
+        """Read an active key and its current quota usage from the database."""
+        owns_session = db is None
+        if owns_session:
+            from api import orm_bootstrap
+            db = orm_bootstrap.SessionLocal()
+        try:
+            db_key = db.query(APIKey).filter(
+                and_(
+                    APIKey.key_hash == key_hash,
+                    APIKey.status == APIKeyStatus.ACTIVE.value
+                )
+            ).first()
+            
+            if not db_key:
+                return None
+            
+            # Check expiration
+            now = datetime.utcnow()
+            if db_key.expires_at and db_key.expires_at < now:
+                # Auto-expire the key
+                db_key.status = APIKeyStatus.EXPIRED.value
+                db.commit()
+                return None
+            
+            # Seed the quota counters; the cache counts from here on
+            verified = VerifiedAPIKey.from_model(db_key)
+            if db_key.daily_quota:
+                verified.daily_used = self._usage_count(db, db_key.id, verified.day_start)
+            if db_key.monthly_quota:
+                verified.monthly_used = self._usage_count(db, db_key.id, verified.month_start)
+            return verified
+        finally:
+            if owns_session:
+                db.close()
+    
+    def _usage_count(self, db: Session, api_key_id: int, start_time: datetime) -> int:
+        """Count usage log rows for a key since ``start_time``."""
+        return db.query(APIKeyUsageLog).filter(
+            APIKeyUsageLog.api_key_id == api_key_id,
+            APIKeyUsageLog.timestamp >= start_time
+        ).count()
     
     def _is_ip_allowed(self, client_ip: str, allowed_ips: List[str]) -> bool:
-        """Check if client IP is in allowed list."""
-        # Simple implementation - could be enhanced with CIDR support
-        return client_ip in allowed_ips
+        """Check if client IP is in the allowed addresses or CIDR ranges."""
+        return ip_in_networks(client_ip, compile_ip_allow_list(allowed_ips))
     
     def log_api_key_usage(
         self,
-        db: Session,
-        api_key: APIKey,
+        db: Optional[Session],
+        api_key: Union[APIKey, VerifiedAPIKey],
         method: str,
         endpoint: str,
         status_code: int,
@@ -262,13 +323,9 @@ class APIKeyManagementService:
         rate_limited: bool = False,
         quota_exceeded: bool = False
     ):
-        """Log API key usage."""
-        
-        # Update API key usage statistics
-        api_key.update_usage(client_ip, user_agent)
-        
-        # Create usage log entry
-        usage_log = APIKeyUsageLog(
+        """Queue an API key usage log row; usage statistics roll up when it is written."""
+        audit_sink.record(
+            APIKeyUsageLog,
             api_key_id=api_key.id,
             timestamp=datetime.utcnow(),
             method=method,
@@ -283,9 +340,6 @@ class APIKeyManagementService:
             rate_limited=rate_limited,
             quota_exceeded=quota_exceeded
         )
-        
-        db.add(usage_log)
-        db.commit()
     
     def get_user_api_keys(self, db: Session, user_id: str) -> List[APIKeyResponse]:
         """Get all API keys for a user."""
@@ -342,6 +396,7 @@ class APIKeyManagementService:
         api_key.revoked_reason = reason
         
         db.commit()
+        api_key_cache.invalidate(api_key.key_hash)
         
         logger.info(f"Revoked API key {key_id} for user {user_id}. Reason: {reason}")
         return True
@@ -436,6 +491,7 @@ class APIKeyManagementService:
         
         if count > 0:
             db.commit()
+            api_key_cache.invalidate(*(key.key_hash for key in expired_keys))
             logger.info(f"Marked {count} API keys as expired")
         
         return count
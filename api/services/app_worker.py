@@ -4,23 +4,44 @@ Unlike the original scaffolding, the worker now performs a full Whisper
 inference cycle.  Jobs are promoted to ``processing`` when dequeued, the
 configured checkpoint is loaded via :mod:`api.app_worker.bootstrap_model_assets`,
 audio is transcribed with Whisper, and the resulting text is persisted to the
-transcript directory.  Failures are captured in a per-job log file so that
-operations teams can diagnose missing checkpoints or inference errors.
+transcript directory together with a columnar sidecar of segment timings
+(see :mod:`api.services.transcript_segments`).  Failures are captured in a
+per-job log file so that operations teams can diagnose missing checkpoints or
+inference errors.
+
+Loaded models stay resident in :data:`api.services.model_registry.model_registry`
+so only the first job per model and device pays the checkpoint load; models
+listed in ``WHISPER_PRELOAD_MODELS`` are loaded when each worker process starts.
+
+Every state transition is published on the job events channel so clients
+streaming ``/jobs/{job_id}/events`` see it without polling.
 """
 
 from __future__ import annotations
 
 import importlib
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict
 
+from celery.signals import worker_process_init
 from celery.utils.log import get_task_logger
 
 from api.app_worker import bootstrap_model_assets, WhisperModelBootstrapError
 from api.models import Job, JobStatusEnum
 from api.orm_bootstrap import SessionLocal
 from api.paths import storage
+from api.services.job_events import job_state_event, publish_job_event_sync
+from api.services.model_registry import (
+    configured_preload_models,
+    model_registry,
+    preload_models,
+    resolve_device,
+)
+from api.services.transcript_index import transcript_index
+from api.services.transcript_segments import write_segments
+from api.services.transcription_dedup import hash_file, result_cache
 from api.worker import celery_app
 from api.utils.logger import bind_job_id, release_job_id
 
@@ -36,6 +57,33 @@ def _ensure_transcript_directory(job_id: str) -> Path:
     return transcript_dir
 
 
+def _write_transcript(transcript_path: Path, transcript_text: str) -> None:
+    """Write ``transcript_text`` atomically.
+
+    Transcripts may be hard-linked into the result cache, so they are replaced
+    via rename rather than truncated in place.
+    """
+
+    staging = transcript_path.with_name(f".{transcript_path.name}.tmp")
+    staging.write_text(transcript_text, encoding="utf-8")
+    os.replace(staging, transcript_path)
+
+
+def _write_segments(transcript_dir: Path, segments: Any, transcript_text: str) -> None:
+    """Store Whisper's segment timings next to the transcript.
+
+    The sidecar is optional for every consumer, so a failure is logged rather
+    than failing a job whose transcript has already been written.
+    """
+
+    if not segments:
+        return
+    try:
+        write_segments(transcript_dir, segments, transcript_text)
+    except Exception as exc:  # pragma: no cover - defensive logging only
+        LOGGER.warning("Failed to write segments for %s: %s", transcript_dir.name, exc)
+
+
 def _write_failure_log(job_id: str, error_message: str) -> str:
     """Persist a failure log for a job and return the file path as a string."""
 
@@ -47,6 +95,63 @@ def _write_failure_log(job_id: str, error_message: str) -> str:
     return str(log_path)
 
 
+def load_whisper_model(model_name: str, device: str) -> Any:
+    """Load the ``model_name`` checkpoint onto ``device``.
+
+    Used as the registry loader, so it only runs on a cache miss.
+    """
+
+    try:
+        bootstrap_model_assets()
+    except WhisperModelBootstrapError as exc:
+        raise RuntimeError(f"Whisper model assets unavailable: {exc}") from exc
+
+    model_path = storage.models_dir / f"{model_name}.pt"
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    whisper = importlib.import_module("whisper")
+
+    LOGGER.info("Loading Whisper model %s on %s", model_name, device)
+    model = whisper.load_model(model_name, download_root=str(storage.models_dir))
+    return model.to(device)
+
+
+def _cache_transcript(job: Job, audio_sha256: str, language: str | None, transcript_path: Path) -> None:
+    """Publish the finished transcript for reuse by duplicate submissions."""
+
+    try:
+        result_cache.put(audio_sha256, job.model, language, None, transcript_path, job.id)
+    except Exception as exc:
+        LOGGER.warning("Unable to cache transcript for job %s: %s", job.id, exc)
+
+
+def _index_transcript(job: Job, transcript_text: str) -> None:
+    """Add the finished transcript to the search index without failing the job."""
+
+    try:
+        transcript_index.index_document(job.id, transcript_text, user_id=job.user_id)
+    except Exception as exc:
+        LOGGER.warning("Unable to index transcript for job %s: %s", job.id, exc)
+
+
+def _publish_state(job: Job) -> None:
+    """Push the job's new state to API replicas streaming ``/jobs/{id}/events``."""
+
+    publish_job_event_sync(job_state_event(job))
+
+
+@worker_process_init.connect
+def preload_configured_models(**_: Any) -> None:  # pragma: no cover - exercised via Celery
+    """Warm the model registry in each freshly forked worker process."""
+
+    names = configured_preload_models()
+    if not names:
+        return
+    loaded = preload_models(model_registry, load_whisper_model, names)
+    LOGGER.info("Preloaded Whisper models: %s", ", ".join(loaded) or "none")
+
+
 @celery_app.task(bind=True, name="api.services.app_worker.transcribe_audio")
 def transcribe_audio(self, job_id: str, **kwargs: Any) -> Dict[str, Any]:  # pragma: no cover - exercised via Celery
     """Process a queued transcription job.
@@ -70,6 +175,7 @@ def transcribe_audio(self, job_id: str, **kwargs: Any) -> Dict[str, Any]:  # pra
         job.started_at = job.started_at or datetime.utcnow()
         job.updated_at = datetime.utcnow()
         session.commit()
+        _publish_state(job)
 
         # Resolve the audio file path from either the task payload or the DB.
         audio_path = Path(kwargs.get("audio_path") or job.saved_filename)
@@ -79,41 +185,47 @@ def transcribe_audio(self, job_id: str, **kwargs: Any) -> Dict[str, Any]:  # pra
         transcript_dir = _ensure_transcript_directory(job.id)
         transcript_path = transcript_dir / "transcript.txt"
 
-        # Load Whisper model and perform transcription
-        try:
-            bootstrap_model_assets()
-        except WhisperModelBootstrapError as exc:
-            raise RuntimeError(f"Whisper model assets unavailable: {exc}") from exc
-
         model_name = job.model
         if not model_name:
             raise ValueError("Job is missing a Whisper model selection")
 
-        model_path = storage.models_dir / f"{model_name}.pt"
-        if not model_path.exists():
-            raise FileNotFoundError(f"Model file not found at {model_path}")
-
-        whisper = importlib.import_module("whisper")
-        torch = importlib.import_module("torch")
-
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        LOGGER.info("Loading Whisper model %s on %s", model_name, device)
-
-        model = whisper.load_model(model_name, download_root=str(storage.models_dir))
-        model.to(device)
-
-        LOGGER.info("Starting transcription for %s", job.original_filename)
-        result = model.transcribe(str(audio_path))
-        
-        # Write the transcription result
-        transcript_text = result["text"]
-        transcript_path.write_text(transcript_text, encoding="utf-8")
+        # Identical audio transcribed with the same settings is reused as-is.
+        language = kwargs.get("language")
+        decode_options = {"language": language} if language else {}
+        audio_sha256 = kwargs.get("content_sha256") or hash_file(audio_path)
+        # Jobs created through the API were counted as a miss at enqueue time;
+        # re-check for a result stored since then without counting it again.
+        lookup = result_cache.peek if kwargs.get("result_cache_checked") else result_cache.get
+        cached = lookup(audio_sha256, model_name, language)
+
+        if cached is not None:
+            LOGGER.info(
+                "Reusing transcript from job %s for %s", cached.source_job_id, job.original_filename
+            )
+            result_cache.link_transcript(cached, transcript_path)
+            transcript_text = transcript_path.read_text(encoding="utf-8")
+        else:
+            device = resolve_device()
+            model = model_registry.get(model_name, device, load_whisper_model)
+
+            LOGGER.info("Starting transcription for %s", job.original_filename)
+            result = model.transcribe(str(audio_path), **decode_options)
+
+            # Write the transcription result
+            transcript_text = result["text"]
+            _write_transcript(transcript_path, transcript_text)
+            _write_segments(transcript_dir, result.get("segments"), transcript_text)
 
         job.transcript_path = str(transcript_path)
         job.status = JobStatusEnum.COMPLETED
         job.finished_at = datetime.utcnow()
         job.updated_at = datetime.utcnow()
         session.commit()
+        _publish_state(job)
+
+        if cached is None:
+            _cache_transcript(job, audio_sha256, language, transcript_path)
+        _index_transcript(job, transcript_text)
 
         LOGGER.info("Job %s completed", job.id)
         return {
@@ -133,6 +245,7 @@ def transcribe_audio(self, job_id: str, **kwargs: Any) -> Dict[str, Any]:  # pra
             job.updated_at = datetime.utcnow()
             job.log_path = _write_failure_log(job.id, error_message)
             session.commit()
+            _publish_state(job)
 
         # Re-raise so Celery marks the task as failed.
         raise
@@ -20,6 +20,11 @@ from scipy import signal
 from pydub import AudioSegment
 from pydub.effects import normalize, low_pass_filter, high_pass_filter
 
+from .audio_streaming import (
+    BlockFunction, OverlapAddSTFT, SOSFilterStream, StreamChain,
+    StreamingAudioStats, iter_audio_blocks,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -84,6 +89,10 @@ class AudioProcessingConfig:
     spectral_gate_stationary: bool = True
     spectral_gate_alpha: float = 2.0
     spectral_gate_threshold: float = 0.02
+    
+    # Streaming settings: files at least this long are processed block by block
+    streaming_min_duration: Optional[float] = 600.0  # seconds; None disables streaming
+    streaming_block_duration: float = 30.0  # seconds of audio per block
 
 
 @dataclass
@@ -145,6 +154,12 @@ class AudioProcessingPipeline:
         analysis = await self.analyze_audio(input_path)
         logger.info(f"Audio analysis complete. Quality score: {analysis.quality_score:.2f}")
         
+        if self._should_stream(input_path):
+            # Steps 2-4 block by block, so memory does not grow with duration
+            await asyncio.to_thread(self._process_audio_stream, input_path, output_path, analysis)
+            logger.info(f"Audio processing complete. Output: {output_path}")
+            return output_path, analysis
+        
         # Step 2: Load and convert format if necessary
         audio_data, sample_rate = await self.load_and_convert_audio(input_path)
         
@@ -160,6 +175,9 @@ class AudioProcessingPipeline:
     async def analyze_audio(self, file_path: str) -> AudioAnalysis:
         """Analyze audio file and provide processing recommendations."""
         try:
+            if self._should_stream(file_path):
+                return await asyncio.to_thread(self._analyze_audio_stream, file_path)
+            
             # Load audio for analysis
             audio_data, sr = librosa.load(file_path, sr=None, mono=False)
             
@@ -177,7 +195,6 @@ class AudioProcessingPipeline:
             # Quality metrics
             rms_level = np.sqrt(np.mean(mono_audio ** 2))
             peak_level = np.max(np.abs(mono_audio))
-            dynamic_range = peak_level - rms_level if peak_level > 0 else 0
             
             # Estimate SNR (simplified)
             snr_estimate = self._estimate_snr(mono_audio, sr)
@@ -190,15 +207,6 @@ class AudioProcessingPipeline:
             # Find frequency range with significant content
             freq_range = self._find_frequency_range(freqs, magnitude)
             
-            # Processing recommendations
-            recommended_noise_reduction = snr_estimate < 20.0  # dB
-            recommended_normalization = peak_level < 0.5 or peak_level > 0.95
-            
-            # Overall quality score
-            quality_score = self._calculate_quality_score(
-                snr_estimate, dynamic_range, peak_level, rms_level
-            )
-            
             # Get file format info
             try:
                 audio_segment = AudioSegment.from_file(file_path)
@@ -208,20 +216,9 @@ class AudioProcessingPipeline:
                 format_info = sr, 16
                 bitrate = None
             
-            return AudioAnalysis(
-                duration=duration,
-                sample_rate=sr,
-                channels=channels,
-                format=Path(file_path).suffix.lower(),
-                bitrate=bitrate,
-                rms_level=float(rms_level),
-                peak_level=float(peak_level),
-                dynamic_range=float(dynamic_range),
-                snr_estimate=float(snr_estimate),
-                frequency_range=freq_range,
-                recommended_noise_reduction=recommended_noise_reduction,
-                recommended_normalization=recommended_normalization,
-                quality_score=float(quality_score)
+            return self._build_analysis(
+                file_path, duration, sr, channels, bitrate,
+                rms_level, peak_level, snr_estimate, freq_range
             )
             
         except Exception as e:
@@ -235,6 +232,52 @@ class AudioProcessingPipeline:
                 quality_score=0.0
             )
     
+    def _analyze_audio_stream(self, file_path: str) -> AudioAnalysis:
+        """Analyze a long file block by block at its native sample rate."""
+        info = sf.info(file_path)
+        stats = StreamingAudioStats(info.samplerate, n_fft=self.config.frame_length)
+        for block in iter_audio_blocks(file_path, self.config.streaming_block_duration):
+            stats.update(block)
+        
+        freqs, magnitude = stats.spectrum()
+        return self._build_analysis(
+            file_path, stats.duration, info.samplerate, info.channels, None,
+            stats.rms, stats.peak, stats.snr_estimate(),
+            self._find_frequency_range(freqs, magnitude)
+        )
+    
+    def _build_analysis(
+        self, file_path: str, duration: float, sr: int, channels: int, bitrate: Optional[int],
+        rms_level: float, peak_level: float, snr_estimate: float, freq_range: Tuple[float, float]
+    ) -> AudioAnalysis:
+        """Derive recommendations and the quality score from measured metrics."""
+        dynamic_range = peak_level - rms_level if peak_level > 0 else 0
+        
+        # Processing recommendations
+        recommended_noise_reduction = snr_estimate < 20.0  # dB
+        recommended_normalization = peak_level < 0.5 or peak_level > 0.95
+        
+        # Overall quality score
+        quality_score = self._calculate_quality_score(
+            snr_estimate, dynamic_range, peak_level, rms_level
+        )
+        
+        return AudioAnalysis(
+            duration=duration,
+            sample_rate=sr,
+            channels=channels,
+            format=Path(file_path).suffix.lower(),
+            bitrate=bitrate,
+            rms_level=float(rms_level),
+            peak_level=float(peak_level),
+            dynamic_range=float(dynamic_range),
+            snr_estimate=float(snr_estimate),
+            frequency_range=freq_range,
+            recommended_noise_reduction=recommended_noise_reduction,
+            recommended_normalization=recommended_normalization,
+            quality_score=float(quality_score)
+        )
+    
     async def load_and_convert_audio(self, file_path: str) -> Tuple[np.ndarray, int]:
         """Load audio file and convert to target format."""
         try:
@@ -306,6 +349,151 @@ class AudioProcessingPipeline:
         
         return processed
     
+    def _should_stream(self, file_path: str) -> bool:
+        """Whether ``file_path`` is long enough to be processed block by block."""
+        min_duration = self.config.streaming_min_duration
+        if min_duration is None or self.config.target_channels != 1:
+            return False
+        try:
+            info = sf.info(file_path)
+        except Exception:
+            return False  # Not decodable by libsndfile; load it in memory instead
+        return info.duration >= min_duration
+    
+    def _process_audio_stream(self, input_path: str, output_path: str, analysis: AudioAnalysis) -> None:
+        """
+        Convert, process and save ``input_path`` block by block.
+        
+        Runs the same steps as ``apply_processing_pipeline`` with causal
+        filters and overlap-add STFT noise reduction.  Normalization needs the
+        level of the filtered signal, so when it applies the filtered audio is
+        staged as float32 next to the output and processed in a second pass.
+        """
+        sr = self.config.target_sample_rate
+        block_duration = self.config.streaming_block_duration
+        logger.info(f"Streaming audio processing for {input_path} in {block_duration:.0f}s blocks")
+        
+        front = StreamChain(self._streaming_filter_stages(sr, analysis))
+        back = StreamChain(self._streaming_enhancement_stages(sr))
+        blocks = iter_audio_blocks(input_path, block_duration, sr)
+        
+        if not (self.config.enable_normalization and analysis.recommended_normalization):
+            self._write_stream(StreamChain([front, back]), blocks, sr, output_path, 'PCM_16')
+            return
+        
+        staging_path = os.path.join(self.temp_dir, f"{Path(output_path).stem}_stage.wav")
+        try:
+            peak, rms = self._write_stream(front, blocks, sr, staging_path, 'FLOAT')
+            gain = self._normalization_gain(peak, rms)
+            staged = iter_audio_blocks(staging_path, block_duration)
+            self._write_stream(
+                StreamChain([BlockFunction(lambda block: block * gain), back]),
+                staged, sr, output_path, 'PCM_16'
+            )
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    
+    def _write_stream(self, chain: StreamChain, blocks, sr: int, path: str, subtype: str) -> Tuple[float, float]:
+        """Run ``blocks`` through ``chain`` into ``path``; returns the written peak and RMS."""
+        samples, sum_squares, peak = 0, 0.0, 0.0
+        with sf.SoundFile(path, 'w', samplerate=sr, channels=1, subtype=subtype) as sink:
+            for out in self._drain(chain, blocks):
+                if not len(out):
+                    continue
+                samples += len(out)
+                sum_squares += float(np.dot(out, out))
+                peak = max(peak, float(np.max(np.abs(out))))
+                sink.write(np.clip(out, -1.0, 1.0) if subtype == 'PCM_16' else out)
+        rms = float(np.sqrt(sum_squares / samples)) if samples else 0.0
+        return peak, rms
+    
+    @staticmethod
+    def _drain(chain: StreamChain, blocks):
+        """Outputs of ``chain`` for each block, then whatever it still holds."""
+        for block in blocks:
+            yield chain.process(block)
+        yield chain.flush()
+    
+    def _streaming_filter_stages(self, sr: int, analysis: AudioAnalysis) -> list:
+        """Stages before normalization: band limiting and noise reduction."""
+        nyquist = sr / 2
+        stages = []
+        if self.config.high_pass_cutoff:
+            sos = signal.butter(4, self.config.high_pass_cutoff / nyquist, btype='high', output='sos')
+            stages.append(SOSFilterStream(sos))
+        if self.config.low_pass_cutoff:
+            sos = signal.butter(4, min(self.config.low_pass_cutoff / nyquist, 0.99), btype='low', output='sos')
+            stages.append(SOSFilterStream(sos))
+        if self.config.enable_noise_reduction and analysis.recommended_noise_reduction:
+            stage = self._streaming_noise_reduction(sr)
+            if stage is not None:
+                stages.append(stage)
+        return stages
+    
+    def _streaming_enhancement_stages(self, sr: int) -> list:
+        """Stages after normalization: compression and EQ."""
+        stages = []
+        if self.config.enable_compression:
+            stages.append(BlockFunction(self._apply_compression))
+        if self.config.enable_eq:
+            stages.append(SOSFilterStream(signal.butter(4, 80.0 / (sr / 2), btype='high', output='sos')))
+            stages.append(SOSFilterStream.from_ba(*self._peaking_eq_coefficients(sr, 1000.0, 1.2, 1.0)))
+            stages.append(SOSFilterStream.from_ba(*self._high_shelf_coefficients(sr, 5000.0, 1.1)))
+        return stages
+    
+    def _streaming_noise_reduction(self, sr: int):
+        """Block-wise counterpart of ``_apply_noise_reduction``.
+        
+        Statistics the in-memory methods take over the whole file (noise
+        floor, noise power, gating threshold) come from the first block.
+        """
+        method = self.config.noise_reduction_method
+        strength = self.config.noise_reduction_strength
+        state: Dict[str, Any] = {}
+        
+        if method == NoiseReductionMethod.SPECTRAL_GATING:
+            def transform(spectra: np.ndarray) -> np.ndarray:
+                magnitude = np.abs(spectra)
+                if 'noise_floor' not in state:
+                    # Use first 0.5 seconds as noise sample
+                    noise_frames = max(1, int(0.5 * sr / 512))
+                    state['noise_floor'] = magnitude[:noise_frames].mean(axis=0)
+                gate_threshold = state['noise_floor'] * (1 + strength * 2)
+                return spectra * np.where(magnitude > gate_threshold, 1.0, 0.1)
+        elif method == NoiseReductionMethod.WIENER_FILTER:
+            def transform(spectra: np.ndarray) -> np.ndarray:
+                power = np.abs(spectra) ** 2
+                if 'noise_power' not in state:
+                    state['noise_power'] = np.percentile(power, 10)
+                return spectra * (power / (power + state['noise_power'] * strength + 1e-12))
+        elif method == NoiseReductionMethod.BANDPASS_FILTER:
+            nyquist = sr / 2
+            sos = signal.butter(6, [85.0 / nyquist, min(8000.0 / nyquist, 0.99)], btype='band', output='sos')
+            return SOSFilterStream(sos)
+        elif method == NoiseReductionMethod.ADAPTIVE_FILTER:
+            def transform(spectra: np.ndarray) -> np.ndarray:
+                magnitude = np.abs(spectra)
+                if 'threshold' not in state:
+                    state['threshold'] = np.percentile(magnitude ** 2, 20)
+                    state['noise'] = magnitude[0]
+                alpha = 0.95  # Smoothing factor
+                noise_estimate = np.empty_like(magnitude)
+                noise = state['noise']
+                for i, frame in enumerate(magnitude):
+                    # Update noise estimate when signal is low
+                    if np.sum(frame ** 2) < state['threshold']:
+                        noise = alpha * noise + (1 - alpha) * frame
+                    noise_estimate[i] = noise
+                state['noise'] = noise
+                enhanced = np.maximum(magnitude - strength * noise_estimate, 0.1 * magnitude)
+                return spectra * (enhanced / np.maximum(magnitude, 1e-12))
+        else:
+            logger.warning(f"Unknown noise reduction method: {method}")
+            return None
+        
+        return OverlapAddSTFT(transform, n_fft=2048, hop_length=512)
+    
     def _apply_high_pass_filter(self, audio: np.ndarray, sr: int, cutoff: float) -> np.ndarray:
         """Apply high-pass filter to remove low-frequency noise."""
         nyquist = sr / 2
@@ -440,19 +628,18 @@ class AudioProcessingPipeline:
     
     def _normalize_audio(self, audio: np.ndarray) -> np.ndarray:
         """Normalize audio to optimal level."""
+        peak = np.max(np.abs(audio)) if len(audio) else 0.0
+        rms = np.sqrt(np.mean(audio ** 2)) if len(audio) else 0.0
+        return audio * self._normalization_gain(peak, rms)
+    
+    def _normalization_gain(self, peak: float, rms: float) -> float:
+        """Gain that brings a signal with the given levels to the target level."""
         if self.config.preserve_dynamics:
-            # Peak normalization
-            peak = np.max(np.abs(audio))
-            if peak > 0:
-                return audio * (0.95 / peak)  # Normalize to 95% to avoid clipping
-            return audio
-        else:
-            # RMS normalization
-            rms = np.sqrt(np.mean(audio ** 2))
-            if rms > 0:
-                target_rms = 0.2  # Target RMS level
-                return audio * (target_rms / rms)
-            return audio
+            # Peak normalization to 95% to avoid clipping
+            return 0.95 / peak if peak > 0 else 1.0
+        # RMS normalization
+        target_rms = 0.2  # Target RMS level
+        return target_rms / rms if rms > 0 else 1.0
     
     def _apply_compression(self, audio: np.ndarray) -> np.ndarray:
         """Apply dynamic range compression."""
@@ -500,7 +687,11 @@ class AudioProcessingPipeline:
     
     def _apply_peaking_eq(self, audio: np.ndarray, sr: int, freq: float, gain: float, q: float) -> np.ndarray:
         """Apply peaking EQ filter."""
-        # Design peaking filter
+        b, a = self._peaking_eq_coefficients(sr, freq, gain, q)
+        return signal.filtfilt(b, a, audio)
+    
+    def _peaking_eq_coefficients(self, sr: int, freq: float, gain: float, q: float) -> Tuple[list, list]:
+        """Design a peaking EQ biquad."""
         w0 = 2 * np.pi * freq / sr
         A = np.sqrt(gain)
         alpha = np.sin(w0) / (2 * q)
@@ -516,10 +707,15 @@ class AudioProcessingPipeline:
         b = [b0/a0, b1/a0, b2/a0]
         a = [1, a1/a0, a2/a0]
         
-        return signal.filtfilt(b, a, audio)
+        return b, a
     
     def _apply_high_shelf(self, audio: np.ndarray, sr: int, freq: float, gain: float) -> np.ndarray:
         """Apply high shelf filter."""
+        b, a = self._high_shelf_coefficients(sr, freq, gain)
+        return signal.filtfilt(b, a, audio)
+    
+    def _high_shelf_coefficients(self, sr: int, freq: float, gain: float) -> Tuple[list, list]:
+        """Design a high shelf biquad."""
         w0 = 2 * np.pi * freq / sr
         A = np.sqrt(gain)
         S = 1  # Shelf slope
@@ -539,7 +735,7 @@ class AudioProcessingPipeline:
         b = [b0/a0, b1/a0, b2/a0]
         a = [1, a1/a0, a2/a0]
         
-        return signal.filtfilt(b, a, audio)
+        return b, a
     
     async def save_processed_audio(self, audio: np.ndarray, sample_rate: int, output_path: str) -> None:
         """Save processed audio to file."""
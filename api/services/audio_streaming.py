@@ -0,0 +1,304 @@
+"""
+Block-wise audio processing primitives with bounded memory.
+
+Long recordings are read, filtered and analysed a block at a time so the
+working set depends on the block size rather than on the duration:
+
+* ``iter_audio_blocks`` decodes a file in blocks with soundfile, downmixes to
+  mono and resamples with a streaming soxr resampler.
+* ``SOSFilterStream`` runs an IIR filter as second-order sections and carries
+  the filter state (``zi``) from one block to the next.
+* ``OverlapAddSTFT`` applies a spectral transform frame by frame and rebuilds
+  the signal by weighted overlap-add, emitting samples as soon as every frame
+  covering them has been processed.
+* ``StreamingAudioStats`` accumulates level, SNR and spectrum statistics.
+
+Every stage has ``process(block)`` and ``flush()``; ``StreamChain`` runs a
+sequence of them as one stage.
+"""
+
+import logging
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import soundfile as sf
+import soxr
+from scipy import signal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SECONDS = 30.0
+
+
+def iter_audio_blocks(
+    file_path: str,
+    block_seconds: float = DEFAULT_BLOCK_SECONDS,
+    target_sample_rate: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """Yield mono float32 blocks of ``file_path``, resampled to ``target_sample_rate``."""
+    with sf.SoundFile(file_path) as source:
+        block_frames = max(1, int(block_seconds * source.samplerate))
+        resampler = None
+        if target_sample_rate and target_sample_rate != source.samplerate:
+            resampler = soxr.ResampleStream(source.samplerate, target_sample_rate, 1, dtype="float32")
+
+        while True:
+            block = source.read(block_frames, dtype="float32", always_2d=True)
+            last = len(block) < block_frames
+            mono = np.ascontiguousarray(block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0])
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=last)
+            if len(mono):
+                yield mono
+            if last:
+                break
+
+
+class SOSFilterStream:
+    """IIR filter in second-order sections whose state carries across blocks."""
+
+    def __init__(self, sos: np.ndarray):
+        self.sos = np.atleast_2d(sos)
+        self._zi: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_ba(cls, b, a) -> "SOSFilterStream":
+        return cls(signal.tf2sos(b, a))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if not len(block):
+            return block
+        if self._zi is None:
+            # Start from the steady state for the first sample to avoid a click
+            self._zi = signal.sosfilt_zi(self.sos) * block[0]
+        out, self._zi = signal.sosfilt(self.sos, block, zi=self._zi)
+        return out.astype(np.float32, copy=False)
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0, dtype=np.float32)
+
+
+class OverlapAddSTFT:
+    """
+    Frame-by-frame STFT transform with weighted overlap-add resynthesis.
+
+    ``transform`` receives the complex spectra of a batch of frames, shaped
+    ``(frames, n_fft // 2 + 1)``, and returns spectra of the same shape.
+    Output is sample-aligned with the input: ``flush`` returns the remaining
+    samples so the total output length equals the total input length.
+    """
+
+    def __init__(
+        self,
+        transform: Callable[[np.ndarray], np.ndarray],
+        n_fft: int = 2048,
+        hop_length: int = 512,
+    ):
+        self.transform = transform
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window = signal.get_window("hann", n_fft).astype(np.float32)
+
+        # Leading zeros so the first real sample is covered by every frame
+        self._padding = -(-(n_fft - hop_length) // hop_length) * hop_length
+        self._input = np.zeros(self._padding, dtype=np.float32)
+        self._overlap = np.zeros(n_fft - hop_length, dtype=np.float32)
+        self._skip = self._padding
+        self._received = 0
+        self._emitted = 0
+
+        squared = self.window ** 2
+        self._norm = np.array([
+            squared[offset::hop_length].sum() for offset in range(hop_length)
+        ], dtype=np.float32)
+        self._norm[self._norm < 1e-8] = 1.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        self._received += len(block)
+        return self._emit(self._run(block))
+
+    def flush(self) -> np.ndarray:
+        return self._emit(self._run(np.zeros(self._padding + self.n_fft, dtype=np.float32)))
+
+    def _emit(self, out: np.ndarray) -> np.ndarray:
+        if self._skip:
+            dropped = min(self._skip, len(out))
+            out = out[dropped:]
+            self._skip -= dropped
+        out = out[: self._received - self._emitted]
+        self._emitted += len(out)
+        return out
+
+    def _run(self, block: np.ndarray) -> np.ndarray:
+        n_fft, hop = self.n_fft, self.hop_length
+        buffer = np.concatenate([self._input, block.astype(np.float32, copy=False)])
+        count = (len(buffer) - n_fft) // hop + 1 if len(buffer) >= n_fft else 0
+        if count == 0:
+            self._input = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[::hop][:count]
+        spectra = self.transform(np.fft.rfft(frames * self.window, axis=1))
+        frames_out = np.fft.irfft(spectra, n=n_fft, axis=1).astype(np.float32) * self.window
+
+        out = np.zeros(count * hop + n_fft - hop, dtype=np.float32)
+        out[: len(self._overlap)] += self._overlap
+        for index, frame in enumerate(frames_out):
+            out[index * hop:index * hop + n_fft] += frame
+
+        complete = count * hop
+        self._overlap = out[complete:].copy()
+        self._input = buffer[complete:].copy()
+        return out[:complete] / np.tile(self._norm, count)
+
+
+class BlockFunction:
+    """Stateless stage applying ``function`` to each block."""
+
+    def __init__(self, function: Callable[[np.ndarray], np.ndarray]):
+        self.function = function
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return self.function(block) if len(block) else block
+
+    def flush(self) -> np.ndarray:
+        return np.zeros(0, dtype=np.float32)
+
+
+class StreamChain:
+    """Stages applied in order; flushing drains each stage through the rest."""
+
+    def __init__(self, stages: Sequence):
+        self.stages = list(stages)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        for stage in self.stages:
+            block = stage.process(block)
+        return block
+
+    def flush(self) -> np.ndarray:
+        out = np.zeros(0, dtype=np.float32)
+        for stage in self.stages:
+            out = np.concatenate([stage.process(out), stage.flush()])
+        return out
+
+
+class StreamingAudioStats:
+    """
+    Level, SNR and spectrum statistics accumulated one block at a time.
+
+    Frame energies for the SNR estimate go into a fine log-spaced histogram
+    (with per-bin energy sums) instead of a list, and the spectrum is the
+    Welch average of Hann-windowed frames, so memory stays fixed.
+    """
+
+    # log10 frame energy range and resolution of the histogram
+    ENERGY_LOG_MIN = -20.0
+    ENERGY_LOG_MAX = 8.0
+    ENERGY_BINS = 5600
+
+    def __init__(self, sample_rate: int, n_fft: int = 2048):
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.sum_squares = 0.0
+        self.peak = 0.0
+
+        self._frame_length = int(0.025 * sample_rate)
+        self._frame_hop = int(0.010 * sample_rate)
+        self._frame_tail = np.zeros(0, dtype=np.float32)
+        self._energy_counts = np.zeros(self.ENERGY_BINS, dtype=np.int64)
+        self._energy_sums = np.zeros(self.ENERGY_BINS, dtype=np.float64)
+
+        self.n_fft = n_fft
+        self._window = signal.get_window("hann", n_fft).astype(np.float32)
+        self._spectrum_tail = np.zeros(0, dtype=np.float32)
+        self._spectrum_sum = np.zeros(n_fft // 2 + 1, dtype=np.float64)
+        self._spectrum_frames = 0
+
+    def update(self, block: np.ndarray) -> None:
+        if not len(block):
+            return
+        self.samples += len(block)
+        self.sum_squares += float(np.dot(block, block))
+        self.peak = max(self.peak, float(np.max(np.abs(block))))
+
+        frames, self._frame_tail = self._frames(self._frame_tail, block, self._frame_length, self._frame_hop)
+        if len(frames):
+            energy = np.einsum("ij,ij->i", frames, frames, dtype=np.float64)
+            bins = self._energy_bin(energy)
+            self._energy_counts += np.bincount(bins, minlength=self.ENERGY_BINS)
+            self._energy_sums += np.bincount(bins, weights=energy, minlength=self.ENERGY_BINS)
+
+        frames, self._spectrum_tail = self._frames(self._spectrum_tail, block, self.n_fft, self.n_fft // 2)
+        if len(frames):
+            self._spectrum_sum += np.abs(np.fft.rfft(frames * self._window, axis=1)).sum(axis=0)
+            self._spectrum_frames += len(frames)
+
+    @property
+    def rms(self) -> float:
+        return float(np.sqrt(self.sum_squares / self.samples)) if self.samples else 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    def snr_estimate(self) -> float:
+        """Energy-based SNR estimate matching the whole-signal estimator."""
+        counts, sums = self._energy_counts, self._energy_sums
+        total = int(counts.sum())
+        if total == 0:
+            return 0.0
+        # Frames above the 60th percentile count as voice; the bin holding the
+        # percentile is split between voice and noise by rank
+        noise_count = min(total, int(np.floor(0.6 * (total - 1))) + 1)
+        cumulative = np.cumsum(counts)
+        threshold_bin = int(np.searchsorted(cumulative, noise_count, side="left"))
+        below = cumulative[threshold_bin] - counts[threshold_bin]
+        split = noise_count - below
+        bin_mean = sums[threshold_bin] / counts[threshold_bin]
+
+        voice_count = total - noise_count
+        if voice_count == 0:
+            return 0.0
+        voice_sum = sums[threshold_bin + 1:].sum() + bin_mean * (counts[threshold_bin] - split)
+        noise_sum = sums[:threshold_bin].sum() + bin_mean * split
+        signal_power = voice_sum / voice_count
+        noise_power = noise_sum / noise_count
+
+        snr_db = 10 * np.log10(signal_power / noise_power) if noise_power > 0 else 60.0
+        return max(0.0, min(60.0, float(snr_db)))
+
+    def spectrum(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Frequencies and Welch-averaged magnitude of the signal seen so far."""
+        freqs = np.fft.rfftfreq(self.n_fft, 1 / self.sample_rate)
+        if self._spectrum_frames == 0:
+            tail = np.zeros(self.n_fft, dtype=np.float32)
+            tail[: len(self._spectrum_tail)] = self._spectrum_tail
+            return freqs, np.abs(np.fft.rfft(tail * self._window))
+        return freqs, self._spectrum_sum / self._spectrum_frames
+
+    def _energy_bin(self, energy: np.ndarray) -> np.ndarray:
+        log_energy = np.log10(np.maximum(energy, 10.0 ** self.ENERGY_LOG_MIN))
+        scaled = (log_energy - self.ENERGY_LOG_MIN) / (self.ENERGY_LOG_MAX - self.ENERGY_LOG_MIN)
+        return np.clip((scaled * self.ENERGY_BINS).astype(np.int64), 0, self.ENERGY_BINS - 1)
+
+    @staticmethod
+    def _frames(tail: np.ndarray, block: np.ndarray, length: int, hop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Complete frames of ``tail + block`` and the samples left for the next block."""
+        buffer = np.concatenate([tail, block])
+        if len(buffer) < length:
+            return np.zeros((0, length), dtype=np.float32), buffer
+        count = (len(buffer) - length) // hop + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, length)[::hop][:count]
+        return frames, buffer[count * hop:].copy()
+
+
+__all__ = [
+    "BlockFunction",
+    "DEFAULT_BLOCK_SECONDS",
+    "OverlapAddSTFT",
+    "SOSFilterStream",
+    "StreamChain",
+    "StreamingAudioStats",
+    "iter_audio_blocks",
+]
@@ -0,0 +1,430 @@
+"""Incremental, content-addressed snapshots of the upload and transcript trees.
+
+A snapshot is a zstd-compressed JSON manifest listing every file of a
+directory tree with its size, mtime and the SHA-256 digests of its
+fixed-size chunks.  Chunk contents live once in ``objects/`` as individually
+compressed zstd frames, so:
+
+* a file whose size and mtime match the previous snapshot is not read again;
+  its chunk list is copied from the previous manifest,
+* changed files are hashed chunk by chunk and only chunks missing from the
+  store are compressed and written,
+* files hard-linked to each other (the content-addressed upload store) are
+  read once and restored as hard links,
+* any snapshot can be restored on its own, in full or for selected paths: the
+  manifest is the index and every chunk is an independent frame, so a restore
+  decompresses chunks in parallel and reads nothing it does not need,
+* objects no longer referenced by a retained snapshot are removed by
+  :meth:`ContentAddressedBackupStore.collect_garbage`.  A backup holds a
+  lease while its snapshots are written and recorded; garbage collection is
+  deferred while any lease is held, since the chunks of an unrecorded
+  snapshot are not yet referenced by a retained manifest.
+
+Files are processed in a thread pool.  ``hashlib`` and ``zstandard`` release
+the GIL on large buffers, so hashing and compression use every worker core.
+All methods are blocking; the backup service runs them via
+:func:`asyncio.to_thread`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+# Ensure environments without compiled Zstandard wheels can fall back to the CFFI backend.
+os.environ.setdefault("PYTHON_ZSTANDARD_IMPORT_POLICY", "cffi_fallback")
+
+import zstandard
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("backup_store")
+
+CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+SNAPSHOT_SUFFIX = ".snapshot.json.zst"
+OBJECTS_DIRNAME = "objects"
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+MAX_OPEN_RESTORE_FILES = 64
+
+
+class BackupIntegrityError(Exception):
+    """Raised when a stored object is missing or does not match its digest."""
+
+
+class ContentAddressedBackupStore:
+    """Chunk store and snapshot manifests rooted at ``root``."""
+
+    def __init__(
+        self,
+        root: Path,
+        chunk_size: int = CHUNK_SIZE,
+        workers: int = DEFAULT_WORKERS,
+        level: int = 3,
+    ):
+        self.root = Path(root)
+        self.objects_dir = self.root / OBJECTS_DIRNAME
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.level = level
+        self._local = threading.local()
+        self._lease_condition = threading.Condition()
+        self._leases = 0
+        self._collecting = False
+        # Set when collection was skipped for an in-progress backup
+        self.gc_deferred = False
+
+    # ------------------------------------------------------------------
+    # Objects
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.zst"
+
+    def has_object(self, digest: str) -> bool:
+        return self.object_path(digest).exists()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        # Compressor contexts are not thread-safe; keep one per worker thread.
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def _write_object(self, digest: str, data: bytes) -> int:
+        path = self.object_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = self._compressor().compress(data)
+        staging = path.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+        with open(staging, "wb") as handle:
+            handle.write(frame)
+        os.replace(staging, path)
+        return len(frame)
+
+    def read_object(self, digest: str) -> bytes:
+        try:
+            frame = self.object_path(digest).read_bytes()
+        except FileNotFoundError as exc:
+            raise BackupIntegrityError(f"Backup object {digest} is missing") from exc
+        data = zstandard.ZstdDecompressor().decompress(frame)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupIntegrityError(f"Backup object {digest} is corrupt")
+        return data
+
+    # ------------------------------------------------------------------
+    # Manifests
+
+    @staticmethod
+    def load_manifest(manifest_path: Path) -> Dict[str, Any]:
+        with open(manifest_path, "rb") as handle:
+            return json.loads(zstandard.ZstdDecompressor().decompress(handle.read()))
+
+    def _write_manifest(self, manifest_path: Path, manifest: Dict[str, Any]) -> None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = zstandard.ZstdCompressor(level=self.level).compress(
+            json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        )
+        staging = manifest_path.with_name(f".{manifest_path.name}.tmp")
+        staging.write_bytes(payload)
+        os.replace(staging, manifest_path)
+
+    # ------------------------------------------------------------------
+    # Snapshot
+
+    def snapshot(
+        self,
+        source_dir: Path,
+        manifest_path: Path,
+        previous_manifest: Optional[Path] = None,
+    ) -> Dict[str, int]:
+        """Snapshot ``source_dir`` into ``manifest_path`` and return statistics.
+
+        ``previous_manifest`` is the last snapshot of the same tree; files whose
+        size and mtime are unchanged since then are not read.
+        """
+        source_dir = Path(source_dir)
+        previous: Dict[str, Dict[str, Any]] = {}
+        if previous_manifest is not None and Path(previous_manifest).exists():
+            try:
+                previous = {
+                    entry["path"]: entry
+                    for entry in self.load_manifest(previous_manifest)["files"]
+                    if "chunks" in entry
+                }
+            except Exception as exc:
+                logger.warning(f"Ignoring unreadable previous snapshot {previous_manifest}: {exc}")
+
+        primaries, links = self._scan(source_dir)
+        stats = {
+            "files": len(primaries) + len(links),
+            "bytes": 0,
+            "reused_files": 0,
+            "new_chunks": 0,
+            "stored_bytes": 0,
+        }
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backup") as pool:
+            results = list(pool.map(
+                lambda item: self._snapshot_file(item[0], item[1], item[2], previous.get(item[0])),
+                primaries,
+            ))
+
+        entries: List[Dict[str, Any]] = []
+        for entry, reused, new_chunks, stored in results:
+            entries.append(entry)
+            stats["bytes"] += entry["size"]
+            stats["reused_files"] += int(reused)
+            stats["new_chunks"] += new_chunks
+            stats["stored_bytes"] += stored
+        entries.extend({"path": path, "link": target} for path, target in links)
+
+        self._write_manifest(manifest_path, {
+            "version": 1,
+            "chunk_size": self.chunk_size,
+            "files": entries,
+        })
+        return stats
+
+    @staticmethod
+    def _scan(source_dir: Path) -> Tuple[List[Tuple[str, Path, os.stat_result]], List[Tuple[str, str]]]:
+        """Walk ``source_dir``; hard links to an already listed file become link entries."""
+        primaries: List[Tuple[str, Path, os.stat_result]] = []
+        links: List[Tuple[str, str]] = []
+        seen_inodes: Dict[Tuple[int, int], str] = {}
+        if not source_dir.exists():
+            return primaries, links
+
+        for directory, dirnames, filenames in os.walk(source_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = Path(directory) / name
+                stat = path.lstat()
+                if not path.is_file() or path.is_symlink():
+                    continue
+                relative = path.relative_to(source_dir).as_posix()
+                inode = (stat.st_dev, stat.st_ino)
+                if stat.st_nlink > 1 and inode in seen_inodes:
+                    links.append((relative, seen_inodes[inode]))
+                    continue
+                seen_inodes[inode] = relative
+                primaries.append((relative, path, stat))
+        return primaries, links
+
+    def _snapshot_file(
+        self,
+        relative: str,
+        path: Path,
+        stat: os.stat_result,
+        previous: Optional[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], bool, int, int]:
+        entry = {
+            "path": relative,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "mode": stat.st_mode & 0o7777,
+        }
+        if (
+            previous is not None
+            and previous["size"] == stat.st_size
+            and previous["mtime_ns"] == stat.st_mtime_ns
+            and all(self.has_object(digest) for digest in previous["chunks"])
+        ):
+            entry["chunks"] = previous["chunks"]
+            return entry, True, 0, 0
+
+        chunks: List[str] = []
+        new_chunks = 0
+        stored = 0
+        with open(path, "rb") as handle:
+            while chunk := handle.read(self.chunk_size):
+                digest = hashlib.sha256(chunk).hexdigest()
+                chunks.append(digest)
+                if not self.has_object(digest):
+                    stored += self._write_object(digest, chunk)
+                    new_chunks += 1
+        entry["chunks"] = chunks
+        return entry, False, new_chunks, stored
+
+    # ------------------------------------------------------------------
+    # Restore
+
+    def restore(
+        self,
+        manifest_path: Path,
+        target_dir: Path,
+        select: Optional[Callable[[str], bool]] = None,
+    ) -> int:
+        """Recreate the tree recorded in ``manifest_path`` under ``target_dir``.
+
+        ``select`` limits the restore to matching relative paths (hard-link
+        targets of selected paths are restored with them), so a single job
+        can be restored by reading only its own objects. Chunks are
+        decompressed in parallel, across and within files, written at their
+        offsets and verified against their digests; each file's size is
+        checked before it is moved into place. Returns the number of files
+        restored.
+        """
+        manifest = self.load_manifest(manifest_path)
+        chunk_size = manifest.get("chunk_size", self.chunk_size)
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        entries = manifest["files"]
+        if select is not None:
+            entries = [entry for entry in entries if select(entry["path"])]
+            wanted = {entry["link"] for entry in entries if "link" in entry}
+            wanted.difference_update(entry["path"] for entry in entries)
+            entries.extend(entry for entry in manifest["files"] if entry["path"] in wanted)
+
+        files = [entry for entry in entries if "chunks" in entry]
+        links = [entry for entry in entries if "link" in entry]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="restore") as pool:
+            open_files: Deque[Tuple[Dict[str, Any], Path, int, List[Future]]] = deque()
+            try:
+                for entry in files:
+                    # Bound open descriptors while keeping every worker busy
+                    while len(open_files) >= MAX_OPEN_RESTORE_FILES:
+                        self._finish_restore(*open_files.popleft())
+                    destination = self._target_path(target_dir, entry["path"])
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    staging = destination.with_name(f".{destination.name}.restore")
+                    fd = os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    os.ftruncate(fd, entry["size"])
+                    futures = [
+                        pool.submit(self._restore_chunk, fd, index * chunk_size, digest)
+                        for index, digest in enumerate(entry["chunks"])
+                    ]
+                    open_files.append((entry, staging, fd, futures))
+                while open_files:
+                    self._finish_restore(*open_files.popleft())
+            finally:
+                for _, staging, fd, futures in open_files:
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+                    os.close(fd)
+                    staging.unlink(missing_ok=True)
+
+        for entry in links:
+            destination = self._target_path(target_dir, entry["path"])
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            source = self._target_path(target_dir, entry["link"])
+            destination.unlink(missing_ok=True)
+            try:
+                os.link(source, destination)
+            except OSError:
+                shutil.copy2(source, destination)
+
+        return len(files) + len(links)
+
+    @staticmethod
+    def _target_path(target_dir: Path, relative: str) -> Path:
+        path = (target_dir / relative).resolve()
+        if not path.is_relative_to(target_dir.resolve()):
+            raise BackupIntegrityError(f"Refusing to restore outside the target: {relative}")
+        return path
+
+    def _restore_chunk(self, fd: int, offset: int, digest: str) -> int:
+        data = self.read_object(digest)
+        os.pwrite(fd, data, offset)
+        return len(data)
+
+    def _finish_restore(
+        self,
+        entry: Dict[str, Any],
+        staging: Path,
+        fd: int,
+        futures: List[Future],
+    ) -> None:
+        try:
+            written = sum(future.result() for future in futures)
+        except BaseException:
+            os.close(fd)
+            staging.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        if written != entry["size"]:
+            staging.unlink(missing_ok=True)
+            raise BackupIntegrityError(
+                f"Restored {entry['path']} has {written} bytes, expected {entry['size']}"
+            )
+        destination = staging.with_name(staging.name[1:-len(".restore")])
+        os.chmod(staging, entry.get("mode", 0o644))
+        os.replace(staging, destination)
+        # Keep the recorded mtime so the next snapshot reuses this file.
+        os.utime(destination, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    # ------------------------------------------------------------------
+    # Garbage collection
+
+    def referenced_objects(self, manifests: Iterable[Path]) -> Set[str]:
+        referenced: Set[str] = set()
+        for manifest_path in manifests:
+            for entry in self.load_manifest(manifest_path)["files"]:
+                referenced.update(entry.get("chunks", ()))
+        return referenced
+
+    def acquire_lease(self) -> None:
+        """Hold off garbage collection until :meth:`release_lease`.
+
+        Blocks while a collection is running.  Take the lease before the
+        first snapshot of a backup and release it once the backup is
+        recorded, so its chunks are referenced by a live manifest by then.
+        """
+        with self._lease_condition:
+            while self._collecting:
+                self._lease_condition.wait()
+            self._leases += 1
+
+    def release_lease(self) -> None:
+        with self._lease_condition:
+            self._leases -= 1
+            self._lease_condition.notify_all()
+
+    def collect_garbage(self, live_manifests: Iterable[Path]) -> int:
+        """Delete objects not referenced by any of ``live_manifests``.
+
+        Skipped, with :attr:`gc_deferred` set, while a backup holds a lease.
+        """
+        with self._lease_condition:
+            if self._leases:
+                self.gc_deferred = True
+                logger.info("Deferring backup garbage collection: a backup is in progress")
+                return 0
+            self._collecting = True
+        try:
+            referenced = self.referenced_objects(
+                path for path in live_manifests if Path(path).exists()
+            )
+            removed = 0
+            self.gc_deferred = False
+            if not self.objects_dir.exists():
+                return removed
+            for object_path in self.objects_dir.glob("*/*.zst"):
+                if object_path.name[:-len(".zst")] not in referenced:
+                    object_path.unlink(missing_ok=True)
+                    removed += 1
+            return removed
+        finally:
+            with self._lease_condition:
+                self._collecting = False
+                self._lease_condition.notify_all()
+
+    def disk_usage(self) -> int:
+        if not self.objects_dir.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.objects_dir.glob("*/*.zst"))
+
+
+__all__ = [
+    "BackupIntegrityError",
+    "ContentAddressedBackupStore",
+    "SNAPSHOT_SUFFIX",
+]
@@ -2,6 +2,14 @@
 """
 T027 Advanced Features: Batch Processing Service
 Service for handling multiple file uploads and batch transcription processing.
+
+Batch files are transcribed by the Celery worker pool, never in the API
+process. A FairShareBatchScheduler decides which file is submitted next
+(respecting each batch's ``max_parallel_jobs`` and sharing worker slots
+between users by priority), and batch progress is counted from the job
+events workers publish when a transcription finishes.  Database writes and
+Celery submissions run in worker threads, so job event listeners never block
+the event loop.
 """
 
 import uuid
@@ -18,16 +26,21 @@ from sqlalchemy import and_, or_, desc
 from fastapi import UploadFile, HTTPException, status
 from pydantic import BaseModel, Field
 
-from api.orm_bootstrap import get_db
+from api.orm_bootstrap import SessionLocal, get_db
 from api.models import Job, JobStatusEnum, User
+from api.services.batch_scheduler import FairShareBatchScheduler
 from api.services.chunked_upload_service import chunked_upload_service
-from api.app_state import handle_whisper
+from api.services.job_events import is_terminal_status, job_event_broker
+from api.services.job_queue import job_queue
 from api.paths import storage
 from api.utils.logger import get_system_logger
 from api.services.websocket_job_integration import get_job_notifier
 
 logger = get_system_logger("batch_processor")
 
+# Job states a batch cancellation may still overwrite; finished jobs keep their result
+CANCELLABLE_JOB_STATUSES = (JobStatusEnum.QUEUED, JobStatusEnum.PROCESSING, JobStatusEnum.ENRICHING)
+
 class BatchStatus(Enum):
     """Batch processing status."""
     PENDING = "pending"
@@ -90,11 +103,19 @@ class BatchInfo(BaseModel):
 class BatchProcessorService:
     """Service for batch processing of multiple files."""
     
-    def __init__(self):
+    def __init__(self, scheduler: Optional[FairShareBatchScheduler] = None):
         self.active_batches: Dict[str, Dict[str, Any]] = {}
-        self.processing_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.scheduler = scheduler or FairShareBatchScheduler(
+            max_in_flight=int(os.getenv("BATCH_MAX_IN_FLIGHT", "8"))
+        )
+        self.reconcile_interval = float(os.getenv("BATCH_RECONCILE_SECONDS", "30"))
+        # Dispatched job id -> batch id, for jobs whose result is still outstanding
+        self._job_batches: Dict[str, str] = {}
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()
         self.batch_storage_dir = Path(storage.UPLOAD_DIR) / "batches"
         self.batch_storage_dir.mkdir(exist_ok=True)
+        job_event_broker.add_listener(self._on_job_event)
         
     def create_batch(
         self,
@@ -205,24 +226,24 @@ class BatchProcessorService:
         # Add to active batches
         self.active_batches[batch_id] = {
             "info": batch_info,
-            "processing_jobs": set(),
-            "completed_jobs": set(),
-            "failed_jobs": set()
+            "files_by_job": {}
         }
         
-        # Create semaphore for parallel processing
-        self.processing_semaphores[batch_id] = asyncio.Semaphore(request.max_parallel_jobs)
-        
         logger.info(f"Created batch {batch_id} with {len(batch_files)} files for user {user_id}")
         
         # Auto-start if requested
         if request.auto_start:
-            asyncio.create_task(self.start_batch_processing(batch_id, db))
+            asyncio.create_task(self.start_batch_processing(batch_id))
         
         return batch_info
     
-    async def start_batch_processing(self, batch_id: str, db: Session):
-        """Start processing a batch."""
+    async def start_batch_processing(self, batch_id: str, db: Optional[Session] = None):
+        """Queue every file of a batch with the scheduler and dispatch what fits.
+        
+        Returns once the first files are submitted; results arrive as job
+        events. ``db`` is accepted for older callers but unused, because
+        dispatching outlives the request that started the batch.
+        """
         
         if batch_id not in self.active_batches:
             raise HTTPException(
@@ -252,126 +273,248 @@ class BatchProcessorService:
         
         logger.info(f"Started batch processing for batch {batch_id}")
         
-        # Create processing tasks for all files
-        semaphore = self.processing_semaphores[batch_id]
-        tasks = []
-        
-        for file_info in batch_info.files:
-            task = asyncio.create_task(
-                self._process_batch_file(batch_id, file_info, semaphore, db)
-            )
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        await asyncio.gather(*tasks, return_exceptions=True)
+        if not batch_info.files:
+            await self._finalize_batch(batch_id)
+            return
         
-        # Update final batch status
-        await self._finalize_batch(batch_id)
+        self.scheduler.add_batch(
+            batch_id,
+            batch_info.user_id,
+            list(batch_info.files),
+            priority=batch_info.priority,
+            max_parallel_jobs=batch_info.max_parallel_jobs
+        )
+        await self._dispatch()
+        self._ensure_reconciler()
     
-    async def _process_batch_file(
-        self,
-        batch_id: str,
-        file_info: BatchFileInfo,
-        semaphore: asyncio.Semaphore,
-        db: Session
-    ):
-        """Process a single file in the batch."""
-        
-        async with semaphore:
+    async def _dispatch(self):
+        """Submit files to Celery while the scheduler has free slots."""
+        
+        while True:
+            slot = self.scheduler.next_item()
+            if slot is None:
+                return
+            
+            batch_id, file_info = slot
+            batch_data = self.active_batches.get(batch_id)
+            if batch_data is None:
+                self.scheduler.release(batch_id)
+                continue
+            
+            # Registered before submitting, so a fast result is not missed
+            job_id = str(uuid.uuid4())
+            file_info.job_id = job_id
+            file_info.status = JobStatusEnum.QUEUED.value
+            batch_data["files_by_job"][job_id] = file_info
+            self._job_batches[job_id] = batch_id
+            
             try:
-                batch_data = self.active_batches[batch_id]
-                batch_info = batch_data["info"]
-                
-                # Create transcription job
-                file_path = self.batch_storage_dir / batch_id / file_info.filename
-                
-                # Create job record in database
-                job = Job(
-                    id=str(uuid.uuid4()),
-                    saved_filename=file_info.filename,
-                    original_filename=file_info.original_filename,
-                    model=batch_info.model,
-                    language=batch_info.language,
-                    status=JobStatusEnum.QUEUED,
-                    user_id=batch_info.user_id,
-                    created_at=datetime.utcnow(),
-                    file_size=file_info.file_size
-                )
-                
-                db.add(job)
-                db.commit()
-                db.refresh(job)
-                
-                # Update file info with job ID
-                file_info.job_id = job.id
-                file_info.status = JobStatusEnum.PROCESSING.value
-                
-                # Add to processing jobs
-                batch_data["processing_jobs"].add(job.id)
-                
-                # Update batch metadata
-                await self._update_batch_metadata(batch_id)
-                
-                # Start transcription
-                job_dir = storage.TRANSCRIPTS_DIR / job.id
-                job_dir.mkdir(exist_ok=True)
-                
-                # Process with Whisper
-                await handle_whisper(
-                    job.id,
-                    str(file_path),
-                    str(job_dir),
-                    batch_info.model,
-                    start_thread=False
-                )
-                
-                # Update job status
-                updated_job = db.query(Job).filter(Job.id == job.id).first()
-                if updated_job:
-                    file_info.status = updated_job.status.value
-                    
-                    if updated_job.status == JobStatusEnum.COMPLETED:
-                        batch_data["completed_jobs"].add(job.id)
-                        batch_data["processing_jobs"].discard(job.id)
-                    elif updated_job.status == JobStatusEnum.FAILED:
-                        batch_data["failed_jobs"].add(job.id)
-                        batch_data["processing_jobs"].discard(job.id)
-                        file_info.error_message = updated_job.error_message
-                
-                logger.info(f"Completed processing file {file_info.filename} in batch {batch_id}")
-                
+                await asyncio.to_thread(self._submit_batch_file, batch_id, batch_data["info"], file_info)
             except Exception as e:
-                logger.error(f"Failed to process file {file_info.filename} in batch {batch_id}: {e}")
-                
-                # Update file as failed
+                logger.error(f"Failed to dispatch file {file_info.filename} in batch {batch_id}: {e}")
+                if self._job_batches.pop(job_id, None) is None:
+                    continue  # Cancelled while submitting; the slot is already free
+                await asyncio.to_thread(self._mark_jobs_failed, [job_id])
                 file_info.status = JobStatusEnum.FAILED.value
                 file_info.error_message = str(e)
-                
-                batch_data["failed_jobs"].add(file_info.job_id)
-                batch_data["processing_jobs"].discard(file_info.job_id)
+                self.scheduler.release(batch_id)
+                self._count_result(batch_data, JobStatusEnum.FAILED.value)
+                self._schedule(self._after_file_finished(batch_id))
+                continue
             
-            finally:
-                # Update batch progress
-                await self._update_batch_progress(batch_id)
+            if batch_data["info"].status == BatchStatus.CANCELLED.value:
+                # cancel_batch ran while this file was being submitted
+                await asyncio.to_thread(self._cancel_jobs, batch_id, [job_id])
     
-    async def _update_batch_progress(self, batch_id: str):
-        """Update batch processing progress."""
+    def _submit_batch_file(self, batch_id: str, batch_info: BatchInfo, file_info: BatchFileInfo):
+        """Create the job row for ``file_info`` and hand it to the worker pool.
         
-        if batch_id not in self.active_batches:
+        Blocking; runs in a worker thread.
+        """
+        
+        job_id = file_info.job_id
+        file_path = self.batch_storage_dir / batch_id / file_info.filename
+        
+        db = SessionLocal()
+        try:
+            db.add(Job(
+                id=job_id,
+                original_filename=file_info.original_filename,
+                saved_filename=str(file_path),
+                model=batch_info.model,
+                status=JobStatusEnum.QUEUED,
+                user_id=batch_info.user_id
+            ))
+            db.commit()
+        finally:
+            db.close()
+        
+        job_queue.submit_job(
+            "transcribe_audio",
+            audio_path=str(file_path),
+            model=batch_info.model,
+            language=batch_info.language,
+            job_id=job_id
+        )
+        logger.debug(f"Dispatched file {file_info.filename} in batch {batch_id} as job {job_id}")
+    
+    def _mark_jobs_failed(self, job_ids: List[str]) -> Dict[str, str]:
+        """Fail jobs that will never run so startup rehydration skips them.
+        
+        Jobs a worker already finished keep their status; those are returned
+        as ``{job_id: status}``.  Blocking; runs in a worker thread.
+        """
+        
+        db = SessionLocal()
+        try:
+            finished = {
+                row.id: row.status.value
+                for row in db.query(Job.id, Job.status).filter(
+                    Job.id.in_(job_ids), Job.status.notin_(CANCELLABLE_JOB_STATUSES)
+                )
+            }
+            # Conditional, so a worker finishing concurrently is not overwritten
+            db.query(Job).filter(
+                Job.id.in_(job_ids), Job.status.in_(CANCELLABLE_JOB_STATUSES)
+            ).update(
+                {Job.status: JobStatusEnum.FAILED, Job.finished_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+            return finished
+        except Exception as e:
+            logger.warning(f"Failed to mark batch jobs {job_ids} as failed: {e}")
+            return {}
+        finally:
+            db.close()
+    
+    def _on_job_event(self, event: Dict[str, Any]):
+        """Job event listener: track batch files as workers report on them."""
+        
+        job_id = event.get("job_id")
+        batch_id = self._job_batches.get(job_id) if job_id else None
+        if batch_id is None:
             return
         
-        batch_data = self.active_batches[batch_id]
+        job_status = event.get("status")
+        if is_terminal_status(job_status):
+            self._record_result(batch_id, job_id, job_status, event.get("error_message"))
+            return
+        
+        batch_data = self.active_batches.get(batch_id)
+        file_info = batch_data["files_by_job"].get(job_id) if batch_data else None
+        if file_info is not None and job_status:
+            file_info.status = job_status
+    
+    def _record_result(self, batch_id: str, job_id: str, job_status: str, error_message: Optional[str] = None):
+        """Count a finished file once, free its slot and dispatch the next file."""
+        
+        if self._job_batches.pop(job_id, None) is None:
+            return  # Already counted (events can arrive from several sources)
+        
+        self.scheduler.release(batch_id)
+        batch_data = self.active_batches.get(batch_id)
+        if batch_data is not None:
+            file_info = batch_data["files_by_job"].get(job_id)
+            if file_info is not None:
+                file_info.status = job_status
+                if error_message:
+                    file_info.error_message = error_message
+            self._count_result(batch_data, job_status)
+        
+        self._schedule(self._dispatch())
+        self._schedule(self._after_file_finished(batch_id))
+    
+    def _count_result(self, batch_data: Dict[str, Any], job_status: str):
+        batch_info = batch_data["info"]
+        if job_status == JobStatusEnum.COMPLETED.value:
+            batch_info.successful_files += 1
+        else:
+            batch_info.failed_files += 1
+        batch_info.processed_files = batch_info.successful_files + batch_info.failed_files
+        batch_info.progress_percentage = (batch_info.processed_files / batch_info.total_files) * 100
+    
+    async def _after_file_finished(self, batch_id: str):
+        batch_data = self.active_batches.get(batch_id)
+        if batch_data is None:
+            return
+        
+        await self._update_batch_progress(batch_id)
+        
         batch_info = batch_data["info"]
+        if (batch_info.status == BatchStatus.PROCESSING.value
+                and batch_info.processed_files >= batch_info.total_files):
+            await self._finalize_batch(batch_id)
+    
+    def _schedule(self, coro):
+        """Run ``coro`` in the background from synchronous event handlers."""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def _ensure_reconciler(self):
+        if self._reconcile_task is not None and not self._reconcile_task.done():
+            return
+        try:
+            self._reconcile_task = asyncio.get_running_loop().create_task(self._reconcile_loop())
+        except RuntimeError:
+            self._reconcile_task = None
+    
+    async def _reconcile_loop(self):
+        """Catch results whose events were missed (e.g. while Redis was down)."""
         
-        # Calculate progress
-        completed = len(batch_data["completed_jobs"])
-        failed = len(batch_data["failed_jobs"])
-        processed = completed + failed
+        while self._job_batches:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f"Batch reconciliation failed: {e}")
+    
+    async def reconcile(self) -> int:
+        """Record finished jobs from the database; returns how many were found."""
+        
+        job_ids = list(self._job_batches)
+        if not job_ids:
+            return 0
+        
+        finished = await asyncio.to_thread(self._load_finished_jobs, job_ids)
+        for job_id, job_status in finished:
+            batch_id = self._job_batches.get(job_id)
+            if batch_id is not None:
+                self._record_result(batch_id, job_id, job_status)
+        return len(finished)
+    
+    def _load_finished_jobs(self, job_ids: List[str]) -> List[tuple]:
+        """``(job_id, status)`` of the finished jobs among ``job_ids``; blocking."""
+        
+        finished = []
+        db = SessionLocal()
+        try:
+            for start in range(0, len(job_ids), 500):
+                rows = (
+                    db.query(Job.id, Job.status)
+                    .filter(Job.id.in_(job_ids[start:start + 500]))
+                    .all()
+                )
+                finished.extend(
+                    (row.id, row.status.value) for row in rows
+                    if is_terminal_status(row.status.value)
+                )
+        finally:
+            db.close()
+        return finished
+    
+    async def _update_batch_progress(self, batch_id: str):
+        """Persist batch progress and notify listeners."""
+        
+        if batch_id not in self.active_batches:
+            return
         
-        batch_info.processed_files = processed
-        batch_info.successful_files = completed
-        batch_info.failed_files = failed
-        batch_info.progress_percentage = (processed / batch_info.total_files) * 100
+        batch_info = self.active_batches[batch_id]["info"]
         
         # Update metadata
         await self._update_batch_metadata(batch_id)
@@ -383,7 +526,7 @@ class BatchProcessorService:
                 "batch_id": batch_id,
                 "status": batch_info.status,
                 "progress_percentage": batch_info.progress_percentage,
-                "processed_files": processed,
+                "processed_files": batch_info.processed_files,
                 "total_files": batch_info.total_files
             })
         except Exception as e:
@@ -500,12 +643,58 @@ class BatchProcessorService:
         batch_info.status = BatchStatus.CANCELLED.value
         batch_info.completed_at = datetime.utcnow()
         
+        # Files that never reached the workers are simply dropped
+        for file_info in self.scheduler.cancel_batch(batch_id):
+            file_info.status = BatchStatus.CANCELLED.value
+        
+        # Revoke files still running and mark their jobs failed
+        running = [job_id for job_id, owner in self._job_batches.items() if owner == batch_id]
+        for job_id in running:
+            self._job_batches.pop(job_id, None)
+            self.scheduler.release(batch_id)
+            file_info = batch_data["files_by_job"].get(job_id)
+            if file_info is not None:
+                file_info.status = BatchStatus.CANCELLED.value
+        
+        if running:
+            finished = await asyncio.to_thread(self._cancel_jobs, batch_id, running)
+            # Files a worker finished before the cancellation keep their result
+            for job_id, job_status in finished.items():
+                file_info = batch_data["files_by_job"].get(job_id)
+                if file_info is not None:
+                    file_info.status = job_status
+                self._count_result(batch_data, job_status)
+        
+        # Slots freed by this batch go to other users' batches
+        await self._dispatch()
+        
         # Update metadata
         await self._update_batch_metadata(batch_id)
         
         logger.info(f"Cancelled batch {batch_id}")
         return True
     
+    def _cancel_jobs(self, batch_id: str, job_ids: List[str]) -> Dict[str, str]:
+        """Revoke ``job_ids`` and fail the unfinished ones; blocking.
+        
+        Returns the statuses of jobs that finished first (see ``_mark_jobs_failed``).
+        """
+        
+        for job_id in job_ids:
+            try:
+                job_queue.cancel_job(job_id)
+            except Exception as e:
+                logger.warning(f"Failed to revoke job {job_id} of batch {batch_id}: {e}")
+        return self._mark_jobs_failed(job_ids)
+    
+    def discard_batch(self, batch_id: str):
+        """Forget a batch that is being deleted."""
+        
+        self.active_batches.pop(batch_id, None)
+        self.scheduler.remove_batch(batch_id)
+        for job_id in [job_id for job_id, owner in self._job_batches.items() if owner == batch_id]:
+            self._job_batches.pop(job_id, None)
+    
     def cleanup_old_batches(self, days: int = 30):
         """Clean up old batch files."""
         
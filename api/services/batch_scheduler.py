@@ -0,0 +1,173 @@
+"""
+Fair-share scheduling of batch transcription files onto the Celery worker pool.
+
+Each batch owns a FIFO of pending files and may have at most
+``max_parallel_jobs`` of them in flight.  A global ``max_in_flight`` bounds
+how many batch tasks sit on the worker queue at once, so interactive jobs are
+not stuck behind a large batch.  When a slot frees up, the next file is taken
+from the user with the lowest virtual time (stride scheduling): dispatching a
+file advances the user's clock by ``1 / weight`` of the batch priority, so an
+urgent batch gets eight times the share of a low-priority one, and a user with
+many batches gets no more than a user with one.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+# Relative share of worker slots per BatchJobPriority value.
+PRIORITY_WEIGHTS: Dict[str, float] = {
+    "low": 1.0,
+    "normal": 2.0,
+    "high": 4.0,
+    "urgent": 8.0,
+}
+
+
+@dataclass
+class ScheduledBatch:
+    """Scheduler-side state for one batch."""
+    batch_id: str
+    user_id: str
+    priority: str
+    max_parallel_jobs: int
+    sequence: int
+    pending: Deque[Any] = field(default_factory=deque)
+    in_flight: int = 0
+
+    @property
+    def weight(self) -> float:
+        return PRIORITY_WEIGHTS.get(self.priority, PRIORITY_WEIGHTS["normal"])
+
+    @property
+    def eligible(self) -> bool:
+        return bool(self.pending) and self.in_flight < self.max_parallel_jobs
+
+
+class FairShareBatchScheduler:
+    """Choose which batch file to dispatch next.
+
+    The scheduler only tracks slots; callers submit the returned items and
+    call :meth:`release` when the corresponding task finishes.
+    """
+
+    def __init__(self, max_in_flight: int = 8):
+        self.max_in_flight = max_in_flight
+        self._batches: Dict[str, ScheduledBatch] = {}
+        self._user_clock: Dict[str, float] = {}
+        self._sequence = 0
+        self.in_flight = 0
+
+    def add_batch(
+        self,
+        batch_id: str,
+        user_id: str,
+        items: List[Any],
+        priority: str = "normal",
+        max_parallel_jobs: int = 3
+    ) -> None:
+        """Queue ``items`` for ``batch_id``; adding to a known batch appends."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            if not self._has_batches(user_id):
+                # A user returning from idle joins at the least-served active
+                # user's clock: idle time is not banked as credit.
+                self._user_clock[user_id] = self._min_active_clock()
+            self._sequence += 1
+            batch = ScheduledBatch(
+                batch_id=batch_id,
+                user_id=user_id,
+                priority=priority,
+                max_parallel_jobs=max(1, max_parallel_jobs),
+                sequence=self._sequence,
+            )
+            self._batches[batch_id] = batch
+        batch.pending.extend(items)
+
+    def next_item(self) -> Optional[tuple]:
+        """Reserve a slot and return ``(batch_id, item)``, or None if nothing can run."""
+        if self.in_flight >= self.max_in_flight:
+            return None
+
+        best: Optional[ScheduledBatch] = None
+        best_key = None
+        for batch in self._batches.values():
+            if not batch.eligible:
+                continue
+            key = (self._user_clock.get(batch.user_id, 0.0), -batch.weight, batch.sequence)
+            if best_key is None or key < best_key:
+                best, best_key = batch, key
+
+        if best is None:
+            return None
+
+        item = best.pending.popleft()
+        best.in_flight += 1
+        self.in_flight += 1
+        self._user_clock[best.user_id] = self._user_clock.get(best.user_id, 0.0) + 1.0 / best.weight
+        return best.batch_id, item
+
+    def release(self, batch_id: str) -> None:
+        """Free the slot held by a finished task of ``batch_id``."""
+        batch = self._batches.get(batch_id)
+        if batch is None or batch.in_flight <= 0:
+            return
+        batch.in_flight -= 1
+        self.in_flight -= 1
+        self._drop_if_idle(batch)
+
+    def cancel_batch(self, batch_id: str) -> List[Any]:
+        """Drop the pending items of ``batch_id`` and return them."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return []
+        dropped = list(batch.pending)
+        batch.pending.clear()
+        self._drop_if_idle(batch)
+        return dropped
+
+    def remove_batch(self, batch_id: str) -> None:
+        """Forget ``batch_id`` entirely, releasing any slots it held."""
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            self.in_flight -= batch.in_flight
+            batch.pending.clear()
+            batch.in_flight = 0
+            self._drop_if_idle(batch)
+
+    def pending_count(self, batch_id: Optional[str] = None) -> int:
+        if batch_id is not None:
+            batch = self._batches.get(batch_id)
+            return len(batch.pending) if batch else 0
+        return sum(len(batch.pending) for batch in self._batches.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "pending": self.pending_count(),
+            "batches": {
+                batch.batch_id: {
+                    "user_id": batch.user_id,
+                    "priority": batch.priority,
+                    "pending": len(batch.pending),
+                    "in_flight": batch.in_flight,
+                    "max_parallel_jobs": batch.max_parallel_jobs,
+                }
+                for batch in self._batches.values()
+            },
+        }
+
+    def _has_batches(self, user_id: str) -> bool:
+        return any(batch.user_id == user_id for batch in self._batches.values())
+
+    def _drop_if_idle(self, batch: ScheduledBatch) -> None:
+        if batch.pending or batch.in_flight:
+            return
+        self._batches.pop(batch.batch_id, None)
+        if not self._has_batches(batch.user_id):
+            self._user_clock.pop(batch.user_id, None)
+
+    def _min_active_clock(self) -> float:
+        clocks = [self._user_clock.get(batch.user_id, 0.0) for batch in self._batches.values()]
+        return min(clocks) if clocks else 0.0
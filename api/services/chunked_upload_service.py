@@ -7,8 +7,9 @@ resumable uploads, and real-time progress tracking.
 
 import asyncio
 import hashlib
-import json
+import os
 import shutil
+import threading
 import time
 import uuid
 from datetime import datetime, timedelta
@@ -24,6 +25,8 @@ from fastapi import HTTPException
 from api.settings import settings
 from api.utils.logger import get_system_logger
 from api.services.enhanced_websocket_service import EnhancedWebSocketService
+from api.services.transcription_dedup import content_store
+from api.services.upload_session_store import UploadSessionStore, create_upload_session_store
 
 logger = get_system_logger("chunked_upload")
 
@@ -55,10 +58,13 @@ class UploadSession:
     model_name: str = "small"
     language: Optional[str] = None
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_chunks: bool = True) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         data = asdict(self)
-        data['uploaded_chunks'] = list(self.uploaded_chunks)
+        if include_chunks:
+            data['uploaded_chunks'] = list(self.uploaded_chunks)
+        else:
+            del data['uploaded_chunks']
         data['status'] = self.status.value
         data['created_at'] = self.created_at.isoformat()
         data['expires_at'] = self.expires_at.isoformat()
@@ -67,55 +73,111 @@ class UploadSession:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'UploadSession':
         """Create from dictionary."""
-        data['uploaded_chunks'] = set(data['uploaded_chunks'])
+        data['uploaded_chunks'] = set(data.get('uploaded_chunks', []))
         data['status'] = UploadStatus(data['status'])
         data['created_at'] = datetime.fromisoformat(data['created_at'])
         data['expires_at'] = datetime.fromisoformat(data['expires_at'])
         return cls(**data)
 
 
+PART_FILENAME = "upload.part"
+HASH_READ_SIZE = 1024 * 1024  # 1 MiB
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    """Write ``data`` at ``offset``, retrying short positional writes."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _pread_exact(fd: int, size: int, offset: int) -> bytes:
+    """Read exactly ``size`` bytes at ``offset``."""
+    data = os.pread(fd, size, offset)
+    if len(data) != size:
+        raise IOError(f"Short read at offset {offset}: expected {size} bytes, got {len(data)}")
+    return data
+
+
+class _HashFrontier:
+    """Running SHA-256 over the contiguous prefix of received chunks.
+    
+    Chunks arriving in order are hashed straight from the request buffer.
+    Chunks that arrive early are parked until the gap before them fills,
+    then read back once (normally from the page cache).
+    """
+    
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.next_chunk = 0
+        self.pending: Set[int] = set()
+        self.lock = threading.Lock()
+
+
 class ChunkProcessor:
-    """Handles parallel chunk processing with validation."""
+    """Writes chunks in place into a pre-allocated upload file."""
     
     def __init__(self, max_workers: int = 4):
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self.chunk_validators = {}
+        self._frontiers: Dict[str, _HashFrontier] = {}
+        self._frontiers_lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool for chunk writes, recreated after ``cleanup`` (one per app lifespan)."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+    
+    @staticmethod
+    def part_path(session_dir: Path) -> Path:
+        """Path of the in-progress upload file for a session."""
+        return session_dir / PART_FILENAME
+    
+    @staticmethod
+    def expected_chunk_size(session: UploadSession, chunk_number: int) -> int:
+        """Every chunk is ``chunk_size`` bytes except the final remainder."""
+        if chunk_number == session.total_chunks - 1:
+            return session.total_size - chunk_number * session.chunk_size
+        return session.chunk_size
+    
+    def _frontier(self, session_id: str) -> _HashFrontier:
+        with self._frontiers_lock:
+            return self._frontiers.setdefault(session_id, _HashFrontier())
+    
+    def discard(self, session_id: str):
+        """Forget in-memory hashing state for a session."""
+        with self._frontiers_lock:
+            self._frontiers.pop(session_id, None)
     
     async def process_chunk(
         self, 
-        session_id: str, 
+        session: UploadSession, 
         chunk_number: int, 
         chunk_data: bytes,
         session_dir: Path
     ) -> Tuple[bool, str]:
-        """Process and validate a single chunk."""
+        """Validate a chunk and write it at its final offset."""
+        session_id = session.session_id
         try:
-            chunk_file = session_dir / "chunks" / f"chunk_{chunk_number:06d}.tmp"
-            chunk_file.parent.mkdir(parents=True, exist_ok=True)
-            
             # Validate chunk data
             if len(chunk_data) == 0:
                 return False, "Empty chunk data"
             
-            # Write chunk to temporary file
-            async with aiofiles.open(chunk_file, "wb") as f:
-                await f.write(chunk_data)
-            
-            # Verify chunk integrity
-            chunk_hash = hashlib.sha256(chunk_data).hexdigest()
+            expected_size = self.expected_chunk_size(session, chunk_number)
+            if len(chunk_data) != expected_size:
+                return False, f"Chunk {chunk_number} must be {expected_size} bytes, got {len(chunk_data)}"
             
-            # Store chunk metadata
-            chunk_meta = {
-                "chunk_number": chunk_number,
-                "size": len(chunk_data),
-                "hash": chunk_hash,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            meta_file = session_dir / "chunks" / f"chunk_{chunk_number:06d}.meta"
-            async with aiofiles.open(meta_file, "w") as f:
-                await f.write(json.dumps(chunk_meta))
+            loop = asyncio.get_running_loop()
+            chunk_hash = await loop.run_in_executor(
+                self.executor, self._write_chunk, session, chunk_number, chunk_data, session_dir
+            )
             
             logger.debug(f"Processed chunk {chunk_number} for session {session_id}")
             return True, chunk_hash
@@ -124,49 +186,109 @@ class ChunkProcessor:
             logger.error(f"Error processing chunk {chunk_number} for session {session_id}: {e}")
             return False, str(e)
     
+    def _write_chunk(
+        self,
+        session: UploadSession,
+        chunk_number: int,
+        chunk_data: bytes,
+        session_dir: Path
+    ) -> str:
+        """Positional write of one chunk (runs in the executor)."""
+        part_file = self.part_path(session_dir)
+        part_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        fd = os.open(part_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != session.total_size:
+                self._preallocate(fd, session.total_size)
+            _pwrite_all(fd, chunk_data, chunk_number * session.chunk_size)
+            self._advance_hash(session, chunk_number, chunk_data, fd)
+        finally:
+            os.close(fd)
+        
+        return hashlib.sha256(chunk_data).hexdigest()
+    
+    @staticmethod
+    def _preallocate(fd: int, size: int):
+        """Reserve the full upload size so chunks never extend the file."""
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, size)
+                return
+            except OSError:
+                pass  # Filesystem without fallocate support; a sparse file works too
+        os.ftruncate(fd, size)
+    
+    def _advance_hash(self, session: UploadSession, chunk_number: int, chunk_data: bytes, fd: int):
+        frontier = self._frontier(session.session_id)
+        with frontier.lock:
+            if chunk_number < frontier.next_chunk or chunk_number in frontier.pending:
+                return
+            if chunk_number != frontier.next_chunk:
+                frontier.pending.add(chunk_number)
+                return
+            
+            frontier.digest.update(chunk_data)
+            frontier.next_chunk += 1
+            while frontier.next_chunk in frontier.pending:
+                parked = frontier.next_chunk
+                frontier.digest.update(_pread_exact(
+                    fd,
+                    self.expected_chunk_size(session, parked),
+                    parked * session.chunk_size
+                ))
+                frontier.pending.discard(parked)
+                frontier.next_chunk += 1
+    
+    def _finish_hash(self, session: UploadSession, part_file: Path) -> str:
+        """Complete the SHA-256, reading only bytes the frontier has not seen."""
+        with self._frontiers_lock:
+            frontier = self._frontiers.pop(session.session_id, None)
+        if frontier is None:
+            # Chunks were received by another process; hash the whole file.
+            frontier = _HashFrontier()
+        
+        offset = min(frontier.next_chunk * session.chunk_size, session.total_size)
+        fd = os.open(part_file, os.O_RDONLY)
+        try:
+            while offset < session.total_size:
+                size = min(HASH_READ_SIZE, session.total_size - offset)
+                frontier.digest.update(_pread_exact(fd, size, offset))
+                offset += size
+        finally:
+            os.close(fd)
+        
+        return frontier.digest.hexdigest()
+    
     async def assemble_file(
         self, 
         session: UploadSession, 
         session_dir: Path,
         output_path: Path
     ) -> Tuple[bool, str]:
-        """Assemble chunks into final file."""
+        """Move the completed upload file into place and return its SHA-256."""
         try:
             logger.info(f"Starting file assembly for session {session.session_id}")
             
-            chunks_dir = session_dir / "chunks"
-            
             # Verify all chunks are present
-            missing_chunks = []
-            for i in range(session.total_chunks):
-                chunk_file = chunks_dir / f"chunk_{i:06d}.tmp"
-                if not chunk_file.exists():
-                    missing_chunks.append(i)
-            
+            missing_chunks = sorted(set(range(session.total_chunks)) - session.uploaded_chunks)
             if missing_chunks:
                 return False, f"Missing chunks: {missing_chunks}"
             
-            # Create output directory if needed
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Assemble file by streaming chunks
-            total_written = 0
-            file_hash = hashlib.sha256()
+            part_file = self.part_path(session_dir)
+            if not part_file.exists():
+                return False, "Upload data not found"
             
-            async with aiofiles.open(output_path, "wb") as output_file:
-                for i in range(session.total_chunks):
-                    chunk_file = chunks_dir / f"chunk_{i:06d}.tmp"
-                    
-                    async with aiofiles.open(chunk_file, "rb") as chunk:
-                        chunk_data = await chunk.read()
-                        await output_file.write(chunk_data)
-                        file_hash.update(chunk_data)
-                        total_written += len(chunk_data)
+            loop = asyncio.get_running_loop()
+            final_hash = await loop.run_in_executor(
+                self.executor, self._finish_hash, session, part_file
+            )
             
-            # Verify final file integrity
-            final_hash = file_hash.hexdigest()
+            # Chunks were written in place, so no copy is needed
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part_file, output_path)
             
-            logger.info(f"File assembly completed for session {session.session_id}: {total_written} bytes")
+            logger.info(f"File assembly completed for session {session.session_id}: {session.total_size} bytes")
             return True, final_hash
             
         except Exception as e:
@@ -174,8 +296,11 @@ class ChunkProcessor:
             return False, str(e)
     
     def cleanup(self):
-        """Cleanup resources."""
-        self.executor.shutdown(wait=True)
+        """Cleanup resources; the next chunk write starts a fresh executor."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
 
 class UploadProgressTracker:
@@ -272,7 +397,10 @@ class ChunkedUploadService:
         self.chunk_processor = ChunkProcessor(max_workers=self.max_parallel_chunks)
         self.progress_tracker = UploadProgressTracker(websocket_service)
         
-        # Session storage (in production, use Redis)
+        # Session state lives in the shared store (Redis or files); this dict
+        # caches the sessions seen by this process for listings and metrics.
+        self.session_store: Optional[UploadSessionStore] = None
+        self._store_lock = asyncio.Lock()
         self.sessions: Dict[str, UploadSession] = {}
         
         logger.info("ChunkedUploadService initialized")
@@ -281,35 +409,40 @@ class ChunkedUploadService:
         """Get session directory path."""
         return self.sessions_dir / session_id
     
+    async def _get_store(self) -> UploadSessionStore:
+        """Return the session store, creating it on first use."""
+        if self.session_store is None:
+            async with self._store_lock:
+                if self.session_store is None:
+                    self.session_store = await create_upload_session_store(self.sessions_dir)
+        return self.session_store
+    
     async def _save_session(self, session: UploadSession):
-        """Save session metadata to disk."""
-        session_dir = self._get_session_dir(session.session_id)
-        session_dir.mkdir(parents=True, exist_ok=True)
-        
-        metadata_file = session_dir / "metadata.json"
-        async with aiofiles.open(metadata_file, "w") as f:
-            await f.write(json.dumps(session.to_dict(), indent=2))
-        
+        """Persist session metadata; received chunks are tracked separately."""
+        store = await self._get_store()
+        await store.save(session.session_id, session.to_dict(include_chunks=False), session.expires_at)
         self.sessions[session.session_id] = session
     
     async def _load_session(self, session_id: str) -> Optional[UploadSession]:
-        """Load session metadata from disk."""
-        if session_id in self.sessions:
-            return self.sessions[session_id]
-        
-        session_dir = self._get_session_dir(session_id)
-        metadata_file = session_dir / "metadata.json"
-        
-        if not metadata_file.exists():
-            return None
-        
+        """Load session metadata from the shared store."""
         try:
-            async with aiofiles.open(metadata_file, "r") as f:
-                data = json.loads(await f.read())
-            
-            session = UploadSession.from_dict(data)
-            self.sessions[session_id] = session
-            return session
+            store = await self._get_store()
+            data = await store.load(session_id)
+            if data is None:
+                return None
+            
+            loaded = UploadSession.from_dict(data)
+            cached = self.sessions.get(session_id)
+            if cached is not None:
+                # Another replica may have changed the status since we last looked.
+                cached.status = loaded.status
+                cached.file_hash = loaded.file_hash
+                cached.expires_at = loaded.expires_at
+                return cached
+            
+            loaded.uploaded_chunks = await store.received_chunks(session_id, loaded.total_chunks)
+            self.sessions[session_id] = loaded
+            return loaded
             
         except Exception as e:
             logger.error(f"Error loading session {session_id}: {e}")
@@ -407,29 +540,32 @@ class ChunkedUploadService:
                 raise HTTPException(status_code=400, detail="Invalid chunk number")
             
             # Check if chunk already uploaded
-            if chunk_number in session.uploaded_chunks:
+            store = await self._get_store()
+            if await store.has_chunk(session_id, chunk_number):
+                session.uploaded_chunks.add(chunk_number)
                 return {
                     "chunk_number": chunk_number,
                     "status": "already_uploaded",
-                    "uploaded_chunks": len(session.uploaded_chunks),
+                    "uploaded_chunks": await store.count_chunks(session_id),
                     "total_chunks": session.total_chunks
                 }
             
             # Process chunk
             session_dir = self._get_session_dir(session_id)
             success, result = await self.chunk_processor.process_chunk(
-                session_id, chunk_number, chunk_data, session_dir
+                session, chunk_number, chunk_data, session_dir
             )
             
             if not success:
                 raise HTTPException(status_code=400, detail=f"Chunk processing failed: {result}")
             
-            # Update session
+            # Acknowledge the chunk (a single bit in the store)
+            await store.mark_chunk(session_id, chunk_number)
             session.uploaded_chunks.add(chunk_number)
-            await self._save_session(session)
+            uploaded_count = await store.count_chunks(session_id)
             
             # Calculate progress
-            bytes_uploaded = len(session.uploaded_chunks) * self.chunk_size
+            bytes_uploaded = uploaded_count * self.chunk_size
             if chunk_number == session.total_chunks - 1:
                 # Last chunk might be smaller
                 bytes_uploaded = session.total_size
@@ -446,9 +582,9 @@ class ChunkedUploadService:
                 "chunk_number": chunk_number,
                 "status": "uploaded",
                 "chunk_hash": result,
-                "uploaded_chunks": len(session.uploaded_chunks),
+                "uploaded_chunks": uploaded_count,
                 "total_chunks": session.total_chunks,
-                "progress_percent": round((len(session.uploaded_chunks) / session.total_chunks) * 100, 2)
+                "progress_percent": round((uploaded_count / session.total_chunks) * 100, 2)
             }
             
         except HTTPException:
@@ -474,14 +610,16 @@ class ChunkedUploadService:
                 raise HTTPException(status_code=403, detail="Access denied")
             
             # Check if all chunks uploaded
-            if len(session.uploaded_chunks) != session.total_chunks:
-                missing_chunks = set(range(session.total_chunks)) - session.uploaded_chunks
+            store = await self._get_store()
+            uploaded_count = await store.count_chunks(session_id)
+            if uploaded_count != session.total_chunks:
                 return {
                     "status": "incomplete",
-                    "missing_chunks": sorted(list(missing_chunks)),
-                    "uploaded_chunks": len(session.uploaded_chunks),
+                    "missing_chunks": await store.missing_chunks(session_id, session.total_chunks),
+                    "uploaded_chunks": uploaded_count,
                     "total_chunks": session.total_chunks
                 }
+            session.uploaded_chunks = set(range(session.total_chunks))
             
             # Update status to assembling
             session.status = UploadStatus.ASSEMBLING
@@ -510,6 +648,9 @@ class ChunkedUploadService:
             session.file_hash = result
             await self._save_session(session)
             
+            # Share storage with identical earlier uploads
+            content_store.adopt(output_path, result)
+            
             # Create transcription job (integrate with existing job system)
             job_id = await self._create_transcription_job(session, output_path)
             
@@ -554,17 +695,21 @@ class ChunkedUploadService:
                 session.status = UploadStatus.EXPIRED
                 await self._save_session(session)
             
-            # Calculate progress
-            progress_percent = (len(session.uploaded_chunks) / session.total_chunks) * 100
-            missing_chunks = sorted(list(set(range(session.total_chunks)) - session.uploaded_chunks))
+            # Calculate progress from the chunk bitmap
+            store = await self._get_store()
+            uploaded_count = await store.count_chunks(session_id)
+            progress_percent = (uploaded_count / session.total_chunks) * 100
+            missing_chunks = await store.missing_chunks(
+                session_id, session.total_chunks, limit=10  # Limit for response size
+            )
             
             return {
                 "session_id": session_id,
                 "status": session.status.value,
-                "uploaded_chunks": len(session.uploaded_chunks),
+                "uploaded_chunks": uploaded_count,
                 "total_chunks": session.total_chunks,
                 "progress_percent": round(progress_percent, 2),
-                "missing_chunks": missing_chunks[:10],  # Limit for response size
+                "missing_chunks": missing_chunks,
                 "expires_at": session.expires_at.isoformat(),
                 "original_filename": session.original_filename
             }
@@ -645,6 +790,7 @@ class ChunkedUploadService:
                 "transcribe_audio",
                 job_id=job_id,
                 file_path=str(file_path),
+                content_sha256=session.file_hash,
             )
             
             logger.info(f"Created transcription job {job_id} for chunked upload session {session.session_id}")
@@ -659,13 +805,13 @@ class ChunkedUploadService:
             db.close()
     
     async def _cleanup_session_chunks(self, session_id: str):
-        """Cleanup temporary chunk files."""
+        """Cleanup partial upload data."""
         try:
-            session_dir = self._get_session_dir(session_id)
-            chunks_dir = session_dir / "chunks"
+            self.chunk_processor.discard(session_id)
+            part_file = self.chunk_processor.part_path(self._get_session_dir(session_id))
             
-            if chunks_dir.exists():
-                await aiofiles.os.rmdir(chunks_dir)
+            if part_file.exists():
+                await aiofiles.os.remove(part_file)
                 logger.debug(f"Cleaned up chunks for session {session_id}")
                 
         except Exception as e:
@@ -706,6 +852,7 @@ class ChunkedUploadService:
             "assembling_sessions": assembling_sessions,
             "completed_sessions": completed_sessions,
             "failed_sessions": failed_sessions,
+            "session_store": self.session_store.backend if self.session_store else None,
             "chunk_size": self.chunk_size,
             "max_parallel_chunks": self.max_parallel_chunks,
             "max_file_size": self.max_file_size
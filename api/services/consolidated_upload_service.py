@@ -12,7 +12,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional, Any, BinaryIO
 
-import aiofiles
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.orm import Session
 
@@ -20,6 +19,7 @@ from api.models import Job, JobStatusEnum
 from api.settings import settings
 from api.services.chunked_upload_service import ChunkedUploadService
 from api.utils.logger import get_system_logger
+from api.utils.upload_streaming import UploadTooLargeError, stream_upload_to_path
 from api.paths import storage
 
 logger = get_system_logger("upload_service")
@@ -65,23 +65,20 @@ class ConsolidatedUploadService:
                     detail=f"Unsupported file format. Supported types: {', '.join(SUPPORTED_FORMATS.keys())}"
                 )
 
-            # Read file content
-            content = await file.read()
-            if len(content) > MAX_DIRECT_UPLOAD_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File too large for direct upload. Maximum size: {MAX_DIRECT_UPLOAD_SIZE} bytes. Use chunked upload instead."
-                )
-
             # Generate unique filename
             file_id = str(uuid.uuid4())
             extension = SUPPORTED_FORMATS[file.content_type]
             saved_filename = f"{file_id}{extension}"
             file_path = self.upload_dir / saved_filename
 
-            # Save file
-            async with aiofiles.open(file_path, "wb") as f:
-                await f.write(content)
+            # Stream file to disk without buffering it in memory
+            try:
+                await stream_upload_to_path(file, file_path, max_bytes=MAX_DIRECT_UPLOAD_SIZE)
+            except UploadTooLargeError:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large for direct upload. Maximum size: {MAX_DIRECT_UPLOAD_SIZE} bytes. Use chunked upload instead."
+                )
 
             # Create job
             job = Job(
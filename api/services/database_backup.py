@@ -0,0 +1,255 @@
+"""Consistent database snapshots for the backup service.
+
+SQLite databases are copied with the online backup API
+(:meth:`sqlite3.Connection.backup`), which takes a transactionally consistent
+page-level copy while the application keeps running and preserves column
+types exactly.  The copy is streamed through zstd into the backup file and
+restored with the same API, so a restore replaces the live database in one
+step instead of replaying ``INSERT`` statements.
+
+PostgreSQL databases are dumped by streaming ``pg_dump --format=custom``
+through zstd and restored with ``pg_restore``.  ``PG_DUMP_BIN`` and
+``PG_RESTORE_BIN`` select the binaries, so any ``pg_dump``-compatible tool
+(or a wrapper that runs it inside a container) can be used.
+
+Every function here blocks; the backup service calls them through
+:func:`asyncio.to_thread`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Ensure environments without compiled Zstandard wheels can fall back to the CFFI backend.
+os.environ.setdefault("PYTHON_ZSTANDARD_IMPORT_POLICY", "cffi_fallback")
+
+import zstandard
+from prometheus_client import Counter, Histogram  # type: ignore
+from sqlalchemy.engine import URL, make_url
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("database_backup")
+
+SQLITE_SNAPSHOT_SUFFIX = ".sqlite3.zst"
+POSTGRES_SNAPSHOT_SUFFIX = ".pgdump.zst"
+COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB
+
+BACKUP_DURATION_SECONDS = Histogram(
+    "backup_duration_seconds",
+    "Time spent creating backups by component (database, uploads, transcripts)",
+    ["component"],
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+)
+BACKUP_BYTES = Counter(
+    "backup_bytes_total",
+    "Bytes processed by backups by component and stage (source, stored)",
+    ["component", "stage"],
+)
+
+
+class DatabaseBackupError(Exception):
+    """Raised when a database snapshot cannot be created or restored."""
+
+
+def record_backup_metrics(component: str, duration: float, source_bytes: int, stored_bytes: int) -> Dict[str, float]:
+    """Export backup metrics for ``component`` and return them for the manifest."""
+    BACKUP_DURATION_SECONDS.labels(component=component).observe(duration)
+    BACKUP_BYTES.labels(component=component, stage="source").inc(source_bytes)
+    BACKUP_BYTES.labels(component=component, stage="stored").inc(stored_bytes)
+    return {
+        "duration_seconds": round(duration, 3),
+        "source_bytes": source_bytes,
+        "stored_bytes": stored_bytes,
+        "throughput_bytes_per_second": round(source_bytes / duration) if duration > 0 else source_bytes,
+    }
+
+
+def snapshot_suffix(database_url: str) -> str:
+    """File suffix of a snapshot of ``database_url``."""
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        return SQLITE_SNAPSHOT_SUFFIX
+    if backend == "postgresql":
+        return POSTGRES_SNAPSHOT_SUFFIX
+    raise DatabaseBackupError(f"Unsupported database backend for backups: {backend}")
+
+
+def _sqlite_path(database_url: str) -> Path:
+    database = make_url(database_url).database
+    if not database or database == ":memory:":
+        raise DatabaseBackupError("In-memory SQLite databases cannot be backed up")
+    return Path(database)
+
+
+def _libpq_connection(database_url: str) -> Tuple[str, Dict[str, str]]:
+    """Connection URL and environment for the libpq command line tools.
+
+    The password travels in ``PGPASSWORD`` rather than on the command line,
+    where any local user could read it from the process list.
+    """
+    url = make_url(database_url)
+    env = os.environ.copy()
+    if url.password is not None:
+        env["PGPASSWORD"] = str(url.password)
+    # pg_dump does not understand SQLAlchemy driver suffixes (postgresql+psycopg2://)
+    libpq_url = URL.create(
+        "postgresql",
+        username=url.username,
+        host=url.host,
+        port=url.port,
+        database=url.database,
+        query=url.query,
+    )
+    return libpq_url.render_as_string(hide_password=False), env
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    return zstandard.ZstdCompressor(level=3, threads=-1)
+
+
+def backup_database(database_url: str, backup_file: Path) -> Dict[str, float]:
+    """Write a compressed, consistent snapshot of ``database_url`` to ``backup_file``."""
+    started = time.perf_counter()
+    backup_file = Path(backup_file)
+    staging = backup_file.with_name(f".{backup_file.name}.tmp")
+
+    try:
+        if make_url(database_url).get_backend_name() == "sqlite":
+            source_bytes = _backup_sqlite(_sqlite_path(database_url), staging)
+        else:
+            snapshot_suffix(database_url)  # Rejects unsupported backends
+            source_bytes = _backup_postgres(database_url, staging)
+        os.replace(staging, backup_file)
+    finally:
+        staging.unlink(missing_ok=True)
+
+    return record_backup_metrics(
+        "database", time.perf_counter() - started, source_bytes, backup_file.stat().st_size
+    )
+
+
+def _backup_sqlite(database_path: Path, output: Path) -> int:
+    with tempfile.TemporaryDirectory(dir=output.parent) as workdir:
+        copy_path = Path(workdir) / "snapshot.sqlite3"
+        source = sqlite3.connect(str(database_path))
+        target = sqlite3.connect(str(copy_path))
+        try:
+            # One step copies every page under a single read transaction: a
+            # consistent snapshot that does not block WAL-mode writers.
+            source.backup(target, pages=-1)
+        finally:
+            target.close()
+            source.close()
+
+        with open(copy_path, "rb") as src, open(output, "wb") as dest:
+            _compressor().copy_stream(src, dest, read_size=COPY_BUFFER_SIZE, write_size=COPY_BUFFER_SIZE)
+        return copy_path.stat().st_size
+
+
+def _backup_postgres(database_url: str, output: Path) -> int:
+    dbname, env = _libpq_connection(database_url)
+    command = [
+        os.getenv("PG_DUMP_BIN", "pg_dump"),
+        "--format=custom",
+        "--compress=0",
+        "--dbname",
+        dbname,
+    ]
+    # stderr goes to a file so a chatty dump cannot fill the pipe and stall
+    with open(output, "wb") as dest, tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors, env=env)
+        try:
+            source_bytes, _ = _compressor().copy_stream(
+                process.stdout, dest, read_size=COPY_BUFFER_SIZE, write_size=COPY_BUFFER_SIZE
+            )
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        _raise_for_status("pg_dump", returncode, errors)
+    return source_bytes
+
+
+def _raise_for_status(tool: str, returncode: int, errors) -> None:
+    if returncode != 0:
+        errors.seek(0)
+        message = errors.read().decode("utf-8", errors="replace").strip()
+        raise DatabaseBackupError(f"{tool} failed with exit code {returncode}: {message}")
+
+
+def restore_database(database_url: str, backup_file: Path) -> None:
+    """Replace the contents of ``database_url`` with the snapshot in ``backup_file``."""
+    backup_file = Path(backup_file)
+    if make_url(database_url).get_backend_name() == "sqlite":
+        _restore_sqlite(_sqlite_path(database_url), backup_file)
+    else:
+        snapshot_suffix(database_url)
+        _restore_postgres(database_url, backup_file)
+
+
+def _restore_sqlite(database_path: Path, backup_file: Path) -> None:
+    with tempfile.TemporaryDirectory(dir=backup_file.parent) as workdir:
+        copy_path = Path(workdir) / "restore.sqlite3"
+        with open(backup_file, "rb") as src, open(copy_path, "wb") as dest:
+            zstandard.ZstdDecompressor().copy_stream(
+                src, dest, read_size=COPY_BUFFER_SIZE, write_size=COPY_BUFFER_SIZE
+            )
+
+        source = sqlite3.connect(str(copy_path))
+        target = sqlite3.connect(str(database_path), timeout=30)
+        try:
+            # Replaces every page of the live database in one write transaction
+            source.backup(target, pages=-1)
+        finally:
+            target.close()
+            source.close()
+
+
+def _restore_postgres(database_url: str, backup_file: Path) -> None:
+    dbname, env = _libpq_connection(database_url)
+    command = [
+        os.getenv("PG_RESTORE_BIN", "pg_restore"),
+        "--clean",
+        "--if-exists",
+        "--single-transaction",
+        "--dbname",
+        dbname,
+    ]
+    with open(backup_file, "rb") as src, tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=errors, env=env)
+        try:
+            zstandard.ZstdDecompressor().copy_stream(
+                src, process.stdin, read_size=COPY_BUFFER_SIZE, write_size=COPY_BUFFER_SIZE
+            )
+        except BrokenPipeError:
+            pass  # pg_restore exited early; its exit status explains why
+        finally:
+            with contextlib.suppress(BrokenPipeError):
+                process.stdin.close()
+            returncode = process.wait()
+        _raise_for_status("pg_restore", returncode, errors)
+
+
+def is_snapshot(backup_file: Optional[Path]) -> bool:
+    """True for snapshots written by this module (as opposed to legacy SQL dumps)."""
+    if backup_file is None:
+        return False
+    name = Path(backup_file).name
+    return name.endswith(SQLITE_SNAPSHOT_SUFFIX) or name.endswith(POSTGRES_SNAPSHOT_SUFFIX)
+
+
+__all__ = [
+    "DatabaseBackupError",
+    "backup_database",
+    "is_snapshot",
+    "record_backup_metrics",
+    "restore_database",
+    "snapshot_suffix",
+]
@@ -1,19 +1,30 @@
 """
 Enhanced WebSocket Service for T025 Phase 4: WebSocket Scaling
 Provides scalable WebSocket connection management with Redis pub/sub, connection pooling, and performance monitoring.
+
+Outbound messages are never sent from the broadcasting task.  Each connection
+owns a bounded :class:`ConnectionSendQueue` drained by its own writer task, so
+a slow client only delays itself.  Broadcasts serialize the message once and
+enqueue the same text for every recipient; when a queue is full the
+``WEBSOCKET_SLOW_CONSUMER_POLICY`` decides whether the oldest message is
+dropped or the client is disconnected, and queued job updates are coalesced
+so a lagging client receives only the latest state of each job.
 """
 
 import asyncio
 import json
 import os
 import time
-from typing import Dict, List, Set, Optional, Any, Callable
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, List, Set, Optional, Any, Callable, Hashable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 import uuid
 
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException
+from prometheus_client import Counter, Gauge  # type: ignore
 import redis.asyncio as redis
 from sqlalchemy.orm import Session
 
@@ -23,6 +34,36 @@ from api.models import Job, JobStatusEnum, User
 
 logger = get_system_logger("websocket_service")
 
+# Outbound messages buffered per connection before the slow-consumer policy applies
+SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "256"))
+# "drop_oldest" discards the oldest queued message, "disconnect" closes the client
+SLOW_CONSUMER_POLICY = os.getenv("WEBSOCKET_SLOW_CONSUMER_POLICY", "drop_oldest")
+# Message types where only the latest queued message per key field is delivered
+COALESCED_MESSAGE_TYPES = {"job_update": "job_id", "job_status": "job_id"}
+
+WEBSOCKET_QUEUE_DEPTH = Gauge(
+    "websocket_send_queue_depth",
+    "Outbound WebSocket messages queued across all connections",
+)
+WEBSOCKET_DROPPED_MESSAGES = Counter(
+    "websocket_dropped_messages_total",
+    "Outbound WebSocket messages not delivered by reason (coalesced, overflow, disconnect)",
+    ["reason"],
+)
+
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """Serialize ``message`` exactly as ``WebSocket.send_json`` would."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def _coalesce_key(message: Dict[str, Any]) -> Optional[Tuple[str, Any]]:
+    message_type = message.get("type")
+    field_name = COALESCED_MESSAGE_TYPES.get(message_type)
+    if field_name is None or message.get(field_name) is None:
+        return None
+    return message_type, message[field_name]
+
 @dataclass
 class WebSocketMetrics:
     """WebSocket performance metrics."""
@@ -30,6 +71,7 @@ class WebSocketMetrics:
     active_connections: int = 0
     messages_sent: int = 0
     messages_received: int = 0
+    messages_dropped: int = 0
     connection_errors: int = 0
     average_message_time_ms: float = 0.0
     peak_connections: int = 0
@@ -59,6 +101,7 @@ class ConnectionInfo:
     last_activity: datetime
     connection_id: str
     subscriptions: Set[str] = field(default_factory=set)
+    send_queue: Optional["ConnectionSendQueue"] = None
     
     def update_activity(self):
         """Update the last activity timestamp."""
@@ -72,11 +115,116 @@ class ConnectionInfo:
         """Remove a subscription topic."""
         self.subscriptions.discard(topic)
 
+class ConnectionSendQueue:
+    """Bounded outbound queue for one connection, drained by its own writer task.
+
+    Messages are queued as already serialized text.  A message with a coalesce
+    key replaces a queued message with the same key in place, so it keeps the
+    older message's position but carries the latest content.
+    """
+
+    def __init__(
+        self,
+        connection_id: str,
+        websocket: WebSocket,
+        pool: "WebSocketConnectionPool",
+        maxsize: int = SEND_QUEUE_SIZE,
+        policy: str = SLOW_CONSUMER_POLICY,
+    ):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.pool = pool
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self._pending: "OrderedDict[Hashable, Tuple[str, str]]" = OrderedDict()
+        self._sequence = count()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(
+            self._write_loop(), name=f"websocket-writer-{self.connection_id}"
+        )
+
+    def put(self, text: str, message_type: str = "unknown", coalesce_key: Optional[Hashable] = None) -> bool:
+        """Queue ``text`` without waiting; returns False if the message was refused."""
+        if self._closed:
+            return False
+
+        if coalesce_key is not None and coalesce_key in self._pending:
+            self._pending[coalesce_key] = (text, message_type)
+            self._drop("coalesced")
+            return True
+
+        if len(self._pending) >= self.maxsize:
+            if self.policy == "disconnect":
+                self._drop("overflow")
+                logger.warning(f"Disconnecting slow WebSocket consumer {self.connection_id}")
+                self.close()
+                asyncio.create_task(self.pool.remove_connection(self.connection_id, "forced"))
+                return False
+            self._pending.popitem(last=False)
+            WEBSOCKET_QUEUE_DEPTH.dec()
+            self._drop("overflow")
+
+        key = coalesce_key if coalesce_key is not None else next(self._sequence)
+        self._pending[key] = (text, message_type)
+        WEBSOCKET_QUEUE_DEPTH.inc()
+        self._ready.set()
+        return True
+
+    def close(self) -> None:
+        """Stop the writer and discard queued messages."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._pending:
+            self._drop("disconnect", len(self._pending))
+            WEBSOCKET_QUEUE_DEPTH.dec(len(self._pending))
+            self._pending.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self._ready.set()
+
+    def _drop(self, reason: str, amount: int = 1) -> None:
+        self.dropped += amount
+        self.pool.metrics.messages_dropped += amount
+        WEBSOCKET_DROPPED_MESSAGES.labels(reason=reason).inc(amount)
+
+    async def _write_loop(self) -> None:
+        while not self._closed:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._pending and not self._closed:
+                _, (text, message_type) = self._pending.popitem(last=False)
+                WEBSOCKET_QUEUE_DEPTH.dec()
+                start_time = time.time()
+                try:
+                    await self.websocket.send_text(text)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Failed to send message to connection {self.connection_id}: {e}")
+                    self.pool.metrics.connection_errors += 1
+                    self.close()
+                    await self.pool.remove_connection(self.connection_id, "send_error")
+                    return
+                self.pool._record_sent(self.connection_id, message_type, (time.time() - start_time) * 1000)
+
+
 class WebSocketConnectionPool:
     """Advanced WebSocket connection pool with monitoring and management."""
     
-    def __init__(self, max_connections: int = 1000):
+    def __init__(self, max_connections: int = 1000, send_queue_size: int = SEND_QUEUE_SIZE,
+                 slow_consumer_policy: str = SLOW_CONSUMER_POLICY):
         self.max_connections = max_connections
+        self.send_queue_size = send_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
         self.connections: Dict[str, ConnectionInfo] = {}
         self.job_connections: Dict[str, Set[str]] = {}  # job_id -> connection_ids
         self.user_connections: Dict[int, Set[str]] = {}  # user_id -> connection_ids
@@ -101,6 +249,14 @@ class WebSocketConnectionPool:
                 last_activity=datetime.utcnow(),
                 connection_id=connection_id
             )
+            conn_info.send_queue = ConnectionSendQueue(
+                connection_id,
+                websocket,
+                self,
+                maxsize=self.send_queue_size,
+                policy=self.slow_consumer_policy,
+            )
+            conn_info.send_queue.start()
             
             # Add to connection mappings
             self.connections[connection_id] = conn_info
@@ -134,6 +290,8 @@ class WebSocketConnectionPool:
                 return
             
             conn_info = self.connections[connection_id]
+            if conn_info.send_queue is not None:
+                conn_info.send_queue.close()
             
             # Remove from job connections
             if conn_info.job_id and conn_info.job_id in self.job_connections:
@@ -158,74 +316,69 @@ class WebSocketConnectionPool:
             
             logger.info(f"WebSocket connection removed: {connection_id} (reason: {reason})")
             
+            if reason == "forced":
+                # Tell the client it fell behind instead of leaving it connected but unserved
+                try:
+                    await conn_info.websocket.close(code=1013, reason="Slow consumer")
+                except Exception as e:
+                    logger.debug(f"Error closing slow WebSocket consumer {connection_id}: {e}")
+            
         except Exception as e:
             logger.error(f"Failed to remove WebSocket connection {connection_id}: {e}")
     
     async def send_to_connection(self, connection_id: str, message: Dict[str, Any]) -> bool:
-        """Send a message to a specific connection."""
-        try:
-            if connection_id not in self.connections:
-                return False
-            
-            conn_info = self.connections[connection_id]
-            start_time = time.time()
-            
-            await conn_info.websocket.send_json(message)
-            
-            # Update metrics
-            send_time_ms = (time.time() - start_time) * 1000
-            self.metrics.messages_sent += 1
-            self._update_average_message_time(send_time_ms)
-            self._track_message_type(message.get("type", "unknown"))
-            
-            conn_info.update_activity()
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Failed to send message to connection {connection_id}: {e}")
-            # Mark connection for removal
-            await self.remove_connection(connection_id, "send_error")
-            self.metrics.connection_errors += 1
+        """Queue a message for a specific connection."""
+        return self._enqueue(
+            connection_id, serialize_message(message), message.get("type", "unknown"), _coalesce_key(message)
+        )
+    
+    def _enqueue(self, connection_id: str, text: str, message_type: str,
+                 coalesce_key: Optional[Hashable]) -> bool:
+        conn_info = self.connections.get(connection_id)
+        if conn_info is None or conn_info.send_queue is None:
             return False
+        return conn_info.send_queue.put(text, message_type, coalesce_key)
+    
+    def _fan_out(self, connection_ids: List[str], message: Dict[str, Any]) -> int:
+        """Serialize ``message`` once and queue it for every connection."""
+        if not connection_ids:
+            return 0
+        text = serialize_message(message)
+        message_type = message.get("type", "unknown")
+        coalesce_key = _coalesce_key(message)
+        return sum(
+            self._enqueue(connection_id, text, message_type, coalesce_key)
+            for connection_id in connection_ids
+        )
+    
+    def _record_sent(self, connection_id: str, message_type: str, send_time_ms: float):
+        """Update metrics after a writer task delivered a message."""
+        self.metrics.messages_sent += 1
+        self._update_average_message_time(send_time_ms)
+        self._track_message_type(message_type)
+        conn_info = self.connections.get(connection_id)
+        if conn_info:
+            conn_info.update_activity()
     
     async def broadcast_to_job(self, job_id: str, message: Dict[str, Any]) -> int:
         """Broadcast a message to all connections for a specific job."""
-        if job_id not in self.job_connections:
-            return 0
-        
-        sent_count = 0
-        connection_ids = list(self.job_connections[job_id])  # Copy to avoid modification during iteration
-        
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent_count += 1
-        
-        return sent_count
+        return self._fan_out(list(self.job_connections.get(job_id, ())), message)
     
     async def broadcast_to_user(self, user_id: int, message: Dict[str, Any]) -> int:
         """Broadcast a message to all connections for a specific user."""
-        if user_id not in self.user_connections:
-            return 0
-        
-        sent_count = 0
-        connection_ids = list(self.user_connections[user_id])  # Copy to avoid modification during iteration
-        
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent_count += 1
-        
-        return sent_count
+        return self._fan_out(list(self.user_connections.get(user_id, ())), message)
     
     async def broadcast_to_all(self, message: Dict[str, Any]) -> int:
         """Broadcast a message to all active connections."""
-        sent_count = 0
-        connection_ids = list(self.connections.keys())  # Copy to avoid modification during iteration
-        
-        for connection_id in connection_ids:
-            if await self.send_to_connection(connection_id, message):
-                sent_count += 1
-        
-        return sent_count
+        return self._fan_out(list(self.connections), message)
+    
+    def queued_messages(self) -> int:
+        """Messages waiting in outbound queues across all connections."""
+        return sum(
+            len(conn_info.send_queue)
+            for conn_info in self.connections.values()
+            if conn_info.send_queue is not None
+        )
     
     def get_connection_info(self, connection_id: str) -> Optional[ConnectionInfo]:
         """Get information about a specific connection."""
@@ -586,6 +739,8 @@ class EnhancedWebSocketService:
             },
             "messaging": {
                 "messages_sent": self.connection_pool.metrics.messages_sent,
+                "queued_messages": self.connection_pool.queued_messages(),
+                "messages_dropped": self.connection_pool.metrics.messages_dropped,
                 "average_message_time_ms": self.connection_pool.metrics.average_message_time_ms,
                 "message_types": self.connection_pool.metrics.message_types
             },
@@ -5,10 +5,12 @@ Provides comprehensive export functionality with format conversion and template
 
 import json
 import os
+import time
 import zipfile
 import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Union, Tuple
 from pathlib import Path
 import logging
 
@@ -34,6 +36,7 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+from .transcript_segments import TranscriptSegments
 from ..extended_models.export_system import (
     ExportTemplate, ExportJob, BatchExport, ExportHistory, ExportFormatConfig,
     ExportFormat, ExportStatus, BatchExportStatus, TemplateType
@@ -42,6 +45,11 @@ from ..models import Job
 
 logger = logging.getLogger(__name__)
 
+# Batch exports render in a process pool; PDF/DOCX generation is CPU-bound.
+EXPORT_RENDER_WORKERS = int(os.getenv("EXPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+BATCH_PROGRESS_COMMIT_EVERY = 25
+BATCH_PROGRESS_COMMIT_SECONDS = 2.0
+
 
 class ExportFormatService:
     """Service for managing export format configurations and capabilities."""
@@ -505,7 +513,7 @@ class DocumentExportService:
                 
                 info_items = [
                     ("Original File", metadata.get("original_filename", "Unknown")),
-                    ("Duration", f"{metadata.get('duration', 0):.1f} seconds"),
+                    ("Duration", f"{metadata.get('duration') or 0:.1f} seconds"),
                     ("Model Used", metadata.get("model", "Unknown")),
                     ("Created", metadata.get("created_at", "Unknown")),
                 ]
@@ -613,7 +621,7 @@ class DocumentExportService:
                     
                     info_data = [
                         ["Original File", metadata.get("original_filename", "Unknown")],
-                        ["Duration", f"{metadata.get('duration', 0):.1f} seconds"],
+                        ["Duration", f"{metadata.get('duration') or 0:.1f} seconds"],
                         ["Model Used", metadata.get("model", "Unknown")],
                         ["Created", metadata.get("created_at", "Unknown")],
                     ]
@@ -694,7 +702,7 @@ class DocumentExportService:
                 content_lines.append("TRANSCRIPT INFORMATION")
                 content_lines.append("=" * 50)
                 content_lines.append(f"Original File: {metadata.get('original_filename', 'Unknown')}")
-                content_lines.append(f"Duration: {metadata.get('duration', 0):.1f} seconds")
+                content_lines.append(f"Duration: {metadata.get('duration') or 0:.1f} seconds")
                 content_lines.append(f"Model Used: {metadata.get('model', 'Unknown')}")
                 content_lines.append(f"Created: {metadata.get('created_at', 'Unknown')}")
                 content_lines.append("")
@@ -880,9 +888,14 @@ class ExportJobService:
             db.commit()
             
             # Generate export content
-            export_content = ExportJobService._generate_export_content(
-                export_job.format, transcript_data, template_config, styling_config
-            )
+            try:
+                export_content = ExportJobService._generate_export_content(
+                    export_job.format, transcript_data, template_config, styling_config
+                )
+            finally:
+                segments = transcript_data.get("segments")
+                if isinstance(segments, TranscriptSegments):
+                    segments.close()
             export_job.progress_percentage = 75.0
             db.commit()
             
@@ -935,33 +948,50 @@ class ExportJobService:
     def _prepare_transcript_data(job: Job) -> Dict[str, Any]:
         """Prepare transcript data for export processing."""
         
+        return ExportJobService._load_transcript_data(
+            job.transcript_path, ExportJobService._job_metadata(job)
+        )
+    
+    @staticmethod
+    def _job_metadata(job: Job) -> Dict[str, Any]:
+        """Export metadata for ``job`` as plain, picklable values."""
+        
+        return {
+            "original_filename": job.original_filename,
+            "duration": None,
+            "model": job.model,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "job_id": job.id,
+            "language": getattr(job, "language", "auto"),
+            "file_size": getattr(job, "file_size", None)
+        }
+    
+    @staticmethod
+    def _load_transcript_data(transcript_path: Optional[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Load transcript text and segments for export.
+
+        Segments come from the transcript's columnar sidecar as a lazy
+        :class:`TranscriptSegments` reader; callers close it once the export
+        content has been generated.
+        """
+        
+        text = ""
+        if transcript_path and os.path.exists(transcript_path):
+            with open(transcript_path, "r", encoding="utf-8") as handle:
+                text = handle.read()
+        
+        segments = TranscriptSegments.for_transcript(transcript_path)
+        
         # Base transcript data structure
         transcript_data = {
-            "text": job.result or "",
-            "metadata": {
-                "original_filename": job.original_filename,
-                "duration": job.duration_seconds,
-                "model": job.model,
-                "created_at": job.created_at.isoformat() if job.created_at else None,
-                "job_id": job.id,
-                "language": getattr(job, "language", "auto"),
-                "file_size": getattr(job, "file_size", None)
-            }
+            "text": text,
+            "metadata": dict(metadata, duration=float(segments.ends[-1]) if segments else None)
         }
         
-        # Add segments if available (from job.segments JSON field)
-        segments_data = getattr(job, "segments", None)
-        if segments_data:
-            try:
-                if isinstance(segments_data, str):
-                    segments = json.loads(segments_data)
-                else:
-                    segments = segments_data
-                
-                if isinstance(segments, list) and segments:
-                    transcript_data["segments"] = segments
-            except (json.JSONDecodeError, TypeError):
-                logger.warning(f"Could not parse segments data for job {job.id}")
+        if segments:
+            transcript_data["segments"] = segments
+        elif segments is not None:
+            segments.close()
         
         return transcript_data
     
@@ -1020,6 +1050,22 @@ class ExportJobService:
         else:
             raise ValueError(f"Unsupported export format: {format}")
     
+    @staticmethod
+    def _export_filename(format: str, base_filename: str) -> str:
+        """Return the output filename for ``base_filename`` exported as ``format``."""
+        
+        format_config = {
+            ExportFormat.SRT.value: ".srt",
+            ExportFormat.VTT.value: ".vtt",
+            ExportFormat.DOCX.value: ".docx",
+            ExportFormat.PDF.value: ".pdf",
+            ExportFormat.TXT.value: ".txt",
+            ExportFormat.JSON.value: ".json"
+        }
+        
+        extension = format_config.get(format, ".txt")
+        return f"{Path(base_filename).stem}_{format}{extension}"
+    
     @staticmethod
     def _save_export_file(
         export_job: ExportJob, 
@@ -1033,17 +1079,7 @@ class ExportJobService:
         export_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate filename
-        format_config = {
-            ExportFormat.SRT.value: ".srt",
-            ExportFormat.VTT.value: ".vtt",
-            ExportFormat.DOCX.value: ".docx",
-            ExportFormat.PDF.value: ".pdf",
-            ExportFormat.TXT.value: ".txt",
-            ExportFormat.JSON.value: ".json"
-        }
-        
-        extension = format_config.get(export_job.format, ".txt")
-        filename = f"{Path(base_filename).stem}_{export_job.format}{extension}"
+        filename = ExportJobService._export_filename(export_job.format, base_filename)
         filepath = export_dir / filename
         
         # Save content
@@ -1066,9 +1102,10 @@ class ExportJobService:
         db: Session, 
         export_job: ExportJob, 
         success: bool, 
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        commit: bool = True
     ) -> None:
-        """Create export history record."""
+        """Create export history record; batch processing defers the commit."""
         
         history = ExportHistory(
             export_job_id=export_job.id,
@@ -1085,7 +1122,52 @@ class ExportJobService:
         )
         
         db.add(history)
-        db.commit()
+        if commit:
+            db.commit()
+
+
+def render_export(task: Dict[str, Any]) -> bytes:
+    """Render one export described by a plain ``task`` dict.
+
+    Module-level so it can run in a :class:`ProcessPoolExecutor` worker; the
+    task carries only picklable values and the worker opens the transcript and
+    its segment sidecar itself.
+    """
+    
+    transcript_data = ExportJobService._load_transcript_data(task["transcript_path"], task["metadata"])
+    try:
+        content = ExportJobService._generate_export_content(
+            task["format"], transcript_data, task["template_config"], task["styling_config"]
+        )
+    finally:
+        segments = transcript_data.get("segments")
+        if isinstance(segments, TranscriptSegments):
+            segments.close()
+    
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+class _ChunkSink:
+    """Write-only file object collecting ZIP output between yields.
+
+    It has no ``tell``/``seek``, so :mod:`zipfile` writes data descriptors
+    instead of seeking back to patch local headers.
+    """
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
 
 class BatchExportService:
@@ -1144,7 +1226,13 @@ class BatchExportService:
     
     @staticmethod
     def process_batch_export(db: Session, batch_export_id: int) -> bool:
-        """Process a batch export by processing all individual export jobs."""
+        """Render every export of a batch in parallel straight into its ZIP archive.
+
+        Exports are rendered in a process pool (see :func:`render_export`) and
+        written to the archive in completion order without intermediate
+        files. Progress is committed every ``BATCH_PROGRESS_COMMIT_EVERY``
+        exports or ``BATCH_PROGRESS_COMMIT_SECONDS`` seconds.
+        """
         
         batch_export = db.query(BatchExport).filter(BatchExport.id == batch_export_id).first()
         if not batch_export:
@@ -1157,35 +1245,75 @@ class BatchExportService:
             batch_export.started_at = datetime.utcnow()
             db.commit()
             
-            # Process all export jobs
-            export_jobs = db.query(ExportJob).filter(
-                ExportJob.batch_export_id == batch_export_id
-            ).all()
+            export_jobs = {
+                export_job.id: export_job
+                for export_job in db.query(ExportJob).filter(
+                    ExportJob.batch_export_id == batch_export_id
+                ).all()
+            }
+            started_at = datetime.utcnow()
+            for export_job in export_jobs.values():
+                export_job.status = ExportStatus.PROCESSING.value
+                export_job.processing_started_at = started_at
+            tasks, missing = BatchExportService._build_render_tasks(db, batch_export, list(export_jobs.values()))
+            db.commit()
             
-            successful_jobs = []
-            failed_jobs = []
+            download_url = f"/api/exports/batch/{batch_export.id}/download"
+            archive_dir = Path("exports") / "batches" / str(batch_export.id)
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            archive_filename = f"{batch_export.name}_{batch_export.export_format}_batch.zip"
+            archive_path = archive_dir / archive_filename
+            staging_path = archive_dir / f".{archive_filename}.tmp"
             
-            for export_job in export_jobs:
-                success = ExportJobService.process_export_job(db, export_job.id)
-                if success:
-                    successful_jobs.append(export_job)
+            def finish(export_job: ExportJob, size: Optional[int], error: Optional[str]) -> None:
+                export_job.processing_completed_at = datetime.utcnow()
+                export_job.calculate_duration()
+                if error is None:
+                    export_job.status = ExportStatus.COMPLETED.value
+                    export_job.progress_percentage = 100.0
+                    export_job.output_size_bytes = size
+                    export_job.output_url = download_url
                     batch_export.completed_jobs += 1
                 else:
-                    failed_jobs.append(export_job)
+                    export_job.status = ExportStatus.FAILED.value
+                    export_job.error_message = error
                     batch_export.failed_jobs += 1
-                
+                ExportJobService._create_history_record(
+                    db, export_job, success=error is None, error=error, commit=False
+                )
                 batch_export.update_progress()
-                db.commit()
             
-            # Create archive if any jobs succeeded
-            if successful_jobs:
-                archive_path = BatchExportService._create_batch_archive(batch_export, successful_jobs)
-                batch_export.archive_path = archive_path
-                batch_export.download_url = f"/api/batch-exports/{batch_export.id}/download"
-                
-                # Calculate archive size
-                if os.path.exists(archive_path):
-                    batch_export.archive_size_bytes = os.path.getsize(archive_path)
+            for export_job_id, error in missing:
+                finish(export_jobs[export_job_id], None, error)
+            
+            processed = 0
+            last_commit = time.monotonic()
+            with zipfile.ZipFile(staging_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for task, content, error in BatchExportService._render_in_pool(tasks):
+                    export_job = export_jobs[task["export_job_id"]]
+                    if error is None:
+                        zipf.writestr(task["arcname"], content)
+                        export_job.output_filename = task["arcname"]
+                        finish(export_job, len(content), None)
+                    else:
+                        logger.warning(f"Export job {export_job.id} failed in batch {batch_export_id}: {error}")
+                        finish(export_job, None, error)
+                    
+                    processed += 1
+                    if (processed % BATCH_PROGRESS_COMMIT_EVERY == 0
+                            or time.monotonic() - last_commit >= BATCH_PROGRESS_COMMIT_SECONDS):
+                        db.commit()
+                        last_commit = time.monotonic()
+            
+            # Publish the archive only if it holds at least one export
+            if batch_export.completed_jobs > 0:
+                os.replace(staging_path, archive_path)
+                batch_export.archive_filename = archive_filename
+                batch_export.archive_path = str(archive_path)
+                batch_export.archive_size_bytes = os.path.getsize(archive_path)
+                batch_export.download_url = download_url
+            else:
+                staging_path.unlink(missing_ok=True)
             
             # Determine final status
             if batch_export.failed_jobs == 0:
@@ -1201,12 +1329,16 @@ class BatchExportService:
             db.commit()
             
             # Create history record
-            BatchExportService._create_batch_history_record(db, batch_export, len(successful_jobs) > 0)
+            BatchExportService._create_batch_history_record(db, batch_export, batch_export.completed_jobs > 0)
             
-            logger.info(f"Completed batch export {batch_export_id}: {len(successful_jobs)} succeeded, {len(failed_jobs)} failed")
-            return len(successful_jobs) > 0
+            logger.info(
+                f"Completed batch export {batch_export_id}: {batch_export.completed_jobs} succeeded, "
+                f"{batch_export.failed_jobs} failed"
+            )
+            return batch_export.completed_jobs > 0
             
         except Exception as e:
+            db.rollback()
             batch_export.status = BatchExportStatus.FAILED.value
             batch_export.error_message = str(e)
             batch_export.completed_at = datetime.utcnow()
@@ -1217,27 +1349,126 @@ class BatchExportService:
             return False
     
     @staticmethod
-    def _create_batch_archive(batch_export: BatchExport, successful_jobs: List[ExportJob]) -> str:
-        """Create ZIP archive containing all successful exports."""
-        
-        # Create archive directory
-        archive_dir = Path("exports") / "batches" / str(batch_export.id)
-        archive_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Archive filename
-        archive_filename = f"{batch_export.name}_{batch_export.export_format}_batch.zip"
-        archive_path = archive_dir / archive_filename
-        
-        # Create ZIP archive
-        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for export_job in successful_jobs:
-                if export_job.output_path and os.path.exists(export_job.output_path):
-                    # Add file to archive with appropriate name
-                    arcname = export_job.output_filename or f"export_{export_job.id}"
-                    zipf.write(export_job.output_path, arcname)
-        
-        batch_export.archive_filename = archive_filename
-        return str(archive_path)
+    def stream_batch_archive(db: Session, batch_export: BatchExport) -> Iterator[bytes]:
+        """Render ``batch_export`` and return an iterator over its ZIP bytes.
+
+        Entries are emitted as soon as each export finishes rendering, so a
+        client receives the first bytes without waiting for the whole batch.
+        Nothing is written to disk or the database; job rows are read up
+        front, so the iterator does not need ``db``.
+        """
+        
+        export_jobs = db.query(ExportJob).filter(ExportJob.batch_export_id == batch_export.id).all()
+        tasks, _ = BatchExportService._build_render_tasks(db, batch_export, export_jobs)
+        batch_export_id = batch_export.id
+        
+        def generate() -> Iterator[bytes]:
+            sink = _ChunkSink()
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for task, content, error in BatchExportService._render_in_pool(tasks):
+                    if error is not None:
+                        logger.warning(
+                            f"Skipping export job {task['export_job_id']} in streamed batch {batch_export_id}: {error}"
+                        )
+                        continue
+                    zipf.writestr(task["arcname"], content)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            # Central directory
+            yield sink.drain()
+        
+        return generate()
+    
+    @staticmethod
+    def _build_render_tasks(
+        db: Session,
+        batch_export: BatchExport,
+        export_jobs: List[ExportJob]
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+        """Describe each export as a picklable render task.
+
+        Returns the tasks and ``(export_job_id, error)`` pairs for exports
+        whose source job no longer exists. Archive names are made unique so
+        two recordings with the same filename do not overwrite each other.
+        """
+        
+        template_config, styling_config, _ = ExportJobService._get_template_config(
+            db, batch_export.template_id, batch_export.batch_config
+        )
+        job_ids = [export_job.job_id for export_job in export_jobs]
+        jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(job_ids)).all()}
+        
+        tasks: List[Dict[str, Any]] = []
+        missing: List[Tuple[int, str]] = []
+        arcnames = set()
+        for export_job in export_jobs:
+            job = jobs.get(export_job.job_id)
+            if job is None:
+                missing.append((export_job.id, f"Source job {export_job.job_id} not found"))
+                continue
+            
+            arcname = ExportJobService._export_filename(
+                export_job.format, job.original_filename or f"transcript_{job.id}"
+            )
+            if arcname in arcnames:
+                stem, extension = os.path.splitext(arcname)
+                arcname = f"{stem}_{export_job.id}{extension}"
+            arcnames.add(arcname)
+            
+            tasks.append({
+                "export_job_id": export_job.id,
+                "arcname": arcname,
+                "format": export_job.format,
+                "transcript_path": job.transcript_path,
+                "metadata": ExportJobService._job_metadata(job),
+                "template_config": template_config,
+                "styling_config": styling_config,
+            })
+        return tasks, missing
+    
+    @staticmethod
+    def _render_in_pool(
+        tasks: List[Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Dict[str, Any], Optional[bytes], Optional[str]]]:
+        """Yield ``(task, content, error)`` for each task in completion order.
+
+        At most two renders per worker are outstanding, so rendered content
+        waiting to be archived stays bounded regardless of batch size.
+        """
+        
+        workers = min(EXPORT_RENDER_WORKERS if max_workers is None else max_workers, len(tasks))
+        if workers <= 1:
+            for task in tasks:
+                try:
+                    yield task, render_export(task), None
+                except Exception as e:
+                    yield task, None, str(e)
+            return
+        
+        remaining = iter(tasks)
+        pending: Dict[Future, Dict[str, Any]] = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                while True:
+                    for task in remaining:
+                        pending[pool.submit(render_export, task)] = task
+                        if len(pending) >= workers * 2:
+                            break
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task = pending.pop(future)
+                        try:
+                            yield task, future.result(), None
+                        except Exception as e:
+                            yield task, None, str(e)
+            finally:
+                # Consumer stopped early (e.g. a streaming client disconnected)
+                for future in pending:
+                    future.cancel()
     
     @staticmethod
     def _create_batch_history_record(db: Session, batch_export: BatchExport, success: bool) -> None:
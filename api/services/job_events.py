@@ -0,0 +1,285 @@
+"""Push delivery of job state transitions to API clients.
+
+``JobEventBroker`` fans job events out to in-process subscribers such as the
+``/jobs/{job_id}/events`` Server-Sent Events stream.  Events reach it from two
+places:
+
+* :class:`api.services.websocket_job_integration.WebSocketJobNotifier`, which
+  publishes every status, progress and error notification it sends to
+  WebSocket clients for jobs updated inside the API process.
+* The ``whisper_job_events`` Redis channel.  Celery workers publish there when
+  they move a job between states (see :func:`publish_job_event_sync`), and each
+  API replica relays events published by other replicas to its local
+  subscribers.
+
+Listeners registered with :meth:`JobEventBroker.add_listener` see every event
+regardless of job; the batch processor uses this to count finished files.
+Subscribers get a bounded queue; a slow consumer loses its oldest events rather
+than growing memory, which is safe because each event carries the full state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("job_events")
+
+JOB_EVENTS_CHANNEL = "whisper_job_events"
+
+# Statuses after which a job never changes again.
+TERMINAL_STATUSES = frozenset({
+    "completed",
+    "failed",
+    "failed_timeout",
+    "failed_launch_error",
+    "failed_whisper_error",
+    "failed_thread_exception",
+    "failed_unknown",
+})
+
+
+def is_terminal_status(status: Optional[str]) -> bool:
+    """Return True when ``status`` is a final job state."""
+    return (status or "").lower() in TERMINAL_STATUSES
+
+
+def job_etag(job: Any, variant: str = "") -> str:
+    """Return a strong ETag for the externally visible state of ``job``.
+
+    Every state change the worker or API makes bumps ``updated_at``, so the
+    tag changes whenever ``GET /jobs/{job_id}`` would return something new.
+    ``variant`` names a different representation of the same state (such
+    as the one with the full transcript), which needs a tag of its own.
+    """
+    updated_at = getattr(job, "updated_at", None)
+    status = getattr(job.status, "value", job.status)
+    parts = [
+        str(job.id),
+        str(status),
+        updated_at.isoformat() if updated_at else "",
+        getattr(job, "transcript_path", None) or "",
+    ]
+    if variant:
+        parts.append(variant)
+    fingerprint = "|".join(parts)
+    return '"' + hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def job_state_event(job: Any, **extra: Any) -> Dict[str, Any]:
+    """Build the event payload describing the current state of ``job``."""
+    updated_at = getattr(job, "updated_at", None)
+    event = {
+        "job_id": job.id,
+        "status": getattr(job.status, "value", job.status),
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        "user_id": job.user_id,
+        "etag": job_etag(job),
+    }
+    event.update(extra)
+    return event
+
+
+class JobEventBroker:
+    """Deliver job events to local subscribers and other replicas."""
+
+    def __init__(self, channel: str = JOB_EVENTS_CHANNEL, queue_size: int = 32):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._instance_id = uuid.uuid4().hex
+        self._redis = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self.events_published = 0
+        self.events_received = 0
+        self.events_dropped = 0
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Queue]:
+        """Yield a queue receiving every event for ``job_id`` until the block exits."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``listener`` synchronously with every event for any job."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def subscriber_count(self, job_id: Optional[str] = None) -> int:
+        if job_id is not None:
+            return len(self._subscribers.get(job_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish_local(self, event: Dict[str, Any]) -> int:
+        """Hand ``event`` to this process's subscribers and return how many got it."""
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"Job event listener failed for {event.get('job_id')}: {e}")
+
+        job_id = event.get("job_id")
+        subscribers = self._subscribers.get(job_id) if job_id else None
+        if not subscribers:
+            return 0
+
+        for queue in list(subscribers):
+            if queue.full():
+                # Every event carries the whole state, so the oldest is expendable.
+                queue.get_nowait()
+                self.events_dropped += 1
+            queue.put_nowait(event)
+        return len(subscribers)
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver ``event`` locally and broadcast it to the other replicas."""
+        self.publish_local(event)
+        if self._redis is None:
+            return
+        try:
+            payload = json.dumps({"origin": self._instance_id, "event": event}, default=str)
+            await self._redis.publish(self.channel, payload)
+            self.events_published += 1
+        except Exception as e:
+            logger.warning(f"Failed to broadcast job event for {event.get('job_id')}: {e}")
+
+    async def start(self, redis_url: Optional[str] = None) -> bool:
+        """Subscribe to the Redis channel; without Redis only local events are delivered."""
+        if self._listener_task is not None:
+            return True
+        try:
+            import redis.asyncio as redis
+
+            client = redis.from_url(
+                redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                encoding="utf-8",
+                decode_responses=True
+            )
+            await client.ping()
+        except Exception as e:
+            logger.warning(f"Redis unavailable for job events, delivering local events only: {e}")
+            return False
+
+        self._redis = client
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f"Job event broker subscribed to {self.channel}")
+        return True
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self) -> None:
+        """Relay events published by workers and other replicas to local subscribers."""
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    self._apply_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job event subscription lost: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _apply_message(self, data: Any) -> None:
+        if not data:
+            return
+        try:
+            message = json.loads(data)
+            event = message["event"]
+        except (TypeError, ValueError, KeyError):
+            logger.warning(f"Ignoring malformed job event message: {data!r}")
+            return
+        if message.get("origin") == self._instance_id:
+            return  # Already delivered locally before publishing
+
+        self.events_received += 1
+        self.publish_local(event)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscriber_count(),
+            "jobs_watched": len(self._subscribers),
+            "events_published": self.events_published,
+            "events_received": self.events_received,
+            "events_dropped": self.events_dropped,
+            "redis_connected": self._redis is not None,
+        }
+
+
+_sync_client = None
+
+
+def publish_job_event_sync(event: Dict[str, Any], redis_url: Optional[str] = None) -> bool:
+    """Publish ``event`` from synchronous code such as Celery tasks.
+
+    Failures are logged and swallowed; clients fall back to the ETag-checked
+    ``GET /jobs/{job_id}`` and the SSE stream re-reads the job periodically.
+    """
+    global _sync_client
+    try:
+        if _sync_client is None:
+            import redis
+
+            _sync_client = redis.Redis.from_url(
+                redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+            )
+        _sync_client.publish(
+            JOB_EVENTS_CHANNEL,
+            json.dumps({"origin": "worker", "event": event}, default=str),
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to publish job event for {event.get('job_id')}: {e}")
+        return False
+
+
+# Global broker instance shared by the notifier and the jobs routes.
+job_event_broker = JobEventBroker()
+
+
+__all__ = [
+    "JOB_EVENTS_CHANNEL",
+    "JobEventBroker",
+    "TERMINAL_STATUSES",
+    "is_terminal_status",
+    "job_etag",
+    "job_event_broker",
+    "job_state_event",
+    "publish_job_event_sync",
+]
@@ -0,0 +1,335 @@
+"""Per-process registry keeping Whisper models resident between Celery tasks.
+
+Loading a Whisper checkpoint deserializes hundreds of megabytes (``small``)
+to several gigabytes (``large-v2``) of weights, which dwarfs the inference
+time for short clips.  The registry caches loaded models keyed by
+``(model_name, device)`` so that only the first job for a given model pays the
+load cost.  Residency is bounded by both a model count and an optional memory
+budget; the least recently used model is evicted once either limit would be
+exceeded.
+
+Configuration is read from the worker environment:
+
+``WHISPER_MODEL_CACHE_SIZE``
+    Maximum number of resident models (default ``2``).
+``WHISPER_MODEL_CACHE_MAX_MB``
+    Memory budget in megabytes across resident models (``0`` disables it).
+``WHISPER_PRELOAD_MODELS``
+    Comma-separated model names loaded when a worker process starts.
+``WHISPER_INFERENCE_DEVICE``
+    Explicit device override (``cpu``/``cuda``); auto-detected when unset.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram  # type: ignore
+
+LOGGER = logging.getLogger("whisper.worker.models")
+
+ModelKey = Tuple[str, str]
+ModelLoader = Callable[[str, str], Any]
+
+MODEL_CACHE_EVENTS = Counter(
+    "whisper_model_cache_events_total",
+    "Whisper model registry events by type (hit, load, eviction)",
+    ["event", "model"],
+)
+MODEL_CACHE_RESIDENT = Gauge(
+    "whisper_model_cache_resident_models",
+    "Number of Whisper models currently resident in the worker process",
+)
+MODEL_CACHE_RESIDENT_BYTES = Gauge(
+    "whisper_model_cache_resident_bytes",
+    "Estimated memory held by resident Whisper models",
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "whisper_model_load_seconds",
+    "Time spent loading Whisper checkpoints into memory",
+    ["model"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 40, 80),
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        LOGGER.warning("Ignoring non-integer %s=%r", name, value)
+        return default
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """Return the approximate in-memory size of ``model``'s weights.
+
+    Torch modules expose ``parameters()``/``buffers()``; anything else (for
+    example test doubles) is treated as weightless so it never trips the
+    memory budget.
+    """
+
+    total = 0
+    for accessor in ("parameters", "buffers"):
+        tensors = getattr(model, accessor, None)
+        if not callable(tensors):
+            continue
+        try:
+            for tensor in tensors():
+                total += int(tensor.numel()) * int(tensor.element_size())
+        except Exception:  # pragma: no cover - defensive against exotic modules
+            LOGGER.debug("Unable to size model via %s()", accessor, exc_info=True)
+    return total
+
+
+def resolve_device() -> str:
+    """Return the inference device for this worker process."""
+
+    override = os.getenv("WHISPER_INFERENCE_DEVICE", "").strip()
+    if override:
+        return override
+
+    try:
+        torch = importlib.import_module("torch")
+    except ImportError:
+        # Whisper itself will report the missing dependency when loading.
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+@dataclass
+class _ResidentModel:
+    model: Any
+    size_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    uses: int = 0
+
+
+class WhisperModelRegistry:
+    """LRU cache of loaded Whisper models bounded by count and memory."""
+
+    def __init__(
+        self,
+        *,
+        max_models: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.max_models = max(1, max_models if max_models is not None else _env_int("WHISPER_MODEL_CACHE_SIZE", 2))
+        if max_bytes is None:
+            max_bytes = _env_int("WHISPER_MODEL_CACHE_MAX_MB", 0) * 1024 * 1024
+        self.max_bytes = max(0, max_bytes)
+
+        self._models: "OrderedDict[ModelKey, _ResidentModel]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+
+    # ------------------------------------------------------------------ lookup
+    def get(self, model_name: str, device: str, loader: ModelLoader) -> Any:
+        """Return a resident model, loading it with ``loader`` on a miss.
+
+        Concurrent callers requesting the same key share a single load; other
+        keys can load in parallel.
+        """
+
+        key = (model_name, device)
+        cached = self._touch(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            cached = self._touch(key)
+            if cached is not None:
+                return cached
+
+            started = time.perf_counter()
+            model = loader(model_name, device)
+            elapsed = time.perf_counter() - started
+
+            size_bytes = estimate_model_bytes(model)
+            with self._lock:
+                self._make_room(size_bytes)
+                self._models[key] = _ResidentModel(model=model, size_bytes=size_bytes, uses=1)
+                self._stats["loads"] += 1
+                self._stats["load_seconds"] += elapsed
+                self._refresh_gauges()
+
+        MODEL_CACHE_EVENTS.labels(event="load", model=model_name).inc()
+        MODEL_LOAD_SECONDS.labels(model=model_name).observe(elapsed)
+        LOGGER.info(
+            "Loaded Whisper model %s on %s in %.2fs (%.1f MB resident)",
+            model_name,
+            device,
+            elapsed,
+            size_bytes / (1024 * 1024),
+        )
+        return model
+
+    def contains(self, model_name: str, device: str) -> bool:
+        with self._lock:
+            return (model_name, device) in self._models
+
+    def _touch(self, key: ModelKey) -> Any:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            entry.last_used = time.time()
+            entry.uses += 1
+            self._stats["hits"] += 1
+
+        MODEL_CACHE_EVENTS.labels(event="hit", model=key[0]).inc()
+        return entry.model
+
+    # ---------------------------------------------------------------- eviction
+    def _resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def _make_room(self, incoming_bytes: int) -> None:
+        """Evict LRU entries until the incoming model fits. Caller holds the lock."""
+
+        while self._models and len(self._models) >= self.max_models:
+            self._evict_oldest()
+
+        if self.max_bytes:
+            while self._models and self._resident_bytes() + incoming_bytes > self.max_bytes:
+                self._evict_oldest()
+            if incoming_bytes > self.max_bytes:
+                LOGGER.warning(
+                    "Whisper model needs %.1f MB which exceeds the %.1f MB cache budget",
+                    incoming_bytes / (1024 * 1024),
+                    self.max_bytes / (1024 * 1024),
+                )
+
+    def _evict_oldest(self) -> None:
+        key, entry = self._models.popitem(last=False)
+        self._stats["evictions"] += 1
+        MODEL_CACHE_EVENTS.labels(event="eviction", model=key[0]).inc()
+        LOGGER.info("Evicting Whisper model %s on %s after %d uses", key[0], key[1], entry.uses)
+        del entry
+        if key[1].startswith("cuda"):
+            _release_cuda_memory()
+
+    def evict(self, model_name: str, device: Optional[str] = None) -> int:
+        """Drop resident models matching ``model_name`` (and ``device``)."""
+
+        with self._lock:
+            keys = [
+                key
+                for key in self._models
+                if key[0] == model_name and (device is None or key[1] == device)
+            ]
+            for key in keys:
+                self._models.pop(key, None)
+                self._stats["evictions"] += 1
+                MODEL_CACHE_EVENTS.labels(event="eviction", model=key[0]).inc()
+            self._refresh_gauges()
+
+        if any(key[1].startswith("cuda") for key in keys):
+            _release_cuda_memory()
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            had_cuda = any(key[1].startswith("cuda") for key in self._models)
+            self._models.clear()
+            self._load_locks.clear()
+            self._refresh_gauges()
+        if had_cuda:
+            _release_cuda_memory()
+
+    # ----------------------------------------------------------- observability
+    def _refresh_gauges(self) -> None:
+        MODEL_CACHE_RESIDENT.set(len(self._models))
+        MODEL_CACHE_RESIDENT_BYTES.set(self._resident_bytes())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["loads"]
+            return {
+                **self._stats,
+                "hit_rate": (self._stats["hits"] / lookups) if lookups else 0.0,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self._resident_bytes(),
+                "resident": [
+                    {
+                        "model": name,
+                        "device": device,
+                        "size_bytes": entry.size_bytes,
+                        "uses": entry.uses,
+                        "loaded_at": entry.loaded_at,
+                    }
+                    for (name, device), entry in self._models.items()
+                ],
+            }
+
+
+def _release_cuda_memory() -> None:
+    try:
+        torch = importlib.import_module("torch")
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:  # pragma: no cover - torch optional in tests
+        LOGGER.debug("Unable to release CUDA cache", exc_info=True)
+
+
+def configured_preload_models() -> List[str]:
+    """Return the model names listed in ``WHISPER_PRELOAD_MODELS``."""
+
+    raw = os.getenv("WHISPER_PRELOAD_MODELS", "")
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def preload_models(
+    registry: WhisperModelRegistry,
+    loader: ModelLoader,
+    model_names: Iterable[str],
+    device: Optional[str] = None,
+) -> List[str]:
+    """Load ``model_names`` into ``registry`` and return those that succeeded.
+
+    Failures are logged rather than raised so a missing optional checkpoint
+    does not prevent the worker from starting.
+    """
+
+    loaded: List[str] = []
+    names = list(model_names)
+    if not names:
+        return loaded
+
+    device = device or resolve_device()
+    for name in names[: registry.max_models]:
+        try:
+            registry.get(name, device, loader)
+            loaded.append(name)
+        except Exception as exc:
+            LOGGER.warning("Failed to preload Whisper model %s: %s", name, exc)
+    return loaded
+
+
+model_registry = WhisperModelRegistry()
+
+
+__all__ = [
+    "WhisperModelRegistry",
+    "configured_preload_models",
+    "estimate_model_bytes",
+    "model_registry",
+    "preload_models",
+    "resolve_device",
+]
@@ -1,19 +1,31 @@
 """
 T036: Real-time Collaboration Features - Operational Transform Engine
 Implements operational transform for conflict-free collaborative editing.
+
+Document text is held in a :class:`~api.services.text_rope.TextRope`, so an
+edit costs O(log n) instead of rebuilding the transcript string.  The
+operation history is bounded: every ``snapshot_interval`` operations the
+document records a checkpoint of its content, and operations older than the
+previous checkpoint are discarded.  Clients that fall further behind resync
+from :meth:`DocumentState.get_snapshot`.
 """
 
 import json
 import logging
 from abc import ABC, abstractmethod
+from collections import deque
 from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
 
 from ..utils.logger import get_logger
+from .text_rope import TextRope
 
 logger = get_logger("operational_transform")
 
+# Operations between content checkpoints; at most twice this many are retained
+SNAPSHOT_INTERVAL = 500
+
 
 class OperationType(Enum):
     """Types of text operations for collaborative editing."""
@@ -284,13 +296,27 @@ class OperationalTransform:
 class DocumentState:
     """Manages the state of a collaborative document."""
     
-    def __init__(self, initial_content: str = "", document_id: str = ""):
+    def __init__(self, initial_content: str = "", document_id: str = "",
+                 snapshot_interval: int = SNAPSHOT_INTERVAL):
         self.document_id = document_id
-        self.content = initial_content
+        self._rope = TextRope(initial_content)
         self.version = 0
+        self.snapshot_interval = max(1, snapshot_interval)
+        # operation_history[0] is the operation that produced history_start_version + 1
         self.operation_history: List[TextOperation] = []
+        self.history_start_version = 0
+        self._checkpoints = deque([(0, initial_content)], maxlen=2)
         self.pending_operations: Dict[int, List[TextOperation]] = {}
     
+    @property
+    def content(self) -> str:
+        """Current document text (materialized once per edit, on demand)."""
+        return str(self._rope)
+    
+    @content.setter
+    def content(self, value: str):
+        self._rope = TextRope(value)
+    
     def apply_operation(self, operation: TextOperation, user_id: int) -> bool:
         """
         Apply an operation to the document.
@@ -303,22 +329,36 @@ class DocumentState:
             True if operation was applied successfully
         """
         try:
-            # Apply the operation
-            new_content = OperationalTransform.apply_operation(self.content, operation)
+            # Edit the rope in place; positions are clamped like OperationalTransform.apply_operation
+            if operation.type == OperationType.INSERT:
+                self._rope.insert(operation.position, operation.content or "")
+            elif operation.type == OperationType.DELETE:
+                self._rope.delete(operation.position, operation.length or 0)
+            elif operation.type not in (OperationType.RETAIN, OperationType.FORMAT):
+                logger.warning(f"Unknown operation type: {operation.type}")
             
             # Update document state
-            self.content = new_content
             self.version += 1
             operation.user_id = user_id
             self.operation_history.append(operation)
+            self._compact_history()
             
-            logger.info(f"Applied {operation.type.value} operation from user {user_id}")
+            logger.debug(f"Applied {operation.type.value} operation from user {user_id}")
             return True
         
         except Exception as e:
             logger.error(f"Failed to apply operation: {e}")
             return False
     
+    def _compact_history(self):
+        """Checkpoint the content every ``snapshot_interval`` operations and drop older history."""
+        if self.version - self._checkpoints[-1][0] < self.snapshot_interval:
+            return
+        self._checkpoints.append((self.version, self.content))
+        base_version = self._checkpoints[0][0]
+        del self.operation_history[:base_version - self.history_start_version]
+        self.history_start_version = base_version
+    
     def transform_and_apply(self, operation: TextOperation, user_id: int, 
                           concurrent_operations: List[TextOperation]) -> TextOperation:
         """
@@ -345,7 +385,7 @@ class DocumentState:
         
         return transformed_op
     
-    def get_operations_since_version(self, version: int) -> List[TextOperation]:
+    def get_operations_since_version(self, version: int) -> Optional[List[TextOperation]]:
         """
         Get all operations since a specific version.
         
@@ -353,12 +393,21 @@ class DocumentState:
             version: Version number to get operations since
             
         Returns:
-            List of operations since the specified version
+            List of operations since the specified version, or None when that
+            version predates the retained history and the caller must resync
+            from :meth:`get_snapshot`
         """
-        if version >= len(self.operation_history):
+        if version < self.history_start_version:
+            return None
+        if version >= self.version:
             return []
         
-        return self.operation_history[version:]
+        return self.operation_history[version - self.history_start_version:]
+    
+    def get_snapshot(self) -> dict:
+        """Oldest retained checkpoint; replaying the retained history on it gives the current content."""
+        version, content = self._checkpoints[0]
+        return {"document_id": self.document_id, "version": version, "content": content}
     
     def get_document_info(self) -> dict:
         """Get current document information."""
@@ -366,8 +415,9 @@ class DocumentState:
             "document_id": self.document_id,
             "content": self.content,
             "version": self.version,
-            "content_length": len(self.content),
-            "operation_count": len(self.operation_history)
+            "content_length": len(self._rope),
+            "operation_count": len(self.operation_history),
+            "history_start_version": self.history_start_version
         }
 
 
@@ -4,9 +4,13 @@ Implements comprehensive caching with intelligent invalidation strategies.
 """
 
 import json
+import gzip
 import hashlib
 import asyncio
 import os
+import random
+import struct
+import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, List, Union
 from dataclasses import dataclass, asdict, field
@@ -16,11 +20,27 @@ import redis.asyncio as redis
 from fastapi import Request, Response
 from pydantic import BaseModel
 
+from api.services.local_cache import LocalCache
 from api.utils.logger import get_system_logger
 from api.settings import settings
 
+try:  # pragma: no cover - zstandard ships with the API image
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
 logger = get_system_logger("redis_cache")
 
+# Binary cache entry layout:
+#   magic (2s) | version (B) | codec (B) | metadata length (I) | metadata JSON | body
+# The body is the response content, compressed with ``codec``.
+ENTRY_MAGIC = b"WC"
+ENTRY_VERSION = 1
+CODEC_IDENTITY = 0
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+_ENTRY_HEADER = struct.Struct(">2sBBI")
+
 @dataclass
 class CacheConfiguration:
     """Advanced cache configuration for different endpoint types."""
@@ -37,6 +57,17 @@ class CacheConfiguration:
     # Cache size and performance
     max_memory_mb: int = 100  # Maximum Redis memory usage
     compression_threshold: int = 1024  # Compress responses larger than 1KB
+    compression_level: int = 3
+    
+    # Fraction of hits recorded in the hit-count hash (0 disables counting).
+    # Each sampled hit costs one extra round-trip; counts are scaled back up.
+    hit_count_sample_rate: float = 0.0
+    
+    # In-process L1 tier in front of Redis (0 bytes disables it). Entries live
+    # at most ``local_cache_ttl`` seconds so a missed invalidation message can
+    # only serve stale data briefly.
+    local_cache_max_bytes: int = 16 * 1024 * 1024
+    local_cache_ttl: int = 10
     
     # Invalidation settings
     enable_smart_invalidation: bool = True
@@ -55,6 +86,10 @@ class CacheMetrics:
     invalidations: int = 0
     errors: int = 0
     total_memory_bytes: int = 0
+    compressed_sets: int = 0
+    bytes_saved: int = 0
+    invalidations_published: int = 0
+    invalidations_received: int = 0
     
     @property
     def hit_ratio(self) -> float:
@@ -78,9 +113,24 @@ class RedisCacheService:
     def __init__(self, config: CacheConfiguration):
         self.config = config
         self.redis_pool: Optional[redis.Redis] = None
+        # Cache entries are binary envelopes, so they go through a client
+        # that does not decode responses.
+        self.entry_pool: Optional[redis.Redis] = None
         self.metrics = CacheMetrics()
         self._key_prefix = "whisper_cache:"
         self._tags_prefix = "whisper_tags:"
+        self._hits_key = "whisper_cache_stats:hits"
+        self._invalidation_channel = "whisper_cache_invalidation"
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self.local_cache: Optional[LocalCache] = (
+            LocalCache(config.local_cache_max_bytes, config.local_cache_ttl)
+            if config.local_cache_max_bytes > 0 else None
+        )
+        self._zstd_compressor = (
+            zstandard.ZstdCompressor(level=config.compression_level) if zstandard else None
+        )
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
         
     async def initialize(self):
         """Initialize Redis connection pool."""
@@ -93,6 +143,13 @@ class RedisCacheService:
                 retry_on_timeout=True
             )
             
+            self.entry_pool = redis.from_url(
+                self.config.redis_url,
+                decode_responses=False,
+                max_connections=20,
+                retry_on_timeout=True
+            )
+            
             # Test connection
             await self.redis_pool.ping()
             logger.info("Redis cache service initialized successfully")
@@ -101,14 +158,156 @@ class RedisCacheService:
             await self.redis_pool.config_set("maxmemory", f"{self.config.max_memory_mb}mb")
             await self.redis_pool.config_set("maxmemory-policy", "allkeys-lru")
             
+            # Only listen once setup has succeeded; a failure above drops the pools
+            if self.local_cache is not None:
+                self._invalidation_task = asyncio.create_task(self._listen_for_invalidations())
+            
         except Exception as e:
             logger.error(f"Failed to initialize Redis cache: {e}")
             self.redis_pool = None
+            self.entry_pool = None
     
     async def close(self):
         """Close Redis connection."""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
         if self.redis_pool:
             await self.redis_pool.close()
+        if self.entry_pool:
+            await self.entry_pool.close()
+    
+    async def _listen_for_invalidations(self):
+        """Apply invalidations published by other replicas to the local tier."""
+        while True:
+            pubsub = self.redis_pool.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self._invalidation_channel)
+                # Messages published while unsubscribed are lost, so start clean.
+                self.local_cache.clear()
+                async for message in pubsub.listen():
+                    self._apply_invalidation(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription lost: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+    
+    def _apply_invalidation(self, data: Any):
+        if self.local_cache is None or not data:
+            return
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+            return
+        if message.get("origin") == self._instance_id:
+            return  # Already applied locally before publishing
+        
+        self.metrics.invalidations_received += 1
+        if message.get("clear"):
+            self.local_cache.clear()
+        else:
+            self.local_cache.invalidate_tags(message.get("tags", []))
+    
+    async def _publish_invalidation(self, tags: Optional[List[str]] = None):
+        """Invalidate the local tier here and on every other replica."""
+        if self.local_cache is not None:
+            if tags is None:
+                self.local_cache.clear()
+            else:
+                self.local_cache.invalidate_tags(tags)
+        
+        payload: Dict[str, Any] = {"origin": self._instance_id}
+        if tags is None:
+            payload["clear"] = True
+        else:
+            payload["tags"] = tags
+        await self.redis_pool.publish(self._invalidation_channel, json.dumps(payload))
+        self.metrics.invalidations_published += 1
+    
+    def get_local(self, cache_key: str) -> Optional[CacheEntry]:
+        """Look the entry up in the in-process tier only."""
+        if self.local_cache is None:
+            return None
+        return self.local_cache.get(cache_key)
+    
+    def store_local(self, cache_key: str, entry: CacheEntry) -> bool:
+        """Keep ``entry`` in the in-process tier for the rest of its lifetime."""
+        if self.local_cache is None:
+            return False
+        ttl = (entry.expires_at - datetime.now()).total_seconds()
+        size = len(entry.content) + sum(len(k) + len(v) for k, v in entry.headers.items())
+        return self.local_cache.set(cache_key, entry, size, ttl=ttl, tags=entry.tags)
+    
+    def _encode_entry(self, entry: CacheEntry) -> bytes:
+        """Pack an entry into the binary envelope, compressing large bodies."""
+        body = entry.content.encode("utf-8")
+        codec = CODEC_IDENTITY
+        if len(body) > self.config.compression_threshold:
+            if self._zstd_compressor is not None:
+                packed, packed_codec = self._zstd_compressor.compress(body), CODEC_ZSTD
+            else:
+                packed = gzip.compress(body, compresslevel=self.config.compression_level)
+                packed_codec = CODEC_GZIP
+            if len(packed) < len(body):
+                self.metrics.compressed_sets += 1
+                self.metrics.bytes_saved += len(body) - len(packed)
+                body, codec = packed, packed_codec
+        
+        metadata = json.dumps(
+            {
+                "s": entry.status_code,
+                "t": entry.content_type,
+                "h": entry.headers,
+                "c": entry.created_at.timestamp(),
+                "e": entry.expires_at.timestamp(),
+                "g": entry.tags,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        return _ENTRY_HEADER.pack(ENTRY_MAGIC, ENTRY_VERSION, codec, len(metadata)) + metadata + body
+    
+    def _decode_entry(self, data: bytes) -> Optional[CacheEntry]:
+        """Unpack a binary envelope; returns None for unknown or legacy formats."""
+        if len(data) < _ENTRY_HEADER.size:
+            return None
+        magic, version, codec, metadata_length = _ENTRY_HEADER.unpack_from(data)
+        if magic != ENTRY_MAGIC or version != ENTRY_VERSION:
+            return None
+        
+        offset = _ENTRY_HEADER.size
+        metadata = json.loads(data[offset:offset + metadata_length])
+        body = data[offset + metadata_length:]
+        if codec == CODEC_ZSTD:
+            if self._zstd_decompressor is None:
+                return None
+            body = self._zstd_decompressor.decompress(body)
+        elif codec == CODEC_GZIP:
+            body = gzip.decompress(body)
+        elif codec != CODEC_IDENTITY:
+            return None
+        
+        # Envelopes are written by ``set`` only, so skip pydantic validation.
+        return CacheEntry.model_construct(
+            content=body.decode("utf-8"),
+            content_type=metadata["t"],
+            status_code=metadata["s"],
+            headers=metadata["h"],
+            created_at=datetime.fromtimestamp(metadata["c"]),
+            expires_at=datetime.fromtimestamp(metadata["e"]),
+            hit_count=0,
+            tags=metadata["g"],
+        )
     
     def _generate_cache_key(self, request: Request) -> str:
         """Generate a unique cache key for the request."""
@@ -182,31 +381,27 @@ class RedisCacheService:
         return tags
     
     async def get(self, cache_key: str) -> Optional[CacheEntry]:
-        """Retrieve entry from cache."""
-        if not self.redis_pool:
+        """Retrieve entry from cache.
+        
+        A hit is a single ``GET``: expiry is enforced by the Redis TTL and hit
+        counts are only written for the sampled fraction of hits.
+        """
+        if not self.entry_pool:
             return None
         
         try:
-            data = await self.redis_pool.get(cache_key)
-            if not data:
+            data = await self.entry_pool.get(cache_key)
+            entry = self._decode_entry(data) if data else None
+            if entry is None or datetime.now() >= entry.expires_at:
                 self.metrics.misses += 1
                 return None
             
-            entry_dict = json.loads(data)
-            entry = CacheEntry(**entry_dict)
-            
-            # Check expiration
-            if datetime.now() >= entry.expires_at:
-                await self.redis_pool.delete(cache_key)
-                self.metrics.misses += 1
-                return None
-            
-            # Update hit count
-            entry.hit_count += 1
-            await self.redis_pool.set(cache_key, entry.json(), ex=int((entry.expires_at - datetime.now()).total_seconds()))
-            
             self.metrics.hits += 1
             
+            sample_rate = self.config.hit_count_sample_rate
+            if sample_rate > 0 and random.random() < sample_rate:
+                await self.entry_pool.hincrby(self._hits_key, cache_key, max(round(1 / sample_rate), 1))
+            
             if self.config.log_cache_operations:
                 logger.debug(f"Cache hit: {cache_key}")
             
@@ -217,9 +412,21 @@ class RedisCacheService:
             self.metrics.errors += 1
             return None
     
+    async def get_hit_count(self, cache_key: str) -> int:
+        """Estimated hits for ``cache_key`` (0 unless hit sampling is enabled)."""
+        if not self.redis_pool:
+            return 0
+        
+        try:
+            count = await self.redis_pool.hget(self._hits_key, cache_key)
+            return int(count) if count else 0
+        except Exception as e:
+            logger.error(f"Cache hit count error for {cache_key}: {e}")
+            return 0
+    
     async def set(self, cache_key: str, response: Response, request: Request, content: str) -> bool:
         """Store response in cache."""
-        if not self.redis_pool:
+        if not self.entry_pool:
             return False
         
         try:
@@ -227,11 +434,6 @@ class RedisCacheService:
             expires_at = datetime.now() + timedelta(seconds=ttl)
             tags = self._extract_cache_tags(request, content)
             
-            # Compress large responses
-            if len(content) > self.config.compression_threshold:
-                # In production, you might want to use gzip compression here
-                logger.debug(f"Large response cached ({len(content)} bytes): {cache_key}")
-            
             entry = CacheEntry(
                 content=content,
                 content_type=response.headers.get("content-type", "application/json"),
@@ -241,21 +443,22 @@ class RedisCacheService:
                 expires_at=expires_at,
                 tags=tags
             )
+            payload = self._encode_entry(entry)
             
-            # Store main cache entry
-            await self.redis_pool.set(cache_key, entry.json(), ex=ttl)
-            
-            # Store tag mappings for invalidation
-            for tag in tags:
-                tag_key = f"{self._tags_prefix}{tag}"
-                # Note: sadd behavior varies by Redis version  
-                await self.redis_pool.sadd(tag_key, cache_key)  # type: ignore
-                await self.redis_pool.expire(tag_key, ttl + 60)  # Keep tags slightly longer
+            # Entry and tag mappings go out in a single round-trip
+            async with self.entry_pool.pipeline(transaction=False) as pipe:
+                pipe.set(cache_key, payload, ex=ttl)
+                for tag in tags:
+                    tag_key = f"{self._tags_prefix}{tag}"
+                    pipe.sadd(tag_key, cache_key)
+                    pipe.expire(tag_key, ttl + 60)  # Keep tags slightly longer
+                await pipe.execute()
             
             self.metrics.sets += 1
+            self.store_local(cache_key, entry)
             
             if self.config.log_cache_operations:
-                logger.debug(f"Cache set: {cache_key} (TTL: {ttl}s, Tags: {tags})")
+                logger.debug(f"Cache set: {cache_key} ({len(payload)} bytes, TTL: {ttl}s, Tags: {tags})")
             
             return True
             
@@ -274,23 +477,24 @@ class RedisCacheService:
             # Note: smembers behavior varies by Redis version
             cache_keys = await self.redis_pool.smembers(tag_key)  # type: ignore
             
+            deleted = 0
             if cache_keys:
-                # Convert to list to handle different return types
-                cache_keys_list = list(cache_keys) if hasattr(cache_keys, '__iter__') else []
-                if cache_keys_list:
-                    # Delete cache entries
-                    deleted = await self.redis_pool.delete(*cache_keys_list)
-                    # Delete tag set
-                    await self.redis_pool.delete(tag_key)
+                cache_keys_list = list(cache_keys)
+                async with self.redis_pool.pipeline(transaction=False) as pipe:
+                    pipe.delete(*cache_keys_list)
+                    pipe.delete(tag_key)
+                    pipe.hdel(self._hits_key, *cache_keys_list)
+                    deleted = (await pipe.execute())[0]
                 
                 self.metrics.invalidations += deleted
                 
                 if self.config.log_cache_operations:
                     logger.info(f"Invalidated {deleted} cache entries for tag: {tag}")
-                
-                return deleted
             
-            return 0
+            # Local tiers may hold entries Redis has already evicted, so
+            # replicas are told even when the tag set was empty.
+            await self._publish_invalidation(tags=[tag])
+            return deleted
             
         except Exception as e:
             logger.error(f"Cache invalidation error for tag {tag}: {e}")
@@ -310,16 +514,17 @@ class RedisCacheService:
             async for key in self.redis_pool.scan_iter(match=pattern_key, count=100):
                 cache_keys.append(key)
             
+            deleted = 0
             if cache_keys:
                 deleted = await self.redis_pool.delete(*cache_keys)
                 self.metrics.invalidations += deleted
                 
                 if self.config.log_cache_operations:
                     logger.info(f"Invalidated {deleted} cache entries matching pattern: {pattern}")
-                
-                return deleted
             
-            return 0
+            # Local tiers are not indexed by key pattern; drop them entirely.
+            await self._publish_invalidation()
+            return deleted
             
         except Exception as e:
             logger.error(f"Cache pattern invalidation error for {pattern}: {e}")
@@ -343,8 +548,8 @@ class RedisCacheService:
                 tag_keys.append(key)
             
             all_keys = cache_keys + tag_keys
-            if all_keys:
-                await self.redis_pool.delete(*all_keys)
+            await self.redis_pool.delete(self._hits_key, *all_keys)
+            await self._publish_invalidation()
             
             cleared_count = len(all_keys)
             self.metrics.invalidations += cleared_count
@@ -380,6 +585,11 @@ class RedisCacheService:
             'sets': self.metrics.sets,
             'invalidations': self.metrics.invalidations,
             'errors': self.metrics.errors,
+            'compressed_sets': self.metrics.compressed_sets,
+            'bytes_saved': self.metrics.bytes_saved,
+            'invalidations_published': self.metrics.invalidations_published,
+            'invalidations_received': self.metrics.invalidations_received,
+            'local_cache': self.local_cache.stats() if self.local_cache else None,
             'memory_info': memory_info,
             'config': asdict(self.config)
         }
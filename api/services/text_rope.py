@@ -0,0 +1,147 @@
+"""
+Rope for collaborative transcript documents.
+
+The text is held as a list of blocks of roughly ``block_size`` characters and
+a Fenwick tree over the block lengths.  Locating a position is a binary
+descent of the tree (O(log n) in the number of blocks) and an edit only
+rebuilds the one block it touches, so a keystroke in an hour-long transcript
+costs the same as one in a short note.  Blocks that grow past twice the block
+size are split, which rebuilds the tree; that happens once every
+``block_size`` inserted characters.
+"""
+
+from typing import List, Tuple
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class TextRope:
+    """Mutable text supporting O(log n) positional inserts and deletes."""
+
+    def __init__(self, text: str = "", block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = max(1, block_size)
+        self._blocks: List[str] = self._split(text) or [""]
+        self._length = len(text)
+        self._text = text
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        # Joined lazily and cached until the next edit
+        if self._text is None:
+            self._text = "".join(self._blocks)
+        return self._text
+
+    @property
+    def block_count(self) -> int:
+        return len(self._blocks)
+
+    def insert(self, position: int, content: str) -> None:
+        """Insert ``content`` at ``position`` (clamped to the document)."""
+        if not content:
+            return
+        index, offset = self._find(max(0, min(position, self._length)))
+        if index == len(self._blocks):
+            index, offset = index - 1, len(self._blocks[-1])
+        block = self._blocks[index]
+        block = block[:offset] + content + block[offset:]
+        self._length += len(content)
+        self._text = None
+
+        if len(block) <= 2 * self.block_size:
+            self._blocks[index] = block
+            self._add(index, len(content))
+        else:
+            self._blocks[index:index + 1] = self._split(block)
+            self._rebuild()
+
+    def delete(self, position: int, length: int) -> None:
+        """Delete up to ``length`` characters starting at ``position`` (clamped)."""
+        start = max(0, min(position, self._length))
+        end = min(start + max(0, length), self._length)
+        if end <= start:
+            return
+        first, first_offset = self._find(start)
+        last, last_offset = self._find(end)
+        if last == len(self._blocks):
+            last, last_offset = last - 1, len(self._blocks[-1])
+        self._length -= end - start
+        self._text = None
+
+        if first == last:
+            block = self._blocks[first]
+            block = block[:first_offset] + block[last_offset:]
+            neighbour = first + 1 if first + 1 < len(self._blocks) else first - 1
+            if len(self._blocks) == 1 or block and (
+                len(block) >= self.block_size // 4
+                or len(block) + len(self._blocks[neighbour]) > 2 * self.block_size
+            ):
+                self._blocks[first] = block
+                self._add(first, start - end)
+                return
+            # Fold blocks shrunk by deletes into a neighbour so they do not pile up
+            low, high = sorted((first, neighbour))
+            self._blocks[low:high + 1] = [
+                block + self._blocks[high] if low == first else self._blocks[low] + block
+            ]
+        else:
+            merged = self._blocks[first][:first_offset] + self._blocks[last][last_offset:]
+            self._blocks[first:last + 1] = [merged] if merged else []
+            if not self._blocks:
+                self._blocks = [""]
+        self._rebuild()
+
+    def slice(self, start: int, end: int) -> str:
+        """Return the text between ``start`` and ``end`` without joining the whole rope."""
+        start = max(0, min(start, self._length))
+        end = max(start, min(end, self._length))
+        if self._text is not None:
+            return self._text[start:end]
+        parts = []
+        index, offset = self._find(start)
+        remaining = end - start
+        while remaining > 0:
+            piece = self._blocks[index][offset:offset + remaining]
+            parts.append(piece)
+            remaining -= len(piece)
+            index, offset = index + 1, 0
+        return "".join(parts)
+
+    # ------------------------------------------------------------------
+    # Block index
+
+    def _split(self, text: str) -> List[str]:
+        size = self.block_size
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _rebuild(self) -> None:
+        count = len(self._blocks)
+        tree = [0] * (count + 1)
+        for index, block in enumerate(self._blocks, start=1):
+            tree[index] += len(block)
+            parent = index + (index & -index)
+            if parent <= count:
+                tree[parent] += tree[index]
+        self._tree = tree
+        self._top = 1 << (count.bit_length() - 1) if count else 0
+
+    def _add(self, index: int, delta: int) -> None:
+        tree = self._tree
+        index += 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def _find(self, position: int) -> Tuple[int, int]:
+        """Block index and offset of ``position``; ``(block_count, 0)`` past the end."""
+        tree = self._tree
+        index, remaining, step = 0, position, self._top
+        while step:
+            candidate = index + step
+            if candidate < len(tree) and tree[candidate] <= remaining:
+                index = candidate
+                remaining -= tree[candidate]
+            step >>= 1
+        return index, remaining
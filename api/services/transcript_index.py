@@ -0,0 +1,376 @@
+"""
+Persistent inverted index for transcript search.
+
+The index lives in a standalone SQLite file (``storage.cache_dir /
+"transcript_index.sqlite3"``) shared by the API and Celery workers. Each
+transcript is tokenized once when its job completes and stored as positional
+postings, so a search only touches the postings of the queried terms instead
+of reading every transcript from disk.
+
+Scoring uses Okapi BM25. Quoted phrases are matched by intersecting the
+positional postings of their terms, and their occurrence counts are scored
+with the same BM25 formula as single terms.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from api.paths import storage
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("transcript_index")
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+INDEX_FILENAME = "transcript_index.sqlite3"
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_SQL_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    length INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS index_stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO index_stats (key, value) VALUES ('doc_count', 0);
+INSERT OR IGNORE INTO index_stats (key, value) VALUES ('total_length', 0);
+INSERT OR IGNORE INTO index_stats (key, value) VALUES ('generation', 0);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into lowercase word tokens."""
+
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _encode_positions(positions: Sequence[int]) -> bytes:
+    return array("I", positions).tobytes()
+
+
+def _decode_positions(blob: bytes) -> array:
+    positions = array("I")
+    positions.frombytes(blob)
+    return positions
+
+
+@dataclass
+class IndexHit:
+    """A scored document returned by :meth:`TranscriptIndex.search`."""
+
+    doc_id: str
+    score: float
+    term_frequencies: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class IndexSearchResult:
+    """A page of hits plus the total number of matching documents."""
+
+    hits: List[IndexHit]
+    total: int
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+class TranscriptIndex:
+    """BM25 inverted index with positional postings stored in SQLite."""
+
+    def __init__(self, path: Optional[Path] = None, *, k1: float = 1.2, b: float = 0.75):
+        self._path = Path(path) if path is not None else None
+        self.k1 = k1
+        self.b = b
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        # Resolved lazily so test fixtures can redirect ``storage.cache_dir``.
+        return self._path or Path(storage.cache_dir) / INDEX_FILENAME
+
+    # ------------------------------------------------------------------ storage
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        with self._write_lock:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ----------------------------------------------------------------- writing
+    def index_document(self, doc_id: str, text: str, user_id: Optional[str] = None) -> int:
+        """Index (or re-index) ``text`` under ``doc_id``; returns the token count."""
+
+        tokens = tokenize(text)
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for position, token in enumerate(tokens):
+            positions[token].append(position)
+
+        rows = [
+            (term, doc_id, len(term_positions), _encode_positions(term_positions))
+            for term, term_positions in positions.items()
+        ]
+
+        with self._transaction() as conn:
+            self._delete_locked(conn, doc_id)
+            conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf, positions) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "INSERT INTO documents (doc_id, user_id, length, indexed_at) VALUES (?, ?, ?, ?)",
+                (doc_id, None if user_id is None else str(user_id), len(tokens), time.time()),
+            )
+            conn.execute("UPDATE index_stats SET value = value + 1 WHERE key = 'doc_count'")
+            conn.execute(
+                "UPDATE index_stats SET value = value + ? WHERE key = 'total_length'",
+                (len(tokens),),
+            )
+            conn.execute("UPDATE index_stats SET value = value + 1 WHERE key = 'generation'")
+
+        return len(tokens)
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Drop ``doc_id`` from the index. Returns True when it was present."""
+
+        with self._transaction() as conn:
+            removed = self._delete_locked(conn, doc_id)
+            if removed:
+                conn.execute("UPDATE index_stats SET value = value + 1 WHERE key = 'generation'")
+        return removed
+
+    def _delete_locked(self, conn: sqlite3.Connection, doc_id: str) -> bool:
+        row = conn.execute("SELECT length FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return False
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        conn.execute("UPDATE index_stats SET value = value - 1 WHERE key = 'doc_count'")
+        conn.execute(
+            "UPDATE index_stats SET value = value - ? WHERE key = 'total_length'",
+            (row[0],),
+        )
+        return True
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM documents")
+            conn.execute("UPDATE index_stats SET value = 0 WHERE key IN ('doc_count', 'total_length')")
+            conn.execute("UPDATE index_stats SET value = value + 1 WHERE key = 'generation'")
+
+    # ----------------------------------------------------------------- reading
+    def _stats(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT key, value FROM index_stats").fetchall()
+        return {key: int(value) for key, value in rows}
+
+    def generation(self) -> int:
+        """Monotonic counter bumped on every write; useful for cache keys."""
+
+        return self._stats().get("generation", 0)
+
+    def document_count(self) -> int:
+        return self._stats().get("doc_count", 0)
+
+    def indexed_ids(self) -> Set[str]:
+        return {row[0] for row in self._connection().execute("SELECT doc_id FROM documents")}
+
+    def contains(self, doc_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        return row is not None
+
+    def _postings(
+        self,
+        term: str,
+        user_id: Optional[str],
+        with_positions: bool,
+    ) -> List[Tuple[str, int, int, Optional[bytes]]]:
+        columns = "p.doc_id, p.tf, d.length, " + ("p.positions" if with_positions else "NULL")
+        sql = (
+            f"SELECT {columns} FROM postings p JOIN documents d ON d.doc_id = p.doc_id "
+            "WHERE p.term = ?"
+        )
+        params: Tuple = (term,)
+        if user_id is not None:
+            sql += " AND d.user_id = ?"
+            params = (term, str(user_id))
+        return self._connection().execute(sql, params).fetchall()
+
+    def _bm25(self, tf: int, df: int, length: int, doc_count: int, avg_length: float) -> float:
+        idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1.0 - self.b + self.b * (length / avg_length if avg_length else 1.0))
+        return idf * (tf * (self.k1 + 1.0)) / (tf + norm)
+
+    @staticmethod
+    def _phrase_count(position_lists: List[array]) -> int:
+        """Count occurrences where each list holds consecutive positions."""
+
+        first, rest = position_lists[0], [set(p) for p in position_lists[1:]]
+        return sum(
+            1
+            for start in first
+            if all((start + offset + 1) in positions for offset, positions in enumerate(rest))
+        )
+
+    def score(
+        self,
+        terms: Iterable[str] = (),
+        phrases: Iterable[str] = (),
+        *,
+        user_id: Optional[str] = None,
+    ) -> Tuple[Dict[str, float], Dict[str, Dict[str, int]]]:
+        """Return BM25 scores and per-term frequencies for matching documents.
+
+        Documents match when they contain any single term or any full phrase.
+        """
+
+        stats = self._stats()
+        doc_count = max(stats.get("doc_count", 0), 1)
+        avg_length = stats.get("total_length", 0) / doc_count
+
+        scores: Dict[str, float] = defaultdict(float)
+        frequencies: Dict[str, Dict[str, int]] = defaultdict(dict)
+
+        for term in dict.fromkeys(t for raw in terms for t in tokenize(raw)):
+            rows = self._postings(term, user_id, with_positions=False)
+            df = len(rows)
+            for doc_id, tf, length, _ in rows:
+                scores[doc_id] += self._bm25(tf, df, length, doc_count, avg_length)
+                frequencies[doc_id][term] = tf
+
+        for phrase in dict.fromkeys(phrases):
+            phrase_terms = tokenize(phrase)
+            if not phrase_terms:
+                continue
+            if len(phrase_terms) == 1:
+                rows = self._postings(phrase_terms[0], user_id, with_positions=False)
+                matches = {doc_id: (tf, length) for doc_id, tf, length, _ in rows}
+            else:
+                matches = self._phrase_matches(phrase_terms, user_id)
+            df = len(matches)
+            for doc_id, (count, length) in matches.items():
+                scores[doc_id] += self._bm25(count, df, length, doc_count, avg_length)
+                frequencies[doc_id][phrase] = count
+
+        return dict(scores), dict(frequencies)
+
+    def _phrase_matches(self, phrase_terms: List[str], user_id: Optional[str]) -> Dict[str, Tuple[int, int]]:
+        postings_by_term: Dict[str, Dict[str, Tuple[int, bytes]]] = {}
+        for term in dict.fromkeys(phrase_terms):
+            rows = self._postings(term, user_id, with_positions=True)
+            postings_by_term[term] = {doc_id: (length, blob) for doc_id, _, length, blob in rows}
+            if not rows:
+                return {}
+
+        candidates = set.intersection(*(set(p) for p in postings_by_term.values()))
+        matches: Dict[str, Tuple[int, int]] = {}
+        for doc_id in candidates:
+            position_lists = [_decode_positions(postings_by_term[term][doc_id][1]) for term in phrase_terms]
+            count = self._phrase_count(position_lists)
+            if count:
+                matches[doc_id] = (count, postings_by_term[phrase_terms[0]][doc_id][0])
+        return matches
+
+    def search(
+        self,
+        terms: Iterable[str] = (),
+        phrases: Iterable[str] = (),
+        *,
+        user_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        allowed: Optional[Callable[[Set[str]], Set[str]]] = None,
+    ) -> IndexSearchResult:
+        """Return the ``offset``/``limit`` page of hits ordered by BM25 score.
+
+        ``allowed`` optionally narrows the candidate set (for example by
+        applying database filters) before ranking; only the requested page is
+        extracted from the heap.
+        """
+
+        scores, frequencies = self.score(terms, phrases, user_id=user_id)
+        if allowed is not None and scores:
+            permitted = allowed(set(scores))
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in permitted}
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        hits = [
+            IndexHit(doc_id=doc_id, score=score, term_frequencies=frequencies.get(doc_id, {}))
+            for doc_id, score in top[offset:offset + limit]
+        ]
+        return IndexSearchResult(hits=hits, total=len(scores), scores=scores)
+
+
+def chunked(values: Sequence[str], size: int = _SQL_CHUNK) -> Iterator[Sequence[str]]:
+    """Yield ``values`` in slices small enough for SQL ``IN`` clauses."""
+
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# Global index instance shared by the API and worker processes
+transcript_index = TranscriptIndex()
+
+
+__all__ = [
+    "IndexHit",
+    "IndexSearchResult",
+    "TranscriptIndex",
+    "chunked",
+    "tokenize",
+    "transcript_index",
+]
@@ -12,6 +12,8 @@ This service provides comprehensive search capabilities across transcripts inclu
 import os
 import re
 import json
+import heapq
+import threading
 import time
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
@@ -19,10 +21,14 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func, text, desc
 
 from api.models import Job, JobStatusEnum, TranscriptMetadata, User
+from api.orm_bootstrap import SessionLocal
+from api.services.transcript_index import chunked, transcript_index
+from api.services.transcript_segments import TranscriptSegments
+from api.services.transcript_storage import TranscriptFile
 from api.settings import settings
 from api.utils.logger import get_system_logger
 
@@ -106,9 +112,16 @@ class TranscriptSearchService:
     metadata filtering, and advanced query capabilities.
     """
     
-    def __init__(self):
+    # Relative weight of transcript content vs. metadata in combined searches
+    CONTENT_WEIGHT = 0.7
+    METADATA_WEIGHT = 0.3
+
+    def __init__(self, index=None):
         self.cache = {}  # Simple in-memory cache for frequent searches
         self.cache_ttl = 300  # 5 minutes cache TTL
+        self.index = index or transcript_index
+        self._index_synced = False
+        self._sync_lock = threading.Lock()
         
     def search(
         self, 
@@ -140,9 +153,10 @@ class TranscriptSearchService:
         start_time = time.time()
         
         try:
-            # Generate cache key
+            # Generate cache key; the index generation invalidates stale pages
             cache_key = self._generate_cache_key(
-                query, user_id, search_type, filters, sort_order, page, page_size
+                query, user_id, search_type, filters, sort_order, page, page_size,
+                self.index.generation()
             )
             
             # Check cache first
@@ -151,22 +165,23 @@ class TranscriptSearchService:
                 logger.debug(f"Cache hit for search query: {query[:50]}")
                 return cached_result
             
-            # Perform search based on type
+            # Perform search based on type; pagination happens inside the ranking
             if search_type == SearchType.FULL_TEXT:
-                results, total = self._search_full_text(query, db, user_id, filters)
+                paginated_results, total = self._search_full_text(
+                    query, db, user_id, filters, sort_order, page, page_size
+                )
             elif search_type == SearchType.METADATA:
-                results, total = self._search_metadata(query, db, user_id, filters)
+                paginated_results, total = self._search_metadata(
+                    query, db, user_id, filters, sort_order, page, page_size
+                )
             elif search_type == SearchType.ADVANCED:
-                results, total = self._search_advanced(query, db, user_id, filters)
+                paginated_results, total = self._search_advanced(
+                    query, db, user_id, filters, sort_order, page, page_size
+                )
             else:  # COMBINED
-                results, total = self._search_combined(query, db, user_id, filters)
-            
-            # Sort results
-            results = self._sort_results(results, sort_order)
-            
-            # Apply pagination
-            start_idx = (page - 1) * page_size
-            paginated_results = results[start_idx:start_idx + page_size]
+                paginated_results, total = self._search_combined(
+                    query, db, user_id, filters, sort_order, page, page_size
+                )
             
             # Create response
             search_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -206,146 +221,83 @@ class TranscriptSearchService:
         query: str, 
         db: Session, 
         user_id: Optional[int], 
-        filters: Optional[SearchFilters]
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder = SortOrder.RELEVANCE,
+        page: int = 1,
+        page_size: int = 20
     ) -> Tuple[List[SearchResult], int]:
         """
         Combined search across transcript content and metadata
         """
-        # Get base query with joins
-        base_query = self._get_base_query(db, user_id, filters)
-        
-        # Prepare search terms
-        search_terms = self._parse_search_terms(query)
-        
-        results = []
-        
-        # Execute query
-        jobs = base_query.all()
-        
-        for job in jobs:
-            # Calculate relevance score
-            relevance_score = 0.0
-            matches = []
-            
-            # Search in transcript file content
-            transcript_content = self._get_transcript_content(job.transcript_path)
-            if transcript_content:
-                content_score, content_matches = self._search_text_content(
-                    transcript_content, search_terms
-                )
-                relevance_score += content_score * 0.7  # Weight content highly
-                matches.extend(content_matches)
-            
-            # Search in metadata
-            metadata_score, metadata_matches = self._search_job_metadata(
-                job, search_terms
-            )
-            relevance_score += metadata_score * 0.3
-            matches.extend(metadata_matches)
-            
-            # Only include results with matches
-            if relevance_score > 0:
-                # Create search result
-                result = SearchResult(
-                    job_id=job.id,
-                    filename=job.original_filename,
-                    transcript_snippet=self._create_snippet(transcript_content, search_terms),
-                    relevance_score=relevance_score,
-                    created_at=job.created_at,
-                    model=job.model,
-                    language=job.transcript_metadata[0].language if job.transcript_metadata else None,
-                    duration=job.transcript_metadata[0].duration if job.transcript_metadata else None,
-                    keywords=self._parse_keywords(job.transcript_metadata[0].keywords) if job.transcript_metadata else None,
-                    summary=job.transcript_metadata[0].summary if job.transcript_metadata else None,
-                    sentiment=job.transcript_metadata[0].sentiment if job.transcript_metadata else None,
-                    matches=matches
-                )
-                results.append(result)
-        
-        return results, len(results)
+        terms, phrases = self._split_search_terms(query)
+        content_scores = self._content_scores(terms, phrases, user_id)
+        metadata_scores = self._metadata_scores(db, terms + phrases, user_id, filters)
+
+        scores: Dict[str, float] = {}
+        for job_id, score in content_scores.items():
+            scores[job_id] = score * self.CONTENT_WEIGHT
+        for job_id, score in metadata_scores.items():
+            scores[job_id] = scores.get(job_id, 0.0) + score * self.METADATA_WEIGHT
+
+        return self._rank_and_materialize(
+            db, scores, user_id, filters, sort_order, page, page_size,
+            search_terms=phrases + terms, include_metadata=True
+        )
     
     def _search_full_text(
         self, 
         query: str, 
         db: Session, 
         user_id: Optional[int], 
-        filters: Optional[SearchFilters]
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder = SortOrder.RELEVANCE,
+        page: int = 1,
+        page_size: int = 20
     ) -> Tuple[List[SearchResult], int]:
         """
-        Full-text search within transcript content
+        Full-text search within transcript content using the inverted index
         """
-        base_query = self._get_base_query(db, user_id, filters)
-        jobs = base_query.all()
-        
-        search_terms = self._parse_search_terms(query)
-        results = []
-        
-        for job in jobs:
-            transcript_content = self._get_transcript_content(job.transcript_path)
-            if not transcript_content:
-                continue
-                
-            score, matches = self._search_text_content(transcript_content, search_terms)
-            if score > 0:
-                result = SearchResult(
-                    job_id=job.id,
-                    filename=job.original_filename,
-                    transcript_snippet=self._create_snippet(transcript_content, search_terms),
-                    full_transcript=transcript_content,
-                    relevance_score=score,
-                    created_at=job.created_at,
-                    model=job.model,
-                    language=job.transcript_metadata[0].language if job.transcript_metadata else None,
-                    duration=job.transcript_metadata[0].duration if job.transcript_metadata else None,
-                    matches=matches
-                )
-                results.append(result)
-        
-        return results, len(results)
+        terms, phrases = self._split_search_terms(query)
+        if sort_order == SortOrder.RELEVANCE:
+            return self._search_index_page(db, terms, phrases, user_id, filters, page, page_size)
+
+        scores = self._content_scores(terms, phrases, user_id)
+
+        return self._rank_and_materialize(
+            db, scores, user_id, filters, sort_order, page, page_size,
+            search_terms=phrases + terms
+        )
     
     def _search_metadata(
         self, 
         query: str, 
         db: Session, 
         user_id: Optional[int], 
-        filters: Optional[SearchFilters]
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder = SortOrder.RELEVANCE,
+        page: int = 1,
+        page_size: int = 20
     ) -> Tuple[List[SearchResult], int]:
         """
         Search within metadata fields (keywords, summary, etc.)
         """
-        base_query = self._get_base_query(db, user_id, filters)
-        jobs = base_query.all()
-        
         search_terms = self._parse_search_terms(query)
-        results = []
-        
-        for job in jobs:
-            score, matches = self._search_job_metadata(job, search_terms)
-            if score > 0:
-                result = SearchResult(
-                    job_id=job.id,
-                    filename=job.original_filename,
-                    transcript_snippet=self._create_metadata_snippet(job, search_terms),
-                    relevance_score=score,
-                    created_at=job.created_at,
-                    model=job.model,
-                    language=job.transcript_metadata[0].language if job.transcript_metadata else None,
-                    duration=job.transcript_metadata[0].duration if job.transcript_metadata else None,
-                    keywords=self._parse_keywords(job.transcript_metadata[0].keywords) if job.transcript_metadata else None,
-                    summary=job.transcript_metadata[0].summary if job.transcript_metadata else None,
-                    sentiment=job.transcript_metadata[0].sentiment if job.transcript_metadata else None,
-                    matches=matches
-                )
-                results.append(result)
-        
-        return results, len(results)
+        scores = self._metadata_scores(db, search_terms, user_id, filters)
+
+        return self._rank_and_materialize(
+            db, scores, user_id, filters, sort_order, page, page_size,
+            search_terms=search_terms, include_metadata=True, metadata_snippets=True
+        )
     
     def _search_advanced(
         self, 
         query: str, 
         db: Session, 
         user_id: Optional[int], 
-        filters: Optional[SearchFilters]
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder = SortOrder.RELEVANCE,
+        page: int = 1,
+        page_size: int = 20
     ) -> Tuple[List[SearchResult], int]:
         """
         Advanced search with boolean operators and phrase matching
@@ -354,28 +306,408 @@ class TranscriptSearchService:
         parsed_query = self._parse_advanced_query(query)
         
         # Use combined search but with advanced query parsing
-        return self._search_combined_advanced(parsed_query, db, user_id, filters)
+        return self._search_combined_advanced(
+            parsed_query, db, user_id, filters, sort_order, page, page_size
+        )
+
+    def _split_search_terms(self, query: str) -> Tuple[List[str], List[str]]:
+        """
+        Split a query into (terms, quoted phrases)
+        """
+        phrases = [phrase for phrase in re.findall(r'"([^"]*)"', query) if phrase.strip()]
+        remaining_query = re.sub(r'"[^"]*"', '', query)
+        terms = [term.lower() for term in remaining_query.split() if len(term) > 1]
+        return terms, phrases
+
+    def _content_scores(
+        self, terms: List[str], phrases: List[str], user_id: Optional[int]
+    ) -> Dict[str, float]:
+        """
+        BM25 scores for transcript content, read from the inverted index
+        """
+        if not terms and not phrases:
+            return {}
+        scores, _ = self.index.score(terms, phrases, user_id=self._index_user(user_id))
+        return scores
+
+    def _search_index_page(
+        self,
+        db: Session,
+        terms: List[str],
+        phrases: List[str],
+        user_id: Optional[int],
+        filters: Optional[SearchFilters],
+        page: int,
+        page_size: int
+    ) -> Tuple[List[SearchResult], int]:
+        """
+        Relevance-ordered page straight from the index; only the page's rows are
+        checked against the database unless filters need the whole candidate set
+        """
+        if not terms and not phrases:
+            return [], 0
+
+        allowed = None
+        if self._has_filters(filters):
+            def allowed(job_ids):
+                return set(self._filter_candidates(db, list(job_ids), user_id, filters, SortOrder.RELEVANCE))
+
+        offset = max(page - 1, 0) * page_size
+        while True:
+            result = self.index.search(
+                terms, phrases, user_id=self._index_user(user_id),
+                offset=offset, limit=page_size, allowed=allowed
+            )
+            page_ids = [hit.doc_id for hit in result.hits]
+            if allowed is not None:
+                break
+            # Prune entries whose job was deleted behind the index's back, then re-rank
+            live = self._filter_candidates(db, page_ids, user_id, None, SortOrder.RELEVANCE)
+            stale = [job_id for job_id in page_ids if job_id not in live]
+            if not stale:
+                break
+            for job_id in stale:
+                self.index.remove_document(job_id)
+
+        scores = {hit.doc_id: hit.score for hit in result.hits}
+        return self._materialize_page(db, page_ids, scores, search_terms=phrases + terms), result.total
+
+    def _index_user(self, user_id: Optional[int]) -> Optional[str]:
+        """
+        The index stores owners as text, like ``Job.user_id``
+        """
+        return None if user_id is None else str(user_id)
+
+    def _has_filters(self, filters: Optional[SearchFilters]) -> bool:
+        return bool(filters) and any(value not in (None, []) for value in asdict(filters).values())
+
+    def _metadata_scores(
+        self,
+        db: Session,
+        search_terms: List[str],
+        user_id: Optional[int],
+        filters: Optional[SearchFilters]
+    ) -> Dict[str, float]:
+        """
+        Score jobs whose filename, keywords or summary mention a search term.
+        Matching is pushed into SQL so only matching rows are loaded.
+        """
+        if not search_terms:
+            return {}
+
+        conditions = []
+        for term in search_terms:
+            pattern = f"%{term}%"
+            conditions.extend([
+                Job.original_filename.ilike(pattern),
+                TranscriptMetadata.keywords.ilike(pattern),
+                TranscriptMetadata.summary.ilike(pattern),
+            ])
+
+        base_query = self._get_base_query(db, user_id, filters, join_metadata=True)
+        rows = base_query.with_entities(
+            Job.id, Job.original_filename, TranscriptMetadata.keywords, TranscriptMetadata.summary
+        ).filter(or_(*conditions)).all()
+
+        scores: Dict[str, float] = {}
+        for job_id, filename, keywords, summary in rows:
+            score, _ = self._score_metadata_fields(filename, keywords, summary, search_terms)
+            if score > 0:
+                scores[job_id] = max(scores.get(job_id, 0.0), score)
+        return scores
+
+    def backfill_index(self) -> int:
+        """
+        Index completed transcripts that predate the index (runs once per process).
+        Uses its own session; returns the number of transcripts indexed.
+        """
+        with self._sync_lock:
+            if self._index_synced:
+                return 0
+            indexed = self.index.indexed_ids()
+            db = SessionLocal()
+            try:
+                rows = db.query(Job.id, Job.transcript_path, Job.user_id).filter(
+                    Job.status == JobStatusEnum.COMPLETED,
+                    Job.transcript_path.isnot(None)
+                ).all()
+            finally:
+                db.close()
+            added = 0
+            for job_id, transcript_path, owner_id in rows:
+                if job_id in indexed:
+                    continue
+                content = self._get_transcript_content(transcript_path)
+                if content is not None:
+                    self.index.index_document(job_id, content, user_id=owner_id)
+                    added += 1
+            if added:
+                logger.info(f"Indexed {added} transcripts missing from the search index")
+            self._index_synced = True
+            return added
+
+    def start_index_backfill(self) -> threading.Thread:
+        """
+        Run :meth:`backfill_index` in a daemon thread; searches meanwhile are
+        served from whatever is already indexed
+        """
+        def run():
+            try:
+                self.backfill_index()
+            except Exception as e:
+                logger.error(f"Search index backfill failed: {e}")
+
+        thread = threading.Thread(target=run, name="transcript-index-backfill", daemon=True)
+        thread.start()
+        return thread
+
+    def _filter_candidates(
+        self,
+        db: Session,
+        job_ids: List[str],
+        user_id: Optional[int],
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder
+    ) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Apply database filters to candidate job IDs, returning sort keys per job
+        """
+        join_metadata = sort_order in (SortOrder.DURATION_ASC, SortOrder.DURATION_DESC)
+        columns = [Job.id, Job.created_at, Job.original_filename]
+        if join_metadata:
+            columns.append(TranscriptMetadata.duration)
+
+        rows: Dict[str, Tuple[Any, ...]] = {}
+        for chunk in chunked(job_ids):
+            query = self._get_base_query(db, user_id, filters, join_metadata=join_metadata)
+            for row in query.with_entities(*columns).filter(Job.id.in_(chunk)).all():
+                rows.setdefault(row[0], tuple(row[1:]))
+        return rows
+
+    def _rank_and_materialize(
+        self,
+        db: Session,
+        scores: Dict[str, float],
+        user_id: Optional[int],
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder,
+        page: int,
+        page_size: int,
+        search_terms: List[str],
+        include_full_transcript: bool = False,
+        include_metadata: bool = False,
+        metadata_snippets: bool = False
+    ) -> Tuple[List[SearchResult], int]:
+        """
+        Rank scored jobs, then load rows and transcripts only for the requested page
+        """
+        scores = {job_id: score for job_id, score in scores.items() if score > 0}
+        if not scores:
+            return [], 0
+
+        # Drops stale index entries (deleted or non-completed jobs) and applies filters
+        sort_keys = self._filter_candidates(db, list(scores), user_id, filters, sort_order)
+        total = len(sort_keys)
+        offset = max(page - 1, 0) * page_size
+
+        if sort_order == SortOrder.RELEVANCE:
+            ranked = heapq.nlargest(offset + page_size, sort_keys, key=lambda job_id: (scores[job_id], job_id))
+        else:
+            ranked = self._sort_job_ids(sort_keys, sort_order)
+        page_ids = ranked[offset:offset + page_size]
+        return self._materialize_page(
+            db, page_ids, scores, search_terms,
+            include_full_transcript=include_full_transcript,
+            include_metadata=include_metadata,
+            metadata_snippets=metadata_snippets
+        ), total
+
+    def _materialize_page(
+        self,
+        db: Session,
+        page_ids: List[str],
+        scores: Dict[str, float],
+        search_terms: List[str],
+        include_full_transcript: bool = False,
+        include_metadata: bool = False,
+        metadata_snippets: bool = False
+    ) -> List[SearchResult]:
+        """
+        Load rows, metadata and transcript snippets for one page of ranked job IDs
+        """
+        if not page_ids:
+            return []
+
+        jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(page_ids)).all()}
+        metadata = self._load_metadata(db, page_ids)
+
+        results = []
+        for job_id in page_ids:
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            meta = metadata.get(job_id)
+            matches: List[Dict[str, Any]] = []
+
+            if metadata_snippets:
+                transcript_content = None
+                snippet = self._create_metadata_snippet(job, meta, search_terms)
+            else:
+                transcript_content = None
+                snippet = ""
+                transcript = TranscriptFile.open(job.transcript_path)
+                if transcript is not None:
+                    with transcript:
+                        # Snippet and match positions come from the mapped file, not a full read
+                        matches = transcript.find_terms(search_terms) if search_terms else []
+                        snippet = self._create_transcript_snippet(transcript, matches)
+                        if include_full_transcript:
+                            transcript_content = transcript.read_text()
+                self._attach_match_times(job.transcript_path, matches)
+
+            if include_metadata:
+                _, metadata_matches = self._score_metadata_fields(
+                    job.original_filename,
+                    meta.keywords if meta else None,
+                    meta.summary if meta else None,
+                    search_terms
+                )
+                matches.extend(metadata_matches)
+
+            results.append(SearchResult(
+                job_id=job.id,
+                filename=job.original_filename,
+                transcript_snippet=snippet,
+                full_transcript=transcript_content if include_full_transcript else None,
+                relevance_score=scores[job_id],
+                created_at=job.created_at,
+                model=job.model,
+                language=meta.language if meta else None,
+                duration=meta.duration if meta else None,
+                keywords=self._parse_keywords(meta.keywords) if meta and include_metadata else None,
+                summary=meta.summary if meta and include_metadata else None,
+                sentiment=meta.sentiment if meta and include_metadata else None,
+                matches=matches
+            ))
+
+        return results
+
+    def _attach_match_times(self, transcript_path: Optional[str], matches: List[Dict]) -> None:
+        """
+        Add the start/end time of the enclosing segment to each match position
+        """
+        positions = [position for match in matches for position in match['positions']]
+        offsets = [position.pop('offset') for position in positions]
+        if not positions:
+            return
+        segments = TranscriptSegments.for_transcript(transcript_path)
+        if segments is None:
+            return
+        with segments:
+            if not segments.indexes_transcript:
+                return
+            for position, offset in zip(positions, offsets):
+                index = segments.segment_at_offset(offset)
+                if index is not None:
+                    position['start'] = float(segments.starts[index])
+                    position['end'] = float(segments.ends[index])
+
+    def _create_transcript_snippet(
+        self, transcript: TranscriptFile, matches: List[Dict], max_length: int = 300
+    ) -> str:
+        """
+        Create a snippet around the first match, reading only that part of the file
+        """
+        first = min(
+            (match['positions'][0] for match in matches if match['positions']),
+            key=lambda position: position['position'],
+            default=None
+        )
+        if first is None:
+            text, truncated = transcript.preview(max_length)
+            return text + "..." if truncated else text
+        return transcript.excerpt(first['position'], first['offset'], max_length)
+
+    def _load_metadata(self, db: Session, job_ids: List[str]) -> Dict[str, TranscriptMetadata]:
+        """
+        Load transcript metadata rows for the given jobs
+        """
+        if not job_ids:
+            return {}
+        rows = db.query(TranscriptMetadata).filter(TranscriptMetadata.job_id.in_(job_ids)).all()
+        return {row.job_id: row for row in rows}
+
+    def _sort_job_ids(self, sort_keys: Dict[str, Tuple[Any, ...]], sort_order: SortOrder) -> List[str]:
+        """
+        Order candidate job IDs by a non-relevance sort key
+        """
+        def created(job_id):
+            return sort_keys[job_id][0]
+
+        def duration(job_id):
+            return sort_keys[job_id][2] if len(sort_keys[job_id]) > 2 else None
+
+        if sort_order == SortOrder.DATE_DESC:
+            return sorted(sort_keys, key=lambda j: created(j) or datetime.min, reverse=True)
+        if sort_order == SortOrder.DATE_ASC:
+            return sorted(sort_keys, key=lambda j: created(j) or datetime.max)
+        if sort_order == SortOrder.DURATION_DESC:
+            return sorted(sort_keys, key=lambda j: duration(j) or 0, reverse=True)
+        if sort_order == SortOrder.DURATION_ASC:
+            return sorted(sort_keys, key=lambda j: duration(j) or float('inf'))
+        if sort_order == SortOrder.FILENAME:
+            return sorted(sort_keys, key=lambda j: (sort_keys[j][1] or "").lower())
+        return list(sort_keys)
+
+    def index_transcript(self, job_id: str, content: str, user_id: Optional[str] = None) -> None:
+        """
+        Add or refresh a transcript in the search index
+        """
+        self.index.index_document(job_id, content, user_id=user_id)
+
+    def remove_transcript(self, job_id: str) -> None:
+        """
+        Remove a transcript from the search index
+        """
+        self.index.remove_document(job_id)
     
-    def _get_base_query(self, db: Session, user_id: Optional[int], filters: Optional[SearchFilters]):
+    def _get_base_query(
+        self,
+        db: Session,
+        user_id: Optional[int],
+        filters: Optional[SearchFilters],
+        join_metadata: bool = False
+    ):
         """
         Build base SQL query with filters and joins
         """
-        query = db.query(Job).options(joinedload(Job.transcript_metadata)).filter(
+        query = db.query(Job).filter(
             Job.status == JobStatusEnum.COMPLETED,
             Job.transcript_path.isnot(None)
         )
+
+        metadata_filters = bool(filters) and any([
+            filters.languages,
+            filters.duration_min,
+            filters.duration_max,
+            filters.sentiment_min is not None,
+            filters.sentiment_max is not None,
+            filters.has_keywords is not None,
+            filters.has_summary is not None,
+        ])
+        if metadata_filters:
+            query = query.join(TranscriptMetadata, TranscriptMetadata.job_id == Job.id)
+        elif join_metadata:
+            query = query.outerjoin(TranscriptMetadata, TranscriptMetadata.job_id == Job.id)
         
         # Apply user filter if provided (for user-specific searches)
-        if user_id:
-            # Note: Need to add user_id to Job model if implementing user-specific transcripts
-            pass
+        if user_id is not None:
+            query = query.filter(Job.user_id == str(user_id))
         
         # Apply filters
         if filters:
             if filters.languages:
-                query = query.join(TranscriptMetadata).filter(
-                    TranscriptMetadata.language.in_(filters.languages)
-                )
+                query = query.filter(TranscriptMetadata.language.in_(filters.languages))
             
             if filters.models:
                 query = query.filter(Job.model.in_(filters.models))
@@ -387,28 +719,24 @@ class TranscriptSearchService:
                 query = query.filter(Job.created_at <= filters.date_to)
             
             if filters.duration_min or filters.duration_max:
-                query = query.join(TranscriptMetadata)
                 if filters.duration_min:
                     query = query.filter(TranscriptMetadata.duration >= filters.duration_min)
                 if filters.duration_max:
                     query = query.filter(TranscriptMetadata.duration <= filters.duration_max)
             
             if filters.sentiment_min is not None or filters.sentiment_max is not None:
-                query = query.join(TranscriptMetadata)
                 if filters.sentiment_min is not None:
                     query = query.filter(TranscriptMetadata.sentiment >= filters.sentiment_min)
                 if filters.sentiment_max is not None:
                     query = query.filter(TranscriptMetadata.sentiment <= filters.sentiment_max)
             
             if filters.has_keywords is not None:
-                query = query.join(TranscriptMetadata)
                 if filters.has_keywords:
                     query = query.filter(TranscriptMetadata.keywords.isnot(None))
                 else:
                     query = query.filter(TranscriptMetadata.keywords.is_(None))
             
             if filters.has_summary is not None:
-                query = query.join(TranscriptMetadata)
                 if filters.has_summary:
                     query = query.filter(TranscriptMetadata.summary.isnot(None))
                 else:
@@ -485,22 +813,23 @@ class TranscriptSearchService:
         
         return total_score, matches
     
-    def _search_job_metadata(self, job: Job, search_terms: List[str]) -> Tuple[float, List[Dict]]:
+    def _score_metadata_fields(
+        self,
+        filename: Optional[str],
+        keywords: Optional[str],
+        summary: Optional[str],
+        search_terms: List[str]
+    ) -> Tuple[float, List[Dict]]:
         """
         Search within job metadata fields
         """
         matches = []
         total_score = 0.0
         
-        if not job.transcript_metadata:
-            return 0.0, []
-        
-        metadata = job.transcript_metadata[0]
-        
         # Search in keywords
-        if metadata.keywords:
+        if keywords:
             keywords_score, keywords_matches = self._search_text_content(
-                metadata.keywords, search_terms
+                keywords, search_terms
             )
             total_score += keywords_score * 2.0  # Weight keywords higher
             if keywords_matches:
@@ -510,9 +839,9 @@ class TranscriptSearchService:
                 })
         
         # Search in summary
-        if metadata.summary:
+        if summary:
             summary_score, summary_matches = self._search_text_content(
-                metadata.summary, search_terms
+                summary, search_terms
             )
             total_score += summary_score * 1.5  # Weight summary moderately
             if summary_matches:
@@ -523,7 +852,7 @@ class TranscriptSearchService:
         
         # Search in filename
         filename_score, filename_matches = self._search_text_content(
-            job.original_filename, search_terms
+            filename or "", search_terms
         )
         total_score += filename_score * 0.8
         if filename_matches:
@@ -566,15 +895,18 @@ class TranscriptSearchService:
         
         return snippet
     
-    def _create_metadata_snippet(self, job: Job, search_terms: List[str]) -> str:
+    def _create_metadata_snippet(
+        self,
+        job: Job,
+        metadata: Optional[TranscriptMetadata],
+        search_terms: List[str]
+    ) -> str:
         """
         Create snippet from metadata fields
         """
-        if not job.transcript_metadata:
+        if metadata is None:
             return f"File: {job.original_filename}"
         
-        metadata = job.transcript_metadata[0]
-        
         # Prioritize summary if available
         if metadata.summary:
             return self._create_snippet(metadata.summary, search_terms, 200)
@@ -600,25 +932,6 @@ class TranscriptSearchService:
             # Fall back to comma-separated
             return [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
     
-    def _sort_results(self, results: List[SearchResult], sort_order: SortOrder) -> List[SearchResult]:
-        """
-        Sort search results based on specified order
-        """
-        if sort_order == SortOrder.RELEVANCE:
-            return sorted(results, key=lambda r: r.relevance_score, reverse=True)
-        elif sort_order == SortOrder.DATE_DESC:
-            return sorted(results, key=lambda r: r.created_at or datetime.min, reverse=True)
-        elif sort_order == SortOrder.DATE_ASC:
-            return sorted(results, key=lambda r: r.created_at or datetime.max)
-        elif sort_order == SortOrder.DURATION_DESC:
-            return sorted(results, key=lambda r: r.duration or 0, reverse=True)
-        elif sort_order == SortOrder.DURATION_ASC:
-            return sorted(results, key=lambda r: r.duration or float('inf'))
-        elif sort_order == SortOrder.FILENAME:
-            return sorted(results, key=lambda r: r.filename.lower())
-        else:
-            return results
-    
     def _parse_advanced_query(self, query: str) -> Dict[str, Any]:
         """
         Parse advanced query syntax (AND, OR, NOT, phrases)
@@ -636,15 +949,20 @@ class TranscriptSearchService:
         parsed_query: Dict[str, Any], 
         db: Session, 
         user_id: Optional[int], 
-        filters: Optional[SearchFilters]
+        filters: Optional[SearchFilters],
+        sort_order: SortOrder = SortOrder.RELEVANCE,
+        page: int = 1,
+        page_size: int = 20
     ) -> Tuple[List[SearchResult], int]:
         """
         Perform advanced search with parsed boolean query
         """
         # For now, fall back to combined search
         # This would implement advanced boolean logic
-        query_str = ' '.join(parsed_query['terms'])
-        return self._search_combined(query_str, db, user_id, filters)
+        phrases = parsed_query['phrases']
+        terms = [term for term in parsed_query['terms'] if term not in phrases]
+        query_str = ' '.join(terms + [f'"{phrase}"' for phrase in phrases])
+        return self._search_combined(query_str, db, user_id, filters, sort_order, page, page_size)
     
     def _generate_cache_key(self, *args) -> str:
         """
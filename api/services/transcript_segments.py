@@ -0,0 +1,351 @@
+"""Columnar sidecar storage for Whisper segments and word timings.
+
+Whisper returns per-segment timings (and optionally per-word timings) that
+``transcript.txt`` cannot hold.  The worker stores them next to the
+transcript as NumPy ``.npy`` arrays:
+
+``segments.npy``
+    One fixed-width record per segment: start/end seconds, the segment's
+    byte range in the text source, ``avg_logprob``, ``no_speech_prob`` and
+    the range of its words in ``words.npy``.
+``words.npy``
+    One record per word (only written when word timings were requested):
+    start/end seconds, byte range in the text source and probability.
+``segments.txt``
+    Only present when the segment texts could not be located in
+    ``transcript.txt``; it then holds the concatenated segment texts and
+    becomes the text source.
+
+:class:`TranscriptSegments` opens the arrays with ``mmap_mode="r"`` and maps
+the text source, so opening a large transcript costs two small header reads
+and segments are decoded only when they are accessed.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from api.utils.logger import get_system_logger
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy is a runtime requirement
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = get_system_logger("transcript_segments")
+
+SEGMENTS_FILE = "segments.npy"
+WORDS_FILE = "words.npy"
+SEGMENT_TEXT_FILE = "segments.txt"
+SIDECAR_FILES = (WORDS_FILE, SEGMENT_TEXT_FILE, SEGMENTS_FILE)
+
+if NUMPY_AVAILABLE:
+    SEGMENT_DTYPE = np.dtype([
+        ("start", "<f4"),
+        ("end", "<f4"),
+        ("text_start", "<u4"),
+        ("text_end", "<u4"),
+        ("avg_logprob", "<f4"),
+        ("no_speech_prob", "<f4"),
+        ("word_start", "<u4"),
+        ("word_end", "<u4"),
+    ])
+    WORD_DTYPE = np.dtype([
+        ("start", "<f4"),
+        ("end", "<f4"),
+        ("text_start", "<u4"),
+        ("text_end", "<u4"),
+        ("probability", "<f4"),
+    ])
+
+
+def _locate(source: bytes, needle: bytes, cursor: int) -> Optional[int]:
+    """Return where ``needle`` starts at or after ``cursor`` in ``source``."""
+    if not needle:
+        return cursor
+    position = source.find(needle, cursor)
+    return position if position >= 0 else None
+
+
+def _align(source: bytes, segments: Sequence[Mapping[str, Any]]) -> Optional[List[Tuple[int, int, List[Tuple[int, int]]]]]:
+    """Find each segment's (and word's) byte range in ``source``, in order."""
+    aligned = []
+    cursor = 0
+    for segment in segments:
+        text = (segment.get("text") or "").strip().encode("utf-8")
+        start = _locate(source, text, cursor)
+        if start is None:
+            return None
+        end = start + len(text)
+
+        words = []
+        word_cursor = start
+        for word in segment.get("words") or ():
+            word_text = (word.get("word") or "").strip().encode("utf-8")
+            word_start = _locate(source, word_text, word_cursor)
+            if word_start is None or word_start + len(word_text) > end:
+                # Tokenization differs from the segment text; keep the timing
+                # and point the word at an empty range.
+                word_start = word_cursor
+                word_text = b""
+            words.append((word_start, word_start + len(word_text)))
+            word_cursor = word_start + len(word_text)
+
+        aligned.append((start, end, words))
+        cursor = end
+    return aligned
+
+
+def _atomic_save(path: Path, array: Any) -> None:
+    staging = path.with_name(f".{path.name}.tmp")
+    with open(staging, "wb") as handle:
+        np.save(handle, array, allow_pickle=False)
+    os.replace(staging, path)
+
+
+def write_segments(
+    transcript_dir: Path,
+    segments: Sequence[Mapping[str, Any]],
+    transcript_text: Optional[str] = None,
+) -> bool:
+    """Store Whisper ``segments`` as a sidecar in ``transcript_dir``.
+
+    ``transcript_text`` should be the content written to ``transcript.txt``;
+    segment text is stored as byte offsets into it when every segment can be
+    found there. Returns False when NumPy is unavailable or there is nothing
+    to store.
+    """
+    if not NUMPY_AVAILABLE or not segments:
+        return False
+
+    transcript_dir = Path(transcript_dir)
+    source = (transcript_text or "").encode("utf-8")
+    aligned = _align(source, segments) if source else None
+    own_text = aligned is None
+    if own_text:
+        parts = [(segment.get("text") or "").strip() for segment in segments]
+        source = "\n".join(parts).encode("utf-8")
+        aligned = _align(source, segments)
+
+    word_count = sum(len(words) for _, _, words in aligned)
+    segment_rows = np.zeros(len(segments), dtype=SEGMENT_DTYPE)
+    word_rows = np.zeros(word_count, dtype=WORD_DTYPE)
+
+    word_index = 0
+    for row, (segment, (text_start, text_end, word_ranges)) in enumerate(zip(segments, aligned)):
+        segment_rows[row] = (
+            float(segment.get("start") or 0.0),
+            float(segment.get("end") or 0.0),
+            text_start,
+            text_end,
+            float(segment.get("avg_logprob") or 0.0),
+            float(segment.get("no_speech_prob") or 0.0),
+            word_index,
+            word_index + len(word_ranges),
+        )
+        for word, (word_start, word_end) in zip(segment.get("words") or (), word_ranges):
+            word_rows[word_index] = (
+                float(word.get("start") or 0.0),
+                float(word.get("end") or 0.0),
+                word_start,
+                word_end,
+                float(word.get("probability") or 0.0),
+            )
+            word_index += 1
+
+    transcript_dir.mkdir(parents=True, exist_ok=True)
+    text_path = transcript_dir / SEGMENT_TEXT_FILE
+    if own_text:
+        staging = text_path.with_name(f".{text_path.name}.tmp")
+        staging.write_bytes(source)
+        os.replace(staging, text_path)
+    elif text_path.exists():
+        text_path.unlink()
+
+    words_path = transcript_dir / WORDS_FILE
+    if word_count:
+        _atomic_save(words_path, word_rows)
+    elif words_path.exists():
+        words_path.unlink()
+
+    # Written last: its presence marks a complete sidecar.
+    _atomic_save(transcript_dir / SEGMENTS_FILE, segment_rows)
+    return True
+
+
+def copy_segments(source_dir: Path, destination_dir: Path) -> bool:
+    """Copy (hard-link where possible) the sidecar of a reused transcript."""
+    source_dir = Path(source_dir)
+    if not (source_dir / SEGMENTS_FILE).exists():
+        return False
+
+    destination_dir = Path(destination_dir)
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    for name in SIDECAR_FILES:
+        source = source_dir / name
+        if not source.exists():
+            continue
+        target = destination_dir / name
+        staging = target.with_name(f".{name}.tmp")
+        try:
+            os.link(source, staging)
+        except OSError:
+            shutil.copyfile(source, staging)
+        os.replace(staging, target)
+    return True
+
+
+class TranscriptSegments:
+    """Lazy, memory-mapped view of a transcript's segment sidecar.
+
+    Behaves as a read-only sequence of segment dicts with ``start``, ``end``,
+    ``text``, ``avg_logprob``, ``no_speech_prob``, ``confidence`` and, when
+    word timings exist, ``words``. Column arrays are available directly via
+    :attr:`starts` and :attr:`ends` for vectorised use.
+    """
+
+    def __init__(self, transcript_dir: Path):
+        self.transcript_dir = Path(transcript_dir)
+        self._segments = np.load(self.transcript_dir / SEGMENTS_FILE, mmap_mode="r", allow_pickle=False)
+        words_path = self.transcript_dir / WORDS_FILE
+        self._words = (
+            np.load(words_path, mmap_mode="r", allow_pickle=False) if words_path.exists() else None
+        )
+
+        text_path = self.transcript_dir / SEGMENT_TEXT_FILE
+        # True when text offsets point into transcript.txt itself
+        self.indexes_transcript = not text_path.exists()
+        if self.indexes_transcript:
+            text_path = self.transcript_dir / "transcript.txt"
+        self._text_file = open(text_path, "rb")
+        try:
+            self._text = mmap.mmap(self._text_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self._text = b""
+
+    @classmethod
+    def open(cls, transcript_dir: Optional[Path]) -> Optional["TranscriptSegments"]:
+        """Return a reader for ``transcript_dir``, or None if it has no sidecar."""
+        if not NUMPY_AVAILABLE or transcript_dir is None:
+            return None
+        if not (Path(transcript_dir) / SEGMENTS_FILE).exists():
+            return None
+        try:
+            return cls(Path(transcript_dir))
+        except Exception as e:
+            logger.warning(f"Unable to open segment sidecar in {transcript_dir}: {e}")
+            return None
+
+    @classmethod
+    def for_transcript(cls, transcript_path: Optional[str]) -> Optional["TranscriptSegments"]:
+        """Return the reader stored next to ``transcript_path``, if any."""
+        if not transcript_path:
+            return None
+        return cls.open(Path(transcript_path).parent)
+
+    def close(self) -> None:
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
+
+    def __enter__(self) -> "TranscriptSegments":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __bool__(self) -> bool:
+        return len(self._segments) > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self._segments)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        record = self._segments[index]
+        segment = {
+            "id": int(index if index >= 0 else len(self) + index),
+            "start": float(record["start"]),
+            "end": float(record["end"]),
+            "text": self._slice(record["text_start"], record["text_end"]),
+            "avg_logprob": float(record["avg_logprob"]),
+            "no_speech_prob": float(record["no_speech_prob"]),
+            "confidence": math.exp(float(record["avg_logprob"])),
+        }
+        if self._words is not None and record["word_end"] > record["word_start"]:
+            segment["words"] = self.words(int(record["word_start"]), int(record["word_end"]))
+        return segment
+
+    @property
+    def starts(self):
+        return self._segments["start"]
+
+    @property
+    def ends(self):
+        return self._segments["end"]
+
+    def text(self, index: int) -> str:
+        record = self._segments[index]
+        return self._slice(record["text_start"], record["text_end"])
+
+    def words(self, first: int, last: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "word": self._slice(word["text_start"], word["text_end"]),
+                "start": float(word["start"]),
+                "end": float(word["end"]),
+                "probability": float(word["probability"]),
+            }
+            for word in self._words[first:last]
+        ]
+
+    def segment_at_time(self, seconds: float) -> Optional[int]:
+        """Index of the segment playing at ``seconds``, if any."""
+        index = int(np.searchsorted(self.starts, seconds, side="right")) - 1
+        if index < 0 or seconds > float(self.ends[index]):
+            return None
+        return index
+
+    def segment_at_offset(self, byte_offset: int) -> Optional[int]:
+        """Index of the segment whose text contains ``byte_offset`` in the text source."""
+        index = int(np.searchsorted(self._segments["text_start"], byte_offset, side="right")) - 1
+        if index < 0 or byte_offset >= int(self._segments["text_end"][index]):
+            return None
+        return index
+
+    def _slice(self, start: Any, end: Any) -> str:
+        return bytes(self._text[int(start):int(end)]).decode("utf-8", errors="replace")
+
+
+def char_to_byte_offsets(content: str, positions: Sequence[int]) -> List[int]:
+    """Convert character positions in ``content`` to UTF-8 byte offsets in one pass."""
+    order = sorted(range(len(positions)), key=positions.__getitem__)
+    offsets = [0] * len(positions)
+    previous_char = 0
+    previous_byte = 0
+    for index in order:
+        position = positions[index]
+        previous_byte += len(content[previous_char:position].encode("utf-8"))
+        previous_char = position
+        offsets[index] = previous_byte
+    return offsets
+
+
+__all__ = [
+    "NUMPY_AVAILABLE",
+    "SEGMENTS_FILE",
+    "TranscriptSegments",
+    "char_to_byte_offsets",
+    "copy_segments",
+    "write_segments",
+]
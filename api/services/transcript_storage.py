@@ -0,0 +1,178 @@
+"""Memory-mapped read access to ``transcript.txt`` files.
+
+Multi-hour transcripts run to megabytes of text, and most readers only need
+a small part of one: the job status route shows a preview, search shows a
+snippet around the first match plus a handful of match positions, and
+downloads stream the file itself (``FileResponse`` handles ``Range``
+requests and uses ``http.response.pathsend`` where the server supports it).
+
+:class:`TranscriptFile` maps the file read-only, so those readers decode
+only the bytes they touch.  Term searches scan the mapping in
+character-aligned chunks of ``SCAN_CHUNK_BYTES``, keeping at most one chunk
+of decoded text in the Python heap however long the transcript is.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("transcript_storage")
+
+TRANSCRIPT_PREVIEW_CHARS = int(os.getenv("TRANSCRIPT_PREVIEW_CHARS", "2000"))
+SCAN_CHUNK_BYTES = 1 << 20
+
+# Longest UTF-8 encoding of one character
+_MAX_CHAR_BYTES = 4
+
+
+class TranscriptFile:
+    """Read-only, memory-mapped view of a UTF-8 transcript file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self._data = b""
+
+    @classmethod
+    def open(cls, transcript_path: Optional[Union[str, Path]]) -> Optional["TranscriptFile"]:
+        """Return a reader for ``transcript_path``, or None if it cannot be read."""
+        if not transcript_path:
+            return None
+        try:
+            return cls(transcript_path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Unable to open transcript {transcript_path}: {e}")
+            return None
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> "TranscriptFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read_text(self) -> str:
+        """Decode the whole transcript; only for callers that need all of it."""
+        return self._data[:].decode("utf-8")
+
+    def preview(self, max_chars: Optional[int] = None) -> Tuple[str, bool]:
+        """First ``max_chars`` characters and whether the transcript is longer.
+
+        Defaults to ``TRANSCRIPT_PREVIEW_CHARS``.
+        """
+        if max_chars is None:
+            max_chars = TRANSCRIPT_PREVIEW_CHARS
+        end = min(self.size, max_chars * _MAX_CHAR_BYTES)
+        text = self._decode(0, end)
+        return text[:max_chars], len(text) > max_chars or end < self.size
+
+    def excerpt(self, position: int, offset: int, max_length: int = 300) -> str:
+        """About ``max_length`` characters around the character at ``position``.
+
+        ``offset`` is that character's byte offset; the excerpt starts up to a
+        third of ``max_length`` before it, with ``...`` marking cut ends.
+        """
+        lead = min(position, max_length // 3)
+        before = self._decode(max(0, offset - lead * _MAX_CHAR_BYTES), offset)[-lead:] if lead else ""
+        end = min(self.size, offset + (max_length - lead) * _MAX_CHAR_BYTES)
+        after = self._decode(offset, end)
+
+        snippet = before + after[:max_length - lead]
+        if position - lead > 0:
+            snippet = "..." + snippet
+        if len(after) > max_length - lead or end < self.size:
+            snippet = snippet + "..."
+        return snippet
+
+    def find_terms(self, terms: Sequence[str], max_positions: int = 10) -> List[Dict[str, Any]]:
+        """Case-insensitive occurrences of ``terms``, in the search match format.
+
+        ``count`` is the number of non-overlapping occurrences; ``positions``
+        holds up to ``max_positions`` character positions per term, each with
+        its byte ``offset`` in the file.
+        """
+        lowered = [term.lower() for term in terms]
+        counts = [0] * len(terms)
+        next_free = [0] * len(terms)
+        positions: List[List[Dict[str, Any]]] = [[] for _ in terms]
+        # Matches may straddle chunks; each window repeats the previous tail
+        overlap = max((len(term) for term in lowered), default=1) - 1
+        carry = ""
+        carry_bytes = 0
+
+        for byte_offset, char_offset, text in self._chunks():
+            window = carry + text
+            window_lower = window.lower()
+            window_char = char_offset - len(carry)
+            window_byte = byte_offset - carry_bytes
+            for index, term in enumerate(lowered):
+                if not term:
+                    continue
+                pos = window_lower.find(term)
+                while pos != -1:
+                    # Occurrences inside the carried tail were seen in the previous window
+                    if pos + len(term) > len(carry):
+                        position = window_char + pos
+                        if position >= next_free[index]:
+                            counts[index] += 1
+                            next_free[index] = position + len(term)
+                        if len(positions[index]) < max_positions:
+                            positions[index].append({
+                                'term': terms[index],
+                                'position': position,
+                                'length': len(terms[index]),
+                                'offset': window_byte + len(window[:pos].encode("utf-8")),
+                            })
+                    pos = window_lower.find(term, pos + 1)
+            carry = window[-overlap:] if overlap else ""
+            carry_bytes = len(carry.encode("utf-8"))
+
+        return [
+            {'term': term, 'count': count, 'positions': found}
+            for term, count, found in zip(terms, counts, positions)
+            if count
+        ]
+
+    def _chunks(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield ``(byte_offset, char_offset, text)`` for character-aligned chunks."""
+        byte_offset = char_offset = 0
+        while byte_offset < self.size:
+            end = self._char_start(min(self.size, byte_offset + SCAN_CHUNK_BYTES))
+            if end <= byte_offset:
+                end = min(self.size, byte_offset + SCAN_CHUNK_BYTES)
+            text = self._data[byte_offset:end].decode("utf-8", errors="replace")
+            yield byte_offset, char_offset, text
+            char_offset += len(text)
+            byte_offset = end
+
+    def _char_start(self, offset: int) -> int:
+        """Move ``offset`` back to the first byte of the character containing it."""
+        while 0 < offset < self.size and self._data[offset] & 0xC0 == 0x80:
+            offset -= 1
+        return offset
+
+    def _decode(self, start: int, end: int) -> str:
+        """Decode from the character containing ``start`` to the last one ending by ``end``."""
+        return self._data[self._char_start(start):self._char_start(end)].decode("utf-8", errors="replace")
+
+
+__all__ = [
+    "SCAN_CHUNK_BYTES",
+    "TRANSCRIPT_PREVIEW_CHARS",
+    "TranscriptFile",
+]
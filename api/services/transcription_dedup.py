@@ -0,0 +1,386 @@
+"""Content-addressed upload storage and transcription result reuse.
+
+Users frequently submit the same recording more than once.  Every upload is
+hashed while it streams to disk, so the hash is used twice:
+
+* :class:`ContentAddressedStore` keeps a single copy of each distinct audio
+  payload under ``storage.upload_dir / ".content"``.  Per-job upload paths are
+  hard links to that blob, so deleting a job's upload never affects another
+  job and identical uploads occupy disk space once.
+* :class:`TranscriptionResultCache` maps ``(audio hash, model, language,
+  options)`` to a finished transcript in ``storage.cache_dir``.  A duplicate
+  submission is completed by linking the cached transcript instead of running
+  Whisper again.
+
+Both stores live on the filesystem and publish entries with atomic renames,
+so the API and any number of Celery workers can share them without locking.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from prometheus_client import Counter  # type: ignore
+
+from api.paths import storage
+from api.services.transcript_segments import copy_segments
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("transcription_dedup")
+
+CONTENT_DIRNAME = ".content"
+RESULTS_DIRNAME = "transcription_results"
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+UPLOAD_DEDUP_EVENTS = Counter(
+    "upload_dedup_events_total",
+    "Uploads stored in the content-addressed store by outcome (unique, duplicate)",
+    ["result"],
+)
+RESULT_CACHE_EVENTS = Counter(
+    "transcription_result_cache_events_total",
+    "Transcription result cache events by type (hit, miss, store, purge)",
+    ["event"],
+)
+
+
+def hash_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Return the hex SHA-256 of ``path`` without loading it into memory."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """Atomically point ``destination`` at ``source``'s content.
+
+    A hard link is preferred; filesystems without link support fall back to a
+    copy.  The new entry is staged beside ``destination`` and renamed into
+    place so readers never observe a partial file.
+    """
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    staging = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(source, staging)
+        except OSError:
+            shutil.copyfile(source, staging)
+        os.replace(staging, destination)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            staging.unlink()
+        raise
+
+
+def _valid_digest(value: str) -> bool:
+    return len(value) == 64 and all(ch in "0123456789abcdef" for ch in value)
+
+
+class ContentAddressedStore:
+    """Single-instance storage for uploaded audio keyed by SHA-256."""
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self._root = Path(root) if root is not None else None
+
+    @property
+    def root(self) -> Path:
+        # Resolved lazily so test fixtures can redirect ``storage.upload_dir``.
+        return self._root or Path(storage.upload_dir) / CONTENT_DIRNAME
+
+    def blob_path(self, sha256: str) -> Path:
+        if not _valid_digest(sha256):
+            raise ValueError(f"Invalid SHA-256 digest: {sha256!r}")
+        return self.root / sha256[:2] / sha256
+
+    def contains(self, sha256: str) -> bool:
+        return self.blob_path(sha256).exists()
+
+    def adopt(self, path: Path, sha256: str) -> bool:
+        """Register the upload at ``path`` under ``sha256``.
+
+        The first upload of a payload becomes the stored blob.  Later uploads
+        of the same payload are replaced by a hard link to that blob, freeing
+        their own copy.  Returns True when the payload was already stored.
+        """
+
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, blob)
+        except FileExistsError:
+            try:
+                _link_or_copy(blob, path)
+            except OSError as exc:
+                logger.warning(f"Unable to deduplicate upload {path.name}: {exc}")
+            UPLOAD_DEDUP_EVENTS.labels(result="duplicate").inc()
+            return True
+        except OSError as exc:
+            # No hard-link support: keep the upload as-is, it simply is not shared.
+            logger.debug(f"Content store unavailable for {path.name}: {exc}")
+        UPLOAD_DEDUP_EVENTS.labels(result="unique").inc()
+        return False
+
+    def _blobs(self) -> Iterator[Path]:
+        if not self.root.exists():
+            return
+        for shard in self.root.iterdir():
+            if shard.is_dir():
+                yield from (blob for blob in shard.iterdir() if blob.is_file())
+
+    def purge_unreferenced(self) -> int:
+        """Delete blobs that no job upload links to any more."""
+
+        removed = 0
+        for blob in self._blobs():
+            with suppress(FileNotFoundError):
+                if blob.stat().st_nlink <= 1:
+                    blob.unlink()
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        blobs = 0
+        stored_bytes = 0
+        referenced_bytes = 0
+        for blob in self._blobs():
+            with suppress(FileNotFoundError):
+                info = blob.stat()
+                blobs += 1
+                stored_bytes += info.st_size
+                referenced_bytes += info.st_size * max(info.st_nlink - 1, 0)
+        return {
+            "blobs": blobs,
+            "stored_bytes": stored_bytes,
+            "bytes_saved": max(referenced_bytes - stored_bytes, 0),
+        }
+
+
+@dataclass(frozen=True)
+class CachedTranscription:
+    """A reusable transcript for a given audio payload and decode settings."""
+
+    key: str
+    audio_sha256: str
+    model: str
+    language: Optional[str]
+    options: Dict[str, Any]
+    source_job_id: str
+    created_at: float
+    transcript_path: Path
+
+
+def result_cache_key(
+    audio_sha256: str,
+    model: str,
+    language: Optional[str] = None,
+    options: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """Derive the cache key for a transcription request."""
+
+    payload = json.dumps(
+        {
+            "audio": audio_sha256,
+            "model": model,
+            "language": (language or "").lower() or None,
+            "options": dict(options or {}),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptionResultCache:
+    """Filesystem cache of finished transcripts keyed by audio and settings."""
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self._root = Path(root) if root is not None else None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "purged": 0}
+
+    @property
+    def root(self) -> Path:
+        return self._root or Path(storage.cache_dir) / RESULTS_DIRNAME
+
+    def _entry_paths(self, key: str) -> tuple[Path, Path]:
+        shard = self.root / key[:2]
+        return shard / f"{key}.json", shard / f"{key}.txt"
+
+    def _count(self, stat: str, event: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[stat] += amount
+        RESULT_CACHE_EVENTS.labels(event=event).inc(amount)
+
+    def _load(self, meta_path: Path, transcript_path: Path) -> Optional[CachedTranscription]:
+        try:
+            data = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not transcript_path.exists():
+            return None
+        return CachedTranscription(
+            key=data["key"],
+            audio_sha256=data["audio_sha256"],
+            model=data["model"],
+            language=data.get("language"),
+            options=data.get("options") or {},
+            source_job_id=data["source_job_id"],
+            created_at=data["created_at"],
+            transcript_path=transcript_path,
+        )
+
+    def get(
+        self,
+        audio_sha256: str,
+        model: str,
+        language: Optional[str] = None,
+        options: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[CachedTranscription]:
+        """Return the cached transcript for this request, recording a hit or miss."""
+
+        entry = self.peek(audio_sha256, model, language, options)
+        if entry is None:
+            self._count("misses", "miss")
+        else:
+            self._count("hits", "hit")
+        return entry
+
+    def peek(
+        self,
+        audio_sha256: str,
+        model: str,
+        language: Optional[str] = None,
+        options: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[CachedTranscription]:
+        """Like :meth:`get`, but for a lookup whose outcome was already counted."""
+
+        key = result_cache_key(audio_sha256, model, language, options)
+        return self._load(*self._entry_paths(key))
+
+    def put(
+        self,
+        audio_sha256: str,
+        model: str,
+        language: Optional[str],
+        options: Optional[Mapping[str, Any]],
+        transcript_path: Path,
+        job_id: str,
+    ) -> CachedTranscription:
+        """Publish ``transcript_path`` as the result for this request."""
+
+        key = result_cache_key(audio_sha256, model, language, options)
+        meta_path, cached_transcript = self._entry_paths(key)
+        _link_or_copy(Path(transcript_path), cached_transcript)
+
+        entry = CachedTranscription(
+            key=key,
+            audio_sha256=audio_sha256,
+            model=model,
+            language=language,
+            options=dict(options or {}),
+            source_job_id=job_id,
+            created_at=time.time(),
+            transcript_path=cached_transcript,
+        )
+        metadata = {**asdict(entry), "transcript_path": cached_transcript.name}
+        staging = meta_path.with_name(f".{meta_path.name}.{uuid.uuid4().hex}.tmp")
+        staging.write_text(json.dumps(metadata), encoding="utf-8")
+        os.replace(staging, meta_path)
+
+        self._count("stores", "store")
+        return entry
+
+    def link_transcript(self, entry: CachedTranscription, destination: Path) -> Path:
+        """Materialize ``entry``'s transcript (and its segment sidecar) at ``destination``."""
+
+        _link_or_copy(entry.transcript_path, destination)
+        try:
+            copy_segments(storage.get_transcript_dir(entry.source_job_id), destination.parent)
+        except OSError as exc:
+            # Timings are optional; the transcript itself is already in place.
+            logger.warning(f"Could not reuse segments from job {entry.source_job_id}: {exc}")
+        return destination
+
+    def _entries(self) -> Iterator[CachedTranscription]:
+        if not self.root.exists():
+            return
+        for meta_path in self.root.glob("*/*.json"):
+            entry = self._load(meta_path, meta_path.with_suffix(".txt"))
+            if entry is not None:
+                yield entry
+
+    def purge(
+        self,
+        audio_sha256: Optional[str] = None,
+        model: Optional[str] = None,
+        older_than_seconds: Optional[float] = None,
+    ) -> int:
+        """Remove entries matching every given criterion (all entries by default)."""
+
+        cutoff = time.time() - older_than_seconds if older_than_seconds is not None else None
+        removed = 0
+        for entry in list(self._entries()):
+            if audio_sha256 is not None and entry.audio_sha256 != audio_sha256:
+                continue
+            if model is not None and entry.model != model:
+                continue
+            if cutoff is not None and entry.created_at >= cutoff:
+                continue
+            meta_path, transcript_path = self._entry_paths(entry.key)
+            for path in (meta_path, transcript_path):
+                with suppress(FileNotFoundError):
+                    path.unlink()
+            removed += 1
+
+        if removed:
+            self._count("purged", "purge", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        size_bytes = 0
+        for entry in self._entries():
+            entries += 1
+            with suppress(FileNotFoundError):
+                size_bytes += entry.transcript_path.stat().st_size
+
+        with self._lock:
+            counters = dict(self._stats)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": (counters["hits"] / lookups) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size_bytes,
+        }
+
+
+# Global instances shared by the API routes and Celery workers
+content_store = ContentAddressedStore()
+result_cache = TranscriptionResultCache()
+
+
+__all__ = [
+    "CachedTranscription",
+    "ContentAddressedStore",
+    "TranscriptionResultCache",
+    "content_store",
+    "hash_file",
+    "result_cache",
+    "result_cache_key",
+]
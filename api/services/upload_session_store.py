@@ -0,0 +1,340 @@
+"""
+Pluggable session storage for chunked uploads.
+
+Session metadata (owner, sizes, status) changes only on state transitions,
+while received-chunk acknowledgements happen once per chunk.  The stores keep
+the two apart: metadata is a small JSON document rewritten on transitions, and
+received chunks live in a bitmap where an acknowledgement is a single bit set.
+
+* :class:`RedisUploadSessionStore` keeps both in Redis (``SETBIT``/``BITCOUNT``)
+  so any API replica can accept any chunk of any session.  Chunk data is
+  still written to ``<sessions_dir>/<id>/upload.part``, so this requires the
+  replicas to share the upload volume; :func:`create_upload_session_store`
+  checks that with a probe file and keeps sessions local if it is not shared.
+* :class:`FileUploadSessionStore` keeps ``metadata.json`` plus a one byte per
+  chunk ``chunks.bitmap`` in the session directory.  It is used when Redis is
+  disabled (``UPLOAD_SESSION_STORE=file``) or unreachable.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from api.utils.logger import get_system_logger
+
+logger = get_system_logger("upload_session_store")
+
+# Keep Redis keys around a little longer than the session itself so expired
+# sessions still report their final status.
+SESSION_KEY_GRACE = timedelta(hours=1)
+
+# Token file proving that replicas sharing Redis also share the sessions directory
+SHARED_STORAGE_PROBE = ".shared-storage-probe"
+SHARED_STORAGE_KEY = "upload_session:storage_probe"
+
+
+class UploadSessionStore(ABC):
+    """Storage backend for chunked upload session state."""
+
+    backend = "unknown"
+
+    @abstractmethod
+    async def save(self, session_id: str, metadata: Dict[str, Any], expires_at: datetime):
+        """Persist session metadata (excluding received chunks)."""
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return session metadata, or None when the session is unknown."""
+
+    @abstractmethod
+    async def mark_chunk(self, session_id: str, chunk_number: int) -> bool:
+        """Record a received chunk; returns False if it was already recorded."""
+
+    @abstractmethod
+    async def has_chunk(self, session_id: str, chunk_number: int) -> bool:
+        """Whether ``chunk_number`` has been received."""
+
+    @abstractmethod
+    async def count_chunks(self, session_id: str) -> int:
+        """Number of received chunks."""
+
+    @abstractmethod
+    async def received_chunks(self, session_id: str, total_chunks: int) -> Set[int]:
+        """All received chunk numbers."""
+
+    async def missing_chunks(
+        self,
+        session_id: str,
+        total_chunks: int,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """Chunk numbers not yet received, in ascending order."""
+        received = await self.received_chunks(session_id, total_chunks)
+        missing = [n for n in range(total_chunks) if n not in received]
+        return missing[:limit] if limit is not None else missing
+
+    @abstractmethod
+    async def delete(self, session_id: str):
+        """Remove all state for a session."""
+
+    async def close(self):
+        """Release backend resources."""
+
+
+class FileUploadSessionStore(UploadSessionStore):
+    """Session state kept beside the upload data in the session directory."""
+
+    backend = "file"
+
+    def __init__(self, sessions_dir: Path):
+        self.sessions_dir = Path(sessions_dir)
+
+    def _metadata_path(self, session_id: str) -> Path:
+        return self.sessions_dir / session_id / "metadata.json"
+
+    def _bitmap_path(self, session_id: str) -> Path:
+        return self.sessions_dir / session_id / "chunks.bitmap"
+
+    def _write_metadata(self, session_id: str, metadata: Dict[str, Any]):
+        path = self._metadata_path(session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_suffix(".json.tmp")
+        staging.write_text(json.dumps(metadata, separators=(",", ":")), encoding="utf-8")
+        os.replace(staging, path)
+
+    def _read_metadata(self, session_id: str) -> Optional[Dict[str, Any]]:
+        path = self._metadata_path(session_id)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+        # Sessions written before the bitmap existed listed their chunks inline.
+        legacy_chunks = data.pop("uploaded_chunks", None)
+        if legacy_chunks and not self._bitmap_path(session_id).exists():
+            for chunk_number in legacy_chunks:
+                self._set_bit(session_id, chunk_number)
+        return data
+
+    def _set_bit(self, session_id: str, chunk_number: int) -> bool:
+        path = self._bitmap_path(session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            previous = os.pread(fd, 1, chunk_number)
+            if previous == b"\x01":
+                return False
+            os.pwrite(fd, b"\x01", chunk_number)
+            return True
+        finally:
+            os.close(fd)
+
+    def _read_bitmap(self, session_id: str) -> bytes:
+        try:
+            return self._bitmap_path(session_id).read_bytes()
+        except FileNotFoundError:
+            return b""
+
+    def _get_bit(self, session_id: str, chunk_number: int) -> bool:
+        try:
+            fd = os.open(self._bitmap_path(session_id), os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            return os.pread(fd, 1, chunk_number) == b"\x01"
+        finally:
+            os.close(fd)
+
+    def _delete(self, session_id: str):
+        for path in (self._metadata_path(session_id), self._bitmap_path(session_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    async def save(self, session_id: str, metadata: Dict[str, Any], expires_at: datetime):
+        await asyncio.to_thread(self._write_metadata, session_id, metadata)
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read_metadata, session_id)
+
+    async def mark_chunk(self, session_id: str, chunk_number: int) -> bool:
+        return await asyncio.to_thread(self._set_bit, session_id, chunk_number)
+
+    async def has_chunk(self, session_id: str, chunk_number: int) -> bool:
+        return await asyncio.to_thread(self._get_bit, session_id, chunk_number)
+
+    async def count_chunks(self, session_id: str) -> int:
+        return (await asyncio.to_thread(self._read_bitmap, session_id)).count(1)
+
+    async def received_chunks(self, session_id: str, total_chunks: int) -> Set[int]:
+        bitmap = await asyncio.to_thread(self._read_bitmap, session_id)
+        return {n for n, flag in enumerate(bitmap[:total_chunks]) if flag}
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, session_id)
+
+
+class RedisUploadSessionStore(UploadSessionStore):
+    """Session state shared across API replicas through Redis."""
+
+    backend = "redis"
+
+    def __init__(self, client, bitmap_client, key_prefix: str = "upload_session:"):
+        # Chunk bitmaps are binary, so they are read through a client that
+        # returns raw bytes (``decode_responses=False``)
+        self.client = client
+        self.bitmap_client = bitmap_client
+        self.key_prefix = key_prefix
+
+    def _metadata_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _bitmap_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:chunks"
+
+    @staticmethod
+    def _ttl_seconds(expires_at: datetime) -> int:
+        remaining = expires_at + SESSION_KEY_GRACE - datetime.utcnow()
+        return max(int(remaining.total_seconds()), 1)
+
+    async def save(self, session_id: str, metadata: Dict[str, Any], expires_at: datetime):
+        ttl = self._ttl_seconds(expires_at)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._metadata_key(session_id), json.dumps(metadata, separators=(",", ":")), ex=ttl)
+            pipe.expire(self._bitmap_key(session_id), ttl)
+            await pipe.execute()
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self._metadata_key(session_id))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def mark_chunk(self, session_id: str, chunk_number: int) -> bool:
+        metadata_key = self._metadata_key(session_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.setbit(self._bitmap_key(session_id), chunk_number, 1)
+            pipe.ttl(metadata_key)
+            previous, ttl = await pipe.execute()
+        if ttl and ttl > 0:
+            # Keep the bitmap alive exactly as long as its session metadata.
+            await self.client.expire(self._bitmap_key(session_id), ttl)
+        return not previous
+
+    async def has_chunk(self, session_id: str, chunk_number: int) -> bool:
+        return bool(await self.client.getbit(self._bitmap_key(session_id), chunk_number))
+
+    async def count_chunks(self, session_id: str) -> int:
+        return int(await self.client.bitcount(self._bitmap_key(session_id)))
+
+    async def _chunk_flags(self, session_id: str, total_chunks: int) -> str:
+        """The chunk bitmap as ``total_chunks`` '0'/'1' flags, chunk 0 first."""
+        raw = await self.bitmap_client.get(self._bitmap_key(session_id)) or b""
+        # Redis numbers bitmap bits from the most significant bit of each byte
+        flags = format(int.from_bytes(raw, "big"), f"0{len(raw) * 8}b") if raw else ""
+        return flags[:total_chunks].ljust(total_chunks, "0")
+
+    async def received_chunks(self, session_id: str, total_chunks: int) -> Set[int]:
+        flags = await self._chunk_flags(session_id, total_chunks)
+        return {number for number, flag in enumerate(flags) if flag == "1"}
+
+    async def missing_chunks(
+        self,
+        session_id: str,
+        total_chunks: int,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        flags = await self._chunk_flags(session_id, total_chunks)
+        missing = (number for number, flag in enumerate(flags) if flag == "0")
+        return list(islice(missing, limit))
+
+    async def delete(self, session_id: str):
+        await self.client.delete(self._metadata_key(session_id), self._bitmap_key(session_id))
+
+    async def close(self):
+        await self.client.close()
+        await self.bitmap_client.close()
+
+
+def _write_probe(path: Path, token: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(path.name + ".tmp")
+    staging.write_text(token, encoding="utf-8")
+    os.replace(staging, path)
+
+
+def _read_probe(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+
+
+async def shares_sessions_dir(client, sessions_dir: Path, attempts: int = 5, delay: float = 0.2) -> bool:
+    """Whether ``sessions_dir`` is the directory other replicas on this Redis use.
+
+    The first replica stores a random token both in Redis and in a probe file
+    in ``sessions_dir``; the others must read the same token from their own
+    directory.  A few retries cover replicas starting at the same moment.
+    """
+    probe = Path(sessions_dir) / SHARED_STORAGE_PROBE
+    token = uuid.uuid4().hex
+    if await client.set(SHARED_STORAGE_KEY, token, nx=True):
+        await asyncio.to_thread(_write_probe, probe, token)
+        return True
+
+    for attempt in range(attempts):
+        expected = await client.get(SHARED_STORAGE_KEY)
+        if expected is not None and await asyncio.to_thread(_read_probe, probe) == expected:
+            return True
+        if attempt + 1 < attempts:
+            await asyncio.sleep(delay)
+    return False
+
+
+async def create_upload_session_store(sessions_dir: Path) -> UploadSessionStore:
+    """Build the configured session store, falling back to files if Redis is unavailable.
+
+    The Redis store is only used when ``sessions_dir`` is shared with the
+    other replicas (see :func:`shares_sessions_dir`); otherwise a chunk
+    accepted by another replica would land in a part file this one never sees.
+    """
+    backend = os.getenv("UPLOAD_SESSION_STORE", "redis").strip().lower()
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+
+            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+            client = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
+            await client.ping()
+            if await shares_sessions_dir(client, sessions_dir):
+                logger.info("Upload sessions stored in Redis")
+                return RedisUploadSessionStore(client, redis.from_url(redis_url, decode_responses=False))
+            logger.error(
+                f"Upload directory {sessions_dir} is not shared with the other replicas using this "
+                "Redis; keeping upload sessions on this replica (route each upload to one replica "
+                "or mount a shared upload volume)"
+            )
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Redis unavailable for upload sessions, using file store: {e}")
+    elif backend != "file":
+        logger.warning(f"Unknown UPLOAD_SESSION_STORE={backend!r}, using file store")
+
+    return FileUploadSessionStore(sessions_dir)
+
+
+__all__ = [
+    "FileUploadSessionStore",
+    "RedisUploadSessionStore",
+    "UploadSessionStore",
+    "create_upload_session_store",
+    "shares_sessions_dir",
+]
@@ -12,6 +12,7 @@ from sqlalchemy import event
 
 from api.models import Job, JobStatusEnum
 from api.services.enhanced_websocket_service import get_websocket_service
+from api.services.job_events import job_etag, job_event_broker
 from api.utils.logger import get_system_logger
 
 logger = get_system_logger("websocket_job_integration")
@@ -36,15 +37,12 @@ class WebSocketJobNotifier:
     async def notify_job_status_change(self, job: Job, previous_status: Optional[str] = None,
                                      progress: Optional[int] = None, message: str = ""):
         """Send WebSocket notification for job status change."""
-        if not self._initialized or not self.websocket_service:
-            return
-        
         try:
             # Prepare notification data
             notification_data = {
                 "job_id": job.id,
                 "status": job.status.value,
-                "progress": progress or job.progress or 0,
+                "progress": progress or getattr(job, "progress", None) or 0,
                 "message": message or f"Job status changed to {job.status.value}",
                 "previous_status": previous_status,
                 "updated_at": job.updated_at.isoformat() if job.updated_at else datetime.utcnow().isoformat(),
@@ -54,12 +52,12 @@ class WebSocketJobNotifier:
             # Add status-specific information
             if job.status == JobStatusEnum.COMPLETED:
                 notification_data.update({
-                    "download_url": f"/api/jobs/{job.id}/download" if job.transcript_file_path else None,
+                    "download_url": f"/api/jobs/{job.id}/download" if job.transcript_path else None,
                     "completion_time": job.finished_at.isoformat() if job.finished_at else None
                 })
             elif job.status == JobStatusEnum.FAILED:
                 notification_data.update({
-                    "error_message": job.error_message or "Job failed",
+                    "error_message": getattr(job, "error_message", None) or "Job failed",
                     "failure_time": job.finished_at.isoformat() if job.finished_at else None
                 })
             elif job.status == JobStatusEnum.PROCESSING:
@@ -68,6 +66,11 @@ class WebSocketJobNotifier:
                     "estimated_completion": None  # Could add estimation logic
                 })
             
+            # Event stream subscribers are served even without the WebSocket service
+            await job_event_broker.publish(dict(notification_data, etag=job_etag(job)))
+            if not self._initialized or not self.websocket_service:
+                return
+            
             # Send job-specific notification
             await self.websocket_service.send_job_update(
                 job_id=job.id,
@@ -98,9 +101,6 @@ class WebSocketJobNotifier:
         user_id: Optional[str] = None,
     ):
         """Send WebSocket notification for job progress update."""
-        if not self._initialized or not self.websocket_service:
-            return
-        
         try:
             progress_data = {
                 "job_id": job_id,
@@ -110,6 +110,10 @@ class WebSocketJobNotifier:
                 "user_id": user_id
             }
             
+            await job_event_broker.publish(dict(progress_data, status="processing"))
+            if not self._initialized or not self.websocket_service:
+                return
+            
             # Send progress update
             await self.websocket_service.send_job_update(
                 job_id=job_id,
@@ -131,9 +135,6 @@ class WebSocketJobNotifier:
         user_id: Optional[str] = None,
     ):
         """Send WebSocket notification for job error."""
-        if not self._initialized or not self.websocket_service:
-            return
-        
         try:
             error_data = {
                 "job_id": job_id,
@@ -142,6 +143,10 @@ class WebSocketJobNotifier:
                 "user_id": user_id
             }
             
+            await job_event_broker.publish(dict(error_data, status="failed"))
+            if not self._initialized or not self.websocket_service:
+                return
+            
             # Send error notification
             await self.websocket_service.send_job_update(
                 job_id=job_id,
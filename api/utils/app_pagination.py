@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session, Query
 from sqlalchemy import desc, asc, func, and_, or_
 import base64
 import json
+import time
 
 from api.schemas_app import BaseSchema, ValidationConfig, sanitize_string
 
@@ -169,6 +170,90 @@ class CursorGenerator:
             raise ValueError("Invalid cursor format")
 
 
+def decode_cursor_value(value: Optional[str], column: Any) -> Any:
+    """Convert a cursor's string sort value back to ``column``'s Python type.
+
+    Cursors store ``str(value)``; comparing a datetime column against that
+    string only works by accident on some backends.
+    """
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type in (int, float):
+        return python_type(value)
+    return value
+
+
+def apply_keyset_filter(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    cursor_data: Dict[str, Any],
+    sort_order: str
+) -> Query:
+    """Restrict ``query`` to rows after the cursor position in (sort, id) order."""
+    cursor_value = decode_cursor_value(cursor_data.get('sort_value'), sort_column)
+    cursor_id = cursor_data['id']
+    
+    if sort_order == 'desc':
+        if cursor_value is None:
+            return query.filter(id_column < cursor_id)
+        return query.filter(
+            or_(
+                sort_column < cursor_value,
+                and_(sort_column == cursor_value, id_column < cursor_id)
+            )
+        )
+    
+    if cursor_value is None:
+        return query.filter(id_column > cursor_id)
+    return query.filter(
+        or_(
+            sort_column > cursor_value,
+            and_(sort_column == cursor_value, id_column > cursor_id)
+        )
+    )
+
+
+class CachedCounter:
+    """Short-lived cache for expensive ``COUNT(*)`` totals keyed by scope.
+    
+    Totals may lag by up to ``ttl_seconds`` for changes made on other
+    replicas; callers invalidate a scope when they change it locally.
+    """
+    
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Any] = {}
+    
+    def get_or_count(self, scope: str, count_fn) -> int:
+        """Return the cached total for ``scope``, calling ``count_fn`` on a miss."""
+        now = time.monotonic()
+        entry = self._entries.get(scope)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        
+        total = count_fn()
+        if len(self._entries) >= self.max_entries:
+            self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[scope] = (total, now + self.ttl_seconds)
+        return total
+    
+    def invalidate(self, scope: str) -> None:
+        self._entries.pop(scope, None)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
 class JobPaginator:
     """Pagination handler for Job queries."""
     
@@ -204,30 +289,9 @@ class JobPaginator:
         # Apply cursor filtering if provided
         if pagination.cursor:
             cursor_data = CursorGenerator.parse_cursor(pagination.cursor)
-            cursor_value = cursor_data.get('sort_value')
-            cursor_id = cursor_data['id']
-            
-            # Apply cursor filter based on sort order
-            if pagination.sort_order == 'desc':
-                if cursor_value is not None:
-                    base_query = base_query.filter(
-                        or_(
-                            sort_column < cursor_value,
-                            and_(sort_column == cursor_value, Job.id < cursor_id)
-                        )
-                    )
-                else:
-                    base_query = base_query.filter(Job.id < cursor_id)
-            else:
-                if cursor_value is not None:
-                    base_query = base_query.filter(
-                        or_(
-                            sort_column > cursor_value,
-                            and_(sort_column == cursor_value, Job.id > cursor_id)
-                        )
-                    )
-                else:
-                    base_query = base_query.filter(Job.id > cursor_id)
+            base_query = apply_keyset_filter(
+                base_query, sort_column, Job.id, cursor_data, pagination.sort_order
+            )
         
         # Get total count if requested (expensive operation)
         total_count = None
@@ -0,0 +1,107 @@
+"""Helpers for streaming uploaded files to disk with bounded memory.
+
+``UploadFile.read()`` without a size materializes the entire upload in memory
+and a plain ``open().write()`` inside an async handler blocks the event loop.
+:func:`stream_upload_to_path` instead copies the upload in fixed-size chunks,
+performs every file write (and the SHA-256 update for that chunk) in a worker
+thread, and aborts as soon as the running total exceeds the configured limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+UPLOAD_STREAM_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the permitted size while streaming."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+@dataclass(frozen=True)
+class StreamedUpload:
+    """Result of streaming an upload to disk."""
+
+    path: Path
+    size: int
+    sha256: str
+
+
+def _write_and_hash(handle: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    # hashlib releases the GIL for large buffers, so both steps run off-loop.
+    handle.write(chunk)
+    digest.update(chunk)
+
+
+async def stream_upload_to_path(
+    upload: UploadFile,
+    destination: Path,
+    *,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = UPLOAD_STREAM_CHUNK_SIZE,
+) -> StreamedUpload:
+    """Copy ``upload`` to ``destination`` in ``chunk_size`` pieces.
+
+    Args:
+        upload: The incoming multipart file.
+        destination: Target path; parent directories are created as needed.
+        max_bytes: Optional size limit enforced incrementally.
+        chunk_size: Number of bytes read per iteration.
+
+    Returns:
+        The written path, its size, and the hex SHA-256 of the content.
+
+    Raises:
+        UploadTooLargeError: When the upload exceeds ``max_bytes``. The partial
+            file is removed before the error propagates.
+    """
+
+    # Starlette records the spooled size; reject obviously oversized uploads
+    # before touching the destination at all.
+    declared_size = getattr(upload, "size", None)
+    if max_bytes is not None and declared_size is not None and declared_size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    written = 0
+
+    handle = await asyncio.to_thread(open, destination, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if max_bytes is not None and written > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            await asyncio.to_thread(_write_and_hash, handle, digest, chunk)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        with suppress(FileNotFoundError):
+            await asyncio.to_thread(os.remove, destination)
+        raise
+    else:
+        await asyncio.to_thread(handle.close)
+
+    return StreamedUpload(path=destination, size=written, sha256=digest.hexdigest())
+
+
+__all__ = [
+    "StreamedUpload",
+    "UPLOAD_STREAM_CHUNK_SIZE",
+    "UploadTooLargeError",
+    "stream_upload_to_path",
+]
@@ -0,0 +1,100 @@
+"""Micro-benchmark for collaborative transcript editing.
+
+Applies a stream of keystroke-sized inserts and deletes at random positions to
+a large transcript and reports operations per second for the rope-backed
+``DocumentState`` and for rebuilding the string on every operation
+(``OperationalTransform.apply_operation``), along with the operation history
+retained at the end.
+
+    python perf/bench_collaborative_editing.py --kilobytes 500 --operations 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+from api.services.operational_transform import (  # noqa: E402
+    DocumentState,
+    OperationalTransform,
+    OperationType,
+    TextOperation,
+)
+
+
+def _transcript(kilobytes: int, rng: random.Random) -> str:
+    words = ["the", "meeting", "transcript", "speaker", "said", "that", "we", "should", "ship", "it"]
+    parts, size = [], 0
+    while size < kilobytes * 1024:
+        word = rng.choice(words)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)
+
+
+def _operations(length: int, count: int, rng: random.Random):
+    operations = []
+    for _ in range(count):
+        position = rng.randint(0, length)
+        if rng.random() < 0.7:
+            operations.append(TextOperation(type=OperationType.INSERT, position=position, content=rng.choice("abcde ")))
+            length += 1
+        else:
+            operations.append(TextOperation(type=OperationType.DELETE, position=position, length=1))
+            length -= 1 if position < length else 0
+    return operations
+
+
+def bench_document(text: str, operations) -> dict:
+    document = DocumentState(text, "bench")
+    started = time.perf_counter()
+    for operation in operations:
+        document.apply_operation(operation, user_id=1)
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_second": round(len(operations) / elapsed),
+        "retained_operations": len(document.operation_history),
+        "content": document.content,
+    }
+
+
+def bench_string(text: str, operations) -> dict:
+    started = time.perf_counter()
+    for operation in operations:
+        text = OperationalTransform.apply_operation(text, operation)
+    elapsed = time.perf_counter() - started
+    return {"ops_per_second": round(len(operations) / elapsed), "content": text}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kilobytes", type=int, default=500, help="Transcript size")
+    parser.add_argument("--operations", type=int, default=20000, help="Edits to apply")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    text = _transcript(args.kilobytes, rng)
+    operations = _operations(len(text), args.operations, rng)
+
+    rope = bench_document(text, operations)
+    string = bench_string(text, operations)
+    assert rope.pop("content") == string.pop("content"), "rope and string results diverged"
+
+    print(json.dumps({
+        "transcript_chars": len(text),
+        "operations": args.operations,
+        "rope": rope,
+        "string_rebuild": string,
+        "speedup": round(rope["ops_per_second"] / string["ops_per_second"], 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Micro-benchmark for the request pipeline against stacked middlewares.
+
+Serves ``/health`` and ``GET /jobs/{job_id}`` stubs through the production
+pipeline stages twice: once as the single ``RequestPipeline`` the API now
+uses, and once with a ``BaseHTTPMiddleware`` layer per stage as the old
+middleware stack had.  Both variants run the same stage work, so the
+difference is the per-layer task hop and response wrapping.  Requests go
+through httpx's in-process ASGI transport; no server or Redis is needed.
+
+``SecurityHardeningStage`` is left out: its per-client rate limiter rejects
+a closed-loop benchmark after a few hundred requests.
+
+    python perf/bench_middleware_pipeline.py --requests 5000 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from api.middlewares.access_log import AccessLogStage  # noqa: E402
+from api.middlewares.api_key_auth import APIKeyAuthenticationStage  # noqa: E402
+from api.middlewares.enhanced_cache import EnhancedApiCacheStage  # noqa: E402
+from api.middlewares.pipeline import CORSStage, RequestPipeline  # noqa: E402
+from api.security.middleware import SecurityAPIKeyStage  # noqa: E402
+
+PATHS = ("/health", "/jobs/3f2b9c1e")
+
+
+def _stages():
+    return [
+        AccessLogStage(),
+        CORSStage(allow_origins=["http://localhost:3000"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]),
+        EnhancedApiCacheStage(),
+        APIKeyAuthenticationStage(),
+        SecurityAPIKeyStage(),
+    ]
+
+
+def _passthrough(request, call_next):
+    return call_next(request)
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        return {"id": job_id, "status": "completed", "original_filename": "sample.wav", "model": "tiny"}
+
+    stages = _stages()
+    if variant == "stacked":
+        # One BaseHTTPMiddleware layer per stage, as the old stack had
+        for _ in stages:
+            app.add_middleware(BaseHTTPMiddleware, dispatch=_passthrough)
+    app.add_middleware(RequestPipeline, stages=stages)
+    return app
+
+
+async def run(variant: str, path: str, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=build_app(variant))
+    latencies = np.zeros(requests)
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Origin": "http://localhost:3000"}
+        for _ in range(50):
+            (await client.get(path, headers=headers)).raise_for_status()
+
+        async def worker() -> None:
+            for index in counter:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies[index] = time.perf_counter() - started
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "variant": variant,
+        "path": path,
+        "requests_per_second": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "max_ms": float(latencies.max() * 1000),
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    # Keep per-request access log lines out of the measurement
+    logging.disable(logging.INFO)
+    results = [
+        asyncio.run(run(variant, path, args.requests, args.concurrency))
+        for path in PATHS
+        for variant in ("stacked", "pipeline")
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
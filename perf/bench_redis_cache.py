@@ -0,0 +1,129 @@
+"""Micro-benchmark for the Redis response cache hot path.
+
+Counts Redis round-trips and measures latency for cache hits and stores in
+``RedisCacheService``.  Runs against fakeredis by default so it needs no
+server; pass ``--redis-url`` to measure a real instance.
+
+    python perf/bench_redis_cache.py --iterations 5000 --body-bytes 16384
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+from api.services.redis_cache import CacheConfiguration, RedisCacheService  # noqa: E402
+
+
+class RoundTripCounter:
+    """Count commands and pipeline flushes sent by a redis-py client."""
+
+    def __init__(self, client) -> None:
+        self.round_trips = 0
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def counted_command(*args, **kwargs):
+            self.round_trips += 1
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*exec_args, **exec_kwargs):
+                self.round_trips += 1
+                return await execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        client.execute_command = counted_command
+        client.pipeline = counted_pipeline
+
+
+def _request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def _make_clients(redis_url: str | None):
+    if redis_url:
+        import redis.asyncio as redis
+
+        return (
+            redis.from_url(redis_url, decode_responses=True),
+            redis.from_url(redis_url, decode_responses=False),
+        )
+
+    import fakeredis.aioredis as fredis
+
+    server = fredis.FakeServer()
+    return (
+        fredis.FakeRedis(server=server, decode_responses=True),
+        fredis.FakeRedis(server=server, decode_responses=False),
+    )
+
+
+async def run(iterations: int, body_bytes: int, redis_url: str | None) -> dict:
+    service = RedisCacheService(CacheConfiguration(log_cache_operations=False))
+    service.redis_pool, service.entry_pool = _make_clients(redis_url)
+    counter = RoundTripCounter(service.entry_pool)
+
+    rows = [{"id": f"job-{n}", "status": "completed", "filename": f"clip-{n}.wav"} for n in range(body_bytes // 60 + 1)]
+    content = json.dumps(rows)[:body_bytes]
+    request = _request("/jobs")
+    response = Response(content=content, media_type="application/json")
+    key = service._generate_cache_key(request)
+
+    try:
+        counter.round_trips = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await service.set(key, response, request, content)
+        set_seconds = time.perf_counter() - started
+        set_round_trips = counter.round_trips / iterations
+
+        counter.round_trips = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            assert await service.get(key) is not None
+        get_seconds = time.perf_counter() - started
+        get_round_trips = counter.round_trips / iterations
+
+        stored_bytes = len(await service.entry_pool.get(key))
+    finally:
+        await service.close()
+
+    return {
+        "iterations": iterations,
+        "body_bytes": len(content),
+        "stored_bytes": stored_bytes,
+        "round_trips_per_hit": get_round_trips,
+        "round_trips_per_set": set_round_trips,
+        "hit_us": get_seconds / iterations * 1e6,
+        "set_us": set_seconds / iterations * 1e6,
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--body-bytes", type=int, default=16 * 1024)
+    parser.add_argument("--redis-url", default=None, help="Benchmark a real Redis instead of fakeredis")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(asyncio.run(run(args.iterations, args.body_bytes, args.redis_url)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
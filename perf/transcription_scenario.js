@@ -9,6 +9,7 @@ const uploadEndpoint = `${baseUrl}/uploads`;
 const jobEndpoint = `${baseUrl}/jobs`;
 const pollInterval = Number(__ENV.POLL_INTERVAL || 1);
 const maxPolls = Number(__ENV.MAX_POLLS || 40);
+const longPollTimeout = Number(__ENV.LONG_POLL_TIMEOUT || 30);
 const selectedModel = __ENV.WHISPER_MODEL || 'tiny';
 const userIdHeader = __ENV.UPLOAD_USER_ID || 'perf-tester';
 const adminUsername = __ENV.ADMIN_USERNAME || 'admin';
@@ -213,25 +214,46 @@ function submitJob() {
   return finalizeUpload(sessionId);
 }
 
+function fetchCompletedJob(jobId) {
+  const res = http.get(`${jobEndpoint}/${jobId}`, { headers: buildHeaders() });
+  check(res, {
+    'transcript returned': (r) => r.json('transcript') && r.json('transcript').length > 0,
+  });
+}
+
 function pollJob(jobId) {
+  // Long-poll the events endpoint: each request waits server-side for the next
+  // state change instead of re-reading the job every POLL_INTERVAL seconds.
+  let etag = null;
   for (let attempt = 0; attempt < maxPolls; attempt += 1) {
-    const res = http.get(`${jobEndpoint}/${jobId}`, { headers: buildHeaders() });
+    const headers = etag ? buildHeaders({ 'If-None-Match': etag }) : buildHeaders();
+    const res = http.get(`${jobEndpoint}/${jobId}/events?timeout=${longPollTimeout}`, {
+      headers,
+      timeout: `${longPollTimeout + 10}s`,
+    });
+
+    if (res.status === 304) {
+      continue;
+    }
+
+    if (res.status !== 200) {
+      sleep(pollInterval);
+      continue;
+    }
+
+    etag = res.headers.Etag || res.headers.ETag || null;
     const status = res.json('status');
 
     if (status === 'COMPLETED' || status === 'completed') {
-      check(res, {
-        'transcript returned': (r) => r.json('transcript') && r.json('transcript').length > 0,
-      });
+      fetchCompletedJob(jobId);
       transcriptionSuccess.add(1);
       return true;
     }
 
-    if (status === 'FAILED' || status === 'failed') {
+    if (status && String(status).toLowerCase().startsWith('failed')) {
       transcriptionFailures.add(1);
       return false;
     }
-
-    sleep(pollInterval);
   }
 
   transcriptionFailures.add(1);
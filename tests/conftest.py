@@ -128,8 +128,8 @@ async def fakeredis_server() -> AsyncIterator[None]:
 
     fake_server = fredis.FakeServer()  # type: ignore[attr-defined]
 
-    def _create_client() -> fredis.FakeRedis:
-        client = fredis.FakeRedis(server=fake_server, decode_responses=True)
+    def _create_client(decode_responses: bool = True) -> fredis.FakeRedis:
+        client = fredis.FakeRedis(server=fake_server, decode_responses=decode_responses)
 
         async def _config_set(*args, **kwargs):  # type: ignore[override]
             return True
@@ -138,7 +138,7 @@ async def fakeredis_server() -> AsyncIterator[None]:
         return client
 
     patcher = pytest.MonkeyPatch()
-    patcher.setattr(redis_async, "from_url", lambda *args, **kwargs: _create_client())
+    patcher.setattr(redis_async, "from_url", lambda *args, **kwargs: _create_client(kwargs.get("decode_responses", True)))
     patcher.setattr(redis_async, "Redis", fredis.FakeRedis)
 
     yield
@@ -13,6 +13,7 @@ from api.models import Job, JobStatusEnum
 from api.orm_bootstrap import SessionLocal
 from api.paths import storage
 from api.services.app_worker import transcribe_audio
+from api.services.model_registry import model_registry
 
 
 def _disable_asyncio_background_tasks(monkeypatch) -> None:
@@ -76,6 +77,7 @@ def test_transcribe_audio_uses_fixture_model(tmp_path, monkeypatch) -> None:
     )
 
     bootstrap_model_assets()
+    model_registry.clear()
 
     result = transcribe_audio.run(job_id, audio_path=str(audio_path))
     assert result["status"] == "completed"
@@ -88,6 +90,33 @@ def test_transcribe_audio_uses_fixture_model(tmp_path, monkeypatch) -> None:
     assert load_calls == [("integration", str(storage.models_dir))]
     assert stub_model.transcribe_called_with == str(audio_path)
 
+    # A second job for the same model reuses the resident instance.
+    with SessionLocal() as session:
+        job = session.get(Job, job_id)
+        assert job is not None
+        job.status = JobStatusEnum.QUEUED
+        session.commit()
+
+    other_audio_path = tmp_path / "other.wav"
+    other_audio_path.write_bytes(b"different audio data")
+    transcribe_audio.run(job_id, audio_path=str(other_audio_path))
+    assert load_calls == [("integration", str(storage.models_dir))]
+    assert stub_model.transcribe_called_with == str(other_audio_path)
+    assert model_registry.contains("integration", "cpu")
+
+    # Re-submitting audio that was already transcribed reuses the cached result.
+    with SessionLocal() as session:
+        job = session.get(Job, job_id)
+        assert job is not None
+        job.status = JobStatusEnum.QUEUED
+        session.commit()
+
+    result = transcribe_audio.run(job_id, audio_path=str(audio_path))
+    assert result["status"] == "completed"
+    assert stub_model.transcribe_called_with == str(other_audio_path)
+    assert Path(result["transcript_path"]).read_text(encoding="utf-8") == "integration transcript"
+    model_registry.clear()
+
 
 def test_transcribe_audio_failure_records_log(tmp_path, monkeypatch) -> None:
     audio_path = tmp_path / "missing.wav"
@@ -28,10 +28,23 @@ except ImportError:  # pragma: no cover - compatibility guard
         "audio/flac": ".flac",
     }
 
+from api.services import chunked_upload_service as chunked_module
+from api.services import consolidated_upload_service as consolidated_module
 from api.services.consolidated_upload_service import ConsolidatedUploadService
 from api.settings import settings as app_settings
 
 
+@pytest.fixture
+def upload_root(tmp_path, monkeypatch) -> Path:
+    """Point new upload services at a private upload directory."""
+
+    root = (tmp_path / "uploads").resolve()
+    isolated = app_settings.model_copy(update={"upload_dir": root})
+    monkeypatch.setattr(consolidated_module, "settings", isolated)
+    monkeypatch.setattr(chunked_module, "settings", isolated)
+    return root
+
+
 def _dangerous_filename_strategy() -> st.SearchStrategy[str]:
     """Generate filenames with characters that often break sanitizers."""
 
@@ -76,6 +89,7 @@ def _payload_strategy() -> st.SearchStrategy[bytes]:
 def test_direct_upload_never_escapes_upload_root(
     event_loop,
     stub_job_queue,
+    upload_root: Path,
     filename: str,
     payload: bytes,
     mime: str,
@@ -111,7 +125,6 @@ def test_direct_upload_never_escapes_upload_root(
     assert stub_job_queue.submitted, "The fuzz run should enqueue a transcription job"
 
     saved_path = Path(stub_job_queue.submitted[-1]["kwargs"]["file_path"]).resolve()
-    upload_root = Path(app_settings.upload_dir).resolve()
 
     # The saved file must live directly beneath the configured upload directory.
     assert saved_path.parent == upload_root
@@ -155,7 +168,8 @@ def test_chunked_upload_stores_chunks_in_session_directory(
     """Ensure chunk assembly never writes outside the session sandbox."""
 
     service = ConsolidatedUploadService().chunked_service
-    file_size = service.chunk_size * max(chunk_number + 1, 1)
+    # Chunks are written at fixed offsets, so make the payload the final chunk.
+    file_size = service.chunk_size * chunk_number + len(payload)
 
     session_dir: Path | None = None
     try:
@@ -189,7 +203,7 @@ def test_chunked_upload_stores_chunks_in_session_directory(
             .resolve()
             .joinpath("sessions", session_id)
         )
-        chunk_path = session_dir / "chunks" / f"chunk_{chunk_number:06d}.tmp"
+        chunk_path = session_dir / "upload.part"
 
         assert chunk_path.exists()
         assert session_dir.is_dir()
@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis.asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api import orm_bootstrap
+from api.extended_models.api_keys import APIKey, APIKeyUsageLog
+from api.orm_bootstrap import Base
+from api.services import api_key_service as service_module
+from api.services.api_key_cache import APIKeyCache, VerifiedAPIKey, compile_ip_allow_list
+from api.services.api_key_service import api_key_service
+
+API_KEY = "wt_test-secret-value"
+
+
+@pytest.fixture()
+def session_factory(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[APIKey.__table__, APIKeyUsageLog.__table__])
+    factory = sessionmaker(bind=engine)
+    factory.statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        factory.statements.append(statement)
+
+    monkeypatch.setattr(orm_bootstrap, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture()
+def cache(monkeypatch):
+    cache = APIKeyCache(max_entries=10, ttl=60)
+    cache._sync_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(service_module, "api_key_cache", cache)
+    return cache
+
+
+def _add_key(factory, **overrides) -> APIKey:
+    values = dict(
+        key_id="key-1", key_hash=api_key_service.hash_api_key(API_KEY), key_prefix=API_KEY[:12],
+        name="ci", user_id="user-1", permissions=["read", "write"], status="active",
+    )
+    values.update(overrides)
+    db = factory()
+    key = APIKey(**values)
+    db.add(key)
+    db.commit()
+    db.refresh(key)
+    db.expunge(key)
+    db.close()
+    return key
+
+
+def test_verified_keys_are_served_without_queries(session_factory, cache):
+    _add_key(session_factory)
+
+    first = api_key_service.validate_api_key(None, API_KEY, "read", "10.0.0.1")
+    queries = len(session_factory.statements)
+    for _ in range(20):
+        again = api_key_service.validate_api_key(None, API_KEY, "read", "10.0.0.1")
+
+    assert first is not None and again is first
+    assert queries > 0
+    assert len(session_factory.statements) == queries
+    assert cache.hits == 20
+    assert api_key_service.validate_api_key(None, API_KEY, "admin", "10.0.0.1") is None
+
+
+def test_ip_allow_list_matches_cidr_ranges():
+    key = VerifiedAPIKey(
+        id=1, key_id="k", key_hash="h", user_id="u", permissions=frozenset(),
+        allowed_networks=compile_ip_allow_list(["10.0.0.0/8", "203.0.113.7", "2001:db8::/32", "bogus"]),
+    )
+
+    assert key.is_ip_allowed("10.20.30.40")
+    assert key.is_ip_allowed("203.0.113.7")
+    assert key.is_ip_allowed("::ffff:10.1.1.1")
+    assert key.is_ip_allowed("2001:db8::1")
+    assert not key.is_ip_allowed("203.0.113.8")
+    assert not key.is_ip_allowed("192.168.1.1")
+    assert not key.is_ip_allowed("unknown")
+
+
+def test_quota_counters_are_seeded_from_usage_and_reset_daily(session_factory, cache):
+    key = _add_key(session_factory, daily_quota=3)
+    db = session_factory()
+    for offset in range(2):
+        db.add(APIKeyUsageLog(
+            api_key_id=key.id, timestamp=datetime.utcnow() - timedelta(seconds=offset),
+            method="GET", endpoint="/api/jobs", status_code=200, client_ip="10.0.0.1",
+        ))
+    db.commit()
+    db.close()
+
+    verified = api_key_service.validate_api_key(None, API_KEY)
+    now = datetime.utcnow()
+    assert verified.consume_quota(now) == {"allowed": True}
+    refused = verified.consume_quota(now)
+    assert refused["allowed"] is False
+    assert refused["quota_type"] == "daily"
+    assert refused["used"] == 3
+
+    assert verified.consume_quota(now + timedelta(days=1)) == {"allowed": True}
+
+
+def test_revocation_drops_the_cached_key(session_factory, cache):
+    _add_key(session_factory)
+    assert api_key_service.validate_api_key(None, API_KEY) is not None
+
+    db = session_factory()
+    api_key_service.revoke_api_key(db, "user-1", "key-1", "leaked")
+    db.close()
+
+    assert api_key_service.validate_api_key(None, API_KEY) is None
+    assert cache.invalidations_published == 1
+
+
+def test_invalidations_reach_other_replicas(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.asyncio, "from_url",
+        lambda *args, **kwargs: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+    )
+    key = VerifiedAPIKey(id=1, key_id="k", key_hash="hash-1", user_id="u", permissions=frozenset())
+
+    async def scenario():
+        publisher, replica = APIKeyCache(), APIKeyCache()
+        publisher._sync_client = fakeredis.FakeRedis(server=server)
+        assert await replica.start()
+        try:
+            # The replica clears its cache on subscribing; wait for that first
+            for _ in range(100):
+                if publisher._sync_client.pubsub_numsub(replica.channel)[0][1]:
+                    break
+                await asyncio.sleep(0.01)
+            replica.put(key)
+            publisher.put(key)
+
+            publisher.invalidate("hash-1")
+            for _ in range(100):
+                if replica.get("hash-1") is None:
+                    break
+                await asyncio.sleep(0.01)
+            return publisher, replica
+        finally:
+            await replica.stop()
+
+    publisher, replica = asyncio.run(scenario())
+    assert publisher.get("hash-1") is None
+    assert replica.get("hash-1") is None
+    assert replica.invalidations_received == 1
@@ -0,0 +1,108 @@
+import asyncio
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+from api.services.audio_processing import AudioProcessingConfig, AudioProcessingPipeline
+from api.services.audio_streaming import (
+    OverlapAddSTFT,
+    SOSFilterStream,
+    StreamingAudioStats,
+)
+
+
+def _speech_like(seconds: float, sr: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    envelope = (np.sin(2 * np.pi * 0.3 * t) > 0) * 0.4 + 0.02
+    tone = np.sin(2 * np.pi * 220 * t) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t))
+    return (envelope * tone + 0.02 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _blocks(audio: np.ndarray, size: int):
+    return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+def test_overlap_add_identity_reconstructs_across_blocks():
+    audio = _speech_like(3.0, 16000)
+    stft = OverlapAddSTFT(lambda spectra: spectra, n_fft=2048, hop_length=512)
+
+    out = np.concatenate([stft.process(block) for block in _blocks(audio, 7001)] + [stft.flush()])
+
+    assert len(out) == len(audio)
+    np.testing.assert_allclose(out, audio, atol=1e-5)
+
+
+def test_sos_filter_state_carries_between_blocks():
+    audio = _speech_like(2.0, 16000)
+    sos = signal.butter(4, 80.0 / 8000, btype="high", output="sos")
+    stream = SOSFilterStream(sos)
+
+    out = np.concatenate([stream.process(block) for block in _blocks(audio, 3333)])
+    expected, _ = signal.sosfilt(sos, audio, zi=signal.sosfilt_zi(sos) * audio[0])
+
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+
+def test_streaming_stats_match_whole_signal_analysis():
+    sr = 16000
+    audio = _speech_like(20.0, sr)
+    pipeline = AudioProcessingPipeline(AudioProcessingConfig())
+    stats = StreamingAudioStats(sr)
+    for block in _blocks(audio, 12345):
+        stats.update(block)
+
+    assert stats.duration == len(audio) / sr
+    assert abs(stats.rms - float(np.sqrt(np.mean(audio ** 2)))) < 1e-5
+    assert stats.peak == float(np.max(np.abs(audio)))
+    assert abs(stats.snr_estimate() - pipeline._estimate_snr(audio, sr)) < 0.5
+
+
+def _process_with_peak_memory(tmp_path, seconds: float):
+    source = tmp_path / f"long-{seconds:.0f}.wav"
+    audio = _speech_like(seconds, 44100)
+    sf.write(source, np.stack([audio, audio * 0.5], axis=1), 44100)
+    del audio
+
+    config = AudioProcessingConfig(streaming_min_duration=30.0, streaming_block_duration=5.0)
+    pipeline = AudioProcessingPipeline(config)
+    output = tmp_path / f"processed-{seconds:.0f}.wav"
+
+    tracemalloc.start()
+    try:
+        path, analysis = asyncio.run(pipeline.process_audio_file(str(source), str(output)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return path, analysis, peak
+
+
+def test_long_files_are_processed_in_bounded_memory(tmp_path):
+    path, analysis, short_peak = _process_with_peak_memory(tmp_path, 40.0)
+    path, analysis, long_peak = _process_with_peak_memory(tmp_path, 160.0)
+
+    assert abs(analysis.duration - 160.0) < 1e-6
+    assert analysis.channels == 2
+    info = sf.info(path)
+    assert info.samplerate == 16000
+    assert abs(info.duration - 160.0) < 0.01
+    # Four times the audio, same working set (the decoded file alone is 56 MB)
+    assert long_peak < short_peak * 1.25
+    assert long_peak < 160.0 * 44100 * 2 * 4 / 2
+
+
+def test_short_files_keep_the_in_memory_pipeline(tmp_path, monkeypatch):
+    source = tmp_path / "short.wav"
+    sf.write(source, _speech_like(2.0, 16000), 16000)
+    pipeline = AudioProcessingPipeline(AudioProcessingConfig())
+
+    def fail(*args, **kwargs):
+        raise AssertionError("short files should not stream")
+
+    monkeypatch.setattr(pipeline, "_process_audio_stream", fail)
+    path, analysis = asyncio.run(pipeline.process_audio_file(str(source), str(tmp_path / "out.wav")))
+
+    assert abs(sf.info(path).duration - 2.0) < 0.05
+    assert abs(analysis.duration - 2.0) < 1e-6
@@ -0,0 +1,165 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from api.extended_models.api_keys import APIKey, APIKeyUsageLog
+from api.orm_bootstrap import Base
+from api.security.audit_models import AuditEventType, AuditSeverity, SecurityAuditLog
+from api.security.audit_sink import AuditSink
+from api.services.api_key_service import _roll_up_key_usage
+
+
+@pytest.fixture()
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(
+        engine,
+        tables=[SecurityAuditLog.__table__, APIKey.__table__, APIKeyUsageLog.__table__],
+    )
+    factory = sessionmaker(bind=engine)
+    factory.statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        factory.statements.append(statement)
+
+    yield factory
+    engine.dispose()
+
+
+def _audit_row(index: int) -> dict:
+    return dict(
+        timestamp=datetime.utcnow(),
+        event_type=AuditEventType.API_ACCESS,
+        severity=AuditSeverity.LOW,
+        client_ip="10.0.0.1",
+        request_method="GET",
+        request_url=f"http://testserver/jobs/{index}",
+        event_description=f"API access {index}",
+        response_status=200,
+    )
+
+
+def _count(factory, model) -> int:
+    db = factory()
+    try:
+        return db.query(model).count()
+    finally:
+        db.close()
+
+
+def test_rows_are_written_in_batched_inserts(session_factory):
+    sink = AuditSink(maxsize=100, batch_size=25, session_factory=session_factory)
+    for index in range(60):
+        sink.record(SecurityAuditLog, **_audit_row(index))
+    sink.stop()
+
+    assert _count(session_factory, SecurityAuditLog) == 60
+    inserts = [s for s in session_factory.statements if s.startswith("INSERT INTO security_audit_logs")]
+    assert 0 < len(inserts) <= 4
+
+
+def test_background_writer_flushes_after_interval(session_factory):
+    sink = AuditSink(batch_size=1000, flush_interval=0.05, session_factory=session_factory)
+    sink.start()
+    try:
+        sink.record(SecurityAuditLog, **_audit_row(1))
+        for _ in range(100):
+            if _count(session_factory, SecurityAuditLog) == 1:
+                break
+            time.sleep(0.02)
+        assert _count(session_factory, SecurityAuditLog) == 1
+        assert sink.queue_depth == 0
+    finally:
+        sink.stop()
+
+
+def test_rows_recorded_after_stop_are_written_without_a_new_thread(session_factory):
+    sink = AuditSink(session_factory=session_factory)
+    sink.record(SecurityAuditLog, **_audit_row(1))
+    sink.stop()
+
+    sink.record(SecurityAuditLog, **_audit_row(2))
+
+    assert sink._thread is None
+    assert sink.queue_depth == 0
+    assert _count(session_factory, SecurityAuditLog) == 2
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [2, 3, 4]), ("drop_newest", [0, 1, 2])])
+def test_overflow_policy_decides_which_rows_are_dropped(session_factory, policy, kept):
+    sink = AuditSink(maxsize=3, overflow_policy=policy, session_factory=session_factory)
+    sink._thread = object()  # Keep the writer from draining the queue during the test
+    for index in range(5):
+        sink.record(SecurityAuditLog, **_audit_row(index))
+    sink._thread = None
+    sink.flush()
+
+    db = session_factory()
+    try:
+        urls = [row.request_url for row in db.query(SecurityAuditLog).order_by(SecurityAuditLog.id)]
+    finally:
+        db.close()
+    assert urls == [f"http://testserver/jobs/{index}" for index in kept]
+    assert sink.dropped == 2
+
+
+def test_key_usage_rolls_up_into_key_statistics(session_factory):
+    db = session_factory()
+    key = APIKey(
+        key_id="key-1", key_hash="hash", key_prefix="wt_live_abcd", name="ci",
+        user_id="user-1", permissions=["read"], usage_count=3,
+    )
+    db.add(key)
+    db.commit()
+    key_id = key.id
+    db.close()
+
+    sink = AuditSink(session_factory=session_factory)
+    sink.register_rollup(APIKeyUsageLog, _roll_up_key_usage)
+    for index in range(4):
+        sink.record(
+            APIKeyUsageLog, api_key_id=key_id, timestamp=datetime(2026, 1, 1, 12, index),
+            method="GET", endpoint="/api/jobs", status_code=200,
+            client_ip=f"10.0.0.{index}", user_agent="pytest",
+        )
+    sink.stop()
+
+    db = session_factory()
+    try:
+        key = db.get(APIKey, key_id)
+        assert key.usage_count == 7
+        assert key.last_used_at == datetime(2026, 1, 1, 12, 3)
+        assert key.last_used_ip == "10.0.0.3"
+        assert db.query(APIKeyUsageLog).count() == 4
+    finally:
+        db.close()
+
+
+def test_request_audit_row_carries_the_response_status(monkeypatch):
+    from api.security import integration
+
+    recorded = []
+    monkeypatch.setattr(integration.audit_sink, "record", lambda model, **values: recorded.append(values))
+    request = Request({
+        "type": "http", "method": "GET", "path": "/jobs", "query_string": b"",
+        "headers": [(b"user-agent", b"pytest")], "client": ("10.0.0.9", 1234),
+        "scheme": "http", "server": ("testserver", 80),
+    })
+
+    integration.security_service.validate_and_audit_request(request, None, None, "general")
+    assert recorded == []
+
+    integration.security_service.complete_request_audit(request, 404, 12)
+    integration.security_service.complete_request_audit(request, 404, 12)
+    assert len(recorded) == 1
+    assert recorded[0]["response_status"] == 404
+    assert recorded[0]["processing_time_ms"] == 12
+    assert recorded[0]["event_type"] == AuditEventType.API_ACCESS
@@ -0,0 +1,109 @@
+"""Tests for incremental content-addressed upload/transcript snapshots."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from api.services.backup_store import BackupIntegrityError, ContentAddressedBackupStore
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return ContentAddressedBackupStore(tmp_path / "backups", chunk_size=16, workers=2)
+
+
+@pytest.fixture()
+def source(tmp_path):
+    root = tmp_path / "uploads"
+    (root / ".content").mkdir(parents=True)
+    blob = root / ".content" / "blob"
+    blob.write_bytes(b"A" * 40 + b"tail")
+    os.link(blob, root / "job-1.wav")
+    (root / "notes.txt").write_text("hello")
+    return root
+
+
+def test_second_snapshot_reuses_unchanged_files(store, source, tmp_path) -> None:
+    first = tmp_path / "first.snapshot.json.zst"
+    stats = store.snapshot(source, first)
+    # Identical 16-byte chunks of the blob are stored once; the hard link is not read
+    assert (stats["files"], stats["bytes"], stats["new_chunks"]) == (3, 49, 3)
+
+    (source / "notes.txt").write_text("changed")
+    second = tmp_path / "second.snapshot.json.zst"
+    stats = store.snapshot(source, second, previous_manifest=first)
+    assert (stats["reused_files"], stats["new_chunks"]) == (1, 1)
+
+
+def test_restore_any_snapshot_with_links(store, source, tmp_path) -> None:
+    first = tmp_path / "first.snapshot.json.zst"
+    store.snapshot(source, first)
+    (source / "notes.txt").write_text("changed")
+    store.snapshot(source, tmp_path / "second.snapshot.json.zst", previous_manifest=first)
+
+    target = tmp_path / "restored"
+    assert store.restore(first, target) == 3
+
+    assert (target / "notes.txt").read_text() == "hello"
+    assert (target / "job-1.wav").read_bytes() == b"A" * 40 + b"tail"
+    assert os.path.samefile(target / "job-1.wav", target / ".content" / "blob")
+
+
+def test_garbage_collection_and_corruption(store, source, tmp_path) -> None:
+    first = tmp_path / "first.snapshot.json.zst"
+    store.snapshot(source, first)
+    (source / "notes.txt").write_text("changed")
+    second = tmp_path / "second.snapshot.json.zst"
+    store.snapshot(source, second, previous_manifest=first)
+
+    assert store.collect_garbage([second]) == 1  # The old notes.txt chunk
+
+    digest = next(iter(store.referenced_objects([second])))
+    store.object_path(digest).write_bytes(b"garbage")
+    with pytest.raises(Exception):
+        store.restore(second, tmp_path / "restored")
+    store.object_path(digest).unlink()
+    with pytest.raises(BackupIntegrityError):
+        store.read_object(digest)
+
+
+def test_selective_restore_reads_only_selected_files(store, source, tmp_path) -> None:
+    manifest = tmp_path / "first.snapshot.json.zst"
+    store.snapshot(source, manifest)
+    (source / "notes.txt").unlink()
+    # Corrupting an unselected object must not affect the restore
+    for digest in store.referenced_objects([manifest]):
+        if store.read_object(digest) == b"hello":
+            store.object_path(digest).write_bytes(b"garbage")
+
+    target = tmp_path / "restored"
+    (target / "other.txt").parent.mkdir(parents=True)
+    (target / "other.txt").write_text("keep")
+    # The file a selected hard link points at comes along with it
+    assert store.restore(manifest, target, select=lambda path: path == ".content/blob") == 2
+
+    assert (target / ".content" / "blob").read_bytes() == b"A" * 40 + b"tail"
+    assert os.path.samefile(target / "job-1.wav", target / ".content" / "blob")
+    assert not (target / "notes.txt").exists()
+    assert (target / "other.txt").read_text() == "keep"
+    assert not list(target.rglob(".*.restore"))
+
+
+def test_garbage_collection_waits_for_in_progress_backups(store, source, tmp_path) -> None:
+    first = tmp_path / "first.snapshot.json.zst"
+    store.snapshot(source, first)
+
+    store.acquire_lease()
+    (source / "notes.txt").write_text("changed")
+    second = tmp_path / "second.snapshot.json.zst"
+    store.snapshot(source, second, previous_manifest=first)
+    # The new snapshot is not recorded yet; its chunks must survive collection
+    assert store.collect_garbage([first]) == 0
+    assert store.gc_deferred
+    store.release_lease()
+
+    assert store.collect_garbage([second]) == 1
+    assert not store.gc_deferred
+    assert store.restore(second, tmp_path / "restored") == 3
@@ -0,0 +1,98 @@
+"""Tests for parallel batch export rendering straight into ZIP archives."""
+
+from __future__ import annotations
+
+import io
+import json
+import zipfile
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.extended_models.export_system import (
+    BatchExport,
+    BatchExportStatus,
+    ExportHistory,
+    ExportJob,
+    ExportStatus,
+    ExportTemplate,
+)
+from api.models import Job, JobStatusEnum
+from api.services import export_system
+from api.services.export_system import BatchExportService
+
+
+@pytest.fixture()
+def session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine("sqlite://")
+    for model in (Job, ExportTemplate, BatchExport, ExportJob, ExportHistory):
+        model.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+
+    for index in range(3):
+        transcript = tmp_path / f"transcript-{index}.txt"
+        transcript.write_text(f"Transcript number {index}", encoding="utf-8")
+        db.add(Job(
+            id=f"job-{index}",
+            # Same filename twice: archive names must not collide
+            original_filename="meeting.wav" if index < 2 else "call.wav",
+            saved_filename=f"/uploads/{index}.wav",
+            model="tiny",
+            user_id="alice",
+            status=JobStatusEnum.COMPLETED,
+            transcript_path=str(transcript),
+        ))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _create(db, job_ids, export_format="json"):
+    return BatchExportService.create_batch_export(
+        db, name="nightly", job_ids=job_ids, export_format=export_format, created_by="alice"
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_export_writes_every_render_into_the_archive(session, monkeypatch, workers) -> None:
+    monkeypatch.setattr(export_system, "EXPORT_RENDER_WORKERS", workers)
+    batch = _create(session, ["job-0", "job-1", "job-2"])
+
+    assert BatchExportService.process_batch_export(session, batch.id)
+
+    session.refresh(batch)
+    assert batch.status == BatchExportStatus.COMPLETED.value
+    assert batch.completed_jobs == 3 and batch.progress_percentage == 100.0
+    with zipfile.ZipFile(batch.archive_path) as archive:
+        names = sorted(archive.namelist())
+        texts = sorted(json.loads(archive.read(name))["full_text"] for name in names)
+    assert len(set(names)) == 3 and "call_json.json" in names
+    assert texts == [f"Transcript number {index}" for index in range(3)]
+    assert all(job.status == ExportStatus.COMPLETED.value for job in batch.export_jobs)
+    assert session.query(ExportHistory).count() == 4  # Three exports plus the batch
+
+
+def test_missing_source_job_marks_batch_partial(session, monkeypatch) -> None:
+    monkeypatch.setattr(export_system, "EXPORT_RENDER_WORKERS", 1)
+    batch = _create(session, ["job-0", "job-1"])
+    session.query(Job).filter(Job.id == "job-1").delete()
+    session.commit()
+
+    assert BatchExportService.process_batch_export(session, batch.id)
+
+    session.refresh(batch)
+    assert batch.status == BatchExportStatus.PARTIAL.value
+    assert (batch.completed_jobs, batch.failed_jobs) == (1, 1)
+
+
+def test_stream_batch_archive_yields_a_valid_zip(session, monkeypatch) -> None:
+    monkeypatch.setattr(export_system, "EXPORT_RENDER_WORKERS", 1)
+    batch = _create(session, ["job-0", "job-2"], export_format="txt")
+
+    chunks = list(BatchExportService.stream_batch_archive(session, batch))
+
+    assert len(chunks) == 3  # One per entry, then the central directory
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert sorted(archive.namelist()) == ["call_txt.txt", "meeting_txt.txt"]
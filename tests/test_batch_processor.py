@@ -0,0 +1,88 @@
+"""Tests for batch cancellation racing with workers that finish files."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from api.models import Job, JobStatusEnum
+from api.orm_bootstrap import SessionLocal
+from api.services import batch_processor as batch_module
+from api.services.batch_processor import BatchFileInfo, BatchInfo, BatchStatus, batch_processor
+
+
+def _file(name: str) -> BatchFileInfo:
+    return BatchFileInfo(
+        filename=name,
+        original_filename=name,
+        file_size=1,
+        content_type="audio/wav",
+        uploaded_at=datetime.utcnow(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cancel_keeps_results_of_files_that_already_finished(monkeypatch):
+    revoked = []
+    monkeypatch.setattr(batch_module.job_queue, "cancel_job", revoked.append)
+
+    batch_id = str(uuid.uuid4())
+    files = [_file("done.wav"), _file("running.wav")]
+    job_ids = {JobStatusEnum.COMPLETED: str(uuid.uuid4()), JobStatusEnum.PROCESSING: str(uuid.uuid4())}
+    info = BatchInfo(
+        batch_id=batch_id,
+        batch_name="race",
+        description=None,
+        user_id="batch-race-test",
+        status=BatchStatus.PROCESSING.value,
+        priority="normal",
+        model="tiny",
+        language=None,
+        created_at=datetime.utcnow(),
+        started_at=datetime.utcnow(),
+        completed_at=None,
+        total_files=2,
+        processed_files=0,
+        successful_files=0,
+        failed_files=0,
+        max_parallel_jobs=2,
+        files=files,
+        progress_percentage=0.0,
+        estimated_completion=None,
+    )
+    with SessionLocal() as db:
+        for job_status, job_id in job_ids.items():
+            db.add(Job(
+                id=job_id,
+                original_filename="example.wav",
+                saved_filename="example.wav",
+                model="tiny",
+                status=job_status,
+                user_id=info.user_id,
+            ))
+        db.commit()
+
+    # The worker finished the first file, but its event has not been handled yet
+    files_by_job = dict(zip(job_ids.values(), files))
+    batch_processor.active_batches[batch_id] = {"info": info, "files_by_job": files_by_job}
+    for job_id in job_ids.values():
+        batch_processor._job_batches[job_id] = batch_id
+
+    try:
+        assert await batch_processor.cancel_batch(batch_id)
+
+        with SessionLocal() as db:
+            statuses = dict(db.query(Job.id, Job.status).filter(Job.id.in_(list(job_ids.values()))).all())
+        assert statuses[job_ids[JobStatusEnum.COMPLETED]] == JobStatusEnum.COMPLETED
+        assert statuses[job_ids[JobStatusEnum.PROCESSING]] == JobStatusEnum.FAILED
+
+        assert sorted(revoked) == sorted(job_ids.values())
+        assert [file.status for file in files] == ["completed", BatchStatus.CANCELLED.value]
+        assert (info.successful_files, info.processed_files) == (1, 1)
+    finally:
+        batch_processor.discard_batch(batch_id)
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id.in_(list(job_ids.values()))).delete(synchronize_session=False)
+            db.commit()
@@ -0,0 +1,74 @@
+"""Tests for fair-share dispatch of batch transcription files."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+from api.services.batch_scheduler import FairShareBatchScheduler
+
+
+def _drain(scheduler: FairShareBatchScheduler, count: int) -> list:
+    return [scheduler.next_item() for _ in range(count)]
+
+
+def test_per_batch_and_global_caps_are_enforced() -> None:
+    scheduler = FairShareBatchScheduler(max_in_flight=5)
+    scheduler.add_batch("a", "alice", list(range(10)), max_parallel_jobs=2)
+
+    dispatched = _drain(scheduler, 3)
+    assert dispatched == [("a", 0), ("a", 1), None]
+
+    scheduler.add_batch("b", "bob", list(range(10)), max_parallel_jobs=10)
+    assert [slot[0] for slot in _drain(scheduler, 3)] == ["b", "b", "b"]
+    assert scheduler.next_item() is None  # Global cap of 5 reached
+
+    scheduler.release("a")
+    assert scheduler.next_item() == ("a", 2)
+
+
+def test_users_share_slots_regardless_of_batch_count() -> None:
+    scheduler = FairShareBatchScheduler(max_in_flight=100)
+    for index in range(4):
+        scheduler.add_batch(f"alice-{index}", "alice", list(range(20)), max_parallel_jobs=20)
+    scheduler.add_batch("bob-0", "bob", list(range(20)), max_parallel_jobs=20)
+
+    owners = Counter(slot[0].split("-")[0] for slot in _drain(scheduler, 20))
+    assert owners == {"alice": 10, "bob": 10}
+
+
+def test_priority_weights_share_between_users() -> None:
+    scheduler = FairShareBatchScheduler(max_in_flight=100)
+    scheduler.add_batch("urgent", "alice", list(range(50)), priority="urgent", max_parallel_jobs=50)
+    scheduler.add_batch("low", "bob", list(range(50)), priority="low", max_parallel_jobs=50)
+
+    counts = Counter(slot[0] for slot in _drain(scheduler, 18))
+    assert counts == {"urgent": 16, "low": 2}
+
+
+def test_returning_user_does_not_bank_idle_time() -> None:
+    scheduler = FairShareBatchScheduler(max_in_flight=100)
+    scheduler.add_batch("bob-old", "bob", ["x"], max_parallel_jobs=1)
+    scheduler.next_item()
+    scheduler.release("bob-old")
+
+    scheduler.add_batch("alice", "alice", list(range(20)), max_parallel_jobs=20)
+    _drain(scheduler, 10)
+    scheduler.add_batch("bob-new", "bob", list(range(20)), max_parallel_jobs=20)
+
+    # Bob joins at Alice's clock instead of getting ten slots in a row.
+    owners = [slot[0] for slot in _drain(scheduler, 4)]
+    assert Counter(owners) == {"alice": 2, "bob-new": 2}
+
+
+def test_cancel_and_remove_release_capacity() -> None:
+    scheduler = FairShareBatchScheduler(max_in_flight=2)
+    scheduler.add_batch("a", "alice", list(range(5)), max_parallel_jobs=2)
+    _drain(scheduler, 2)
+
+    assert scheduler.cancel_batch("a") == [2, 3, 4]
+    assert scheduler.pending_count("a") == 0
+    assert scheduler.in_flight == 2
+
+    scheduler.remove_batch("a")
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["batches"] == {}
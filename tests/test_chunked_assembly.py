@@ -0,0 +1,81 @@
+"""Tests for in-place chunk writes and incremental hashing in ChunkedUploadService."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from api.services.chunked_upload_service import ChunkedUploadService
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = ChunkedUploadService()
+    svc.chunk_size = 4
+    svc.uploads_dir = tmp_path / "uploads"
+    svc.sessions_dir = svc.uploads_dir / "sessions"
+    yield svc
+    svc.cleanup()
+
+
+async def _upload(service: ChunkedUploadService, payload: bytes, order: list[int]) -> dict:
+    init = await service.initialize_upload(user_id="chunk-user", filename="clip.wav", file_size=len(payload))
+    session_id = init["session_id"]
+    for number in order:
+        chunk = payload[number * service.chunk_size:(number + 1) * service.chunk_size]
+        await service.upload_chunk(session_id, number, chunk, "chunk-user")
+    return init
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order", [[0, 1, 2, 3], [3, 1, 0, 2], [2, 3, 1, 0]])
+async def test_out_of_order_chunks_assemble_with_correct_hash(service, stub_job_queue, order):
+    payload = b"0123456789abcde"  # 4 chunks, the last one 3 bytes
+
+    init = await _upload(service, payload, order)
+    result = await service.finalize_upload(init["session_id"], "chunk-user")
+
+    assert result["status"] == "completed"
+    assert result["file_hash"] == hashlib.sha256(payload).hexdigest()
+    final_path = Path(stub_job_queue.submitted[-1]["kwargs"]["file_path"])
+    assert final_path.read_bytes() == payload
+    assert not (service.sessions_dir / init["session_id"] / "upload.part").exists()
+    assert not list((service.sessions_dir / init["session_id"]).glob("chunks/*"))
+
+
+@pytest.mark.asyncio
+async def test_finalize_hashes_file_when_state_is_lost(service, stub_job_queue):
+    payload = b"abcdefgh"
+    init = await _upload(service, payload, [1, 0])
+    # Simulate finalization on a process that did not receive the chunks.
+    service.chunk_processor.discard(init["session_id"])
+
+    result = await service.finalize_upload(init["session_id"], "chunk-user")
+
+    assert result["file_hash"] == hashlib.sha256(payload).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_rejects_chunks_with_wrong_size(service):
+    init = await service.initialize_upload(user_id="chunk-user", filename="clip.wav", file_size=10)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await service.upload_chunk(init["session_id"], 0, b"abc", "chunk-user")
+
+    assert excinfo.value.status_code == 400
+    assert "must be 4 bytes" in excinfo.value.detail
+
+
+@pytest.mark.asyncio
+async def test_uploads_work_after_service_cleanup(service, stub_job_queue):
+    # Lifespan shutdown cleans up the shared service; a later lifespan must still accept uploads
+    service.cleanup()
+    payload = b"abcdefgh"
+
+    init = await _upload(service, payload, [0, 1])
+    result = await service.finalize_upload(init["session_id"], "chunk-user")
+
+    assert result["file_hash"] == hashlib.sha256(payload).hexdigest()
@@ -0,0 +1,96 @@
+"""Tests for consistent database snapshots used by the backup service."""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+import textwrap
+
+import pytest
+
+from api.services.database_backup import (
+    DatabaseBackupError,
+    backup_database,
+    is_snapshot,
+    restore_database,
+    snapshot_suffix,
+)
+
+
+def _seed(path) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE samples (id INTEGER PRIMARY KEY, score REAL, payload BLOB, note TEXT)")
+        conn.executemany(
+            "INSERT INTO samples (score, payload, note) VALUES (?, ?, ?)",
+            [(index / 3, bytes([index % 256]) * 4, None if index % 2 else f"it's {index}") for index in range(500)],
+        )
+
+
+def test_sqlite_snapshot_round_trip_preserves_types(tmp_path) -> None:
+    database = tmp_path / "app.db"
+    _seed(database)
+    url = f"sqlite:///{database}"
+    backup_file = tmp_path / f"snapshot{snapshot_suffix(url)}"
+
+    stats = backup_database(url, backup_file)
+    assert is_snapshot(backup_file)
+    assert stats["source_bytes"] == database.stat().st_size
+    assert 0 < stats["stored_bytes"] < stats["source_bytes"]
+
+    with sqlite3.connect(database) as conn:
+        conn.execute("DELETE FROM samples")
+        conn.execute("CREATE TABLE stray (id INTEGER)")
+    restore_database(url, backup_file)
+
+    with sqlite3.connect(database) as conn:
+        rows = conn.execute("SELECT score, payload, note FROM samples ORDER BY id").fetchall()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert len(rows) == 500
+    assert rows[3] == (1.0, b"\x03" * 4, None)
+    assert rows[4][2] == "it's 4"
+    assert tables == {"samples"}
+
+
+def _tool(tmp_path, name, body) -> str:
+    script = tmp_path / name
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(body))
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_postgres_snapshot_streams_through_dump_tools(tmp_path, monkeypatch) -> None:
+    restored = tmp_path / "restored.bin"
+    monkeypatch.setenv("PG_DUMP_BIN", _tool(tmp_path, "pg_dump", """
+        import os, sys
+        assert "postgresql://app@db/whisper" in sys.argv
+        assert not any("secret" in arg for arg in sys.argv)
+        assert os.environ["PGPASSWORD"] == "secret"
+        sys.stdout.buffer.write(b"PGDMP" + b"x" * 100000)
+    """))
+    monkeypatch.setenv("PG_RESTORE_BIN", _tool(tmp_path, "pg_restore", f"""
+        import os, sys
+        assert os.environ["PGPASSWORD"] == "secret" and "postgresql://app@db/whisper" in sys.argv
+        open({str(restored)!r}, "wb").write(sys.stdin.buffer.read())
+    """))
+    url = "postgresql+psycopg2://app:secret@db/whisper"
+    backup_file = tmp_path / f"snapshot{snapshot_suffix(url)}"
+
+    stats = backup_database(url, backup_file)
+    restore_database(url, backup_file)
+
+    assert stats["source_bytes"] == 100005
+    assert restored.read_bytes() == b"PGDMP" + b"x" * 100000
+
+
+def test_failed_dump_reports_stderr_and_leaves_no_file(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("PG_DUMP_BIN", _tool(tmp_path, "pg_dump", """
+        import sys
+        sys.stderr.write("connection refused")
+        sys.exit(1)
+    """))
+    backup_file = tmp_path / "snapshot.pgdump.zst"
+
+    with pytest.raises(DatabaseBackupError, match="connection refused"):
+        backup_database("postgresql://app@db/whisper", backup_file)
+    assert list(tmp_path.glob("*.zst")) == []
+    assert not is_snapshot(tmp_path / "legacy_db.sql.zst")
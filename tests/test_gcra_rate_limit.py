@@ -0,0 +1,87 @@
+"""Tests for the GCRA rate limiting backend."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from api.middlewares.gcra_rate_limit import GCRARateLimiter, gcra_decide
+
+
+def test_gcra_allows_a_burst_then_one_request_per_interval() -> None:
+    tat, now, results = None, 100.0, []
+    for _ in range(4):
+        new_tat, decision = gcra_decide(tat, now, interval=1.0, capacity=3.0)
+        results.append((decision.allowed, decision.remaining))
+        tat = new_tat if new_tat is not None else tat
+
+    assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+    _, refused = gcra_decide(tat, now, interval=1.0, capacity=3.0)
+    assert refused.retry_after == pytest.approx(1.0)
+
+    # One interval later exactly one more request fits
+    _, decision = gcra_decide(tat, now + 1.0, interval=1.0, capacity=3.0)
+    assert (decision.allowed, decision.remaining) == (True, 0)
+
+
+@pytest.mark.asyncio
+async def test_memory_limiter_keeps_one_entry_per_key_and_evicts_expired() -> None:
+    limiter = GCRARateLimiter(max_memory_entries=2)
+
+    assert [(await limiter.hit("a", 2, 60)).allowed for _ in range(3)] == [True, True, False]
+    await limiter.hit("b", 2, 60)
+    limiter._tats["a"] = 0.0  # Bucket refilled long ago
+    await limiter.hit("c", 2, 60)
+
+    assert limiter.memory_entries == 2 and "a" not in limiter._tats
+
+
+@pytest.mark.asyncio
+async def test_redis_script_shares_limits_across_limiters() -> None:
+    pytest.importorskip("lupa")
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    replicas = [
+        GCRARateLimiter(fakeredis.FakeAsyncRedis(server=server)) for _ in range(2)
+    ]
+
+    decisions = [await replicas[i % 2].hit("ip:1", 3, 60) for i in range(4)]
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == pytest.approx(20.0, abs=0.5)
+    assert 0 < await replicas[0].redis_client.pttl("ratelimit:ip:1") <= 60_000
+    assert replicas[0].memory_entries == 0
+
+
+class _BrokenRedis:
+    calls = 0
+
+    def register_script(self, script):
+        async def run(**kwargs):
+            self.calls += 1
+            raise ConnectionError("redis down")
+        return run
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_in_process_limits() -> None:
+    limiter = GCRARateLimiter(_BrokenRedis())
+
+    assert [(await limiter.hit("k", 1, 60)).allowed for _ in range(2)] == [True, False]
+    assert limiter.memory_entries == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_is_not_retried_until_the_cooldown_passes() -> None:
+    redis_client = _BrokenRedis()
+    limiter = GCRARateLimiter(redis_client, redis_retry_seconds=0.05)
+
+    for _ in range(5):
+        await limiter.hit("k", 100, 60)
+    assert redis_client.calls == 1
+
+    await asyncio.sleep(0.06)
+    await limiter.hit("k", 100, 60)
+    assert redis_client.calls == 2
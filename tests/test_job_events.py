@@ -0,0 +1,151 @@
+"""Tests for push delivery of job state changes."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from api.models import Job, JobStatusEnum, User
+from api.orm_bootstrap import SessionLocal
+from api.routes import jobs
+from api.routes.jobs import _etag_matches, _format_sse
+from api.services.job_events import JobEventBroker, is_terminal_status, job_etag, job_state_event
+
+
+def _job(status=JobStatusEnum.QUEUED, updated_at=datetime(2024, 1, 1, 12, 0, 0), transcript_path=None):
+    return SimpleNamespace(
+        id="job-1",
+        user_id="alice",
+        status=status,
+        updated_at=updated_at,
+        transcript_path=transcript_path,
+    )
+
+
+def test_job_etag_tracks_visible_state() -> None:
+    queued = job_etag(_job())
+
+    assert job_etag(_job()) == queued
+    assert job_etag(_job(status=JobStatusEnum.PROCESSING)) != queued
+    assert job_etag(_job(updated_at=datetime(2024, 1, 1, 12, 0, 1))) != queued
+    assert job_etag(_job(transcript_path="/t/transcript.txt")) != queued
+    assert queued.startswith('"') and queued.endswith('"')
+
+
+def test_etag_matching_handles_lists_and_weak_tags() -> None:
+    etag = job_etag(_job())
+
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(f'"other", W/{etag}', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+    assert not _etag_matches(None, etag)
+
+
+def test_state_event_and_sse_encoding() -> None:
+    event = job_state_event(_job(status=JobStatusEnum.COMPLETED))
+
+    assert event["status"] == "completed"
+    assert event["etag"] == job_etag(_job(status=JobStatusEnum.COMPLETED))
+    assert is_terminal_status(event["status"])
+    assert is_terminal_status("failed_timeout")
+    assert not is_terminal_status("processing")
+
+    message = _format_sse(event)
+    assert message.startswith("event: status\ndata: ")
+    assert message.endswith("\n\n")
+    assert json.loads(message.split("data: ", 1)[1]) == event
+    assert _format_sse({"job_id": "job-1", "progress": 50}).startswith("event: progress\n")
+
+
+@pytest.mark.asyncio
+async def test_broker_delivers_only_to_subscribers_of_the_job() -> None:
+    broker = JobEventBroker()
+
+    with broker.subscribe("job-1") as first, broker.subscribe("job-2") as second:
+        await broker.publish({"job_id": "job-1", "status": "processing"})
+
+        assert (await asyncio.wait_for(first.get(), 1))["status"] == "processing"
+        assert second.empty()
+        assert broker.subscriber_count() == 2
+
+    assert broker.subscriber_count() == 0
+    assert broker.publish_local({"job_id": "job-1"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_keeps_latest_events() -> None:
+    broker = JobEventBroker(queue_size=2)
+
+    with broker.subscribe("job-1") as queue:
+        for progress in (10, 20, 30):
+            broker.publish_local({"job_id": "job-1", "progress": progress})
+
+        assert [queue.get_nowait()["progress"] for _ in range(2)] == [20, 30]
+        assert broker.events_dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_relayed_messages_skip_own_origin() -> None:
+    broker = JobEventBroker()
+
+    with broker.subscribe("job-1") as queue:
+        own = {"origin": broker._instance_id, "event": {"job_id": "job-1", "status": "queued"}}
+        worker = {"origin": "worker", "event": {"job_id": "job-1", "status": "completed"}}
+        broker._apply_message(json.dumps(own))
+        broker._apply_message(json.dumps(worker))
+        broker._apply_message("not json")
+
+        assert queue.get_nowait()["status"] == "completed"
+        assert queue.empty()
+        assert broker.events_received == 1
+
+
+@pytest.mark.asyncio
+async def test_long_poll_rechecks_the_database_between_waits(
+    async_client, admin_token, security_headers, monkeypatch
+):
+    """Transitions with no local notification are found by the periodic re-check."""
+    monkeypatch.setattr(jobs, "EVENT_STREAM_REFRESH_SECONDS", 0.05)
+    headers = security_headers(token=admin_token)
+    job_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        admin_user = db.query(User).filter(User.username == "admin").one()
+        db.add(Job(
+            id=job_id,
+            original_filename="example.wav",
+            saved_filename=f"{job_id}.wav",
+            model="small",
+            status=JobStatusEnum.QUEUED,
+            user_id=str(admin_user.id),
+        ))
+        db.commit()
+
+    try:
+        first = await async_client.get(f"/jobs/{job_id}/events", headers=headers)
+        assert first.json()["status"] == "queued"
+
+        async def finish_elsewhere():
+            await asyncio.sleep(0.1)
+            with SessionLocal() as db:
+                db.query(Job).filter(Job.id == job_id).update({"status": JobStatusEnum.COMPLETED})
+                db.commit()
+
+        updater = asyncio.create_task(finish_elsewhere())
+        response = await async_client.get(
+            f"/jobs/{job_id}/events?timeout=10",
+            headers={**headers, "If-None-Match": first.headers["etag"]},
+        )
+        await updater
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "completed"
+    finally:
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == job_id).delete()
+            db.commit()
@@ -0,0 +1,91 @@
+"""Tests for keyset pagination of job listings."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.models import Job, JobStatusEnum
+from api.utils.app_pagination import CachedCounter, CursorGenerator, apply_keyset_filter
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    Job.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for index in range(7):
+        db.add(Job(
+            id=f"job-{index}",
+            original_filename=f"clip-{index}.wav",
+            saved_filename=f"/uploads/clip-{index}.wav",
+            model="tiny",
+            user_id="alice",
+            status=JobStatusEnum.QUEUED,
+            # Two jobs share each timestamp, so the id tie-break matters.
+            created_at=base + timedelta(seconds=index // 2),
+        ))
+    db.add(Job(
+        id="job-other",
+        original_filename="other.wav",
+        saved_filename="/uploads/other.wav",
+        model="tiny",
+        user_id="bob",
+        status=JobStatusEnum.QUEUED,
+        created_at=base,
+    ))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _page(db, cursor=None, limit=3):
+    query = db.query(Job.id, Job.created_at).filter(Job.user_id == "alice")
+    if cursor:
+        query = apply_keyset_filter(
+            query, Job.created_at, Job.id, CursorGenerator.parse_cursor(cursor), "desc"
+        )
+    rows = query.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit).all()
+    next_cursor = None
+    if rows:
+        next_cursor = CursorGenerator.generate_cursor(rows[-1].id, rows[-1].created_at, "created_at", "desc")
+    return [row.id for row in rows], next_cursor
+
+
+def test_keyset_pages_cover_every_job_once(session) -> None:
+    seen = []
+    cursor = None
+    while True:
+        ids, cursor = _page(session, cursor)
+        if not ids:
+            break
+        seen.extend(ids)
+
+    assert seen == [f"job-{index}" for index in range(6, -1, -1)]
+
+
+def test_cursor_without_microseconds_still_matches_ties(session) -> None:
+    # str(datetime) drops ".000000"; the filter must compare datetimes, not strings.
+    ids, cursor = _page(session, limit=2)
+    assert ids == ["job-6", "job-5"]
+
+    ids, _ = _page(session, cursor, limit=2)
+    assert ids == ["job-4", "job-3"]
+
+
+def test_cached_counter_reuses_until_invalidated() -> None:
+    counter = CachedCounter(ttl_seconds=60)
+    calls = []
+
+    def count() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert counter.get_or_count("alice", count) == 1
+    assert counter.get_or_count("alice", count) == 1
+    counter.invalidate("alice")
+    assert counter.get_or_count("alice", count) == 2
@@ -0,0 +1,99 @@
+"""Unit tests for the worker-side Whisper model registry."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from api.services.model_registry import WhisperModelRegistry, estimate_model_bytes
+
+
+class _Tensor:
+    def __init__(self, count: int, width: int = 4) -> None:
+        self._count = count
+        self._width = width
+
+    def numel(self) -> int:
+        return self._count
+
+    def element_size(self) -> int:
+        return self._width
+
+
+class _Model:
+    def __init__(self, name: str, params: int = 0) -> None:
+        self.name = name
+        self._params = [_Tensor(params)] if params else []
+
+    def parameters(self):
+        return iter(self._params)
+
+    def buffers(self):
+        return iter(())
+
+
+def _recording_loader(calls: list[tuple[str, str]], params: int = 0):
+    def _load(name: str, device: str) -> _Model:
+        calls.append((name, device))
+        return _Model(name, params)
+
+    return _load
+
+
+def test_registry_reuses_loaded_models() -> None:
+    registry = WhisperModelRegistry(max_models=2, max_bytes=0)
+    calls: list[tuple[str, str]] = []
+    loader = _recording_loader(calls)
+
+    first = registry.get("small", "cpu", loader)
+    second = registry.get("small", "cpu", loader)
+
+    assert first is second
+    assert calls == [("small", "cpu")]
+    stats = registry.stats()
+    assert stats["hits"] == 1
+    assert stats["loads"] == 1
+
+
+def test_registry_keys_by_device() -> None:
+    registry = WhisperModelRegistry(max_models=4, max_bytes=0)
+    calls: list[tuple[str, str]] = []
+    loader = _recording_loader(calls)
+
+    registry.get("small", "cpu", loader)
+    registry.get("small", "cuda", loader)
+
+    assert calls == [("small", "cpu"), ("small", "cuda")]
+
+
+def test_registry_evicts_least_recently_used() -> None:
+    registry = WhisperModelRegistry(max_models=2, max_bytes=0)
+    calls: list[tuple[str, str]] = []
+    loader = _recording_loader(calls)
+
+    registry.get("tiny", "cpu", loader)
+    registry.get("small", "cpu", loader)
+    registry.get("tiny", "cpu", loader)  # refresh tiny so small is now LRU
+    registry.get("medium", "cpu", loader)
+
+    assert registry.contains("tiny", "cpu")
+    assert registry.contains("medium", "cpu")
+    assert not registry.contains("small", "cpu")
+    assert registry.stats()["evictions"] == 1
+
+
+def test_registry_enforces_memory_budget() -> None:
+    registry = WhisperModelRegistry(max_models=4, max_bytes=1000)
+    calls: list[tuple[str, str]] = []
+    loader = _recording_loader(calls, params=150)  # 600 bytes per model
+
+    registry.get("tiny", "cpu", loader)
+    registry.get("small", "cpu", loader)
+
+    assert not registry.contains("tiny", "cpu")
+    assert registry.contains("small", "cpu")
+    assert registry.stats()["resident_bytes"] == 600
+
+
+def test_estimate_model_bytes_ignores_plain_objects() -> None:
+    assert estimate_model_bytes(SimpleNamespace()) == 0
+    assert estimate_model_bytes(_Model("x", params=10)) == 40
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from api.query_telemetry import LatencySketch, QueryTelemetry, describe_statement
+
+
+def test_statements_differing_in_literals_share_a_fingerprint():
+    first = describe_statement("SELECT * FROM jobs WHERE id = 42 AND status IN ('queued', 'failed')")
+    second = describe_statement("select *  from jobs where id = 7 and status in ('done')")
+
+    assert first.fingerprint == "SELECT * FROM jobs WHERE id = ? AND status IN (?)"
+    assert first.fingerprint.upper() == second.fingerprint.upper()
+    assert first.query_type == second.query_type == "SELECT"
+    assert first.table_name == "jobs"
+    assert describe_statement('INSERT INTO "api_keys" (name) VALUES (?)').table_name == "api_keys"
+    assert describe_statement("WITH x AS (SELECT 1) SELECT * FROM x").query_type == "OTHER"
+
+
+@pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+def test_sketch_quantiles_stay_within_relative_accuracy(q):
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(mean=1.0, sigma=1.5, size=20000)
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(float(value))
+
+    expected = float(np.quantile(values, q, method="lower"))
+    assert abs(sketch.quantile(q) - expected) <= 0.011 * expected
+    assert sketch.count == len(values)
+
+
+def test_ring_buffer_keeps_fixed_memory_and_recent_window():
+    telemetry = QueryTelemetry(capacity=100)
+    now = time.time()
+    for index in range(1000):
+        telemetry.record(f"SELECT * FROM jobs WHERE id = {index}", float(index % 10), 1, now=now - 1000 + index)
+
+    summary = telemetry.summary(now - 50, slow_ms=8.0, very_slow_ms=100.0)
+    assert summary["total_queries"] == 50
+    assert summary["max_execution_time_ms"] == 9.0
+    assert summary["slow_queries"] == 5
+    assert summary["query_types"]["SELECT"]["count"] == 50
+    # Older statements were overwritten in place
+    assert telemetry.summary(now - 1000, 8.0, 100.0)["total_queries"] == 100
+    assert telemetry._durations.nbytes == 400
+
+    fingerprints = telemetry.fingerprint_stats()
+    assert len(fingerprints) == 1
+    assert fingerprints[0]["count"] == 1000
+
+
+def test_sampling_scales_counts_back_up():
+    telemetry = QueryTelemetry(capacity=10000, sample_rate=0.25)
+    for _ in range(8000):
+        telemetry.record("UPDATE jobs SET status = ? WHERE id = ?", 1.0)
+
+    total = telemetry.summary(0, 100.0, 500.0)["total_queries"]
+    assert 7000 < total < 9000
+
+
+def test_top_slow_queries_and_failures():
+    telemetry = QueryTelemetry(capacity=64, max_fingerprints=2)
+    telemetry.record("SELECT * FROM jobs", 5.0, 3)
+    telemetry.record("SELECT * FROM users", 50.0, 1)
+    telemetry.record("SELECT * FROM metadata", 20.0)
+    telemetry.record("DELETE FROM jobs WHERE id = 1", 0.0, success=False)
+
+    slow = telemetry.top_slow_queries(0, 2)
+    assert [q["execution_time_ms"] for q in slow] == [50.0, 20.0]
+    assert slow[0]["table_name"] == "users"
+    # Beyond max_fingerprints statements are pooled under one entry
+    assert slow[1]["fingerprint"] == "<other>"
+
+    summary = telemetry.summary(0, 100.0, 500.0)
+    assert summary["successful_queries"] == 3
+    assert summary["query_types"]["OTHER"]["errors"] == 1
@@ -0,0 +1,232 @@
+"""Tests for RedisCacheService entries, round-trip budget and the local tier."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import fakeredis.aioredis as fredis
+import pytest
+import pytest_asyncio
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api.services.local_cache import LocalCache
+from api.services.redis_cache import (
+    CODEC_IDENTITY,
+    CODEC_ZSTD,
+    CacheConfiguration,
+    RedisCacheService,
+    _ENTRY_HEADER,
+)
+
+
+class _CountingClient:
+    """Count round-trips: direct commands plus pipeline flushes."""
+
+    def __init__(self, client):
+        self.round_trips = 0
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def counted_command(*args, **kwargs):
+            self.round_trips += 1
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*exec_args, **exec_kwargs):
+                self.round_trips += 1
+                return await execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        client.execute_command = counted_command
+        client.pipeline = counted_pipeline
+
+
+def _request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def _service(server) -> RedisCacheService:
+    service = RedisCacheService(CacheConfiguration(log_cache_operations=False))
+    service.redis_pool = fredis.FakeRedis(server=server, decode_responses=True)
+    service.entry_pool = fredis.FakeRedis(server=server, decode_responses=False)
+    return service
+
+
+@pytest_asyncio.fixture
+async def cache():
+    service = _service(fredis.FakeServer())
+    yield service
+    await service.close()
+
+
+async def _store(cache: RedisCacheService, path: str, content: str) -> str:
+    request = _request(path)
+    key = cache._generate_cache_key(request)
+    response = Response(content=content, media_type="application/json")
+    assert await cache.set(key, response, request, content)
+    return key
+
+
+@pytest.mark.asyncio
+async def test_large_entries_are_compressed_and_round_trip(cache):
+    content = json.dumps([{"id": f"job-{n}", "status": "completed"} for n in range(200)])
+    key = await _store(cache, "/jobs", content)
+
+    raw = await cache.entry_pool.get(key)
+    assert _ENTRY_HEADER.unpack_from(raw)[2] == CODEC_ZSTD
+    assert len(raw) < len(content)
+
+    entry = await cache.get(key)
+    assert entry.content == content
+    assert entry.status_code == 200
+    assert entry.content_type == "application/json"
+    assert entry.tags == ["jobs", "status_data"]
+    assert cache.metrics.compressed_sets == 1
+    assert cache.metrics.bytes_saved > 0
+
+
+@pytest.mark.asyncio
+async def test_small_entries_are_stored_uncompressed(cache):
+    key = await _store(cache, "/version", '{"version": "1.0"}')
+
+    raw = await cache.entry_pool.get(key)
+    assert _ENTRY_HEADER.unpack_from(raw)[2] == CODEC_IDENTITY
+    assert (await cache.get(key)).content == '{"version": "1.0"}'
+
+
+@pytest.mark.asyncio
+async def test_hit_and_set_each_cost_one_round_trip(cache):
+    counter = _CountingClient(cache.entry_pool)
+
+    key = await _store(cache, "/jobs/abc", '{"status": "queued"}')
+    assert counter.round_trips == 1
+
+    counter.round_trips = 0
+    for _ in range(5):
+        assert await cache.get(key) is not None
+    assert counter.round_trips == 5
+    assert cache.metrics.hits == 5
+    assert await cache.get_hit_count(key) == 0
+
+
+@pytest.mark.asyncio
+async def test_sampled_hit_counts_and_tag_invalidation(cache):
+    cache.config.hit_count_sample_rate = 1.0
+    key = await _store(cache, "/jobs/abc", '{"status": "queued"}')
+
+    await cache.get(key)
+    await cache.get(key)
+    assert await cache.get_hit_count(key) == 2
+
+    assert await cache.invalidate_by_tag("job:abc") == 1
+    assert await cache.get(key) is None
+    assert await cache.get_hit_count(key) == 0
+    assert not await cache.redis_pool.exists("whisper_tags:job:abc")
+
+
+@pytest.mark.asyncio
+async def test_legacy_json_entries_are_treated_as_misses(cache):
+    await cache.redis_pool.set("whisper_cache:legacy", json.dumps({"content": "old"}))
+
+    assert await cache.get("whisper_cache:legacy") is None
+    assert cache.metrics.misses == 1
+    assert cache.metrics.errors == 0
+
+
+def test_local_cache_evicts_least_recently_used_within_byte_budget():
+    local = LocalCache(max_bytes=10, default_ttl=60, max_entry_bytes=6)
+
+    assert local.set("a", "A", size=4, tags=["jobs"])
+    assert local.set("b", "B", size=4)
+    assert local.get("a") == "A"  # "b" is now least recently used
+    assert local.set("c", "C", size=4)
+    assert not local.set("huge", "H", size=7)
+
+    assert local.get("b") is None
+    assert local.get("a") == "A" and local.get("c") == "C"
+    assert local.stats()["bytes"] == 8
+    assert local.stats()["evictions"] == 1
+
+    assert local.invalidate_tags(["jobs"]) == 1
+    assert local.get("a") is None
+
+
+def test_local_cache_caps_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("api.services.local_cache.time.monotonic", lambda: now[0])
+    local = LocalCache(max_bytes=100, default_ttl=5)
+
+    local.set("a", "A", size=1, ttl=300)
+    now[0] += 4
+    assert local.get("a") == "A"
+    now[0] += 2
+    assert local.get("a") is None
+    assert not local.set("expired", "E", size=1, ttl=0)
+
+
+@pytest.mark.asyncio
+async def test_local_hits_skip_redis(cache):
+    key = await _store(cache, "/health", '{"status": "ok"}')
+    counter = _CountingClient(cache.entry_pool)
+
+    assert cache.get_local(key).content == '{"status": "ok"}'
+    assert counter.round_trips == 0
+
+
+@pytest.mark.asyncio
+async def test_tag_invalidation_reaches_other_replicas():
+    server = fredis.FakeServer()
+    writer, reader = _service(server), _service(server)
+    reader._invalidation_task = asyncio.create_task(reader._listen_for_invalidations())
+    try:
+        for _ in range(100):
+            if (await reader.redis_pool.pubsub_numsub(reader._invalidation_channel))[0][1]:
+                break
+            await asyncio.sleep(0.01)
+
+        key = await _store(writer, "/jobs", '{"jobs": []}')
+        entry = await reader.get(key)
+        assert reader.store_local(key, entry)
+        assert reader.get_local(key) is not None
+
+        await writer.invalidate_by_tag("jobs")
+        assert writer.get_local(key) is None
+        for _ in range(100):
+            if reader.get_local(key) is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert reader.get_local(key) is None
+        assert reader.metrics.invalidations_received == 1
+        assert writer.metrics.invalidations_received == 0
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_setup_does_not_start_the_invalidation_listener(monkeypatch):
+    server = fredis.FakeServer()
+    monkeypatch.setattr(
+        "api.services.redis_cache.redis.from_url",
+        lambda url, **kwargs: fredis.FakeRedis(server=server, decode_responses=kwargs.get("decode_responses", False)),
+    )
+
+    async def refuse_config_set(*args, **kwargs):
+        raise RuntimeError("CONFIG SET is disabled")
+
+    monkeypatch.setattr(fredis.FakeRedis, "config_set", refuse_config_set)
+    service = RedisCacheService(CacheConfiguration(log_cache_operations=False))
+
+    await service.initialize()
+
+    assert service.redis_pool is None
+    assert service._invalidation_task is None
+    await service.close()
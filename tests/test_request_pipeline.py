@@ -0,0 +1,142 @@
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from api.middlewares.enhanced_cache import EnhancedApiCacheStage
+from api.middlewares.pipeline import CORSStage, RequestContext, RequestPipeline, Stage
+
+
+class RecordingStage(Stage):
+    def __init__(self, name, events, answer=None, raise_http=False):
+        self.name = name
+        self.events = events
+        self.answer = answer
+        self.raise_http = raise_http
+
+    async def on_request(self, ctx: RequestContext):
+        self.events.append(f"{self.name}:request")
+        if self.raise_http:
+            raise HTTPException(status_code=429, detail="slow down", headers={"Retry-After": "5"})
+        return self.answer
+
+    def on_response_start(self, ctx, headers):
+        self.events.append(f"{self.name}:start")
+        headers[f"X-{self.name}"] = "1"
+
+    async def on_complete(self, ctx, exc: Optional[BaseException]):
+        self.events.append(f"{self.name}:complete:{ctx.status_code}:{type(exc).__name__ if exc else None}")
+
+
+def _client(stages, events=None):
+    app = FastAPI()
+
+    @app.get("/ok")
+    def ok():
+        if events is not None:
+            events.append("app")
+        return {"ok": True}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 10, b"b" * 20, b"c" * 30]), media_type="text/plain")
+
+    app.add_middleware(RequestPipeline, stages=stages)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_stages_run_in_order_around_the_app():
+    events = []
+    client = _client([RecordingStage("outer", events), RecordingStage("inner", events)], events)
+
+    response = client.get("/ok")
+
+    assert response.json() == {"ok": True}
+    assert response.headers["X-outer"] == response.headers["X-inner"] == "1"
+    assert events == [
+        "outer:request", "inner:request", "app",
+        "inner:start", "outer:start",
+        "inner:complete:200:None", "outer:complete:200:None",
+    ]
+
+
+def test_short_circuit_skips_later_stages_and_the_app():
+    events = []
+    answer = PlainTextResponse("cached", status_code=203)
+    client = _client([RecordingStage("outer", events, answer=answer), RecordingStage("inner", events)], events)
+
+    response = client.get("/ok")
+
+    assert response.status_code == 203
+    assert response.text == "cached"
+    assert events == ["outer:request", "outer:start", "outer:complete:203:None"]
+
+
+def test_http_exception_from_a_stage_becomes_a_json_error():
+    events = []
+    client = _client([RecordingStage("outer", events), RecordingStage("guard", events, raise_http=True)])
+
+    response = client.get("/ok")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "slow down"}
+    assert response.headers["Retry-After"] == "5"
+    assert events[-1] == "outer:complete:429:None"
+
+
+def test_stages_complete_when_the_app_raises():
+    events = []
+    client = _client([RecordingStage("outer", events)])
+
+    response = client.get("/boom")
+
+    assert response.status_code == 500
+    assert "outer:complete:None:RuntimeError" in events
+
+
+def test_streaming_responses_pass_through_unbuffered():
+    class BodyStage(Stage):
+        name = "body"
+
+        def on_response_start(self, ctx, headers):
+            ctx.capture_body = True
+
+        async def on_complete(self, ctx, exc):
+            captured.update(streaming=ctx.streaming, body=ctx.body, size=ctx.response_bytes)
+
+    captured = {}
+    client = _client([BodyStage()])
+
+    response = client.get("/stream")
+    assert response.text == "a" * 10 + "b" * 20 + "c" * 30
+    assert captured == {"streaming": True, "body": None, "size": 60}
+
+    client.get("/ok")
+    assert captured == {"streaming": False, "body": b'{"ok":true}', "size": 11}
+
+
+@pytest.mark.parametrize("origin, allowed", [("http://app.example", True), ("http://evil.example", False)])
+def test_cors_stage_matches_starlette(origin, allowed):
+    client = _client([CORSStage(allow_origins=["http://app.example"], allow_methods=["GET"], allow_credentials=True)])
+
+    response = client.get("/ok", headers={"Origin": origin})
+    assert (response.headers.get("access-control-allow-origin") == origin) is allowed
+    assert "Origin" in response.headers["vary"]
+
+    preflight = client.options("/ok", headers={"Origin": origin, "Access-Control-Request-Method": "GET"})
+    assert (preflight.status_code == 200) is allowed
+
+
+@pytest.mark.parametrize("path, cacheable", [
+    ("/health", False), ("/health/ready", False), ("/ready", False), ("/version", False), ("/jobs", True),
+])
+def test_cache_stage_never_caches_probes(path, cacheable):
+    request = Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+    assert EnhancedApiCacheStage()._should_cache_request(request) is cacheable
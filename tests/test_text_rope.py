@@ -0,0 +1,66 @@
+"""Tests for the rope-backed collaborative document model."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from api.services.operational_transform import DocumentState, OperationType, TextOperation
+from api.services.text_rope import TextRope
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 16])
+def test_rope_matches_string_edits(block_size) -> None:
+    rng = random.Random(block_size)
+    rope, expected = TextRope("hello world", block_size=block_size), "hello world"
+
+    for _ in range(2000):
+        position = rng.randint(-2, len(expected) + 2)
+        start = max(0, min(position, len(expected)))
+        if rng.random() < 0.5:
+            content = "".join(rng.choice("ab \n") for _ in range(rng.randint(0, block_size * 4)))
+            rope.insert(position, content)
+            expected = expected[:start] + content + expected[start:]
+        else:
+            length = rng.choice([1, 1, rng.randint(0, block_size * 6)])
+            rope.delete(position, length)
+            expected = expected[:start] + expected[start + length:]
+
+        assert len(rope) == len(expected)
+        low = rng.randint(0, len(expected))
+        assert rope.slice(low, low + 5) == expected[low:low + 5]
+
+    assert str(rope) == expected
+
+
+def _insert(position, content):
+    return TextOperation(type=OperationType.INSERT, position=position, content=content)
+
+
+def test_document_history_is_compacted_behind_snapshots() -> None:
+    document = DocumentState("x", snapshot_interval=4)
+    for version in range(10):
+        assert document.apply_operation(_insert(version, str(version)), user_id=1)
+
+    assert document.content == "0123456789x"
+    assert document.history_start_version == 4
+    assert len(document.operation_history) == 6
+    assert document.get_operations_since_version(3) is None
+
+    # Replaying the retained history onto the snapshot yields the current text
+    snapshot = document.get_snapshot()
+    replica = DocumentState(snapshot["content"])
+    for operation in document.get_operations_since_version(snapshot["version"]):
+        replica.apply_operation(operation, operation.user_id)
+    assert replica.content == document.content
+    assert document.get_operations_since_version(10) == []
+
+
+def test_document_clamps_operations_like_string_transform() -> None:
+    document = DocumentState("abc")
+    document.apply_operation(_insert(99, "!"), user_id=1)
+    document.apply_operation(TextOperation(type=OperationType.DELETE, position=-5, length=2), user_id=1)
+
+    assert document.content == "c!"
+    assert document.get_document_info()["content_length"] == 2
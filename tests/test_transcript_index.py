@@ -0,0 +1,137 @@
+"""Tests for the inverted transcript index and the search service built on it."""
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from api.models import Job, JobStatusEnum
+from api.services.transcript_index import TranscriptIndex, tokenize
+from api.services.transcript_search import SearchType, TranscriptSearchService
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = TranscriptIndex(tmp_path / "index.sqlite3")
+    yield idx
+    idx.close()
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    assert tokenize("Hello, World! It's 2024.") == ["hello", "world", "it", "s", "2024"]
+
+
+def test_bm25_ranks_denser_matches_first(index):
+    index.index_document("a", "the budget meeting covered the budget and the budget review")
+    index.index_document("b", "a short note about the budget")
+    index.index_document("c", "nothing relevant here at all")
+
+    result = index.search(["budget"])
+
+    assert [hit.doc_id for hit in result.hits] == ["a", "b"]
+    assert result.total == 2
+    assert result.hits[0].term_frequencies == {"budget": 3}
+
+
+def test_phrase_requires_adjacent_positions(index):
+    index.index_document("adjacent", "we discussed the quarterly report today")
+    index.index_document("scattered", "the report was quarterly and late")
+
+    result = index.search(phrases=["quarterly report"])
+
+    assert [hit.doc_id for hit in result.hits] == ["adjacent"]
+
+
+def test_reindex_and_remove_update_statistics(index):
+    index.index_document("a", "alpha beta")
+    generation = index.generation()
+    index.index_document("a", "gamma")
+
+    assert index.document_count() == 1
+    assert index.generation() > generation
+    assert index.search(["alpha"]).total == 0
+    assert index.search(["gamma"]).total == 1
+
+    assert index.remove_document("a") is True
+    assert index.remove_document("a") is False
+    assert index.document_count() == 0
+    assert index.indexed_ids() == set()
+
+
+def test_search_pages_and_filters_candidates(index):
+    for number in range(5):
+        index.index_document(f"doc-{number}", "keyword " * (number + 1) + "filler text")
+
+    first = index.search(["keyword"], limit=2)
+    second = index.search(["keyword"], offset=2, limit=2)
+    filtered = index.search(["keyword"], allowed=lambda ids: {"doc-0"})
+
+    assert [hit.doc_id for hit in first.hits] == ["doc-4", "doc-3"]
+    assert [hit.doc_id for hit in second.hits] == ["doc-2", "doc-1"]
+    assert first.total == 5
+    assert [hit.doc_id for hit in filtered.hits] == ["doc-0"]
+    assert filtered.total == 1
+
+
+def test_user_scoping(index):
+    index.index_document("mine", "shared vocabulary", user_id="1")
+    index.index_document("theirs", "shared vocabulary", user_id="2")
+
+    assert [hit.doc_id for hit in index.search(["shared"], user_id="1").hits] == ["mine"]
+
+
+def test_background_backfill_indexes_and_skips_deleted_jobs(db_session, tmp_path):
+    service = TranscriptSearchService(index=TranscriptIndex(tmp_path / "service.sqlite3"))
+    jobs = []
+    for text in ("the migration plan is ready", "lunch menu for friday"):
+        transcript = tmp_path / f"{uuid.uuid4().hex}.txt"
+        transcript.write_text(text, encoding="utf-8")
+        job = Job(
+            id=uuid.uuid4().hex,
+            original_filename="meeting.wav",
+            saved_filename=str(tmp_path / "meeting.wav"),
+            model="tiny",
+            user_id="search-index-test",
+            status=JobStatusEnum.COMPLETED,
+            transcript_path=str(transcript),
+        )
+        db_session.add(job)
+        jobs.append(job)
+    db_session.commit()
+
+    try:
+        # Searches never wait for the backfill; they see what is indexed so far
+        response = service.search("migration", db_session, search_type=SearchType.FULL_TEXT)
+        assert response.results == []
+
+        service.start_index_backfill().join()
+        response = service.search("migration", db_session, search_type=SearchType.FULL_TEXT)
+        assert [result.job_id for result in response.results] == [jobs[0].id]
+        assert response.total_results == 1
+        assert "migration" in response.results[0].transcript_snippet.lower()
+        assert service.index.contains(jobs[1].id)
+
+        # Searches on behalf of a user only see that user's transcripts
+        own = service.search("migration", db_session, user_id="search-index-test", search_type=SearchType.FULL_TEXT)
+        assert [result.job_id for result in own.results] == [jobs[0].id]
+        other = service.search("meeting", db_session, user_id="someone-else")
+        assert other.results == [] and other.total_results == 0
+
+        # Combined search also scores filename matches from the database.
+        combined = service.search("meeting", db_session, page_size=1)
+        assert combined.total_results == 2
+        assert len(combined.results) == 1
+
+        # Rows removed from the database are dropped even if still indexed.
+        db_session.delete(jobs[0])
+        db_session.commit()
+        service.cache.clear()  # Deleting a row does not bump the index generation
+        response = service.search("migration", db_session, search_type=SearchType.FULL_TEXT)
+        assert response.results == []
+        assert not service.index.contains(jobs[0].id)
+    finally:
+        for job in jobs[1:]:
+            db_session.delete(job)
+        db_session.commit()
+        service.index.close()
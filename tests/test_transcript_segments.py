@@ -0,0 +1,89 @@
+"""Tests for the columnar segment sidecar written next to transcripts."""
+
+from __future__ import annotations
+
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from api.services.transcript_segments import (
+    SEGMENTS_FILE,
+    TranscriptSegments,
+    char_to_byte_offsets,
+    copy_segments,
+    write_segments,
+)
+
+SEGMENTS = [
+    {
+        "start": 0.0,
+        "end": 2.5,
+        "text": " Héllo there.",
+        "avg_logprob": -0.25,
+        "no_speech_prob": 0.01,
+        "words": [
+            {"word": " Héllo", "start": 0.0, "end": 1.0, "probability": 0.9},
+            {"word": " there.", "start": 1.0, "end": 2.5, "probability": 0.8},
+        ],
+    },
+    {"start": 2.5, "end": 5.0, "text": " General Kenobi.", "avg_logprob": -0.5, "no_speech_prob": 0.02},
+]
+TEXT = " Héllo there. General Kenobi."
+
+
+def _write(tmp_path, text=TEXT):
+    (tmp_path / "transcript.txt").write_text(text, encoding="utf-8")
+    assert write_segments(tmp_path, SEGMENTS, text)
+
+
+def test_round_trip_reads_offsets_into_transcript(tmp_path) -> None:
+    _write(tmp_path)
+
+    with TranscriptSegments.open(tmp_path) as segments:
+        assert segments.indexes_transcript
+        assert not (tmp_path / "segments.txt").exists()
+        assert len(segments) == 2
+        first, second = list(segments)
+
+    assert first["text"] == "Héllo there."
+    assert first["confidence"] == pytest.approx(math.exp(-0.25))
+    assert [word["word"] for word in first["words"]] == ["Héllo", "there."]
+    assert first["words"][1]["start"] == pytest.approx(1.0)
+    assert second["text"] == "General Kenobi."
+    assert second["end"] == pytest.approx(5.0)
+    assert "words" not in second
+
+
+def test_unaligned_text_falls_back_to_own_text_source(tmp_path) -> None:
+    _write(tmp_path, text="post-processed transcript")
+
+    with TranscriptSegments.open(tmp_path) as segments:
+        assert not segments.indexes_transcript
+        assert [segment["text"] for segment in segments] == ["Héllo there.", "General Kenobi."]
+
+
+def test_lookup_by_time_and_offset(tmp_path) -> None:
+    _write(tmp_path)
+    position = TEXT.index("Kenobi")
+    [offset] = char_to_byte_offsets(TEXT, [position])
+
+    assert offset == len(TEXT[:position].encode("utf-8"))
+    with TranscriptSegments.open(tmp_path) as segments:
+        assert segments.segment_at_time(3.0) == 1
+        assert segments.segment_at_time(9.0) is None
+        assert segments.segment_at_offset(offset) == 1
+        assert segments.segment_at_offset(0) is None  # Leading space belongs to no segment
+
+
+def test_copy_and_missing_sidecar(tmp_path) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    _write(source)
+    destination = tmp_path / "copy"
+
+    assert copy_segments(source, destination)
+    assert (destination / SEGMENTS_FILE).exists()
+    assert TranscriptSegments.open(tmp_path / "missing") is None
+    assert not copy_segments(tmp_path / "missing", destination)
@@ -0,0 +1,135 @@
+"""Tests for memory-mapped transcript reads and the routes built on them."""
+
+from __future__ import annotations
+
+import contextlib
+import uuid
+from datetime import datetime
+
+import pytest
+
+from api.models import Job, JobStatusEnum, User
+from api.orm_bootstrap import SessionLocal
+from api.paths import storage
+from api.services import transcript_storage
+from api.services.transcript_storage import TranscriptFile
+
+TEXT = "Café budget — the 𝄞 budget review. " * 40
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    path = tmp_path / "transcript.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    with TranscriptFile(path) as reader:
+        yield reader
+
+
+def test_preview_stops_at_a_character_boundary(transcript):
+    text, truncated = transcript.preview(7)
+    assert text == "Café bu"
+    assert truncated is True
+
+    full, truncated = transcript.preview(len(TEXT))
+    assert full == TEXT
+    assert truncated is False
+
+
+def test_find_terms_matches_across_scan_chunks(transcript, monkeypatch):
+    monkeypatch.setattr(transcript_storage, "SCAN_CHUNK_BYTES", 13)
+
+    [match] = transcript.find_terms(["BUDGET"], max_positions=3)
+
+    assert match["count"] == 80
+    positions = [position["position"] for position in match["positions"]]
+    lowered = TEXT.lower()
+    assert positions == [lowered.find("budget"), lowered.find("budget", 6), lowered.find("budget", 21)]
+    for position in match["positions"]:
+        assert len(TEXT[:position["position"]].encode("utf-8")) == position["offset"]
+    assert transcript.find_terms(["absent"]) == []
+
+
+def test_excerpt_reads_around_the_match(transcript):
+    [match] = transcript.find_terms(["review"], max_positions=2)
+    second = match["positions"][1]
+
+    excerpt = transcript.excerpt(second["position"], second["offset"], max_length=30)
+
+    start = second["position"] - 10
+    assert excerpt == "..." + TEXT[start:start + 30] + "..."
+
+
+def test_missing_and_empty_files(tmp_path):
+    assert TranscriptFile.open(tmp_path / "missing.txt") is None
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    with TranscriptFile.open(empty) as reader:
+        assert reader.preview() == ("", False)
+        assert reader.find_terms(["x"]) == []
+        assert reader.read_text() == ""
+
+
+@pytest.mark.asyncio
+async def test_job_status_previews_and_download_serves_ranges(
+    async_client, admin_token, security_headers, monkeypatch
+):
+    """Job status returns a preview by default; downloads honour Range requests."""
+
+    monkeypatch.setattr(transcript_storage, "TRANSCRIPT_PREVIEW_CHARS", 10)
+    headers = security_headers(token=admin_token)
+    job_id = str(uuid.uuid4())
+    transcript_path = storage.transcripts_dir / f"{job_id}.txt"
+    transcript_path.write_text(TEXT, encoding="utf-8")
+
+    with SessionLocal() as db:
+        admin_user = db.query(User).filter(User.username == "admin").one()
+        db.add(Job(
+            id=job_id,
+            original_filename="example.wav",
+            saved_filename=str(storage.upload_dir / f"{job_id}.wav"),
+            model="small",
+            status=JobStatusEnum.COMPLETED,
+            user_id=str(admin_user.id),
+            transcript_path=str(transcript_path),
+            finished_at=datetime.utcnow(),
+        ))
+        db.commit()
+
+    try:
+        preview = await async_client.get(f"/jobs/{job_id}", headers=headers)
+        detail = preview.json()
+        assert detail["transcript"] == TEXT[:10]
+        assert detail["transcript_truncated"] is True
+        assert detail["transcript_size_bytes"] == len(TEXT.encode("utf-8"))
+
+        full_url = f"/jobs/{job_id}?include=transcript"
+        full_response = await async_client.get(full_url, headers=headers)
+        full = full_response.json()
+        assert full["transcript"] == TEXT
+        assert full["transcript_truncated"] is False
+
+        # The preview's tag must not validate a cached full-transcript body
+        etag = full_response.headers["etag"]
+        assert etag != preview.headers["etag"]
+        stale = await async_client.get(full_url, headers={**headers, "If-None-Match": preview.headers["etag"]})
+        assert stale.status_code == 200
+        fresh = await async_client.get(full_url, headers={**headers, "If-None-Match": etag})
+        assert fresh.status_code == 304
+
+        partial = await async_client.get(
+            detail["transcript_download_url"], headers={**headers, "Range": "bytes=0-4"}
+        )
+        assert partial.status_code == 206
+        assert partial.content == TEXT.encode("utf-8")[:5]
+        assert partial.headers["content-range"] == f"bytes 0-4/{detail['transcript_size_bytes']}"
+
+        raw = await async_client.get(f"/transcripts/{job_id}/raw", headers=headers)
+        assert raw.status_code == 200
+        assert raw.text == TEXT
+    finally:
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == job_id).delete()
+            db.commit()
+        with contextlib.suppress(FileNotFoundError):
+            transcript_path.unlink()
@@ -0,0 +1,146 @@
+"""Tests for content-addressed uploads and transcription result reuse."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import uuid
+
+import pytest
+
+from api.models import Job, JobStatusEnum
+from api.orm_bootstrap import SessionLocal
+from api.services.transcription_dedup import (
+    ContentAddressedStore,
+    TranscriptionResultCache,
+    result_cache,
+    result_cache_key,
+)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_adopt_links_duplicate_uploads_to_one_blob(tmp_path):
+    store = ContentAddressedStore(tmp_path / "content")
+    first = tmp_path / "first.wav"
+    second = tmp_path / "second.wav"
+    first.write_bytes(b"same audio")
+    second.write_bytes(b"same audio")
+    digest = _digest(b"same audio")
+
+    assert store.adopt(first, digest) is False
+    assert store.adopt(second, digest) is True
+
+    blob = store.blob_path(digest)
+    assert blob.stat().st_ino == first.stat().st_ino == second.stat().st_ino
+    assert store.stats() == {"blobs": 1, "stored_bytes": 10, "bytes_saved": 10}
+
+    # Deleting every upload leaves the blob unreferenced and purgeable.
+    first.unlink()
+    assert store.purge_unreferenced() == 0
+    second.unlink()
+    assert store.purge_unreferenced() == 1
+    assert not blob.exists()
+
+
+def test_blob_path_rejects_non_digests(tmp_path):
+    with pytest.raises(ValueError):
+        ContentAddressedStore(tmp_path).blob_path("../../etc/passwd")
+
+
+def test_result_cache_key_depends_on_every_setting():
+    digest = _digest(b"audio")
+    base = result_cache_key(digest, "small", None)
+
+    assert result_cache_key(digest, "small", "") == base
+    assert result_cache_key(digest, "small", "EN") == result_cache_key(digest, "small", "en")
+    assert result_cache_key(digest, "medium", None) != base
+    assert result_cache_key(digest, "small", "en") != base
+    assert result_cache_key(digest, "small", None, {"temperature": 0}) != base
+
+
+def test_result_cache_round_trip_purge_and_hit_rate(tmp_path):
+    cache = TranscriptionResultCache(tmp_path / "results")
+    transcript = tmp_path / "transcript.txt"
+    transcript.write_text("hello world", encoding="utf-8")
+    digest = _digest(b"audio")
+
+    assert cache.get(digest, "small") is None
+    cache.put(digest, "small", None, None, transcript, "job-1")
+    entry = cache.get(digest, "small")
+
+    assert entry is not None
+    assert entry.source_job_id == "job-1"
+    assert cache.peek(digest, "small") == entry  # Not counted
+    linked = cache.link_transcript(entry, tmp_path / "copy" / "transcript.txt")
+    assert linked.read_text(encoding="utf-8") == "hello world"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 1
+
+    assert cache.purge(model="medium") == 0
+    assert cache.purge(audio_sha256=digest) == 1
+    assert cache.get(digest, "small") is None
+    # Materialized transcripts survive a purge.
+    assert linked.read_text(encoding="utf-8") == "hello world"
+
+
+@pytest.mark.asyncio
+async def test_duplicate_upload_completes_from_cached_result(
+    async_client, admin_token, security_headers, stub_job_queue, tmp_path
+):
+    audio = f"dedup audio {uuid.uuid4()}".encode()
+    digest = _digest(audio)
+    headers = security_headers(token=admin_token)
+
+    async def _upload():
+        response = await async_client.post(
+            "/jobs/",
+            data={"model": "small"},
+            files={"file": ("dup.wav", io.BytesIO(audio), "audio/wav")},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    first = await _upload()
+    assert first["status"] == "queued"
+    assert first["duplicate_upload"] is False
+    assert first["result_cached"] is False
+    assert stub_job_queue.submitted[-1]["kwargs"]["content_sha256"] == digest
+    # The worker re-checks without counting a second miss
+    assert stub_job_queue.submitted[-1]["kwargs"]["result_cache_checked"] is True
+
+    # Simulate the worker publishing the finished transcript.
+    transcript = tmp_path / "transcript.txt"
+    transcript.write_text("cached transcript", encoding="utf-8")
+    result_cache.put(digest, "small", None, None, transcript, first["job_id"])
+    submissions = len(stub_job_queue.submitted)
+
+    try:
+        second = await _upload()
+        assert second["status"] == "completed"
+        assert second["duplicate_upload"] is True
+        assert second["result_cached"] is True
+        assert second["queue_job_id"] is None
+        assert len(stub_job_queue.submitted) == submissions
+
+        with SessionLocal() as db:
+            job = db.get(Job, second["job_id"])
+            assert job.status == JobStatusEnum.COMPLETED
+            with open(job.transcript_path, encoding="utf-8") as handle:
+                assert handle.read() == "cached transcript"
+
+        stats = await async_client.get("/api/admin/dedup/stats", headers=headers)
+        assert stats.status_code == 200, stats.text
+        assert stats.json()["result_cache"]["hits"] >= 1
+    finally:
+        purge = await async_client.delete(
+            "/api/admin/dedup/results", params={"audio_sha256": digest}, headers=headers
+        )
+    assert purge.status_code == 200
+    assert purge.json()["results_removed"] == 1
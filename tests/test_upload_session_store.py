@@ -0,0 +1,136 @@
+"""Tests for the chunked upload session stores."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import fakeredis.aioredis as fredis
+import pytest
+import pytest_asyncio
+
+from api.services.chunked_upload_service import ChunkedUploadService
+from api.services.upload_session_store import (
+    FileUploadSessionStore,
+    RedisUploadSessionStore,
+    create_upload_session_store,
+)
+
+
+@pytest_asyncio.fixture(params=["file", "redis"])
+async def store(request, tmp_path):
+    if request.param == "file":
+        yield FileUploadSessionStore(tmp_path)
+    else:
+        server = fredis.FakeServer()
+        store = RedisUploadSessionStore(
+            fredis.FakeRedis(server=server, decode_responses=True),
+            fredis.FakeRedis(server=server, decode_responses=False),
+        )
+        yield store
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_store_round_trips_metadata_and_chunk_bitmap(store):
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    await store.save("s1", {"session_id": "s1", "status": "active"}, expires_at)
+
+    assert await store.load("s1") == {"session_id": "s1", "status": "active"}
+    assert await store.load("unknown") is None
+
+    assert await store.mark_chunk("s1", 3) is True
+    assert await store.mark_chunk("s1", 3) is False
+    assert await store.mark_chunk("s1", 0) is True
+
+    assert await store.has_chunk("s1", 3)
+    assert not await store.has_chunk("s1", 1)
+    assert await store.count_chunks("s1") == 2
+    assert await store.received_chunks("s1", 5) == {0, 3}
+    assert await store.missing_chunks("s1", 5) == [1, 2, 4]
+    assert await store.missing_chunks("s1", 5, limit=2) == [1, 2]
+    # Chunks past the first byte of the bitmap
+    assert await store.mark_chunk("s1", 9) is True
+    assert await store.received_chunks("s1", 12) == {0, 3, 9}
+    assert await store.missing_chunks("s1", 12, limit=6) == [1, 2, 4, 5, 6, 7]
+
+    await store.delete("s1")
+    assert await store.load("s1") is None
+    assert await store.count_chunks("s1") == 0
+
+
+@pytest.mark.asyncio
+async def test_file_store_migrates_inline_chunk_lists(tmp_path):
+    session_dir = tmp_path / "legacy"
+    session_dir.mkdir()
+    (session_dir / "metadata.json").write_text(
+        json.dumps({"session_id": "legacy", "uploaded_chunks": [0, 2]}), encoding="utf-8"
+    )
+    store = FileUploadSessionStore(tmp_path)
+
+    assert await store.load("legacy") == {"session_id": "legacy"}
+    assert await store.received_chunks("legacy", 3) == {0, 2}
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_sessions_through_redis(tmp_path, stub_job_queue):
+    server = fredis.FakeServer()
+    client = fredis.FakeRedis(server=server, decode_responses=True)
+    bitmap_client = fredis.FakeRedis(server=server, decode_responses=False)
+    replicas = []
+    for _ in range(2):
+        replica = ChunkedUploadService()
+        replica.chunk_size = 4
+        replica.uploads_dir = tmp_path / "uploads"
+        replica.sessions_dir = replica.uploads_dir / "sessions"
+        replica.session_store = RedisUploadSessionStore(client, bitmap_client)
+        replicas.append(replica)
+    first, second = replicas
+    payload = b"abcdefghij"
+
+    try:
+        init = await first.initialize_upload(user_id="u1", filename="clip.wav", file_size=len(payload))
+        session_id = init["session_id"]
+
+        await first.upload_chunk(session_id, 0, payload[0:4], "u1")
+        await second.upload_chunk(session_id, 2, payload[8:10], "u1")
+        status = await second.get_upload_status(session_id, "u1")
+        assert status["uploaded_chunks"] == 2
+        assert status["missing_chunks"] == [1]
+
+        duplicate = await second.upload_chunk(session_id, 0, payload[0:4], "u1")
+        assert duplicate["status"] == "already_uploaded"
+
+        await first.upload_chunk(session_id, 1, payload[4:8], "u1")
+        result = await second.finalize_upload(session_id, "u1")
+
+        assert result["status"] == "completed"
+        assert result["file_hash"] == hashlib.sha256(payload).hexdigest()
+        assert (await first._load_session(session_id)).status.value == "completed"
+    finally:
+        for replica in replicas:
+            replica.cleanup()
+        await client.close()
+        await bitmap_client.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_requires_a_shared_sessions_dir(tmp_path, monkeypatch):
+    server = fredis.FakeServer()
+    monkeypatch.setenv("UPLOAD_SESSION_STORE", "redis")
+    monkeypatch.setattr(
+        "redis.asyncio.from_url",
+        lambda url, **kwargs: fredis.FakeRedis(server=server, decode_responses=kwargs["decode_responses"]),
+    )
+    shared, local = tmp_path / "shared", tmp_path / "local"
+    stores = []
+    try:
+        for sessions_dir in (shared, shared, local):
+            stores.append(await create_upload_session_store(sessions_dir))
+
+        assert [store.backend for store in stores] == ["redis", "redis", "file"]
+    finally:
+        for store in stores:
+            await store.close()
+
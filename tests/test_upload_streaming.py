@@ -0,0 +1,48 @@
+"""Tests for streaming uploads to disk with incremental size enforcement."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from api.utils.upload_streaming import UploadTooLargeError, stream_upload_to_path
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_writes_file_and_hash(tmp_path) -> None:
+    payload = b"abc123" * 5000
+    upload = UploadFile(filename="clip.wav", file=io.BytesIO(payload))
+    destination = tmp_path / "nested" / "clip.wav"
+
+    stored = await stream_upload_to_path(upload, destination, max_bytes=len(payload), chunk_size=4096)
+
+    assert destination.read_bytes() == payload
+    assert stored.size == len(payload)
+    assert stored.sha256 == hashlib.sha256(payload).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_aborts_when_limit_exceeded(tmp_path) -> None:
+    upload = UploadFile(filename="big.wav", file=io.BytesIO(b"x" * 10_000))
+    destination = tmp_path / "big.wav"
+
+    with pytest.raises(UploadTooLargeError):
+        await stream_upload_to_path(upload, destination, max_bytes=4096, chunk_size=1024)
+
+    assert not destination.exists()
+    # Only the bytes up to the first over-limit chunk were consumed.
+    assert upload.file.tell() <= 4096 + 1024
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_rejects_declared_oversize(tmp_path) -> None:
+    upload = UploadFile(filename="big.wav", file=io.BytesIO(b"x" * 10), size=10_000)
+    destination = tmp_path / "declared.wav"
+
+    with pytest.raises(UploadTooLargeError):
+        await stream_upload_to_path(upload, destination, max_bytes=100)
+
+    assert not destination.exists()
@@ -0,0 +1,88 @@
+"""Tests for per-connection WebSocket send queues and broadcast fan-out."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from api.services.enhanced_websocket_service import WebSocketConnectionPool
+
+
+class _Socket:
+    """WebSocket stand-in whose sends block until ``release`` is set."""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.close_code = None
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def send_text(self, text: str) -> None:
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.close_code = code
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_does_not_delay_others_and_job_updates_coalesce() -> None:
+    pool = WebSocketConnectionPool(send_queue_size=8)
+    fast, slow = _Socket(), _Socket(blocked=True)
+    await pool.add_connection(fast, "fast", job_id="job-1")
+    await pool.add_connection(slow, "slow", job_id="job-1")
+
+    for progress in range(5):
+        assert await pool.broadcast_to_job(
+            "job-1", {"type": "job_update", "job_id": "job-1", "progress": progress}
+        ) == 2
+        await _settle()
+
+    assert [m["progress"] for m in fast.sent] == list(range(5))
+    assert slow.sent == [] and pool.queued_messages() == 1
+
+    slow.release.set()
+    await _settle()
+    # The client that fell behind skips the updates superseded while it was blocked
+    assert [m["progress"] for m in slow.sent] == [0, 4]
+    assert pool.metrics.messages_dropped == 3
+    assert pool.metrics.messages_sent == 7
+    await pool.remove_connection("fast")
+    await pool.remove_connection("slow")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, results, delivered",
+    [("drop_oldest", [1, 1, 1, 1], [0, 2, 3]), ("disconnect", [1, 1, 1, 0], [])],
+)
+async def test_full_queue_drops_oldest_or_disconnects(policy, results, delivered) -> None:
+    pool = WebSocketConnectionPool(send_queue_size=2, slow_consumer_policy=policy)
+    socket = _Socket(blocked=True)
+    await pool.add_connection(socket, "conn")
+
+    # The first message is taken by the writer and blocks in send_text
+    queued = []
+    for n in range(4):
+        queued.append(await pool.broadcast_to_all({"type": "notice", "n": n}))
+        await _settle()
+    socket.release.set()
+    await _settle()
+
+    assert queued == results
+    assert [m["n"] for m in socket.sent] == delivered
+    if policy == "disconnect":
+        assert "conn" not in pool.connections
+        assert pool.metrics.forced_disconnects == 1
+        assert socket.close_code == 1013
+    else:
+        assert pool.metrics.messages_dropped == 1
+        await pool.remove_connection("conn")